@@ -7,7 +7,7 @@ import logging
 from pathlib import Path
 from dotenv import load_dotenv
 from sqlalchemy import event
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, make_url
 import sqlite3
 from sqlalchemy.exc import SQLAlchemyError
 from flask_migrate import Migrate
@@ -15,12 +15,14 @@ from flask_migrate import Migrate
 # Load environment variables from project root .env file
 _project_root = Path(__file__).parent.parent
 _env_file = _project_root / '.env'
-load_dotenv(dotenv_path=_env_file, override=True)
+# (tests set their own environment before importing the app, so it is not overridden)
+load_dotenv(dotenv_path=_env_file, override=os.getenv('TESTING') != 'true')
 
 from flask import Flask
 from flask_cors import CORS
 from models import db
 from config import Config
+from services.db_writer import init_db_writer
 from controllers.material_controller import material_bp, material_global_bp
 from controllers.reference_file_controller import reference_file_bp
 from controllers.settings_controller import settings_bp
@@ -43,7 +45,7 @@ def set_sqlite_pragma(dbapi_conn, connection_record):
     try:
         cursor.execute("PRAGMA journal_mode=WAL")
         cursor.execute("PRAGMA synchronous=NORMAL")
-        cursor.execute("PRAGMA busy_timeout=30000")  # 30 seconds timeout
+        cursor.execute(f"PRAGMA busy_timeout={Config.SQLITE_BUSY_TIMEOUT * 1000}")
     finally:
         cursor.close()
 
@@ -55,13 +57,11 @@ def create_app():
     # Load configuration from Config class
     app.config.from_object(Config)
     
-    # Override with environment-specific paths (use absolute path)
+    # Database: honor DATABASE_URL (defaults to backend/instance/database.db)
     backend_dir = os.path.dirname(os.path.abspath(__file__))
-    instance_dir = os.path.join(backend_dir, 'instance')
-    os.makedirs(instance_dir, exist_ok=True)
-    
-    db_path = os.path.join(instance_dir, 'database.db')
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    database_url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if database_url.get_backend_name() == 'sqlite' and database_url.database not in (None, '', ':memory:'):
+        os.makedirs(os.path.dirname(os.path.abspath(database_url.database)), exist_ok=True)
     
     # Ensure upload folder exists
     project_root = os.path.dirname(backend_dir)
@@ -97,6 +97,8 @@ def create_app():
     CORS(app, origins=cors_origins)
     # Database migrations (Alembic via Flask-Migrate)
     Migrate(app, db)
+    # Optional single writer thread for SQLite (SQLITE_SINGLE_WRITER)
+    init_db_writer(app)
     
     # Register blueprints
     app.register_blueprint(project_bp)
@@ -117,7 +119,12 @@ def create_app():
     # Health check endpoint
     @app.route('/health')
     def health_check():
-        return {'status': 'ok', 'message': 'Banana Slides API is running'}
+        from services.ai_providers.fallback import get_provider_health
+        return {
+            'status': 'ok',
+            'message': 'Banana Slides API is running',
+            'providers': get_provider_health()
+        }
     
     # Output language endpoint
     @app.route('/api/output-language', methods=['GET'])
@@ -219,7 +226,7 @@ if __name__ == '__main__':
         f"Environment: {os.getenv('FLASK_ENV', 'development')}\n"
         f"Debug mode: {debug}\n"
         f"API Base URL: http://localhost:{port}/api\n"
-        f"Database: {app.config['SQLALCHEMY_DATABASE_URI']}\n"
+        f"Database: {make_url(app.config['SQLALCHEMY_DATABASE_URI']).render_as_string(hide_password=True)}\n"
         f"Uploads: {app.config['UPLOAD_FOLDER']}"
     )
     
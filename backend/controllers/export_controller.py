@@ -4,20 +4,145 @@ Export Controller - handles file export endpoints
 import logging
 import os
 import io
+import uuid
 
 from flask import Blueprint, request, current_app
-from models import db, Project, Page, Task
+from models import db, Project, Page, Task, PageImageVersion
 from utils import (
     error_response, not_found, bad_request, success_response,
     parse_page_ids_from_query, parse_page_ids_from_body, get_filtered_pages
 )
-from services import ExportService, FileService
+from services import FileService
+from services.export_cache import export_artifact_cache
+from services.image_variant_service import ImageVariantService
 from services.ai_service_manager import get_ai_service
 
 logger = logging.getLogger(__name__)
 
 export_bp = Blueprint('export', __name__, url_prefix='/api/projects')
 
+# Upper bound for the PDF export dpi query param
+MAX_EXPORT_PDF_DPI = 1200
+
+
+def _start_image_export(project_id, pages, export_format, filename, options=None):
+    """
+    Return a cached artifact, join an identical in-flight build, or start a new export task.
+    
+    Returns:
+        Flask response: 200 with download URL on cache hit, 202 with task_id otherwise
+    """
+    from services.task_manager import task_manager, export_images_task
+    
+    file_service = FileService(current_app.config['UPLOAD_FOLDER'])
+    
+    # Optionally export the pre-generated slide-sized variant instead of the master image
+    use_variants = current_app.config.get('IMAGE_EXPORT_USE_VARIANTS', False)
+    variant_indexes = {}
+    if use_variants:
+        versions = PageImageVersion.query.filter(
+            PageImageVersion.page_id.in_([page.id for page in pages]),
+            PageImageVersion.is_current.is_(True)
+        ).all()
+        variant_indexes = {version.page_id: version.variants for version in versions}
+    
+    image_paths = []
+    for page in pages:
+        if page.generated_image_path:
+            abs_path = file_service.get_absolute_path(page.generated_image_path)
+            variant = ImageVariantService.pick_variant(variant_indexes.get(page.id), 'export')
+            if variant:
+                variant_path = file_service.get_absolute_path(variant['path'])
+                if os.path.exists(variant_path):
+                    abs_path = variant_path
+            image_paths.append(abs_path)
+    
+    if not image_paths:
+        return bad_request("No generated images found for project")
+    
+    options = dict(options or {})
+    if use_variants:
+        options['use_variants'] = True
+    
+    exports_dir = file_service._get_exports_dir(project_id)
+    output_path = os.path.join(exports_dir, filename)
+    download_path = f"/files/{project_id}/exports/{filename}"
+    
+    cache_key = export_artifact_cache.build_key(
+        export_format=export_format,
+        filename=filename,
+        pages=[page for page in pages if page.generated_image_path],
+        image_paths=image_paths,
+        options=options
+    )
+    
+    task_id = str(uuid.uuid4())
+    with export_artifact_cache.lock:
+        # Repeat request with unchanged pages: return the existing file
+        if export_artifact_cache.lookup(output_path, cache_key):
+            logger.info(f"Export cache hit for project {project_id}: {filename}")
+            base_url = request.url_root.rstrip("/")
+            return success_response(
+                data={
+                    "download_url": download_path,
+                    "download_url_absolute": f"{base_url}{download_path}",
+                    "cached": True,
+                },
+                message=f"Export {export_format.upper()} ready"
+            )
+        
+        # Identical build already registered: share its task. The entry stays until
+        # export_images_task (or the failure path below) releases it, so a request
+        # arriving before the task is committed and submitted still joins it.
+        inflight_task_id = export_artifact_cache.get_inflight(cache_key)
+        if inflight_task_id:
+            logger.info(f"Joining in-flight export task {inflight_task_id} for project {project_id}")
+            return success_response(
+                data={"task_id": inflight_task_id, "cached": False},
+                message=f"Export {export_format.upper()} task already running",
+                status_code=202
+            )
+        
+        export_artifact_cache.register_inflight(cache_key, task_id)
+    
+    # Commit outside the process-wide cache lock so a slow database doesn't stall other exports
+    try:
+        task = Task(
+            id=task_id,
+            project_id=project_id,
+            task_type=f'EXPORT_{export_format.upper()}',
+            status='PENDING'
+        )
+        task.set_progress({"total": len(image_paths), "completed": 0, "failed": 0})
+        db.session.add(task)
+        db.session.commit()
+        
+        app = current_app._get_current_object()
+        task_manager.submit_task(
+            task.id,
+            export_images_task,
+            project_id=project_id,
+            export_format=export_format,
+            image_paths=image_paths,
+            output_path=output_path,
+            filename=filename,
+            cache_key=cache_key,
+            options=options,
+            app=app
+        )
+    except Exception:
+        # Nothing will run for this registration, so let the next request build it
+        export_artifact_cache.release_inflight(cache_key, task_id)
+        raise
+    
+    logger.info(f"Submitted {export_format} export task {task.id} for project {project_id}")
+    
+    return success_response(
+        data={"task_id": task.id, "cached": False},
+        message=f"Export {export_format.upper()} task created",
+        status_code=202
+    )
+
 
 @export_bp.route('/<project_id>/export/pptx', methods=['GET'])
 def export_pptx(project_id):
@@ -29,14 +154,19 @@ def export_pptx(project_id):
         - page_ids: optional comma-separated page IDs to export (if not provided, exports all pages)
     
     Returns:
-        JSON with download URL, e.g.
+        If an identical export (same pages, image versions and options) already exists, 200 with
+        the download URL, e.g.
         {
             "success": true,
             "data": {
                 "download_url": "/files/{project_id}/exports/xxx.pptx",
-                "download_url_absolute": "http://host:port/files/{project_id}/exports/xxx.pptx"
+                "download_url_absolute": "http://host:port/files/{project_id}/exports/xxx.pptx",
+                "cached": true
             }
         }
+        Otherwise 202 with {"task_id": "...", "cached": false}; identical concurrent requests share
+        one task. Poll /api/projects/{project_id}/tasks/{task_id}, the download URL is in
+        progress.download_url once COMPLETED.
     """
     try:
         project = Project.query.get(project_id)
@@ -54,44 +184,12 @@ def export_pptx(project_id):
         if not pages:
             return bad_request("No pages found for project")
         
-        # Get image paths
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        
-        image_paths = []
-        for page in pages:
-            if page.generated_image_path:
-                abs_path = file_service.get_absolute_path(page.generated_image_path)
-                image_paths.append(abs_path)
-        
-        if not image_paths:
-            return bad_request("No generated images found for project")
-        
-        # Determine export directory and filename
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        exports_dir = file_service._get_exports_dir(project_id)
-        
         # Get filename from query params or use default
         filename = request.args.get('filename', f'presentation_{project_id}.pptx')
         if not filename.endswith('.pptx'):
             filename += '.pptx'
-
-        output_path = os.path.join(exports_dir, filename)
-
-        # Generate PPTX file on disk
-        ExportService.create_pptx_from_images(image_paths, output_file=output_path)
-
-        # Build download URLs
-        download_path = f"/files/{project_id}/exports/{filename}"
-        base_url = request.url_root.rstrip("/")
-        download_url_absolute = f"{base_url}{download_path}"
-
-        return success_response(
-            data={
-                "download_url": download_path,
-                "download_url_absolute": download_url_absolute,
-            },
-            message="Export PPTX task created"
-        )
+        
+        return _start_image_export(project_id, pages, 'pptx', filename)
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -105,16 +203,13 @@ def export_pdf(project_id):
     Query params:
         - filename: optional custom filename
         - page_ids: optional comma-separated page IDs to export (if not provided, exports all pages)
+        - dpi: optional target DPI 0-1200, pages above it are down-sampled, 0 keeps the
+          original resolution (default: EXPORT_PDF_DPI)
+        - jpeg_quality: optional JPEG quality 1-95 for re-encoding pages (default: EXPORT_PDF_JPEG_QUALITY)
     
     Returns:
-        JSON with download URL, e.g.
-        {
-            "success": true,
-            "data": {
-                "download_url": "/files/{project_id}/exports/xxx.pdf",
-                "download_url_absolute": "http://host:port/files/{project_id}/exports/xxx.pdf"
-            }
-        }
+        Same contract as the PPTX export: 200 with the download URL on cache hit,
+        otherwise 202 with a task_id to poll.
     """
     try:
         project = Project.query.get(project_id)
@@ -129,42 +224,29 @@ def export_pdf(project_id):
         if not pages:
             return bad_request("No pages found for project")
         
-        # Get image paths
-        file_service = FileService(current_app.config['UPLOAD_FOLDER'])
-        
-        image_paths = []
-        for page in pages:
-            if page.generated_image_path:
-                abs_path = file_service.get_absolute_path(page.generated_image_path)
-                image_paths.append(abs_path)
-        
-        if not image_paths:
-            return bad_request("No generated images found for project")
-        
-        # Determine export directory and filename
-        exports_dir = file_service._get_exports_dir(project_id)
-
         # Get filename from query params or use default
         filename = request.args.get('filename', f'presentation_{project_id}.pdf')
         if not filename.endswith('.pdf'):
             filename += '.pdf'
-
-        output_path = os.path.join(exports_dir, filename)
-
-        # Generate PDF file on disk
-        ExportService.create_pdf_from_images(image_paths, output_file=output_path)
-
-        # Build download URLs
-        download_path = f"/files/{project_id}/exports/{filename}"
-        base_url = request.url_root.rstrip("/")
-        download_url_absolute = f"{base_url}{download_path}"
-
-        return success_response(
-            data={
-                "download_url": download_path,
-                "download_url_absolute": download_url_absolute,
-            },
-            message="Export PDF task created"
+        
+        # Optional down-sampling / re-encoding (query params override config, dpi=0 keeps original resolution)
+        dpi = request.args.get('dpi')
+        jpeg_quality = request.args.get('jpeg_quality')
+        try:
+            dpi = current_app.config.get('EXPORT_PDF_DPI') if dpi is None else int(dpi)
+            jpeg_quality = (current_app.config.get('EXPORT_PDF_JPEG_QUALITY') if jpeg_quality is None
+                            else int(jpeg_quality))
+        except ValueError:
+            return bad_request("dpi and jpeg_quality must be integers")
+        if dpi is not None and not 0 <= dpi <= MAX_EXPORT_PDF_DPI:
+            return bad_request(f"dpi must be between 0 and {MAX_EXPORT_PDF_DPI}")
+        if jpeg_quality is not None and not 1 <= jpeg_quality <= 95:
+            return bad_request("jpeg_quality must be between 1 and 95")
+        dpi = dpi or None
+        
+        return _start_image_export(
+            project_id, pages, 'pdf', filename,
+            options={"dpi": dpi, "jpeg_quality": jpeg_quality}
         )
     
     except Exception as e:
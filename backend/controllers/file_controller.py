@@ -1,15 +1,109 @@
 """
 File Controller - handles static file serving
 """
-from flask import Blueprint, send_from_directory, current_app
+from flask import Blueprint, send_file, current_app, request
 from utils import error_response, not_found
 from utils.path_utils import find_file_with_prefix
+from services.thumbnail_service import ThumbnailService
+from services.export_cache import ExportArtifactCache
+import mimetypes
 import os
+import re
 from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 
 file_bp = Blueprint('files', __name__, url_prefix='/files')
 
+# File types / extensions that can be served as resized thumbnails (?w=<width>)
+THUMBNAIL_FILE_TYPES = {'template', 'pages', 'materials'}
+THUMBNAIL_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp'}
+
+# Files that are never rewritten under the same name: versioned and timestamped page
+# images (<page>_v<N>.png, <page>_<ms>.png) with their derived variants, and timestamped materials.
+# Only these file types are checked; exports, templates and user templates keep
+# user-chosen or fixed names that are rebuilt in place.
+IMMUTABLE_FILE_TYPES = {'pages', 'materials'}
+IMMUTABLE_FILENAME_RE = re.compile(r'((_v\d+|_\d{13})(__w\d+)?|^material_\d+)\.\w+$')
+IMMUTABLE_MAX_AGE = 31536000
+
+
+def _is_immutable(file_type: str, filename: str) -> bool:
+    """Whether the file identifies content that never changes"""
+    return file_type in IMMUTABLE_FILE_TYPES and IMMUTABLE_FILENAME_RE.search(filename) is not None
+
+
+def _accel_redirect_uri(file_path: str) -> Optional[str]:
+    """
+    Internal nginx URI for file_path, or None if the transfer should stay in Python
+
+    Offloading requires FILE_ACCEL_REDIRECT_PREFIX to be configured and the request
+    to come through a proxy announcing ``X-Sendfile-Type: X-Accel-Redirect``, so
+    direct requests to the backend keep working.
+    """
+    prefix = current_app.config.get('FILE_ACCEL_REDIRECT_PREFIX')
+    if not prefix or request.headers.get('X-Sendfile-Type') != 'X-Accel-Redirect':
+        return None
+    relative_path = os.path.relpath(file_path, os.path.abspath(current_app.config['UPLOAD_FOLDER']))
+    if relative_path.startswith('..'):
+        return None
+    return f"{prefix.rstrip('/')}/{quote(Path(relative_path).as_posix())}"
+
+
+def _send_upload(directory: str, filename: str, immutable: bool = False,
+                 mimetype: Optional[str] = None):
+    """
+    Send an uploaded file with HTTP caching
+
+    Responses carry ETag and Last-Modified so repeat requests can be answered
+    with 304. Immutable files are cached for a year without revalidation; all
+    other files are revalidated on every use (``Cache-Control: no-cache``).
+    Behind nginx the transfer itself is handed off via X-Accel-Redirect.
+    """
+    file_path = safe_join(directory, filename)
+    if file_path is None or not os.path.isfile(file_path):
+        return not_found('File')
+
+    accel_uri = _accel_redirect_uri(os.path.abspath(file_path))
+    if accel_uri:
+        # nginx serves the body and answers conditional/range requests itself
+        response = current_app.response_class(
+            mimetype=mimetype or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        )
+        response.headers['X-Accel-Redirect'] = accel_uri
+    else:
+        response = send_file(file_path, mimetype=mimetype, conditional=True)
+
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def _serve_thumbnail(file_path: str, file_type: str, width: int):
+    """
+    Serve a cached, resized copy of an image file
+
+    Versioned URLs (``?v=<timestamp>``) and immutable sources are cached by the
+    browser as immutable; others are revalidated via ETag/Last-Modified.
+    """
+    service = ThumbnailService(
+        current_app.config['UPLOAD_FOLDER'],
+        quality=current_app.config.get('THUMBNAIL_QUALITY', 75)
+    )
+    thumbnail_path = service.get_thumbnail(file_path, width)
+    return _send_upload(
+        os.path.dirname(thumbnail_path),
+        os.path.basename(thumbnail_path),
+        immutable='v' in request.args or _is_immutable(file_type, os.path.basename(file_path)),
+        mimetype=service.mimetype
+    )
+
 
 @file_bp.route('/<project_id>/<file_type>/<filename>', methods=['GET'])
 def serve_file(project_id, file_type, filename):
@@ -18,12 +112,18 @@ def serve_file(project_id, file_type, filename):
     
     Args:
         project_id: Project UUID
-        file_type: 'template' or 'pages'
+        file_type: 'template', 'pages', 'materials' or 'exports'
         filename: File name
+
+    Query params:
+        w: Optional width in pixels; image files are served as a cached thumbnail
     """
     try:
         if file_type not in ['template', 'pages', 'materials', 'exports']:
             return not_found('File')
+        # Export cache key sidecars and in-progress builds are internal
+        if file_type == 'exports' and filename.endswith((ExportArtifactCache.KEY_SUFFIX, ExportArtifactCache.TMP_SUFFIX)):
+            return not_found('File')
         
         # Construct file path
         file_dir = os.path.join(
@@ -32,17 +132,16 @@ def serve_file(project_id, file_type, filename):
             file_type
         )
         
-        # Check if directory exists
-        if not os.path.exists(file_dir):
-            return not_found('File')
-        
-        # Check if file exists
-        file_path = os.path.join(file_dir, filename)
-        if not os.path.exists(file_path):
-            return not_found('File')
+        # Serve resized thumbnail if requested
+        width = request.args.get('w', type=int)
+        if (width and width > 0 and file_type in THUMBNAIL_FILE_TYPES
+                and os.path.splitext(filename)[1].lower() in THUMBNAIL_EXTENSIONS):
+            file_path = safe_join(file_dir, filename)
+            if file_path is None or not os.path.isfile(file_path):
+                return not_found('File')
+            return _serve_thumbnail(os.path.abspath(file_path), file_type, width)
         
-        # Serve file
-        return send_from_directory(file_dir, filename)
+        return _send_upload(file_dir, filename, immutable=_is_immutable(file_type, filename))
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -65,17 +164,7 @@ def serve_user_template(template_id, filename):
             template_id
         )
         
-        # Check if directory exists
-        if not os.path.exists(file_dir):
-            return not_found('File')
-        
-        # Check if file exists
-        file_path = os.path.join(file_dir, filename)
-        if not os.path.exists(file_path):
-            return not_found('File')
-        
-        # Serve file
-        return send_from_directory(file_dir, filename)
+        return _send_upload(file_dir, filename)
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -97,17 +186,7 @@ def serve_global_material(filename):
             'materials'
         )
         
-        # Check if directory exists
-        if not os.path.exists(file_dir):
-            return not_found('File')
-        
-        # Check if file exists
-        file_path = os.path.join(file_dir, safe_filename)
-        if not os.path.exists(file_path):
-            return not_found('File')
-        
-        # Serve file
-        return send_from_directory(file_dir, safe_filename)
+        return _send_upload(file_dir, safe_filename, immutable=_is_immutable('materials', safe_filename))
     
     except Exception as e:
         return error_response('SERVER_ERROR', str(e), 500)
@@ -154,7 +233,7 @@ def serve_mineru_file(extract_id, filepath):
             except Exception:
                 return error_response('INVALID_PATH', 'Invalid file path', 403)
             
-            return send_from_directory(str(matched_path.parent), matched_path.name)
+            return _send_upload(str(matched_path.parent), matched_path.name)
 
         return not_found('File')
     except Exception as e:
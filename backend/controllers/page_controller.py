@@ -4,7 +4,7 @@ Page Controller - handles page-related endpoints
 import logging
 from flask import Blueprint, request, current_app
 from models import db, Project, Page, PageImageVersion, Task
-from utils import success_response, error_response, not_found, bad_request
+from utils import success_response, error_response, not_found, bad_request, sse_event, stream_response
 from services import FileService, ProjectContext
 from services.ai_service_manager import get_ai_service
 from services.task_manager import task_manager, generate_single_page_image_task, edit_page_image_task
@@ -14,6 +14,7 @@ from werkzeug.utils import secure_filename
 import shutil
 import tempfile
 import json
+from textwrap import dedent
 
 logger = logging.getLogger(__name__)
 
@@ -54,17 +55,13 @@ def create_page(project_id):
         if 'outline_content' in data:
             page.set_outline_content(data['outline_content'])
         
-        db.session.add(page)
-        
-        # Update other pages' order_index if necessary
-        other_pages = Page.query.filter(
+        # Shift following pages with a single UPDATE before inserting the new page
+        Page.query.filter(
             Page.project_id == project_id,
             Page.order_index >= data['order_index']
-        ).all()
+        ).update({Page.order_index: Page.order_index + 1}, synchronize_session='fetch')
         
-        for p in other_pages:
-            if p.id != page.id:
-                p.order_index += 1
+        db.session.add(page)
         
         project.updated_at = datetime.utcnow()
         db.session.commit()
@@ -76,6 +73,44 @@ def create_page(project_id):
         return error_response('SERVER_ERROR', str(e), 500)
 
 
+@page_bp.route('/<project_id>/pages/order', methods=['PUT'])
+def update_pages_order(project_id):
+    """
+    PUT /api/projects/{project_id}/pages/order - Reorder all pages in one statement
+    
+    Request body:
+    {
+        "page_ids": ["page-uuid-1", "page-uuid-2", ...]  // every page of the project, in the new order
+    }
+    """
+    try:
+        project = Project.query.get(project_id)
+        
+        if not project:
+            return not_found('Project')
+        
+        data = request.get_json() or {}
+        page_ids = data.get('page_ids')
+        
+        if not isinstance(page_ids, list) or not all(isinstance(page_id, str) for page_id in page_ids):
+            return bad_request("page_ids must be a list of page IDs")
+        
+        existing_ids = {page_id for (page_id,) in db.session.query(Page.id).filter(Page.project_id == project_id)}
+        if len(page_ids) != len(existing_ids) or set(page_ids) != existing_ids:
+            return bad_request("page_ids must contain every page of the project exactly once")
+        
+        Page.reorder(project_id, page_ids)
+        project.updated_at = datetime.utcnow()
+        db.session.commit()
+        
+        return success_response({'page_ids': page_ids})
+    
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"update_pages_order failed: {str(e)}", exc_info=True)
+        return error_response('SERVER_ERROR', str(e), 500)
+
+
 @page_bp.route('/<project_id>/pages/<page_id>', methods=['DELETE'])
 def delete_page(project_id, page_id):
     """
@@ -195,7 +230,9 @@ def generate_page_description(project_id, page_id):
     
     Request body:
     {
-        "force_regenerate": false
+        "force_regenerate": false,
+        "stream": false  # if true, respond with text/event-stream:
+                         # "delta" events with text chunks, then "done" (or "error")
     }
     """
     try:
@@ -245,25 +282,15 @@ def generate_page_description(project_id, page_id):
         if page.part:
             page_data['part'] = page.part
         
-        desc_text = ai_service.generate_page_description(
-            project_context,
-            outline,
-            page_data,
-            page.order_index + 1,
-            language=language
-        )
-        
-        # Save description
-        desc_content = {
-            "text": desc_text,
-            "generated_at": datetime.utcnow().isoformat()
-        }
+        description_args = (project_context, outline, page_data, page.order_index + 1)
         
-        page.set_description_content(desc_content)
-        page.status = 'DESCRIPTION_GENERATED'
-        page.updated_at = datetime.utcnow()
+        if data.get('stream'):
+            return stream_response(_stream_description_events(
+                page, ai_service.stream_page_description(*description_args, language=language)
+            ))
         
-        db.session.commit()
+        desc_text = ai_service.generate_page_description(*description_args, language=language)
+        _save_generated_description(page, desc_text)
         
         return success_response(page.to_dict())
     
@@ -272,6 +299,40 @@ def generate_page_description(project_id, page_id):
         return error_response('AI_SERVICE_ERROR', str(e), 503)
 
 
+def _save_generated_description(page, desc_text: str):
+    """Store a generated description on the page and commit"""
+    page.set_description_content({
+        "text": desc_text,
+        "generated_at": datetime.utcnow().isoformat()
+    })
+    page.status = 'DESCRIPTION_GENERATED'
+    page.updated_at = datetime.utcnow()
+    
+    db.session.commit()
+
+
+def _stream_description_events(page, chunks):
+    """
+    SSE events for a streamed page description
+    
+    Emits a "delta" event per text chunk, then saves the full description and emits "done" (or "error").
+    """
+    try:
+        parts = []
+        for chunk in chunks:
+            if chunk:
+                parts.append(chunk)
+                yield sse_event('delta', {'text': chunk})
+        
+        _save_generated_description(page, dedent(''.join(parts)))
+        yield sse_event('done', page.to_dict())
+    
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"generate_page_description stream failed: {str(e)}", exc_info=True)
+        yield sse_event('error', {'code': 'AI_SERVICE_ERROR', 'message': str(e)})
+
+
 @page_bp.route('/<project_id>/pages/<page_id>/generate/image', methods=['POST'])
 def generate_page_image(project_id, page_id):
     """
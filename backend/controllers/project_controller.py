@@ -7,7 +7,7 @@ import traceback
 from datetime import datetime
 
 from flask import Blueprint, request, jsonify, current_app
-from sqlalchemy import desc
+from sqlalchemy import desc, func
 from sqlalchemy.orm import joinedload
 from werkzeug.exceptions import BadRequest
 
@@ -21,7 +21,7 @@ from services.task_manager import (
 )
 from utils import (
     success_response, error_response, not_found, bad_request,
-    parse_page_ids_from_body, get_filtered_pages
+    parse_page_ids_from_body, get_filtered_pages, sse_event, stream_response
 )
 
 logger = logging.getLogger(__name__)
@@ -37,7 +37,7 @@ def _get_project_reference_files_content(project_id: str) -> list:
         project_id: Project ID
         
     Returns:
-        List of dicts with 'filename' and 'content' keys
+        List of dicts with 'filename', 'content' and 'chunks' (retrieval chunks, may be None) keys
     """
     reference_files = ReferenceFile.query.filter_by(
         project_id=project_id,
@@ -49,7 +49,8 @@ def _get_project_reference_files_content(project_id: str) -> list:
         if ref_file.markdown_content:
             files_content.append({
                 'filename': ref_file.filename,
-                'content': ref_file.markdown_content
+                'content': ref_file.markdown_content,
+                'chunks': ref_file.content_chunks
             })
     
     return files_content
@@ -114,6 +115,224 @@ def _reconstruct_outline_from_pages(pages: list) -> list:
     return outline
 
 
+def _outline_page_content(page_data: dict) -> dict:
+    """Outline content stored on a page created from a flattened outline entry"""
+    return {
+        'title': page_data.get('title'),
+        'points': page_data.get('points', [])
+    }
+
+
+def _get_ordered_pages(project_id: str) -> list:
+    """Load the pages of a project ordered by order_index"""
+    return Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+
+
+def _save_outline_pages(project, pages_data: list) -> list:
+    """
+    Replace the project's pages with pages created from a flattened outline and commit
+    
+    Returns:
+        The new pages ordered by order_index
+    """
+    # Replace existing pages (bulk delete removes image versions explicitly)
+    Page.delete_for_project(project.id)
+    Page.bulk_create(project.id, [
+        {
+            'order_index': i,
+            'part': page_data.get('part'),
+            'status': 'DRAFT',
+            'outline_content': _outline_page_content(page_data),
+        }
+        for i, page_data in enumerate(pages_data)
+    ])
+    
+    # Update project status
+    project.status = 'OUTLINE_GENERATED'
+    project.updated_at = datetime.utcnow()
+    
+    db.session.commit()
+    
+    pages_list = _get_ordered_pages(project.id)
+    logger.info(f"大纲生成完成: 项目 {project.id}, 创建了 {len(pages_list)} 个页面")
+    return pages_list
+
+
+def _stream_outline_events(project, ai_service, outline_items):
+    """
+    SSE events for streamed outline generation
+    
+    Emits a "page" event for each page as soon as its outline item is complete,
+    then saves all pages and emits "done" (or "error").
+    """
+    try:
+        pages_data = []
+        for item in outline_items:
+            for page_data in ai_service.flatten_outline([item]):
+                yield sse_event('page', {
+                    'index': len(pages_data),
+                    'part': page_data.get('part'),
+                    'outline_content': _outline_page_content(page_data),
+                })
+                pages_data.append(page_data)
+        
+        pages_list = _save_outline_pages(project, pages_data)
+        yield sse_event('done', {'pages': [page.to_dict() for page in pages_list]})
+    
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"generate_outline stream failed: {str(e)}", exc_info=True)
+        yield sse_event('error', {'code': 'AI_SERVICE_ERROR', 'message': str(e)})
+
+
+def _description_count_error(expected: int, actual: int):
+    """Error message when the AI returned a different number of descriptions than pages (None if equal)"""
+    if actual == expected:
+        return None
+    logger.error(f"AI 返回的描述数量不匹配: 期望 {expected} 个页面，实际返回 {actual} 个描述。")
+    
+    # 如果 AI 试图增删页面，给出明确提示
+    if actual > expected:
+        return " 提示：如需增加页面，请在大纲页面进行操作。"
+    return " 提示：如需删除页面，请在大纲页面进行操作。"
+
+
+def _save_refined_descriptions(project, pages: list, refined_descriptions: list):
+    """Store refined descriptions on the pages (same order) and commit"""
+    generated_at = datetime.utcnow().isoformat()
+    for page, refined_desc in zip(pages, refined_descriptions):
+        page.set_description_content({
+            "text": refined_desc,
+            "generated_at": generated_at
+        })
+        page.status = 'DESCRIPTION_GENERATED'
+    
+    # Update project status
+    project.status = 'DESCRIPTIONS_GENERATED'
+    project.updated_at = datetime.utcnow()
+    
+    db.session.commit()
+    
+    logger.info(f"页面描述修改完成: 项目 {project.id}, 更新了 {len(pages)} 个页面")
+
+
+def _stream_refined_description_events(project, pages: list, descriptions):
+    """
+    SSE events for streamed description refinement
+    
+    Emits a "description" event for each page as soon as its text is complete,
+    then saves all descriptions and emits "done" (or "error").
+    """
+    try:
+        refined_descriptions = []
+        for description in descriptions:
+            index = len(refined_descriptions)
+            yield sse_event('description', {
+                'index': index,
+                'page_id': pages[index].id if index < len(pages) else None,
+                'text': description,
+            })
+            refined_descriptions.append(description)
+        
+        error_msg = _description_count_error(len(pages), len(refined_descriptions))
+        if error_msg is not None:
+            yield sse_event('error', {'code': 'INVALID_REQUEST', 'message': error_msg})
+            return
+        
+        _save_refined_descriptions(project, pages, refined_descriptions)
+        yield sse_event('done', {
+            'pages': [page.to_dict() for page in pages],
+            'message': '页面描述修改成功'
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"refine_descriptions stream failed: {str(e)}", exc_info=True)
+        yield sse_event('error', {'code': 'AI_SERVICE_ERROR', 'message': str(e)})
+
+
+def _build_project_summaries(projects):
+    """
+    Build lightweight page summaries for a list of projects with aggregate queries
+
+    Page JSON columns are not loaded, except the first page outline of projects
+    without an idea prompt (used as the display title).
+
+    Returns:
+        Dict mapping project_id to {page_count, status_counts, image_page_count,
+        description_page_count, first_page_title, first_page_image_url,
+        first_page_image_updated_at}
+    """
+    project_ids = [project.id for project in projects]
+    summaries = {
+        project_id: {
+            'page_count': 0,
+            'status_counts': {},
+            'image_page_count': 0,
+            'description_page_count': 0,
+            'first_page_title': None,
+            'first_page_image_url': None,
+            'first_page_image_updated_at': None,
+        }
+        for project_id in project_ids
+    }
+    if not project_ids:
+        return summaries
+
+    # Page counts and status histogram
+    rows = db.session.query(
+        Page.project_id,
+        Page.status,
+        func.count(Page.id),
+        func.count(Page.generated_image_path),
+        func.count(Page.description_content)
+    ).filter(Page.project_id.in_(project_ids)).group_by(Page.project_id, Page.status).all()
+    for project_id, status, page_count, image_count, description_count in rows:
+        summary = summaries[project_id]
+        summary['page_count'] += page_count
+        summary['status_counts'][status] = page_count
+        summary['image_page_count'] += image_count
+        summary['description_page_count'] += description_count
+
+    # First page with a generated image (thumbnail for the history list)
+    first_image = db.session.query(
+        Page.project_id,
+        func.min(Page.order_index).label('order_index')
+    ).filter(
+        Page.project_id.in_(project_ids),
+        Page.generated_image_path.isnot(None)
+    ).group_by(Page.project_id).subquery()
+    rows = db.session.query(Page.project_id, Page.generated_image_path, Page.updated_at).join(
+        first_image,
+        (Page.project_id == first_image.c.project_id) & (Page.order_index == first_image.c.order_index)
+    ).filter(Page.generated_image_path.isnot(None)).all()
+    for project_id, image_path, updated_at in rows:
+        summary = summaries[project_id]
+        if summary['first_page_image_url'] is None:
+            summary['first_page_image_url'] = f'/files/{project_id}/pages/{image_path.split("/")[-1]}'
+            summary['first_page_image_updated_at'] = updated_at.isoformat() if updated_at else None
+
+    # First page outline title, only for projects that have no idea prompt
+    untitled_ids = [project.id for project in projects if not project.idea_prompt]
+    if untitled_ids:
+        first_page = db.session.query(
+            Page.project_id,
+            func.min(Page.order_index).label('order_index')
+        ).filter(Page.project_id.in_(untitled_ids)).group_by(Page.project_id).subquery()
+        # Extract only the title inside the database instead of loading the whole outline
+        title = Page.outline_content['title'].as_string()
+        rows = db.session.query(Page.project_id, title).join(
+            first_page,
+            (Page.project_id == first_page.c.project_id) & (Page.order_index == first_page.c.order_index)
+        ).filter(Page.outline_content.isnot(None)).all()
+        for project_id, page_title in rows:
+            summary = summaries[project_id]
+            if summary['first_page_title'] is None and page_title:
+                summary['first_page_title'] = page_title
+
+    return summaries
+
+
 @project_bp.route('', methods=['GET'])
 def list_projects():
     """
@@ -122,11 +341,13 @@ def list_projects():
     Query params:
     - limit: number of projects to return (default: 50, max: 100)
     - offset: offset for pagination (default: 0)
+    - view: 'full' (default, includes pages) or 'summary' (page statistics only)
     """
     try:
         # Parameter validation
         limit = request.args.get('limit', 50, type=int)
         offset = request.args.get('offset', 0, type=int)
+        summary_view = request.args.get('view', 'full') == 'summary'
         
         # Enforce limits to prevent performance issues
         limit = min(max(1, limit), 100)  # Between 1-100
@@ -134,8 +355,10 @@ def list_projects():
         
         # Fetch limit + 1 items to check for more pages efficiently
         # This avoids a second database query
-        projects_with_extra = Project.query\
-            .options(joinedload(Project.pages))\
+        query = Project.query
+        if not summary_view:
+            query = query.options(joinedload(Project.pages))
+        projects_with_extra = query\
             .order_by(desc(Project.updated_at))\
             .limit(limit + 1)\
             .offset(offset)\
@@ -146,8 +369,18 @@ def list_projects():
         # Return only the requested limit
         projects = projects_with_extra[:limit]
         
+        if summary_view:
+            summaries = _build_project_summaries(projects)
+            project_dicts = []
+            for project in projects:
+                data = project.to_dict()
+                data['summary'] = summaries[project.id]
+                project_dicts.append(data)
+        else:
+            project_dicts = [project.to_dict(include_pages=True) for project in projects]
+        
         return success_response({
-            'projects': [project.to_dict(include_pages=True) for project in projects],
+            'projects': project_dicts,
             'has_more': has_more,
             'limit': limit,
             'offset': offset
@@ -284,20 +517,8 @@ def update_project(project_id):
         
         # Update page order if provided
         if 'pages_order' in data:
-            pages_order = data['pages_order']
-            # Optimization: batch query all pages to update, avoiding N+1 queries
-            pages_to_update = Page.query.filter(
-                Page.id.in_(pages_order),
-                Page.project_id == project_id
-            ).all()
-            
-            # Create page_id -> page mapping for O(1) lookup
-            pages_map = {page.id: page for page in pages_to_update}
-            
-            # Batch update order
-            for index, page_id in enumerate(pages_order):
-                if page_id in pages_map:
-                    pages_map[page_id].order_index = index
+            # Single UPDATE for all listed pages
+            Page.reorder(project_id, data['pages_order'])
         
         project.updated_at = datetime.utcnow()
         db.session.commit()
@@ -349,7 +570,10 @@ def generate_outline(project_id):
     Request body (optional):
     {
         "idea_prompt": "...",  # for idea type
-        "language": "zh"  # output language: zh, en, ja, auto
+        "language": "zh",  # output language: zh, en, ja, auto
+        "stream": false  # if true, respond with text/event-stream:
+                         # "page" event per page as soon as it is generated,
+                         # then "done" with the saved pages (or "error")
     }
     """
     try:
@@ -382,7 +606,7 @@ def generate_outline(project_id):
             
             # Create project context and parse outline text into structured format
             project_context = ProjectContext(project, reference_files_content)
-            outline = ai_service.parse_outline_text(project_context, language=language)
+            generate, stream = ai_service.parse_outline_text, ai_service.stream_parse_outline_text
         elif project.creation_type == 'descriptions':
             # 从描述生成：这个类型应该使用专门的端点
             return bad_request("Use /generate/from-description endpoint for descriptions type")
@@ -397,41 +621,15 @@ def generate_outline(project_id):
             
             # Create project context and generate outline from idea
             project_context = ProjectContext(project, reference_files_content)
-            outline = ai_service.generate_outline(project_context, language=language)
-        
-        # Flatten outline to pages
-        pages_data = ai_service.flatten_outline(outline)
-        
-        # Delete existing pages (using ORM session to trigger cascades)
-        # Note: Cannot use bulk delete as it bypasses ORM cascades for PageImageVersion
-        old_pages = Page.query.filter_by(project_id=project_id).all()
-        for old_page in old_pages:
-            db.session.delete(old_page)
-        
-        # Create pages from outline
-        pages_list = []
-        for i, page_data in enumerate(pages_data):
-            page = Page(
-                project_id=project_id,
-                order_index=i,
-                part=page_data.get('part'),
-                status='DRAFT'
-            )
-            page.set_outline_content({
-                'title': page_data.get('title'),
-                'points': page_data.get('points', [])
-            })
-            
-            db.session.add(page)
-            pages_list.append(page)
+            generate, stream = ai_service.generate_outline, ai_service.stream_outline
         
-        # Update project status
-        project.status = 'OUTLINE_GENERATED'
-        project.updated_at = datetime.utcnow()
+        if data.get('stream'):
+            return stream_response(_stream_outline_events(
+                project, ai_service, stream(project_context, language=language)
+            ))
         
-        db.session.commit()
-        
-        logger.info(f"大纲生成完成: 项目 {project_id}, 创建了 {len(pages_list)} 个页面")
+        outline = generate(project_context, language=language)
+        pages_list = _save_outline_pages(project, ai_service.flatten_outline(outline))
         
         # Return pages
         return success_response({
@@ -510,36 +708,24 @@ def generate_from_description(project_id):
             pages_data = pages_data[:min_count]
             page_descriptions = page_descriptions[:min_count]
         
-        # Step 4: Delete existing pages (using ORM session to trigger cascades)
-        old_pages = Page.query.filter_by(project_id=project_id).all()
-        for old_page in old_pages:
-            db.session.delete(old_page)
-        
-        # Step 5: Create pages with both outline and description
-        pages_list = []
-        for i, (page_data, page_desc) in enumerate(zip(pages_data, page_descriptions)):
-            page = Page(
-                project_id=project_id,
-                order_index=i,
-                part=page_data.get('part'),
-                status='DESCRIPTION_GENERATED'  # 直接设置为已生成描述
-            )
-            
-            # Set outline content
-            page.set_outline_content({
-                'title': page_data.get('title'),
-                'points': page_data.get('points', [])
-            })
-            
-            # Set description content
-            desc_content = {
-                "text": page_desc,
-                "generated_at": datetime.utcnow().isoformat()
+        # Step 4: Delete existing pages
+        Page.delete_for_project(project_id)
+        
+        # Step 5: Create pages with both outline and description (single bulk INSERT)
+        generated_at = datetime.utcnow().isoformat()
+        Page.bulk_create(project_id, [
+            {
+                'order_index': i,
+                'part': page_data.get('part'),
+                'status': 'DESCRIPTION_GENERATED',  # 直接设置为已生成描述
+                'outline_content': _outline_page_content(page_data),
+                'description_content': {
+                    "text": page_desc,
+                    "generated_at": generated_at
+                },
             }
-            page.set_description_content(desc_content)
-            
-            db.session.add(page)
-            pages_list.append(page)
+            for i, (page_data, page_desc) in enumerate(zip(pages_data, page_descriptions))
+        ])
         
         # Update project status
         project.status = 'DESCRIPTIONS_GENERATED'
@@ -547,6 +733,7 @@ def generate_from_description(project_id):
         
         db.session.commit()
         
+        pages_list = _get_ordered_pages(project_id)
         logger.info(f"从描述生成完成: 项目 {project_id}, 创建了 {len(pages_list)} 个页面，已填充大纲和描述")
         
         # Return pages
@@ -569,7 +756,8 @@ def generate_descriptions(project_id):
     Request body:
     {
         "max_workers": 5,
-        "language": "zh"  # output language: zh, en, ja, auto
+        "language": "zh",  # output language: zh, en, ja, auto
+        "batch_size": 1  # pages per request (default DESCRIPTION_BATCH_SIZE, at most MAX_DESCRIPTION_BATCH_SIZE)
     }
     """
     try:
@@ -597,6 +785,19 @@ def generate_descriptions(project_id):
         # 从配置中读取默认并发数，如果请求中提供了则使用请求的值
         max_workers = data.get('max_workers', current_app.config.get('MAX_DESCRIPTION_WORKERS', 5))
         language = data.get('language', current_app.config.get('OUTPUT_LANGUAGE', 'zh'))
+        batch_size = data.get('batch_size', current_app.config.get('DESCRIPTION_BATCH_SIZE', 1))
+        # 在提交后台任务前校验，避免任务启动后才因类型错误失败
+        try:
+            if isinstance(batch_size, bool) or (isinstance(batch_size, float) and not batch_size.is_integer()):
+                raise ValueError(batch_size)
+            batch_size = int(batch_size)
+        except (TypeError, ValueError):
+            return bad_request("batch_size must be a positive integer")
+        if batch_size < 1:
+            return bad_request("batch_size must be a positive integer")
+        max_batch_size = current_app.config.get('MAX_DESCRIPTION_BATCH_SIZE', 10)
+        if batch_size > max_batch_size:
+            return bad_request(f"batch_size must not exceed {max_batch_size}")
         
         # Create task
         task = Task(
@@ -633,7 +834,8 @@ def generate_descriptions(project_id):
             outline,
             max_workers,
             app,
-            language
+            language,
+            batch_size
         )
         
         # Update project status
@@ -860,55 +1062,45 @@ def refine_outline(project_id):
                 if old_page.status in ['DESCRIPTION_GENERATED', 'IMAGE_GENERATED']:
                     old_status_map[title] = old_page.status
         
-        # Delete existing pages (using ORM session to trigger cascades)
-        for old_page in old_pages:
-            db.session.delete(old_page)
+        # Delete existing pages
+        Page.delete_for_project(project_id)
         
         # Create pages from refined outline
-        pages_list = []
-        has_descriptions = False
+        page_rows = []
         preserved_count = 0
         new_count = 0
         
         for i, page_data in enumerate(pages_data):
-            page = Page(
-                project_id=project_id,
-                order_index=i,
-                part=page_data.get('part'),
-                status='DRAFT'
-            )
-            page.set_outline_content({
-                'title': page_data.get('title'),
-                'points': page_data.get('points', [])
-            })
+            row = {
+                'order_index': i,
+                'part': page_data.get('part'),
+                'status': 'DRAFT',
+                'outline_content': _outline_page_content(page_data),
+                'description_content': None,
+            }
             
             # 尝试匹配并恢复已有的描述
             title = page_data.get('title')
             if title in descriptions_map:
-                # 恢复描述内容
-                page.description_content = descriptions_map[title]
-                # 恢复状态（如果有）
-                if title in old_status_map:
-                    page.status = old_status_map[title]
-                else:
-                    page.status = 'DESCRIPTION_GENERATED'
-                has_descriptions = True
+                # 恢复描述内容和状态（如果有）
+                row['description_content'] = descriptions_map[title]
+                row['status'] = old_status_map.get(title, 'DESCRIPTION_GENERATED')
                 preserved_count += 1
             else:
                 # 新页面或标题改变的页面，描述为空
                 # 这包括：新增的页面、合并的页面、标题改变的页面
-                page.status = 'DRAFT'
                 new_count += 1
             
-            db.session.add(page)
-            pages_list.append(page)
+            page_rows.append(row)
+        
+        Page.bulk_create(project_id, page_rows)
         
         logger.info(f"描述匹配完成: 保留了 {preserved_count} 个页面的描述, {new_count} 个页面需要重新生成描述")
         
         # Update project status
         # 如果所有页面都有描述，保持 DESCRIPTION_GENERATED 状态
         # 否则降级为 OUTLINE_GENERATED
-        if has_descriptions and all(p.description_content for p in pages_list):
+        if page_rows and new_count == 0:
             project.status = 'DESCRIPTIONS_GENERATED'
         else:
             project.status = 'OUTLINE_GENERATED'
@@ -916,6 +1108,7 @@ def refine_outline(project_id):
         
         db.session.commit()
         
+        pages_list = _get_ordered_pages(project_id)
         logger.info(f"大纲修改完成: 项目 {project_id}, 创建了 {len(pages_list)} 个页面")
         
         # Return pages
@@ -938,7 +1131,9 @@ def refine_descriptions(project_id):
     Request body:
     {
         "user_requirement": "用户要求，例如：让描述更详细一些",
-        "language": "zh"  # output language: zh, en, ja, auto
+        "language": "zh",  # output language: zh, en, ja, auto
+        "stream": false  # if true, respond with text/event-stream:
+                         # "description" event per page, then "done" (or "error")
     }
     """
     try:
@@ -1003,44 +1198,28 @@ def refine_descriptions(project_id):
         
         # Refine descriptions
         logger.info(f"开始修改页面描述: 项目 {project_id}, 用户要求: {user_requirement}, 历史要求数: {len(previous_requirements)}")
-        refined_descriptions = ai_service.refine_descriptions(
-            current_descriptions=current_descriptions,
-            user_requirement=user_requirement,
-            project_context=project_context,
-            outline=outline,
-            previous_requirements=previous_requirements,
-            language=language
-        )
+        refine_kwargs = {
+            'current_descriptions': current_descriptions,
+            'user_requirement': user_requirement,
+            'project_context': project_context,
+            'outline': outline,
+            'previous_requirements': previous_requirements,
+            'language': language,
+        }
+        
+        if data.get('stream'):
+            return stream_response(_stream_refined_description_events(
+                project, pages, ai_service.stream_refine_descriptions(**refine_kwargs)
+            ))
+        
+        refined_descriptions = ai_service.refine_descriptions(**refine_kwargs)
         
         # 验证返回的描述数量
-        if len(refined_descriptions) != len(pages):
-            error_msg = ""
-            logger.error(f"AI 返回的描述数量不匹配: 期望 {len(pages)} 个页面，实际返回 {len(refined_descriptions)} 个描述。")
-            
-            # 如果 AI 试图增删页面，给出明确提示
-            if len(refined_descriptions) > len(pages):
-                error_msg += " 提示：如需增加页面，请在大纲页面进行操作。"
-            elif len(refined_descriptions) < len(pages):
-                error_msg += " 提示：如需删除页面，请在大纲页面进行操作。"
-            
+        error_msg = _description_count_error(len(pages), len(refined_descriptions))
+        if error_msg is not None:
             return bad_request(error_msg)
         
-        # Update pages with refined descriptions
-        for page, refined_desc in zip(pages, refined_descriptions):
-            desc_content = {
-                "text": refined_desc,
-                "generated_at": datetime.utcnow().isoformat()
-            }
-            page.set_description_content(desc_content)
-            page.status = 'DESCRIPTION_GENERATED'
-        
-        # Update project status
-        project.status = 'DESCRIPTIONS_GENERATED'
-        project.updated_at = datetime.utcnow()
-        
-        db.session.commit()
-        
-        logger.info(f"页面描述修改完成: 项目 {project_id}, 更新了 {len(pages)} 个页面")
+        _save_refined_descriptions(project, pages, refined_descriptions)
         
         # Return pages
         return success_response({
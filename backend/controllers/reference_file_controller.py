@@ -16,6 +16,8 @@ import threading
 from models import db, ReferenceFile, Project
 from utils.response import success_response, error_response, bad_request, not_found
 from services.file_parser_service import FileParserService
+from services.reference_index import build_chunks
+from services.db_writer import run_write
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +37,15 @@ def _get_file_type(filename: str) -> str:
     return 'unknown'
 
 
+def _update_reference_file(file_id: str, **fields):
+    """Write operation: update reference file columns (committed via run_write)"""
+    reference_file = ReferenceFile.query.get(file_id)
+    if reference_file:
+        for name, value in fields.items():
+            setattr(reference_file, name, value)
+        reference_file.updated_at = datetime.utcnow()
+
+
 def _parse_file_async(file_id: str, file_path: str, filename: str, app):
     """
     Parse file asynchronously in background
@@ -53,8 +64,7 @@ def _parse_file_async(file_id: str, file_path: str, filename: str, app):
                 return
             
             # Update status to parsing
-            reference_file.parse_status = 'parsing'
-            db.session.commit()
+            run_write(_update_reference_file, file_id, parse_status='parsing')
             
             # Initialize parser service
             parser = FileParserService(
@@ -73,31 +83,27 @@ def _parse_file_async(file_id: str, file_path: str, filename: str, app):
             batch_id, markdown_content, extract_id, error_message, failed_image_count = parser.parse_file(file_path, filename)
             
             # Update database
-            reference_file.mineru_batch_id = batch_id
             if error_message:
-                reference_file.parse_status = 'failed'
-                reference_file.error_message = error_message
+                run_write(_update_reference_file, file_id, mineru_batch_id=batch_id,
+                          parse_status='failed', error_message=error_message)
                 logger.error(f"File parsing failed: {error_message}")
             else:
-                reference_file.parse_status = 'completed'
-                reference_file.markdown_content = markdown_content
+                # 解析完成时切分检索分块，生成页面描述时按相关度选取片段
+                content_chunks = build_chunks(markdown_content, current_app.config.get('REFERENCE_CHUNK_TOKENS', 400))
+                run_write(_update_reference_file, file_id, mineru_batch_id=batch_id,
+                          parse_status='completed', markdown_content=markdown_content,
+                          content_chunks=content_chunks)
                 if failed_image_count > 0:
                     logger.warning(f"File parsing completed: {filename}, but {failed_image_count} images failed to generate captions")
                 else:
                     logger.info(f"File parsing completed: {filename}")
             
-            reference_file.updated_at = datetime.utcnow()
-            db.session.commit()
-            
         except Exception as e:
             logger.error(f"Error in async file parsing: {str(e)}", exc_info=True)
             try:
-                reference_file = ReferenceFile.query.get(file_id)
-                if reference_file:
-                    reference_file.parse_status = 'failed'
-                    reference_file.error_message = f"Parsing error: {str(e)}"
-                    reference_file.updated_at = datetime.utcnow()
-                    db.session.commit()
+                db.session.rollback()
+                run_write(_update_reference_file, file_id, parse_status='failed',
+                          error_message=f"Parsing error: {str(e)}")
             except Exception as db_error:
                 logger.error(f"Failed to update error status: {str(db_error)}")
 
@@ -331,6 +337,7 @@ def trigger_file_parse(file_id):
             reference_file.error_message = None
             # 清空之前的解析结果，以便重新解析
             reference_file.markdown_content = None
+            reference_file.content_chunks = None
             reference_file.mineru_batch_id = None
             db.session.commit()
         
@@ -57,6 +57,8 @@ def run_migrations_online() -> None:
             connection=connection,
             target_metadata=target_metadata,
             compare_type=True,
+            # SQLite cannot ALTER most column properties in place
+            render_as_batch=connection.dialect.name == 'sqlite',
         )
 
         with context.begin_transaction():
@@ -0,0 +1,42 @@
+"""add image variants index to page_image_versions
+
+Revision ID: 007_add_image_variants
+Revises: 006_add_export_settings
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '007_add_image_variants'
+down_revision = '006_add_export_settings'
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    """Check if a column exists in a table"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade() -> None:
+    """
+    Add variants column to page_image_versions.
+    - variants: JSON index of derived web/export images generated from the master image
+    """
+    if not _column_exists('page_image_versions', 'variants'):
+        op.add_column('page_image_versions', sa.Column('variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """
+    Remove variants column from page_image_versions.
+    """
+    if _column_exists('page_image_versions', 'variants'):
+        op.drop_column('page_image_versions', 'variants')
@@ -0,0 +1,71 @@
+"""add composite indexes for hot queries
+
+Revision ID: 008_add_composite_indexes
+Revises: 007_add_image_variants
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '008_add_composite_indexes'
+down_revision = '007_add_image_variants'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_pages_project_id_order_index', 'pages', ['project_id', 'order_index']),
+    ('ix_page_image_versions_page_id_version_number', 'page_image_versions', ['page_id', 'version_number']),
+    ('ix_page_image_versions_page_id_is_current', 'page_image_versions', ['page_id', 'is_current']),
+    ('ix_reference_files_project_id_parse_status', 'reference_files', ['project_id', 'parse_status']),
+    ('ix_materials_project_id_created_at', 'materials', ['project_id', 'created_at']),
+    ('ix_projects_updated_at', 'projects', ['updated_at']),
+]
+
+# Single-column indexes covered by a composite index above (index name, table, columns)
+REDUNDANT_INDEXES = [
+    ('ix_page_image_versions_page_id', 'page_image_versions', ['page_id']),
+]
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    """Check if an index exists on a table"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    indexes = [index['name'] for index in inspector.get_indexes(table_name)]
+    return index_name in indexes
+
+
+def upgrade() -> None:
+    """
+    Add composite indexes used by the hot queries:
+    - pages by project_id ordered by order_index
+    - page_image_versions by page_id (max version_number / is_current)
+    - reference_files by (project_id, parse_status)
+    - materials by project_id ordered by created_at
+    - projects ordered by updated_at
+
+    Drop single-column indexes that are a prefix of one of them.
+    """
+    for index_name, table_name, columns in INDEXES:
+        if not _index_exists(table_name, index_name):
+            op.create_index(index_name, table_name, columns, unique=False)
+    for index_name, table_name, _ in REDUNDANT_INDEXES:
+        if _index_exists(table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
+
+
+def downgrade() -> None:
+    """
+    Restore the single-column indexes and remove the composite indexes.
+    """
+    for index_name, table_name, columns in REDUNDANT_INDEXES:
+        if not _index_exists(table_name, index_name):
+            op.create_index(index_name, table_name, columns, unique=False)
+    for index_name, table_name, _ in reversed(INDEXES):
+        if _index_exists(table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
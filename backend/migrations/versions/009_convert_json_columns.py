@@ -0,0 +1,81 @@
+"""store page content and task progress in JSON columns
+
+Revision ID: 009_convert_json_columns
+Revises: 008_add_composite_indexes
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009_convert_json_columns'
+down_revision = '008_add_composite_indexes'
+branch_labels = None
+depends_on = None
+
+
+# (table, column)
+JSON_COLUMNS = [
+    ('pages', 'outline_content'),
+    ('pages', 'description_content'),
+    ('tasks', 'progress'),
+]
+
+
+def upgrade() -> None:
+    """
+    Convert JSON text columns to the JSON type.
+    Values that are not valid JSON are cleared first so the conversion cannot fail.
+    - SQLite: rebuild the table with the column typed as JSON (batch mode)
+    - PostgreSQL: cast existing text to json
+    - Others: alter the column type
+    """
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # Returns NULL instead of raising for text that does not parse as JSON
+        op.execute(sa.text(
+            "CREATE OR REPLACE FUNCTION pg_temp.try_json(value text) RETURNS json AS $$ "
+            "BEGIN RETURN value::json; EXCEPTION WHEN others THEN RETURN NULL; END; "
+            "$$ LANGUAGE plpgsql IMMUTABLE"
+        ))
+
+    for table_name, column_name in JSON_COLUMNS:
+        if bind.dialect.name == 'sqlite':
+            op.execute(sa.text(
+                f"UPDATE {table_name} SET {column_name} = NULL "
+                f"WHERE {column_name} IS NOT NULL AND json_valid({column_name}) = 0"
+            ))
+            with op.batch_alter_table(table_name) as batch_op:
+                batch_op.alter_column(column_name, type_=sa.JSON(), existing_type=sa.Text(),
+                                      existing_nullable=True)
+        elif bind.dialect.name == 'postgresql':
+            op.execute(sa.text(
+                f"UPDATE {table_name} SET {column_name} = NULL "
+                f"WHERE {column_name} IS NOT NULL AND pg_temp.try_json({column_name}) IS NULL"
+            ))
+            op.alter_column(table_name, column_name, type_=sa.JSON(), existing_type=sa.Text(),
+                            postgresql_using=f'{column_name}::json')
+        else:
+            op.alter_column(table_name, column_name, type_=sa.JSON(), existing_type=sa.Text())
+
+    if bind.dialect.name == 'postgresql':
+        op.execute(sa.text("DROP FUNCTION pg_temp.try_json(text)"))
+
+
+def downgrade() -> None:
+    """
+    Convert JSON columns back to text.
+    """
+    bind = op.get_bind()
+    for table_name, column_name in JSON_COLUMNS:
+        if bind.dialect.name == 'sqlite':
+            with op.batch_alter_table(table_name) as batch_op:
+                batch_op.alter_column(column_name, type_=sa.Text(), existing_type=sa.JSON(),
+                                      existing_nullable=True)
+        elif bind.dialect.name == 'postgresql':
+            op.alter_column(table_name, column_name, type_=sa.Text(), existing_type=sa.JSON(),
+                            postgresql_using=f'{column_name}::text')
+        else:
+            op.alter_column(table_name, column_name, type_=sa.Text(), existing_type=sa.JSON())
@@ -0,0 +1,43 @@
+"""add retrieval chunks to reference_files
+
+Revision ID: 010_add_reference_chunks
+Revises: 009_convert_json_columns
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = '010_add_reference_chunks'
+down_revision = '009_convert_json_columns'
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(table_name: str, column_name: str) -> bool:
+    """Check if a column exists in a table"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+
+def upgrade() -> None:
+    """
+    Add content_chunks column to reference_files.
+    - content_chunks: retrieval chunks (text + term frequencies) built from markdown_content
+      when parsing completes; existing rows are chunked on demand
+    """
+    if not _column_exists('reference_files', 'content_chunks'):
+        op.add_column('reference_files', sa.Column('content_chunks', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """
+    Remove content_chunks column from reference_files.
+    """
+    if _column_exists('reference_files', 'content_chunks'):
+        op.drop_column('reference_files', 'content_chunks')
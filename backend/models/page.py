@@ -1,9 +1,11 @@
 """
 Page model
 """
+import copy
 import uuid
-import json
 from datetime import datetime
+from sqlalchemy import case, delete, update
+from sqlalchemy.orm.attributes import flag_modified
 from . import db
 
 
@@ -12,13 +14,17 @@ class Page(db.Model):
     Page model - represents a single PPT page/slide
     """
     __tablename__ = 'pages'
+    __table_args__ = (
+        db.Index('ix_pages_project_id_order_index', 'project_id', 'order_index'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False)
     order_index = db.Column(db.Integer, nullable=False)
     part = db.Column(db.String(200), nullable=True)  # Optional section name
-    outline_content = db.Column(db.Text, nullable=True)  # JSON string
-    description_content = db.Column(db.Text, nullable=True)  # JSON string
+    # JSON 列：加载时解码一次，实例上缓存解码后的对象
+    outline_content = db.Column(db.JSON(none_as_null=True), nullable=True)
+    description_content = db.Column(db.JSON(none_as_null=True), nullable=True)
     generated_image_path = db.Column(db.String(500), nullable=True)
     status = db.Column(db.String(50), nullable=False, default='DRAFT')
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -30,46 +36,106 @@ class Page(db.Model):
                                      lazy='dynamic', cascade='all, delete-orphan',
                                      order_by='PageImageVersion.version_number.desc()')
     
+    def _set_json(self, key, data):
+        """Assign a JSON column (flags in-place modified objects as changed)"""
+        same_object = data is not None and data is getattr(self, key)
+        setattr(self, key, data if data else None)
+        if same_object:
+            flag_modified(self, key)
+    
     def get_outline_content(self):
-        """Parse outline_content from JSON string"""
-        if self.outline_content:
-            try:
-                return json.loads(self.outline_content)
-            except json.JSONDecodeError:
-                return None
-        return None
+        """Get decoded outline_content (a copy, so callers can modify it freely)"""
+        return copy.deepcopy(self.outline_content) or None
     
     def set_outline_content(self, data):
-        """Set outline_content as JSON string"""
-        if data:
-            self.outline_content = json.dumps(data, ensure_ascii=False)
-        else:
-            self.outline_content = None
+        """Set outline_content"""
+        self._set_json('outline_content', data)
     
     def get_description_content(self):
-        """Parse description_content from JSON string"""
-        if self.description_content:
-            try:
-                return json.loads(self.description_content)
-            except json.JSONDecodeError:
-                return None
-        return None
+        """Get decoded description_content (a copy, so callers can modify it freely)"""
+        return copy.deepcopy(self.description_content) or None
     
     def set_description_content(self, data):
-        """Set description_content as JSON string"""
-        if data:
-            self.description_content = json.dumps(data, ensure_ascii=False)
-        else:
-            self.description_content = None
+        """Set description_content"""
+        self._set_json('description_content', data)
+    
+    @classmethod
+    def bulk_create(cls, project_id, rows):
+        """
+        Insert pages for a project with a single executemany INSERT
+        
+        Args:
+            project_id: Project ID
+            rows: Page column dicts (order_index, part, status, outline_content, ...)
+        
+        Returns:
+            IDs of the new pages, in the order of rows
+        """
+        now = datetime.utcnow()
+        mappings = [
+            {
+                'id': str(uuid.uuid4()),
+                'project_id': project_id,
+                'status': 'DRAFT',
+                'created_at': now,
+                'updated_at': now,
+                **row,
+            }
+            for row in rows
+        ]
+        if mappings:
+            db.session.bulk_insert_mappings(cls, mappings)
+        return [mapping['id'] for mapping in mappings]
+    
+    @classmethod
+    def delete_for_project(cls, project_id):
+        """
+        Delete all pages of a project (and their image versions) with two DELETE statements
+        
+        Returns:
+            Number of deleted pages
+        """
+        from .page_image_version import PageImageVersion
+        page_ids = db.session.query(cls.id).filter(cls.project_id == project_id).scalar_subquery()
+        db.session.execute(
+            delete(PageImageVersion).where(PageImageVersion.page_id.in_(page_ids)),
+            execution_options={'synchronize_session': False}
+        )
+        result = db.session.execute(
+            delete(cls).where(cls.project_id == project_id),
+            execution_options={'synchronize_session': 'fetch'}
+        )
+        return result.rowcount
+    
+    @classmethod
+    def reorder(cls, project_id, page_ids):
+        """
+        Set order_index of the given pages to their position in page_ids with one UPDATE
+        
+        Pages of the project that are not listed keep their order_index.
+        
+        Returns:
+            Number of updated pages
+        """
+        if not page_ids:
+            return 0
+        positions = {page_id: index for index, page_id in enumerate(page_ids)}
+        result = db.session.execute(
+            update(cls)
+            .where(cls.project_id == project_id, cls.id.in_(list(positions)))
+            .values(order_index=case(positions, value=cls.id)),
+            execution_options={'synchronize_session': 'fetch'}
+        )
+        return result.rowcount
     
     def to_dict(self, include_versions=False):
-        """Convert to dictionary"""
+        """Convert to dictionary (JSON content is returned uncopied; the result is meant for serialization)"""
         data = {
             'page_id': self.id,
             'order_index': self.order_index,
             'part': self.part,
-            'outline_content': self.get_outline_content(),
-            'description_content': self.get_description_content(),
+            'outline_content': self.outline_content or None,
+            'description_content': self.description_content or None,
             'generated_image_url': f'/files/{self.project_id}/pages/{self.generated_image_path.split("/")[-1]}' if self.generated_image_path else None,
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
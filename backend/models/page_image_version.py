@@ -11,12 +11,17 @@ class PageImageVersion(db.Model):
     Page Image Version model - represents a historical version of a page's generated image
     """
     __tablename__ = 'page_image_versions'
+    __table_args__ = (
+        db.Index('ix_page_image_versions_page_id_version_number', 'page_id', 'version_number'),
+        db.Index('ix_page_image_versions_page_id_is_current', 'page_id', 'is_current'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    page_id = db.Column(db.String(36), db.ForeignKey('pages.id'), nullable=False, index=True)
+    page_id = db.Column(db.String(36), db.ForeignKey('pages.id'), nullable=False)  # 由 page_id 开头的复合索引覆盖
     image_path = db.Column(db.String(500), nullable=False)
     version_number = db.Column(db.Integer, nullable=False)  # 版本号，从1开始递增
     is_current = db.Column(db.Boolean, nullable=False, default=False)  # 是否为当前使用的版本
+    variants = db.Column(db.JSON(none_as_null=True), nullable=True)  # 派生图片索引 {"master": {...}, "variants": [...]}
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
     # Relationships
@@ -39,6 +44,17 @@ class PageImageVersion(db.Model):
             'version_number': self.version_number,
             'is_current': self.is_current,
             'created_at': created_at_str,
+            'variants': [
+                {
+                    'url': f'/files/{project_id}/pages/{v["path"].split("/")[-1]}' if project_id else None,
+                    'format': v.get('format'),
+                    'purpose': v.get('purpose'),
+                    'width': v.get('width'),
+                    'height': v.get('height'),
+                    'bytes': v.get('bytes'),
+                }
+                for v in (self.variants or {}).get('variants', [])
+            ],
         }
     
     def __repr__(self):
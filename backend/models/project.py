@@ -11,6 +11,9 @@ class Project(db.Model):
     Project model - represents a PPT project
     """
     __tablename__ = 'projects'
+    __table_args__ = (
+        db.Index('ix_projects_updated_at', 'updated_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     idea_prompt = db.Column(db.Text, nullable=True)
@@ -11,6 +11,9 @@ class ReferenceFile(db.Model):
     Reference File model - represents an uploaded reference file
     """
     __tablename__ = 'reference_files'
+    __table_args__ = (
+        db.Index('ix_reference_files_project_id_parse_status', 'project_id', 'parse_status'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=True)  # Can be null for global files
@@ -20,6 +23,8 @@ class ReferenceFile(db.Model):
     file_type = db.Column(db.String(50), nullable=False)  # pdf, docx, pptx, etc.
     parse_status = db.Column(db.String(50), nullable=False, default='pending')  # pending|parsing|completed|failed
     markdown_content = db.Column(db.Text, nullable=True)  # Parsed markdown with enhanced image descriptions
+    # 检索分块：解析完成时由 markdown_content 切分，[{"text": ..., "terms": {词项: 频次}}]
+    content_chunks = db.Column(db.JSON(none_as_null=True), nullable=True)
     error_message = db.Column(db.Text, nullable=True)  # Error message if parsing failed
     mineru_batch_id = db.Column(db.String(100), nullable=True)  # Mineru service batch ID
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -2,7 +2,6 @@
 Task model for tracking async operations
 """
 import uuid
-import json
 from datetime import datetime
 from . import db
 
@@ -17,7 +16,7 @@ class Task(db.Model):
     project_id = db.Column(db.String(36), db.ForeignKey('projects.id'), nullable=False)
     task_type = db.Column(db.String(50), nullable=False)  # GENERATE_DESCRIPTIONS|GENERATE_IMAGES
     status = db.Column(db.String(50), nullable=False, default='PENDING')
-    progress = db.Column(db.Text, nullable=True)  # JSON string: {"total": 10, "completed": 5, "failed": 0}
+    progress = db.Column(db.JSON(none_as_null=True), nullable=True)  # {"total": 10, "completed": 5, "failed": 0}
     error_message = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime, nullable=True)
@@ -26,20 +25,14 @@ class Task(db.Model):
     project = db.relationship('Project', back_populates='tasks')
     
     def get_progress(self):
-        """Parse progress from JSON string"""
-        if self.progress:
-            try:
-                return json.loads(self.progress)
-            except json.JSONDecodeError:
-                return {"total": 0, "completed": 0, "failed": 0}
+        """Get progress (a copy, so callers can modify it and pass it to set_progress)"""
+        if isinstance(self.progress, dict):
+            return dict(self.progress)
         return {"total": 0, "completed": 0, "failed": 0}
     
     def set_progress(self, data):
-        """Set progress as JSON string"""
-        if data:
-            self.progress = json.dumps(data)
-        else:
-            self.progress = None
+        """Set progress"""
+        self.progress = dict(data) if data else None
     
     def update_progress(self, completed=None, failed=None):
         """Update progress incrementally"""
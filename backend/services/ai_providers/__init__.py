@@ -11,6 +11,7 @@ Configuration Priority (highest to lowest):
 
 Environment Variables:
     AI_PROVIDER_FORMAT: "gemini" (default), "openai", or "vertex"
+    AI_FALLBACK_FORMATS: Formats tried when AI_PROVIDER_FORMAT fails (comma-separated, e.g. "gemini,openai")
 
     For Gemini format (Google GenAI SDK):
         GOOGLE_API_KEY: API key
@@ -27,17 +28,18 @@ Environment Variables:
 """
 import os
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from .text import TextProvider, GenAITextProvider, OpenAITextProvider
-from .image import ImageProvider, GenAIImageProvider, OpenAIImageProvider
+from .image import ImageProvider, GenAIImageProvider, OpenAIImageProvider, HedgedImageProvider
+from config import get_config
 
 logger = logging.getLogger(__name__)
 
 __all__ = [
     'TextProvider', 'GenAITextProvider', 'OpenAITextProvider',
-    'ImageProvider', 'GenAIImageProvider', 'OpenAIImageProvider',
-    'get_text_provider', 'get_image_provider', 'get_provider_format'
+    'ImageProvider', 'GenAIImageProvider', 'OpenAIImageProvider', 'HedgedImageProvider',
+    'get_text_provider', 'get_image_provider', 'get_provider_format', 'get_fallback_formats'
 ]
 
 
@@ -100,9 +102,20 @@ def _get_config_value(key: str, default: str = None) -> str:
     return None
 
 
-def _get_provider_config() -> Dict[str, Any]:
+def get_fallback_formats() -> List[str]:
     """
-    Get provider configuration based on AI_PROVIDER_FORMAT
+    Get the fallback provider formats (AI_FALLBACK_FORMATS, comma-separated)
+
+    Returns:
+        Formats to try after AI_PROVIDER_FORMAT, in order (e.g. ["gemini", "openai"])
+    """
+    value = _get_config_value('AI_FALLBACK_FORMATS', '') or ''
+    return [fmt.strip().lower() for fmt in value.split(',') if fmt.strip()]
+
+
+def _get_provider_config(provider_format: str = None) -> Dict[str, Any]:
+    """
+    Get provider configuration based on AI_PROVIDER_FORMAT (or the given format)
 
     Priority for API keys/base URLs:
         1. Flask app.config (from database settings)
@@ -118,7 +131,7 @@ def _get_provider_config() -> Dict[str, Any]:
     Raises:
         ValueError: If required configuration is not set
     """
-    provider_format = get_provider_format()
+    provider_format = provider_format or get_provider_format()
 
     if provider_format == 'vertex':
         # Vertex AI format
@@ -173,17 +186,18 @@ def _get_provider_config() -> Dict[str, Any]:
         }
 
 
-def get_text_provider(model: str = "gemini-3-flash-preview") -> TextProvider:
+def get_text_provider(model: str = "gemini-3-flash-preview", provider_format: str = None) -> TextProvider:
     """
     Factory function to get text generation provider based on configuration
 
     Args:
         model: Model name to use
+        provider_format: Format to use instead of AI_PROVIDER_FORMAT (e.g. for fallbacks)
 
     Returns:
         TextProvider instance (GenAITextProvider or OpenAITextProvider)
     """
-    config = _get_provider_config()
+    config = _get_provider_config(provider_format)
     provider_format = config['format']
 
     if provider_format == 'openai':
@@ -202,30 +216,32 @@ def get_text_provider(model: str = "gemini-3-flash-preview") -> TextProvider:
         return GenAITextProvider(api_key=config['api_key'], api_base=config['api_base'], model=model)
 
 
-def get_image_provider(model: str = "gemini-3-pro-image-preview") -> ImageProvider:
+def get_image_provider(model: str = "gemini-3-pro-image-preview", provider_format: str = None) -> ImageProvider:
     """
     Factory function to get image generation provider based on configuration
 
     Args:
         model: Model name to use
+        provider_format: Format to use instead of AI_PROVIDER_FORMAT (e.g. for fallbacks)
 
     Returns:
-        ImageProvider instance (GenAIImageProvider or OpenAIImageProvider)
+        ImageProvider instance (GenAIImageProvider or OpenAIImageProvider,
+        wrapped in HedgedImageProvider when IMAGE_HEDGING_ENABLED)
 
     Note:
         OpenAI format does NOT support 4K resolution, only 1K is available.
         If you need higher resolution images, use Gemini or Vertex AI format.
     """
-    config = _get_provider_config()
+    config = _get_provider_config(provider_format)
     provider_format = config['format']
 
     if provider_format == 'openai':
         logger.info(f"Using OpenAI format for image generation, model: {model}")
         logger.warning("OpenAI format only supports 1K resolution, 4K is not available")
-        return OpenAIImageProvider(api_key=config['api_key'], api_base=config['api_base'], model=model)
+        provider = OpenAIImageProvider(api_key=config['api_key'], api_base=config['api_base'], model=model)
     elif provider_format == 'vertex':
         logger.info(f"Using Vertex AI for image generation, model: {model}, project: {config['project_id']}")
-        return GenAIImageProvider(
+        provider = GenAIImageProvider(
             model=model,
             vertexai=True,
             project_id=config['project_id'],
@@ -233,4 +249,15 @@ def get_image_provider(model: str = "gemini-3-pro-image-preview") -> ImageProvid
         )
     else:
         logger.info(f"Using Gemini format for image generation, model: {model}")
-        return GenAIImageProvider(api_key=config['api_key'], api_base=config['api_base'], model=model)
+        provider = GenAIImageProvider(api_key=config['api_key'], api_base=config['api_base'], model=model)
+
+    app_config = get_config()
+    if app_config.IMAGE_HEDGING_ENABLED:
+        logger.info(f"Image request hedging enabled (after p{round(app_config.IMAGE_HEDGE_PERCENTILE * 100)} latency)")
+        provider = HedgedImageProvider(
+            provider,
+            percentile=app_config.IMAGE_HEDGE_PERCENTILE,
+            min_samples=app_config.IMAGE_HEDGE_MIN_SAMPLES,
+            max_workers=app_config.IMAGE_HEDGE_WORKERS
+        )
+    return provider
@@ -0,0 +1,289 @@
+"""
+Circuit breakers and fallback chains for AI providers
+
+Each provider format (e.g. "text:gemini", "image:vertex") has a process-wide
+CircuitBreaker. After AI_CIRCUIT_FAILURE_THRESHOLD consecutive failed calls the
+circuit opens and calls skip that provider instantly instead of burning their
+retries; after AI_CIRCUIT_RECOVERY_SECONDS a single trial call is let through
+(half-open) and its outcome closes or re-opens the circuit.
+
+FallbackTextProvider / FallbackImageProvider try an ordered chain of providers
+(AI_PROVIDER_FORMAT first, then AI_FALLBACK_FORMATS), skipping open circuits and
+moving on when a call fails.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from PIL import Image
+
+from .text.base import TextProvider
+from .image.base import ImageProvider
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when every provider in a chain is unavailable (open circuit)"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half-open -> closed)"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.recovery_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self) -> bool:
+        """True if a call may be sent now (in half-open state only one trial call at a time)"""
+        return self.acquire() is not None
+
+    def acquire(self) -> Optional[bool]:
+        """
+        Claim permission for a call
+
+        Returns:
+            None if the call must be skipped, True if it is the half-open trial call,
+            False for a normal call
+        """
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return False
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return None
+
+    def release_trial(self):
+        """Give up the trial slot of a call that ended without an outcome (cancelled / abandoned)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit {self.name} closed")
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            was_trial = self._trial_in_flight
+            self._trial_in_flight = False
+            if was_trial or (self.opened_at is None and self.consecutive_failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                logger.warning(f"Circuit {self.name} opened after {self.consecutive_failures} consecutive failures")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Health state for monitoring"""
+        with self._lock:
+            state = self._state()
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = round(self.recovery_timeout - (time.monotonic() - self.opened_at), 1)
+            return {
+                'state': state,
+                'consecutive_failures': self.consecutive_failures,
+                'retry_in_seconds': retry_in,
+            }
+
+
+# Process-wide breakers keyed by "<kind>:<format>"
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Return the breaker for a provider, creating it with the configured thresholds"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            from config import get_config
+            config = get_config()
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=config.AI_CIRCUIT_FAILURE_THRESHOLD,
+                recovery_timeout=config.AI_CIRCUIT_RECOVERY_SECONDS
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def get_provider_health() -> Dict[str, Dict[str, Any]]:
+    """Health state of every provider that has been used"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+class _FallbackChain:
+    """Shared call logic for provider chains"""
+
+    def __init__(self, providers: List[Tuple[str, Any]]):
+        """
+        Args:
+            providers: (breaker name, provider) pairs in order of preference
+        """
+        if not providers:
+            raise ValueError("At least one provider is required")
+        self.providers = [(provider, get_circuit_breaker(name)) for name, provider in providers]
+
+    def __getattr__(self, name):
+        # Provider-specific attributes (model, client, ...) come from the preferred provider
+        if name == 'providers':
+            raise AttributeError(name)
+        return getattr(self.providers[0][0], name)
+
+    def _available(self, method: str):
+        """Providers whose circuit allows a call, in order, with whether the call is a half-open trial"""
+        for provider, breaker in self.providers:
+            if not hasattr(provider, method):
+                continue
+            trial = breaker.acquire()
+            if trial is None:
+                logger.debug(f"Skipping {breaker.name}: circuit {breaker.state}")
+                continue
+            yield provider, breaker, trial
+
+    @staticmethod
+    def _failed(breaker: CircuitBreaker, method: str, error: Exception):
+        breaker.record_failure()
+        logger.warning(f"{breaker.name}.{method} failed, trying next provider: {type(error).__name__}: {error}")
+
+    def _no_provider(self, method: str, last_error: Optional[Exception]):
+        if last_error is not None:
+            raise last_error
+        names = ', '.join(breaker.name for _, breaker in self.providers)
+        raise CircuitOpenError(f"No provider available for {method} (circuits open: {names})")
+
+    def _call(self, method: str, *args, **kwargs):
+        last_error = None
+        for provider, breaker, trial in self._available(method):
+            try:
+                result = getattr(provider, method)(*args, **kwargs)
+            except Exception as e:
+                self._failed(breaker, method, e)
+                last_error = e
+                continue
+            except BaseException:
+                # Cancelled / interrupted: no outcome, but the trial slot must not stay taken
+                if trial:
+                    breaker.release_trial()
+                raise
+            breaker.record_success()
+            return result
+        self._no_provider(method, last_error)
+
+    async def _acall(self, method: str, *args, **kwargs):
+        last_error = None
+        for provider, breaker, trial in self._available(method):
+            try:
+                result = await getattr(provider, method)(*args, **kwargs)
+            except Exception as e:
+                self._failed(breaker, method, e)
+                last_error = e
+                continue
+            except BaseException:
+                # Cancelled / interrupted: no outcome, but the trial slot must not stay taken
+                if trial:
+                    breaker.release_trial()
+                raise
+            breaker.record_success()
+            return result
+        self._no_provider(method, last_error)
+
+
+class FallbackTextProvider(_FallbackChain, TextProvider):
+    """Text provider that falls back along a chain of providers"""
+
+    def generate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        return self._call('generate_text', prompt, thinking_budget=thinking_budget)
+
+    def generate_structured(self, prompt: str, response_schema: Dict[str, Any],
+                            thinking_budget: int = 1000) -> str:
+        return self._call('generate_structured', prompt, response_schema, thinking_budget=thinking_budget)
+
+    def generate_with_image(self, prompt: str, image, thinking_budget: int = 1000, **kwargs) -> str:
+        return self._call('generate_with_image', prompt=prompt, image=image,
+                          thinking_budget=thinking_budget, **kwargs)
+
+    async def agenerate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        return await self._acall('agenerate_text', prompt, thinking_budget=thinking_budget)
+
+    def generate_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 1000) -> str:
+        return self._call('generate_with_prefix', prefix, suffix, thinking_budget=thinking_budget)
+
+    async def agenerate_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 1000) -> str:
+        return await self._acall('agenerate_with_prefix', prefix, suffix, thinking_budget=thinking_budget)
+
+    def stream_text(self, prompt: str, thinking_budget: int = 1000) -> Iterator[str]:
+        """Stream from the first available provider; falls back only before the first chunk"""
+        last_error = None
+        for provider, breaker, trial in self._available('stream_text'):
+            started = False
+            try:
+                for chunk in provider.stream_text(prompt, thinking_budget=thinking_budget):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                if started:
+                    breaker.record_failure()
+                    raise
+                self._failed(breaker, 'stream_text', e)
+                last_error = e
+                continue
+            except BaseException:
+                # Consumer closed the stream (e.g. SSE client disconnected, GeneratorExit)
+                if trial:
+                    breaker.release_trial()
+                raise
+            breaker.record_success()
+            return
+        self._no_provider('stream_text', last_error)
+
+
+class FallbackImageProvider(_FallbackChain, ImageProvider):
+    """Image provider that falls back along a chain of providers"""
+
+    def generate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K"
+    ) -> Optional[Image.Image]:
+        return self._call('generate_image', prompt, ref_images, aspect_ratio, resolution)
+
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K"
+    ) -> Optional[Image.Image]:
+        return await self._acall('agenerate_image', prompt, ref_images, aspect_ratio, resolution)
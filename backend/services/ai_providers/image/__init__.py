@@ -2,12 +2,16 @@
 from .base import ImageProvider
 from .genai_provider import GenAIImageProvider
 from .openai_provider import OpenAIImageProvider
+from .hedged_provider import HedgedImageProvider, HedgeBudget, use_hedge_budget
 from .baidu_inpainting_provider import BaiduInpaintingProvider, create_baidu_inpainting_provider
 
 __all__ = [
     'ImageProvider', 
     'GenAIImageProvider', 
     'OpenAIImageProvider',
+    'HedgedImageProvider',
+    'HedgeBudget',
+    'use_hedge_budget',
     'BaiduInpaintingProvider',
     'create_baidu_inpainting_provider',
 ]
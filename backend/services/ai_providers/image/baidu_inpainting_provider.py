@@ -12,6 +12,7 @@ from typing import Dict, List, Any, Optional, Tuple
 from PIL import Image
 import io
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from services.http_session import get_http_session
 
 logger = logging.getLogger(__name__)
 
@@ -28,16 +29,19 @@ class BaiduInpaintingProvider:
     - 快速响应，适合批量处理
     """
     
-    def __init__(self, api_key: str, api_secret: Optional[str] = None):
+    def __init__(self, api_key: str, api_secret: Optional[str] = None,
+                 session: Optional[requests.Session] = None):
         """
         初始化百度图像修复 Provider
         
         Args:
             api_key: 百度API Key（BCEv3格式：bce-v3/ALTAK-...）或Access Token
             api_secret: 可选，如果提供则用于BCEv3签名
+            session: 可选，HTTP 会话（默认使用共享连接池，复用与百度 API 的连接）
         """
         self.api_key = api_key
         self.api_secret = api_secret
+        self.session = session or get_http_session()
         self.api_url = "https://aip.baidubce.com/rest/2.0/image-process/v1/inpainting"
         
         if api_key.startswith('bce-v3/'):
@@ -144,7 +148,7 @@ class BaiduInpaintingProvider:
             }
             
             logger.info("🌐 发送请求到百度图像修复API...")
-            response = requests.post(
+            response = self.session.post(
                 url, 
                 headers=headers, 
                 json=request_body, 
@@ -1,6 +1,7 @@
 """
 Abstract base class for image generation providers
 """
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Optional, List
 from PIL import Image
@@ -30,3 +31,18 @@ class ImageProvider(ABC):
             Generated PIL Image object, or None if failed
         """
         pass
+    
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K"
+    ) -> Optional[Image.Image]:
+        """
+        Async variant of generate_image
+        
+        Providers with an async SDK client override this; the default runs
+        generate_image in the event loop's executor.
+        """
+        return await asyncio.to_thread(self.generate_image, prompt, ref_images, aspect_ratio, resolution)
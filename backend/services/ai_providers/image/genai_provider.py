@@ -6,7 +6,7 @@ Supports two modes:
 - Vertex AI: Uses GCP service account authentication
 """
 import logging
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from google import genai
 from google.genai import types
 from PIL import Image
@@ -91,75 +91,124 @@ class GenAIImageProvider(ImageProvider):
             Generated PIL Image object, or None if failed
         """
         try:
-            # Build contents list with prompt and reference images
-            contents = []
-            
-            # Add reference images first (if any)
-            if ref_images:
-                for ref_img in ref_images:
-                    contents.append(ref_img)
-            
-            # Add text prompt
-            contents.append(prompt)
-            
-            logger.debug(f"Calling GenAI API for image generation with {len(ref_images) if ref_images else 0} reference images...")
-            logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}, enable_thinking: {enable_thinking}")
-            
-            # Build config
-            config_params = {
-                'response_modalities': ['TEXT', 'IMAGE'],
-                'image_config': types.ImageConfig(
-                    aspect_ratio=aspect_ratio,
-                    image_size=resolution
-                )
-            }
-            
-            # Add thinking config if enabled
-            if enable_thinking:
-                config_params['thinking_config'] = types.ThinkingConfig(
-                    include_thoughts=True
-                )
+            contents, config = self._build_request(prompt, ref_images, aspect_ratio, resolution, enable_thinking)
             
             response = self.client.models.generate_content(
                 model=self.model,
                 contents=contents,
-                config=types.GenerateContentConfig(**config_params)
+                config=config
             )
             
             logger.debug("GenAI API call completed")
+            return self._extract_image(response)
             
-            # Extract the final image from the response.
-            # Earlier images are usually low resolution drafts 
-            # Therefore, always use the last image found.
-            last_image = None
-            
-            for i, part in enumerate(response.parts):
-                if part.text is not None:
-                    logger.debug(f"Part {i}: TEXT - {part.text[:100] if len(part.text) > 100 else part.text}")
-                else:
-                    try:
-                        logger.debug(f"Part {i}: Attempting to extract image...")
-                        image = part.as_image()
-                        if image:
-                            logger.debug(f"Successfully extracted image from part {i}")
-                            last_image = image
-                    except Exception as e:
-                        logger.debug(f"Part {i}: Failed to extract image - {str(e)}")
-            
-            # Return the last image found (highest quality in thinking chain scenarios)
-            if last_image:
-                return last_image
+        except Exception as e:
+            error_detail = f"Error generating image with GenAI: {type(e).__name__}: {str(e)}"
+            logger.error(error_detail, exc_info=True)
+            raise Exception(error_detail) from e
+    
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10)
+    )
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K",
+        enable_thinking: bool = True
+    ) -> Optional[Image.Image]:
+        """
+        Generate image using the SDK's async client (client.aio)
+        
+        Same arguments and result as generate_image.
+        """
+        try:
+            contents, config = self._build_request(prompt, ref_images, aspect_ratio, resolution, enable_thinking)
             
-            # No image found in response
-            error_msg = "No image found in API response. "
-            if response.parts:
-                error_msg += f"Response had {len(response.parts)} parts but none contained valid images."
-            else:
-                error_msg += "Response had no parts."
+            response = await self.client.aio.models.generate_content(
+                model=self.model,
+                contents=contents,
+                config=config
+            )
             
-            raise ValueError(error_msg)
+            logger.debug("GenAI async API call completed")
+            return self._extract_image(response)
             
         except Exception as e:
             error_detail = f"Error generating image with GenAI: {type(e).__name__}: {str(e)}"
             logger.error(error_detail, exc_info=True)
             raise Exception(error_detail) from e
+    
+    @staticmethod
+    def _build_request(prompt: str, ref_images: Optional[List[Image.Image]], aspect_ratio: str,
+                       resolution: str, enable_thinking: bool) -> Tuple[list, types.GenerateContentConfig]:
+        """Build request contents (reference images first, then prompt) and config"""
+        contents = []
+        
+        # Add reference images first (if any)
+        if ref_images:
+            for ref_img in ref_images:
+                contents.append(ref_img)
+        
+        # Add text prompt
+        contents.append(prompt)
+        
+        logger.debug(f"Calling GenAI API for image generation with {len(ref_images) if ref_images else 0} reference images...")
+        logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}, enable_thinking: {enable_thinking}")
+        
+        # Build config
+        config_params = {
+            'response_modalities': ['TEXT', 'IMAGE'],
+            'image_config': types.ImageConfig(
+                aspect_ratio=aspect_ratio,
+                image_size=resolution
+            )
+        }
+        
+        # Add thinking config if enabled
+        if enable_thinking:
+            config_params['thinking_config'] = types.ThinkingConfig(
+                include_thoughts=True
+            )
+        
+        return contents, types.GenerateContentConfig(**config_params)
+    
+    @staticmethod
+    def _extract_image(response) -> Image.Image:
+        """
+        Extract the final image from the response
+        
+        Earlier images are usually low resolution drafts, therefore always use the last image found.
+        
+        Raises:
+            ValueError: If the response contains no image
+        """
+        last_image = None
+        
+        for i, part in enumerate(response.parts or []):
+            if part.text is not None:
+                logger.debug(f"Part {i}: TEXT - {part.text[:100] if len(part.text) > 100 else part.text}")
+            else:
+                try:
+                    logger.debug(f"Part {i}: Attempting to extract image...")
+                    image = part.as_image()
+                    if image:
+                        logger.debug(f"Successfully extracted image from part {i}")
+                        last_image = image
+                except Exception as e:
+                    logger.debug(f"Part {i}: Failed to extract image - {str(e)}")
+        
+        # Return the last image found (highest quality in thinking chain scenarios)
+        if last_image:
+            return last_image
+        
+        # No image found in response
+        error_msg = "No image found in API response. "
+        if response.parts:
+            error_msg += f"Response had {len(response.parts)} parts but none contained valid images."
+        else:
+            error_msg += "Response had no parts."
+        
+        raise ValueError(error_msg)
@@ -0,0 +1,216 @@
+"""
+Request hedging for image generation
+
+Image generation latency has a long tail: most calls finish well under the
+median-to-p90 range, a few take minutes. HedgedImageProvider wraps another
+provider; when a call is still running after the rolling p90 latency it fires a
+second identical request and returns whichever succeeds first.
+
+Extra requests cost money, so hedging only happens inside a HedgeBudget scope:
+a batch task opens one with use_hedge_budget() and each hedge consumes one unit.
+Calls outside a scope (or once the budget is spent) are never hedged.
+
+The losing request is cancelled on the async path (its elapsed time still
+counts as a latency sample, so slow calls are not dropped from the window). A
+blocking SDK call cannot be interrupted, so on the sync path its result is
+discarded when it finishes. Sync attempts run on a pool sized by
+IMAGE_HEDGE_WORKERS; the hedge delay is measured from when the primary actually
+starts, so time spent queued for a thread does not trigger hedges.
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import List, Optional
+
+from PIL import Image
+
+from .base import ImageProvider
+
+logger = logging.getLogger(__name__)
+
+
+class HedgeBudget:
+    """Number of hedged (extra) requests a task may send"""
+
+    def __init__(self, max_hedges: int):
+        self.max_hedges = max_hedges
+        self.used = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_pages(cls, page_count: int, ratio: float) -> 'HedgeBudget':
+        """Budget of ceil(page_count * ratio) hedges"""
+        return cls(math.ceil(page_count * ratio))
+
+    def try_acquire(self) -> bool:
+        """Consume one hedge; False if the budget is spent"""
+        with self._lock:
+            if self.used >= self.max_hedges:
+                return False
+            self.used += 1
+            return True
+
+
+_current_budget: ContextVar[Optional[HedgeBudget]] = ContextVar('image_hedge_budget', default=None)
+
+
+@contextmanager
+def use_hedge_budget(budget: Optional[HedgeBudget]):
+    """Allow hedging within this block (current thread / coroutine), drawing from budget"""
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window: int = 100, min_samples: int = 10):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q-quantile of the window (nearest rank), or None until min_samples are recorded"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[index]
+
+
+class HedgedImageProvider(ImageProvider):
+    """Image provider wrapper that hedges calls slower than the rolling latency percentile"""
+
+    def __init__(self, provider: ImageProvider, percentile: float = 0.9,
+                 window: int = 100, min_samples: int = 10, max_workers: int = 64):
+        """
+        Args:
+            provider: Wrapped image provider
+            percentile: Latency quantile after which a call is hedged (e.g. 0.9 = p90)
+            window: Number of recent latencies kept
+            min_samples: Latencies needed before hedging starts
+            max_workers: Threads for concurrent sync attempts
+        """
+        self.provider = provider
+        self.percentile = percentile
+        self.latencies = LatencyTracker(window=window, min_samples=min_samples)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image-hedge')
+
+    def __getattr__(self, name):
+        # Provider-specific attributes (model, client, ...) come from the wrapped provider
+        if name == 'provider':
+            raise AttributeError(name)
+        return getattr(self.provider, name)
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None if this call must not be hedged"""
+        if _current_budget.get() is None:
+            return None
+        return self.latencies.percentile(self.percentile)
+
+    def _timed_generate(self, *args, running: Optional[threading.Event] = None) -> Optional[Image.Image]:
+        if running is not None:
+            running.set()
+        started = time.monotonic()
+        image = self.provider.generate_image(*args)
+        self.latencies.record(time.monotonic() - started)
+        return image
+
+    async def _atimed_generate(self, *args) -> Optional[Image.Image]:
+        started = time.monotonic()
+        try:
+            image = await self.provider.agenerate_image(*args)
+        except asyncio.CancelledError:
+            # 被取消的较慢请求：已耗时是其延迟的下限，仍计入样本，避免分位数偏低
+            self.latencies.record(time.monotonic() - started)
+            raise
+        self.latencies.record(time.monotonic() - started)
+        return image
+
+    def generate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K"
+    ) -> Optional[Image.Image]:
+        args = (prompt, ref_images, aspect_ratio, resolution)
+        delay = self._hedge_delay()
+        if delay is None:
+            return self._timed_generate(*args)
+
+        running = threading.Event()
+        primary = self._executor.submit(copy_context().run, self._timed_generate, *args, running=running)
+        # 从原请求真正开始执行时计时：排队等待线程的时间不是 provider 的延迟
+        running.wait()
+        done, _ = wait({primary}, timeout=delay)
+        if done or not _current_budget.get().try_acquire():
+            return primary.result()
+
+        logger.info(f"Image generation exceeded p{round(self.percentile * 100)} ({delay:.1f}s), sending hedged request")
+        hedge = self._executor.submit(copy_context().run, self._timed_generate, *args)
+
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()  # 仍在排队的对冲请求不再发送；已在执行的阻塞调用无法中断，结果将被丢弃
+                    logger.info(f"{'Hedged' if future is hedge else 'Primary'} image request finished first")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K"
+    ) -> Optional[Image.Image]:
+        args = (prompt, ref_images, aspect_ratio, resolution)
+        delay = self._hedge_delay()
+        if delay is None:
+            return await self._atimed_generate(*args)
+
+        primary = asyncio.ensure_future(self._atimed_generate(*args))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not _current_budget.get().try_acquire():
+                return await primary
+
+            logger.info(f"Image generation exceeded p{round(self.percentile * 100)} ({delay:.1f}s), sending hedged request")
+            hedge = asyncio.ensure_future(self._atimed_generate(*args))
+            tasks.append(hedge)
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        logger.info(f"{'Hedged' if task is hedge else 'Primary'} image request finished first")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
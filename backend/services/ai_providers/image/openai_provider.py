@@ -1,16 +1,17 @@
 """
 OpenAI SDK implementation for image generation
 """
+import asyncio
 import logging
 import base64
 import re
-import requests
 from io import BytesIO
 from typing import Optional, List
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from PIL import Image
 from .base import ImageProvider
 from config import get_config
+from services.http_session import get_http_session
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,13 @@ class OpenAIImageProvider(ImageProvider):
             timeout=get_config().OPENAI_TIMEOUT,  # set timeout from config
             max_retries=get_config().OPENAI_MAX_RETRIES  # set max retries from config
         )
+        # Async client for the event-loop runner (same settings)
+        self.async_client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=api_base,
+            timeout=get_config().OPENAI_TIMEOUT,
+            max_retries=get_config().OPENAI_MAX_RETRIES
+        )
         self.model = model
     
     def _encode_image_to_base64(self, image: Image.Image) -> str:
@@ -74,150 +82,191 @@ class OpenAIImageProvider(ImageProvider):
             Generated PIL Image object, or None if failed
         """
         try:
-            # Build message content
-            content = []
-            
-            # Add reference images first (if any)
-            if ref_images:
-                for ref_img in ref_images:
-                    base64_image = self._encode_image_to_base64(ref_img)
-                    content.append({
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}"
-                        }
-                    })
-            
-            # Add text prompt
-            content.append({"type": "text", "text": prompt})
-            
-            logger.debug(f"Calling OpenAI API for image generation with {len(ref_images) if ref_images else 0} reference images...")
-            logger.debug(f"Config - aspect_ratio: {aspect_ratio} (resolution ignored, OpenAI format only supports 1K)")
+            messages = self._build_messages(prompt, ref_images, aspect_ratio)
             
             # Note: resolution is not supported in OpenAI format, only aspect_ratio via system message
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": f"aspect_ratio={aspect_ratio}"},
-                    {"role": "user", "content": content},
-                ],
+                messages=messages,
                 modalities=["text", "image"]
             )
             
             logger.debug("OpenAI API call completed")
+            return self._extract_image(response.choices[0].message)
             
-            # Extract image from response - handle different response formats
-            message = response.choices[0].message
+        except Exception as e:
+            error_detail = f"Error generating image with OpenAI (model={self.model}): {type(e).__name__}: {str(e)}"
+            logger.error(error_detail, exc_info=True)
+            raise Exception(error_detail) from e
+    
+    async def agenerate_image(
+        self,
+        prompt: str,
+        ref_images: Optional[List[Image.Image]] = None,
+        aspect_ratio: str = "16:9",
+        resolution: str = "2K"
+    ) -> Optional[Image.Image]:
+        """
+        Generate image using the async OpenAI client
+        
+        Same arguments and result as generate_image. Response parsing may download
+        an image URL, so it runs in the event loop's executor.
+        """
+        try:
+            messages = self._build_messages(prompt, ref_images, aspect_ratio)
             
-            # Debug: log available attributes
-            logger.debug(f"Response message attributes: {dir(message)}")
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                modalities=["text", "image"]
+            )
             
-            # Try multi_mod_content first (custom format from some proxies)
-            if hasattr(message, 'multi_mod_content') and message.multi_mod_content:
-                parts = message.multi_mod_content
-                for part in parts:
-                    if "text" in part:
-                        logger.debug(f"Response text: {part['text'][:100] if len(part['text']) > 100 else part['text']}")
-                    if "inline_data" in part:
-                        image_data = base64.b64decode(part["inline_data"]["data"])
-                        image = Image.open(BytesIO(image_data))
-                        logger.debug(f"Successfully extracted image: {image.size}, {image.mode}")
-                        return image
+            logger.debug("OpenAI async API call completed")
+            return await asyncio.to_thread(self._extract_image, response.choices[0].message)
             
-            # Try standard OpenAI content format (list of content parts)
-            if hasattr(message, 'content') and message.content:
-                # If content is a list (multimodal response)
-                if isinstance(message.content, list):
-                    for part in message.content:
-                        if isinstance(part, dict):
-                            # Handle image_url type
-                            if part.get('type') == 'image_url':
-                                image_url = part.get('image_url', {}).get('url', '')
-                                if image_url.startswith('data:image'):
-                                    # Extract base64 data from data URL
-                                    base64_data = image_url.split(',', 1)[1]
-                                    image_data = base64.b64decode(base64_data)
-                                    image = Image.open(BytesIO(image_data))
-                                    logger.debug(f"Successfully extracted image from content: {image.size}, {image.mode}")
-                                    return image
-                            # Handle text type
-                            elif part.get('type') == 'text':
-                                text = part.get('text', '')
-                                if text:
-                                    logger.debug(f"Response text: {text[:100] if len(text) > 100 else text}")
-                        elif hasattr(part, 'type'):
-                            # Handle as object with attributes
-                            if part.type == 'image_url':
-                                image_url = getattr(part, 'image_url', {})
-                                if isinstance(image_url, dict):
-                                    url = image_url.get('url', '')
-                                else:
-                                    url = getattr(image_url, 'url', '')
-                                if url.startswith('data:image'):
-                                    base64_data = url.split(',', 1)[1]
-                                    image_data = base64.b64decode(base64_data)
-                                    image = Image.open(BytesIO(image_data))
-                                    logger.debug(f"Successfully extracted image from content object: {image.size}, {image.mode}")
-                                    return image
-                # If content is a string, try to extract image from it
-                elif isinstance(message.content, str):
-                    content_str = message.content
-                    logger.debug(f"Response content (string): {content_str[:200] if len(content_str) > 200 else content_str}")
-                    
-                    # Try to extract Markdown image URL: ![...](url)
-                    markdown_pattern = r'!\[.*?\]\((https?://[^\s\)]+)\)'
-                    markdown_matches = re.findall(markdown_pattern, content_str)
-                    if markdown_matches:
-                        image_url = markdown_matches[0]  # Use the first image URL found
-                        logger.debug(f"Found Markdown image URL: {image_url}")
-                        try:
-                            response = requests.get(image_url, timeout=30, stream=True)
+        except Exception as e:
+            error_detail = f"Error generating image with OpenAI (model={self.model}): {type(e).__name__}: {str(e)}"
+            logger.error(error_detail, exc_info=True)
+            raise Exception(error_detail) from e
+    
+    def _build_messages(self, prompt: str, ref_images: Optional[List[Image.Image]],
+                        aspect_ratio: str) -> List[dict]:
+        """Build chat messages: reference images first, then the prompt"""
+        content = []
+        
+        # Add reference images first (if any)
+        if ref_images:
+            for ref_img in ref_images:
+                base64_image = self._encode_image_to_base64(ref_img)
+                content.append({
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:image/jpeg;base64,{base64_image}"
+                    }
+                })
+        
+        # Add text prompt
+        content.append({"type": "text", "text": prompt})
+        
+        logger.debug(f"Calling OpenAI API for image generation with {len(ref_images) if ref_images else 0} reference images...")
+        logger.debug(f"Config - aspect_ratio: {aspect_ratio} (resolution ignored, OpenAI format only supports 1K)")
+        
+        return [
+            {"role": "system", "content": f"aspect_ratio={aspect_ratio}"},
+            {"role": "user", "content": content},
+        ]
+    
+    def _extract_image(self, message) -> Image.Image:
+        """
+        Extract the image from a chat completion message (handles different proxy response formats)
+        
+        Raises:
+            ValueError: If no image can be extracted
+        """
+        # Debug: log available attributes
+        logger.debug(f"Response message attributes: {dir(message)}")
+        
+        # Try multi_mod_content first (custom format from some proxies)
+        if hasattr(message, 'multi_mod_content') and message.multi_mod_content:
+            parts = message.multi_mod_content
+            for part in parts:
+                if "text" in part:
+                    logger.debug(f"Response text: {part['text'][:100] if len(part['text']) > 100 else part['text']}")
+                if "inline_data" in part:
+                    image_data = base64.b64decode(part["inline_data"]["data"])
+                    image = Image.open(BytesIO(image_data))
+                    logger.debug(f"Successfully extracted image: {image.size}, {image.mode}")
+                    return image
+        
+        # Try standard OpenAI content format (list of content parts)
+        if hasattr(message, 'content') and message.content:
+            # If content is a list (multimodal response)
+            if isinstance(message.content, list):
+                for part in message.content:
+                    if isinstance(part, dict):
+                        # Handle image_url type
+                        if part.get('type') == 'image_url':
+                            image_url = part.get('image_url', {}).get('url', '')
+                            if image_url.startswith('data:image'):
+                                # Extract base64 data from data URL
+                                base64_data = image_url.split(',', 1)[1]
+                                image_data = base64.b64decode(base64_data)
+                                image = Image.open(BytesIO(image_data))
+                                logger.debug(f"Successfully extracted image from content: {image.size}, {image.mode}")
+                                return image
+                        # Handle text type
+                        elif part.get('type') == 'text':
+                            text = part.get('text', '')
+                            if text:
+                                logger.debug(f"Response text: {text[:100] if len(text) > 100 else text}")
+                    elif hasattr(part, 'type'):
+                        # Handle as object with attributes
+                        if part.type == 'image_url':
+                            image_url = getattr(part, 'image_url', {})
+                            if isinstance(image_url, dict):
+                                url = image_url.get('url', '')
+                            else:
+                                url = getattr(image_url, 'url', '')
+                            if url.startswith('data:image'):
+                                base64_data = url.split(',', 1)[1]
+                                image_data = base64.b64decode(base64_data)
+                                image = Image.open(BytesIO(image_data))
+                                logger.debug(f"Successfully extracted image from content object: {image.size}, {image.mode}")
+                                return image
+            # If content is a string, try to extract image from it
+            elif isinstance(message.content, str):
+                content_str = message.content
+                logger.debug(f"Response content (string): {content_str[:200] if len(content_str) > 200 else content_str}")
+                
+                # Try to extract Markdown image URL: ![...](url)
+                markdown_pattern = r'!\[.*?\]\((https?://[^\s\)]+)\)'
+                markdown_matches = re.findall(markdown_pattern, content_str)
+                if markdown_matches:
+                    image_url = markdown_matches[0]  # Use the first image URL found
+                    logger.debug(f"Found Markdown image URL: {image_url}")
+                    try:
+                        with get_http_session().get(image_url, timeout=30) as response:
                             response.raise_for_status()
                             image = Image.open(BytesIO(response.content))
                             image.load()  # Ensure image is fully loaded
-                            logger.debug(f"Successfully downloaded image from Markdown URL: {image.size}, {image.mode}")
-                            return image
-                        except Exception as download_error:
-                            logger.warning(f"Failed to download image from Markdown URL: {download_error}")
-                    
-                    # Try to extract plain URL (not in Markdown format)
-                    url_pattern = r'(https?://[^\s\)\]]+\.(?:png|jpg|jpeg|gif|webp|bmp)(?:\?[^\s\)\]]*)?)'
-                    url_matches = re.findall(url_pattern, content_str, re.IGNORECASE)
-                    if url_matches:
-                        image_url = url_matches[0]
-                        logger.debug(f"Found plain image URL: {image_url}")
-                        try:
-                            response = requests.get(image_url, timeout=30, stream=True)
+                        logger.debug(f"Successfully downloaded image from Markdown URL: {image.size}, {image.mode}")
+                        return image
+                    except Exception as download_error:
+                        logger.warning(f"Failed to download image from Markdown URL: {download_error}")
+                
+                # Try to extract plain URL (not in Markdown format)
+                url_pattern = r'(https?://[^\s\)\]]+\.(?:png|jpg|jpeg|gif|webp|bmp)(?:\?[^\s\)\]]*)?)'
+                url_matches = re.findall(url_pattern, content_str, re.IGNORECASE)
+                if url_matches:
+                    image_url = url_matches[0]
+                    logger.debug(f"Found plain image URL: {image_url}")
+                    try:
+                        with get_http_session().get(image_url, timeout=30) as response:
                             response.raise_for_status()
                             image = Image.open(BytesIO(response.content))
                             image.load()
-                            logger.debug(f"Successfully downloaded image from plain URL: {image.size}, {image.mode}")
-                            return image
-                        except Exception as download_error:
-                            logger.warning(f"Failed to download image from plain URL: {download_error}")
-                    
-                    # Try to extract base64 data URL from string
-                    base64_pattern = r'data:image/[^;]+;base64,([A-Za-z0-9+/=]+)'
-                    base64_matches = re.findall(base64_pattern, content_str)
-                    if base64_matches:
-                        base64_data = base64_matches[0]
-                        logger.debug(f"Found base64 image data in string")
-                        try:
-                            image_data = base64.b64decode(base64_data)
-                            image = Image.open(BytesIO(image_data))
-                            logger.debug(f"Successfully extracted base64 image from string: {image.size}, {image.mode}")
-                            return image
-                        except Exception as decode_error:
-                            logger.warning(f"Failed to decode base64 image from string: {decode_error}")
-            
-            # Log raw response for debugging
-            logger.warning(f"Unable to extract image. Raw message type: {type(message)}")
-            logger.warning(f"Message content type: {type(getattr(message, 'content', None))}")
-            logger.warning(f"Message content: {getattr(message, 'content', 'N/A')}")
-            
-            raise ValueError("No valid multimodal response received from OpenAI API")
-            
-        except Exception as e:
-            error_detail = f"Error generating image with OpenAI (model={self.model}): {type(e).__name__}: {str(e)}"
-            logger.error(error_detail, exc_info=True)
-            raise Exception(error_detail) from e
+                        logger.debug(f"Successfully downloaded image from plain URL: {image.size}, {image.mode}")
+                        return image
+                    except Exception as download_error:
+                        logger.warning(f"Failed to download image from plain URL: {download_error}")
+                
+                # Try to extract base64 data URL from string
+                base64_pattern = r'data:image/[^;]+;base64,([A-Za-z0-9+/=]+)'
+                base64_matches = re.findall(base64_pattern, content_str)
+                if base64_matches:
+                    base64_data = base64_matches[0]
+                    logger.debug(f"Found base64 image data in string")
+                    try:
+                        image_data = base64.b64decode(base64_data)
+                        image = Image.open(BytesIO(image_data))
+                        logger.debug(f"Successfully extracted base64 image from string: {image.size}, {image.mode}")
+                        return image
+                    except Exception as decode_error:
+                        logger.warning(f"Failed to decode base64 image from string: {decode_error}")
+        
+        # Log raw response for debugging
+        logger.warning(f"Unable to extract image. Raw message type: {type(message)}")
+        logger.warning(f"Message content type: {type(getattr(message, 'content', None))}")
+        logger.warning(f"Message content: {getattr(message, 'content', 'N/A')}")
+        
+        raise ValueError("No valid multimodal response received from OpenAI API")
@@ -34,7 +34,22 @@ class VolcengineInpaintingProvider:
         self.access_key = access_key
         self.secret_key = secret_key
         self.timeout = timeout
+        self._visual_service = None
         logger.info("火山引擎 Inpainting Provider 初始化（直接HTTP模式）")
+    
+    def _get_visual_service(self):
+        """
+        获取 VisualService（首次使用时创建）
+        
+        SDK 的 Service 内部持有 requests 会话，复用同一实例即可保持与 API 的连接
+        """
+        if self._visual_service is None:
+            from volcengine.visual.VisualService import VisualService
+            service = VisualService()
+            service.set_ak(self.access_key)
+            service.set_sk(self.secret_key)
+            self._visual_service = service
+        return self._visual_service
         
     def _encode_image_to_base64(self, image: Image.Image, is_mask: bool = False) -> str:
         """
@@ -135,10 +150,7 @@ class VolcengineInpaintingProvider:
             logger.debug(f"请求体大小: {len(json.dumps(request_body))} bytes")
             
             # 6. 使用SDK（它会处理签名）
-            from volcengine.visual.VisualService import VisualService
-            service = VisualService()
-            service.set_ak(self.access_key)
-            service.set_sk(self.secret_key)
+            service = self._get_visual_service()
             
             # 使用SDK的json_handler方法（这个方法会处理签名）
             logger.info("使用SDK发送请求（带正确签名）")
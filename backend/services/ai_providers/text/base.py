@@ -1,7 +1,9 @@
 """
 Abstract base class for text generation providers
 """
+import asyncio
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator
 
 
 class TextProvider(ABC):
@@ -20,3 +22,62 @@ class TextProvider(ABC):
             Generated text content
         """
         pass
+    
+    def generate_structured(self, prompt: str, response_schema: Dict[str, Any],
+                            thinking_budget: int = 1000) -> str:
+        """
+        Generate JSON text constrained to a JSON schema
+        
+        Providers with a structured-output API override this; the default relies
+        on the format instructions in the prompt and calls generate_text.
+        
+        Args:
+            prompt: The input prompt
+            response_schema: JSON schema of the expected value
+            thinking_budget: Budget for thinking/reasoning (provider-specific)
+            
+        Returns:
+            Generated JSON text (callers still parse it tolerantly)
+        """
+        return self.generate_text(prompt, thinking_budget=thinking_budget)
+    
+    def stream_text(self, prompt: str, thinking_budget: int = 1000) -> Iterator[str]:
+        """
+        Generate text and yield it in chunks as it arrives
+        
+        Providers with a streaming API override this; the default yields the
+        complete generate_text result as a single chunk.
+        """
+        yield self.generate_text(prompt, thinking_budget=thinking_budget)
+    
+    def generate_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 1000) -> str:
+        """
+        Generate text from a prompt split into a shared prefix and a per-call suffix
+        
+        Callers use this when many calls share an identical prefix (e.g. all page
+        descriptions of a task). Providers with explicit context caching override
+        it to upload the prefix once; the default sends prefix + suffix, which
+        still benefits from implicit prefix caching where the API has it.
+        
+        Args:
+            prefix: Prompt head, identical across related calls
+            suffix: Call-specific rest of the prompt
+            thinking_budget: Budget for thinking/reasoning (provider-specific)
+            
+        Returns:
+            Generated text content
+        """
+        return self.generate_text(prefix + suffix, thinking_budget=thinking_budget)
+    
+    async def agenerate_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 1000) -> str:
+        """Async variant of generate_with_prefix"""
+        return await self.agenerate_text(prefix + suffix, thinking_budget=thinking_budget)
+    
+    async def agenerate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        """
+        Async variant of generate_text
+        
+        Providers with an async SDK client override this; the default runs
+        generate_text in the event loop's executor.
+        """
+        return await asyncio.to_thread(self.generate_text, prompt, thinking_budget)
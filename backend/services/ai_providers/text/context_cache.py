@@ -0,0 +1,125 @@
+"""
+Handles for provider-side context caches of shared prompt prefixes
+
+A batch of calls that share a long prompt prefix (all page descriptions of a
+task) can upload the prefix once as cached content and reference it by name.
+PrefixCache maps a prefix (by hash) to the provider's cache handle, creating it
+on first use. Concurrent callers with the same prefix wait for a single
+creation; a failed creation is remembered for the TTL so calls fall back to the
+plain prompt instead of retrying the upload every time. Handles that are
+replaced (locally expired or invalidated) are deleted on the provider side so
+they are not billed until their TTL runs out.
+"""
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from services.prompt_budget import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class PrefixCache:
+    """Prefix hash -> provider cache handle, with expiry"""
+
+    def __init__(self, create: Callable[[str, int], str], ttl_seconds: int = 300,
+                 min_tokens: int = 4096, expiry_margin: float = 30.0,
+                 delete: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            create: Uploads a prefix with the given TTL (seconds) and returns its handle
+            ttl_seconds: Lifetime of a cache entry on the provider side
+            min_tokens: Shorter prefixes are not cached (providers have a minimum size)
+            expiry_margin: Stop handing out a handle this many seconds before it expires
+            delete: Deletes a handle on the provider side (optional, best effort)
+        """
+        self.create = create
+        self.delete = delete
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.expiry_margin = expiry_margin
+        # key -> (handle or None if creation failed, local expiry time)
+        self._entries: Dict[str, Tuple[Optional[str], float]] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(prefix: str) -> str:
+        return hashlib.sha256(prefix.encode('utf-8')).hexdigest()
+
+    def _valid_entry(self, key: str) -> Optional[Tuple[Optional[str], float]]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry
+        return None
+
+    def get(self, prefix: str) -> Optional[str]:
+        """
+        Handle for the prefix, uploading it on first use
+
+        Returns:
+            Cache handle, or None if the prefix is too short or caching failed
+        """
+        if estimate_tokens(prefix) < self.min_tokens:
+            return None
+        key = self._key(prefix)
+        with self._lock:
+            entry = self._valid_entry(key)
+            if entry is not None:
+                return entry[0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._valid_entry(key)
+            if entry is not None:
+                return entry[0]
+
+            expires_at = time.monotonic() + self.ttl_seconds - self.expiry_margin
+            try:
+                handle = self.create(prefix, self.ttl_seconds)
+                logger.info(f"Created context cache {handle} for a ~{estimate_tokens(prefix)} token prompt prefix")
+            except Exception as e:
+                handle = None
+                logger.warning(f"Context cache creation failed, sending full prompts: {type(e).__name__}: {e}")
+
+            replaced = []
+            with self._lock:
+                now = time.monotonic()
+                for stale in [k for k, (_, expiry) in self._entries.items() if expiry <= now]:
+                    replaced.append(self._entries.pop(stale)[0])
+                    if stale != key:
+                        self._key_locks.pop(stale, None)
+                self._entries[key] = (handle, expires_at)
+                self._key_locks.setdefault(key, key_lock)
+            for old_handle in replaced:
+                self._discard(old_handle)
+            return handle
+
+    def invalidate(self, prefix: str, handle: Optional[str] = None):
+        """
+        Forget (and delete) the handle for a prefix, e.g. after the provider rejected it
+
+        Args:
+            prefix: Prompt prefix
+            handle: Only invalidate if this is still the current handle (another
+                caller may already have replaced it)
+        """
+        with self._lock:
+            key = self._key(prefix)
+            entry = self._entries.get(key)
+            if entry is None or (handle is not None and entry[0] != handle):
+                return
+            del self._entries[key]
+        self._discard(entry[0])
+
+    def _discard(self, handle: Optional[str]):
+        """Delete a replaced handle on the provider side (errors are ignored)"""
+        if handle is None or self.delete is None:
+            return
+        try:
+            self.delete(handle)
+        except Exception as e:
+            logger.debug(f"Deleting context cache {handle} failed: {type(e).__name__}: {e}")
@@ -5,11 +5,16 @@ Supports two modes:
 - Google AI Studio: Uses API key authentication
 - Vertex AI: Uses GCP service account authentication
 """
+import asyncio
 import logging
+from io import BytesIO
+from typing import Any, Dict, Iterator, Optional, Union
 from google import genai
 from google.genai import types
+from PIL import Image
 from tenacity import retry, stop_after_attempt, wait_exponential
 from .base import TextProvider
+from .context_cache import PrefixCache
 from config import get_config
 
 logger = logging.getLogger(__name__)
@@ -62,6 +67,15 @@ class GenAITextProvider(TextProvider):
             )
 
         self.model = model
+        
+        # 共享前缀的显式上下文缓存（同一前缀只上传一次，调用时按名称引用）
+        config = get_config()
+        self.prefix_cache = PrefixCache(
+            self._create_cached_content,
+            ttl_seconds=config.GENAI_CONTEXT_CACHE_TTL,
+            min_tokens=config.GENAI_CONTEXT_CACHE_MIN_TOKENS,
+            delete=self._delete_cached_content
+        ) if config.GENAI_CONTEXT_CACHE_ENABLED else None
     
     @retry(
         stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
@@ -81,41 +95,213 @@ class GenAITextProvider(TextProvider):
         response = self.client.models.generate_content(
             model=self.model,
             contents=prompt,
-            config=types.GenerateContentConfig(
-                thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget),
+            config=self._generate_config(thinking_budget),
+        )
+        return response.text
+    
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10)
+    )
+    def generate_structured(self, prompt: str, response_schema: Dict[str, Any],
+                            thinking_budget: int = 1000) -> str:
+        """
+        Generate JSON using the SDK's structured output (response_json_schema)
+        
+        Args:
+            prompt: The input prompt
+            response_schema: JSON schema of the expected value
+            thinking_budget: Thinking budget for the model
+            
+        Returns:
+            Generated JSON text
+        """
+        response = self.client.models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config=self._generate_config(thinking_budget, response_schema),
+        )
+        return response.text
+    
+    def stream_text(self, prompt: str, thinking_budget: int = 1000) -> Iterator[str]:
+        """
+        Stream text using Google GenAI SDK (generate_content_stream)
+        
+        Not retried: chunks may already have been consumed when an error occurs.
+        
+        Args:
+            prompt: The input prompt
+            thinking_budget: Thinking budget for the model
+            
+        Yields:
+            Text chunks in order
+        """
+        for chunk in self.client.models.generate_content_stream(
+            model=self.model,
+            contents=prompt,
+            config=self._generate_config(thinking_budget),
+        ):
+            if chunk.text:
+                yield chunk.text
+    
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10)
+    )
+    async def agenerate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        """
+        Generate text using the SDK's async client (client.aio)
+        
+        Args:
+            prompt: The input prompt
+            thinking_budget: Thinking budget for the model
+            
+        Returns:
+            Generated text
+        """
+        response = await self.client.aio.models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config=self._generate_config(thinking_budget),
+        )
+        return response.text
+    
+    def _create_cached_content(self, prefix: str, ttl_seconds: int) -> str:
+        """Upload a prompt prefix as cached content and return its name"""
+        cache = self.client.caches.create(
+            model=self.model,
+            config=types.CreateCachedContentConfig(
+                contents=[prefix],
+                ttl=f"{ttl_seconds}s",
+                display_name='shared-prompt-prefix',
             ),
         )
+        return cache.name
+    
+    def _delete_cached_content(self, name: str):
+        """Delete cached content that has been replaced"""
+        self.client.caches.delete(name=name)
+    
+    @staticmethod
+    def _is_cached_content_error(error: Exception) -> bool:
+        """
+        True if a request failed because its cached content is gone (not found / expired)
+        
+        Other errors (429, 5xx, timeouts) keep the handle so retries reuse it.
+        """
+        message = str(error).lower()
+        if 'cachedcontent' not in message.replace(' ', '').replace('_', ''):
+            return False
+        return getattr(error, 'code', None) in (403, 404) or 'not found' in message or 'expired' in message
+    
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10)
+    )
+    def generate_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 1000) -> str:
+        """
+        Generate text with the prefix served from an explicit context cache
+        
+        The prefix is uploaded once (per TTL) and referenced by name; prefixes
+        below GENAI_CONTEXT_CACHE_MIN_TOKENS, or when caching is unavailable,
+        are sent inline with the suffix.
+        
+        Args:
+            prefix: Prompt head, identical across related calls
+            suffix: Call-specific rest of the prompt
+            thinking_budget: Thinking budget for the model
+            
+        Returns:
+            Generated text
+        """
+        cached_content = self.prefix_cache.get(prefix) if self.prefix_cache else None
+        if cached_content is None:
+            contents, config = prefix + suffix, self._generate_config(thinking_budget)
+        else:
+            contents, config = suffix, self._generate_config(thinking_budget, cached_content=cached_content)
+        try:
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=contents,
+                config=config,
+            )
+        except Exception as e:
+            if cached_content is not None and self._is_cached_content_error(e):
+                # 缓存已过期或被删除：重试时重新创建（限流等其他错误继续使用原缓存）
+                self.prefix_cache.invalidate(prefix, cached_content)
+            raise
         return response.text
     
     @retry(
         stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
         wait=wait_exponential(multiplier=1, min=2, max=10)
     )
-    def generate_with_image(self, prompt: str, image_path: str, thinking_budget: int = 1000) -> str:
+    async def agenerate_with_prefix(self, prefix: str, suffix: str, thinking_budget: int = 1000) -> str:
+        """Async variant of generate_with_prefix (the one-time upload runs in a worker thread)"""
+        cached_content = await asyncio.to_thread(self.prefix_cache.get, prefix) if self.prefix_cache else None
+        if cached_content is None:
+            contents, config = prefix + suffix, self._generate_config(thinking_budget)
+        else:
+            contents, config = suffix, self._generate_config(thinking_budget, cached_content=cached_content)
+        try:
+            response = await self.client.aio.models.generate_content(
+                model=self.model,
+                contents=contents,
+                config=config,
+            )
+        except Exception as e:
+            if cached_content is not None and self._is_cached_content_error(e):
+                await asyncio.to_thread(self.prefix_cache.invalidate, prefix, cached_content)
+            raise
+        return response.text
+    
+    @staticmethod
+    def _generate_config(thinking_budget: int,
+                         response_schema: Optional[Dict[str, Any]] = None,
+                         cached_content: Optional[str] = None) -> types.GenerateContentConfig:
+        """Build the request config for text generation (JSON mode when a schema is given)"""
+        options = {'thinking_config': types.ThinkingConfig(thinking_budget=thinking_budget)}
+        if response_schema is not None:
+            options.update(response_mime_type='application/json', response_json_schema=response_schema)
+        if cached_content is not None:
+            options['cached_content'] = cached_content
+        return types.GenerateContentConfig(**options)
+    
+    @retry(
+        stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
+        wait=wait_exponential(multiplier=1, min=2, max=10)
+    )
+    def generate_with_image(self, prompt: str, image: Union[str, bytes, Image.Image],
+                            thinking_budget: int = 1000,
+                            response_schema: Optional[Dict[str, Any]] = None) -> str:
         """
         Generate text with image input using Google GenAI SDK (multimodal)
         
         Args:
             prompt: The input prompt
-            image_path: Path to the image file
+            image: Image file path, encoded image bytes, or PIL Image object.
+                In-memory images are passed to the SDK directly without a temp file.
             thinking_budget: Thinking budget for the model
+            response_schema: Optional JSON schema; if given, the response is constrained JSON
             
         Returns:
             Generated text
         """
-        from PIL import Image
-        
-        # 加载图片
-        img = Image.open(image_path)
+        if isinstance(image, bytes):
+            # 已编码的图片字节直接作为 Part 传入，避免解码后再重新编码
+            image_format = Image.open(BytesIO(image)).format or 'PNG'
+            image_part = types.Part.from_bytes(data=image, mime_type=f"image/{image_format.lower()}")
+        elif isinstance(image, Image.Image):
+            image_part = image
+        else:
+            image_part = Image.open(image)
         
         # 构建多模态内容
-        contents = [img, prompt]
+        contents = [image_part, prompt]
         
         response = self.client.models.generate_content(
             model=self.model,
             contents=contents,
-            config=types.GenerateContentConfig(
-                thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget),
-            ),
+            config=self._generate_config(thinking_budget, response_schema),
         )
-        return response.text
\ No newline at end of file
+        return response.text
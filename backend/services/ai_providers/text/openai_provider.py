@@ -1,8 +1,12 @@
 """
 OpenAI SDK implementation for text generation
 """
+import base64
 import logging
-from openai import OpenAI
+from io import BytesIO
+from typing import Any, Dict, Iterator, Optional, Union
+from openai import AsyncOpenAI, OpenAI
+from PIL import Image
 from .base import TextProvider
 from config import get_config
 
@@ -27,6 +31,13 @@ class OpenAITextProvider(TextProvider):
             timeout=get_config().OPENAI_TIMEOUT,  # set timeout from config
             max_retries=get_config().OPENAI_MAX_RETRIES  # set max retries from config
         )
+        # Async client for the event-loop runner (same settings)
+        self.async_client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=api_base,
+            timeout=get_config().OPENAI_TIMEOUT,
+            max_retries=get_config().OPENAI_MAX_RETRIES
+        )
         self.model = model
     
     def generate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
@@ -47,3 +58,140 @@ class OpenAITextProvider(TextProvider):
             ]
         )
         return response.choices[0].message.content
+    
+    def generate_structured(self, prompt: str, response_schema: Dict[str, Any],
+                            thinking_budget: int = 1000) -> str:
+        """
+        Generate JSON using structured outputs (response_format=json_schema)
+        
+        Args:
+            prompt: The input prompt
+            response_schema: JSON schema of the expected value
+            thinking_budget: Not used in OpenAI format, kept for interface compatibility
+            
+        Returns:
+            Generated JSON text
+        """
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            response_format=self._response_format(response_schema)
+        )
+        return response.choices[0].message.content
+    
+    def stream_text(self, prompt: str, thinking_budget: int = 1000) -> Iterator[str]:
+        """
+        Stream text using OpenAI SDK (stream=True)
+        
+        Args:
+            prompt: The input prompt
+            thinking_budget: Not used in OpenAI format, kept for interface compatibility
+            
+        Yields:
+            Text chunks in order
+        """
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    async def agenerate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+        """
+        Generate text using the async OpenAI client
+        
+        Args:
+            prompt: The input prompt
+            thinking_budget: Not used in OpenAI format, kept for interface compatibility
+            
+        Returns:
+            Generated text
+        """
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        )
+        return response.choices[0].message.content
+    
+    def generate_with_image(self, prompt: str, image: Union[str, bytes, Image.Image],
+                            thinking_budget: int = 1000,
+                            response_schema: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Generate text with image input using OpenAI SDK (multimodal)
+        
+        Args:
+            prompt: The input prompt
+            image: Image file path, encoded image bytes, or PIL Image object
+            thinking_budget: Not used in OpenAI format, kept for interface compatibility
+            response_schema: Optional JSON schema; if given, the response is constrained JSON
+            
+        Returns:
+            Generated text
+        """
+        extra_args = {}
+        if response_schema is not None:
+            extra_args['response_format'] = self._response_format(response_schema)
+        
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "image_url", "image_url": {"url": self._to_data_url(image)}},
+                        {"type": "text", "text": prompt},
+                    ]
+                }
+            ],
+            **extra_args
+        )
+        return response.choices[0].message.content
+    
+    @staticmethod
+    def _response_format(response_schema: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build a json_schema response_format
+        
+        Structured outputs require an object at the root, so other schemas are
+        wrapped as {"items": ...}; AIService unwraps single-key objects when an
+        array is expected.
+        """
+        if response_schema.get("type") != "object":
+            response_schema = {
+                "type": "object",
+                "properties": {"items": response_schema},
+                "required": ["items"],
+            }
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": "response", "schema": response_schema, "strict": False},
+        }
+    
+    @staticmethod
+    def _to_data_url(image: Union[str, bytes, Image.Image]) -> str:
+        """
+        Encode an image as a data URL
+        
+        File contents and raw bytes are forwarded as-is; only PIL images are encoded (PNG).
+        """
+        if isinstance(image, Image.Image):
+            buffered = BytesIO()
+            image.save(buffered, format="PNG")
+            data = buffered.getvalue()
+        elif isinstance(image, bytes):
+            data = image
+        else:
+            with open(image, 'rb') as f:
+                data = f.read()
+        
+        image_format = (Image.open(BytesIO(data)).format or 'PNG').lower()
+        return f"data:image/{image_format};base64,{base64.b64encode(data).decode('utf-8')}"
@@ -1,29 +1,42 @@
 """
 AI Service - handles all AI model interactions
 Based on demo.py and gemini_genai.py
-TODO: use structured output API
 """
 import os
 import json
+import asyncio
 import re
 import logging
-import requests
-from typing import List, Dict, Optional, Union
+import threading
+from io import BytesIO
+from typing import Any, Iterator, List, Dict, Optional, Tuple, Union
 from textwrap import dedent
 from PIL import Image
 from tenacity import retry, stop_after_attempt, retry_if_exception_type
 from .prompts import (
     get_outline_generation_prompt,
     get_outline_parsing_prompt,
-    get_page_description_prompt,
+    get_page_description_prompt_parts,
+    get_page_descriptions_batch_prompt_parts,
     get_image_generation_prompt,
     get_image_edit_prompt,
     get_description_to_outline_prompt,
     get_description_split_prompt,
     get_outline_refinement_prompt,
-    get_descriptions_refinement_prompt
+    get_descriptions_refinement_prompt,
+    OUTLINE_SCHEMA,
+    DESCRIPTIONS_SCHEMA,
+    BATCH_PAGE_DESCRIPTIONS_SCHEMA
 )
-from .ai_providers import get_text_provider, get_image_provider, TextProvider, ImageProvider
+from utils.json_stream import JSONArrayStreamParser
+from utils.json_repair import parse_json_response
+from .ai_providers import (
+    get_text_provider, get_image_provider, get_provider_format, get_fallback_formats,
+    TextProvider, ImageProvider
+)
+from .ai_providers.fallback import FallbackTextProvider, FallbackImageProvider
+from .http_session import get_http_session
+from .reference_index import ReferenceIndex
 from config import get_config
 
 logger = logging.getLogger(__name__)
@@ -53,6 +66,42 @@ class ProjectContext:
             self.creation_type = project_or_dict.get('creation_type', 'idea')
         
         self.reference_files_content = reference_files_content or []
+        self._reference_index: Optional[ReferenceIndex] = None
+        self._reference_index_lock = threading.Lock()
+    
+    @property
+    def reference_index(self) -> ReferenceIndex:
+        """参考文件片段的 BM25 索引（首次使用时构建，同一任务的各页共用）"""
+        with self._reference_index_lock:
+            if self._reference_index is None:
+                self._reference_index = ReferenceIndex(
+                    self.reference_files_content, chunk_tokens=get_config().REFERENCE_CHUNK_TOKENS
+                )
+            return self._reference_index
+    
+    def get_relevant_reference_files(self, query: str) -> List[Dict[str, str]]:
+        """
+        选取与查询最相关的参考文件片段（不超过 REFERENCE_TOP_K 个、REFERENCE_TOKEN_BUDGET 个 token）
+        
+        参考文件总量本身不超过预算，或预算为 0（关闭检索）时，返回全部参考文件内容
+        
+        Args:
+            query: 检索查询（如页面标题与要点）
+            
+        Returns:
+            与 reference_files_content 相同结构的列表（'filename' 与 'content'）
+        """
+        if self.reference_files_fit_budget():
+            return self.reference_files_content
+        config = get_config()
+        return self.reference_index.select(query, top_k=config.REFERENCE_TOP_K, token_budget=config.REFERENCE_TOKEN_BUDGET)
+    
+    def reference_files_fit_budget(self) -> bool:
+        """参考文件总量不超过 REFERENCE_TOKEN_BUDGET（或关闭检索）时，每页都附带全部参考文件"""
+        if not self.reference_files_content:
+            return True
+        budget = get_config().REFERENCE_TOKEN_BUDGET
+        return budget <= 0 or self.reference_index.total_tokens <= budget
     
     def to_dict(self) -> Dict:
         """转换为字典，方便传递"""
@@ -92,9 +141,36 @@ class AIService:
             self.text_model = config.TEXT_MODEL
             self.image_model = config.IMAGE_MODEL
         
-        # Use provided providers or create from factory based on AI_PROVIDER_FORMAT (from Flask config or env var)
-        self.text_provider = text_provider or get_text_provider(model=self.text_model)
-        self.image_provider = image_provider or get_image_provider(model=self.image_model)
+        # Use provided providers or create from factory based on AI_PROVIDER_FORMAT (from Flask config or env var),
+        # followed by AI_FALLBACK_FORMATS, each guarded by a circuit breaker
+        self.text_provider = text_provider or FallbackTextProvider(
+            self._provider_chain('text', get_text_provider, self.text_model)
+        )
+        self.image_provider = image_provider or FallbackImageProvider(
+            self._provider_chain('image', get_image_provider, self.image_model)
+        )
+        self.structured_output = config.AI_STRUCTURED_OUTPUT
+    
+    @staticmethod
+    def _provider_chain(kind: str, factory, model: str) -> List[tuple]:
+        """
+        Build (breaker name, provider) pairs for the primary format and the configured fallbacks
+        
+        Fallback formats without the required configuration are skipped.
+        
+        Raises:
+            ValueError: If the primary format is not configured
+        """
+        primary = get_provider_format()
+        chain = [(f"{kind}:{primary}", factory(model=model, provider_format=primary))]
+        for provider_format in get_fallback_formats():
+            if provider_format == primary or any(name == f"{kind}:{provider_format}" for name, _ in chain):
+                continue
+            try:
+                chain.append((f"{kind}:{provider_format}", factory(model=model, provider_format=provider_format)))
+            except ValueError as e:
+                logger.warning(f"Skipping fallback {kind} provider '{provider_format}': {e}")
+        return chain
     
     @staticmethod
     def extract_image_urls_from_markdown(text: str) -> List[str]:
@@ -157,45 +233,49 @@ class AIService:
         retry=retry_if_exception_type((json.JSONDecodeError, ValueError)),
         reraise=True
     )
-    def generate_json(self, prompt: str, thinking_budget: int = 1000) -> Union[Dict, List]:
+    def generate_json(self, prompt: str, thinking_budget: int = 1000,
+                      schema: Optional[Dict] = None) -> Union[Dict, List]:
         """
-        生成并解析JSON，如果解析失败则重新生成
+        生成并解析JSON
+        
+        提供 schema 时使用 provider 的结构化输出约束生成结果；解析时先在本地修复
+        常见格式问题（代码块标记、尾随逗号、输出截断等），仍无法解析或结构不符时才重新生成
         
         Args:
             prompt: 生成提示词
             thinking_budget: 思考预算
+            schema: 期望结果的 JSON Schema（可选）
             
         Returns:
             解析后的JSON对象（字典或列表）
             
         Raises:
-            json.JSONDecodeError: JSON解析失败（重试3次后仍失败）
+            json.JSONDecodeError / ValueError: JSON解析失败（重试3次后仍失败）
         """
         # 调用AI生成文本
-        response_text = self.text_provider.generate_text(prompt, thinking_budget=thinking_budget)
-        
-        # 清理响应文本：移除markdown代码块标记和多余空白
-        cleaned_text = response_text.strip().strip("```json").strip("```").strip()
+        if schema is not None and self.structured_output:
+            response_text = self.text_provider.generate_structured(prompt, schema, thinking_budget=thinking_budget)
+        else:
+            response_text = self.text_provider.generate_text(prompt, thinking_budget=thinking_budget)
         
-        try:
-            return json.loads(cleaned_text)
-        except json.JSONDecodeError as e:
-            logger.warning(f"JSON解析失败，将重新生成。原始文本: {cleaned_text[:200]}... 错误: {str(e)}")
-            raise
+        return self._parse_json_response(response_text, schema)
     
     @retry(
         stop=stop_after_attempt(3),
         retry=retry_if_exception_type((json.JSONDecodeError, ValueError)),
         reraise=True
     )
-    def generate_json_with_image(self, prompt: str, image_path: str, thinking_budget: int = 1000) -> Union[Dict, List]:
+    def generate_json_with_image(self, prompt: str, image: Union[str, bytes, Image.Image],
+                                 thinking_budget: int = 1000,
+                                 schema: Optional[Dict] = None) -> Union[Dict, List]:
         """
-        带图片输入的JSON生成，如果解析失败则重新生成（最多重试3次）
+        带图片输入的JSON生成，本地修复后仍解析失败则重新生成（最多重试3次）
         
         Args:
             prompt: 生成提示词
-            image_path: 图片文件路径
+            image: 图片文件路径、已编码的图片字节或 PIL Image 对象（内存中的图片直接传给 provider，无需临时文件）
             thinking_budget: 思考预算
+            schema: 期望结果的 JSON Schema（可选，provider 支持时用于结构化输出）
             
         Returns:
             解析后的JSON对象（字典或列表）
@@ -206,28 +286,74 @@ class AIService:
         """
         # 调用AI生成文本（带图片）
         if hasattr(self.text_provider, 'generate_with_image'):
+            structured_args = {'response_schema': schema} if schema is not None and self.structured_output else {}
             response_text = self.text_provider.generate_with_image(
                 prompt=prompt,
-                image_path=image_path,
-                thinking_budget=thinking_budget
+                image=image,
+                thinking_budget=thinking_budget,
+                **structured_args
             )
         elif hasattr(self.text_provider, 'generate_text_with_images'):
             response_text = self.text_provider.generate_text_with_images(
                 prompt=prompt,
-                images=[image_path],
+                images=[image],
                 thinking_budget=thinking_budget
             )
         else:
             raise ValueError("text_provider 不支持图片输入")
         
-        # 清理响应文本：移除markdown代码块标记和多余空白
-        cleaned_text = response_text.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+        return self._parse_json_response(response_text, schema)
+    
+    @staticmethod
+    def _parse_json_response(response_text: str, schema: Optional[Dict] = None) -> Union[Dict, List]:
+        """
+        容错解析模型返回的JSON，并按 schema 检查顶层类型
+        
+        期望数组但返回了只含一个数组字段的对象时（如 {"items": [...]}），取出该数组
         
+        Raises:
+            json.JSONDecodeError: 修复后仍无法解析
+            ValueError: 顶层类型与 schema 不符
+        """
         try:
-            return json.loads(cleaned_text)
+            result = parse_json_response(response_text)
         except json.JSONDecodeError as e:
-            logger.warning(f"JSON解析失败（带图片），将重新生成。原始文本: {cleaned_text[:200]}... 错误: {str(e)}")
+            logger.warning(f"JSON解析失败，将重新生成。原始文本: {(response_text or '')[:200]}... 错误: {str(e)}")
             raise
+        
+        expected_type = (schema or {}).get('type')
+        if expected_type == 'array' and isinstance(result, dict):
+            arrays = [value for value in result.values() if isinstance(value, list)]
+            if len(arrays) == 1:
+                result = arrays[0]
+        
+        if (expected_type == 'array' and not isinstance(result, list)) or \
+                (expected_type == 'object' and not isinstance(result, dict)):
+            logger.warning(f"JSON结构不符（期望 {expected_type}），将重新生成。原始文本: {(response_text or '')[:200]}...")
+            raise ValueError(f"Expected a JSON {expected_type}, but got: {type(result).__name__}")
+        
+        return result
+    
+    def stream_json_array(self, prompt: str, thinking_budget: int = 1000) -> Iterator[Any]:
+        """
+        流式生成 JSON 数组，每个顶层元素完整后立即产出
+        
+        与 generate_json 不同，已产出的元素无法撤回，因此解析失败时不重新生成
+        
+        Args:
+            prompt: 生成提示词
+            thinking_budget: 思考预算
+            
+        Yields:
+            数组中的元素（按顺序）
+            
+        Raises:
+            ValueError / json.JSONDecodeError: 响应不是完整的 JSON 数组
+        """
+        parser = JSONArrayStreamParser()
+        for chunk in self.text_provider.stream_text(prompt, thinking_budget=thinking_budget):
+            yield from parser.feed(chunk)
+        parser.close()
     
     @staticmethod
     def _convert_mineru_path_to_local(mineru_path: str) -> Optional[str]:
@@ -258,13 +384,14 @@ class AIService:
         """
         try:
             logger.debug(f"Downloading image from URL: {url}")
-            response = requests.get(url, timeout=30, stream=True)
-            response.raise_for_status()
-            
-            # 从响应内容创建 PIL Image
-            image = Image.open(response.raw)
-            # 确保图片被加载
-            image.load()
+            # 读取完整响应体并关闭响应，连接归还到连接池（包括 raise_for_status 失败时）
+            with get_http_session().get(url, timeout=30) as response:
+                response.raise_for_status()
+                
+                # 从响应内容创建 PIL Image
+                image = Image.open(BytesIO(response.content))
+                # 确保图片被加载
+                image.load()
             logger.debug(f"Successfully downloaded image: {image.size}, {image.mode}")
             return image
         except Exception as e:
@@ -283,9 +410,19 @@ class AIService:
             List of outline items (may contain parts with pages or direct pages)
         """
         outline_prompt = get_outline_generation_prompt(project_context, language)
-        outline = self.generate_json(outline_prompt, thinking_budget=1000)
+        outline = self.generate_json(outline_prompt, thinking_budget=1000, schema=OUTLINE_SCHEMA)
         return outline
     
+    def stream_outline(self, project_context: ProjectContext, language: str = None) -> Iterator[Dict]:
+        """
+        Streaming variant of generate_outline
+        
+        Yields:
+            Top-level outline items (pages or parts with pages) as soon as each is complete
+        """
+        outline_prompt = get_outline_generation_prompt(project_context, language)
+        return self.stream_json_array(outline_prompt, thinking_budget=1000)
+    
     def parse_outline_text(self, project_context: ProjectContext, language: str = None) -> List[Dict]:
         """
         Parse user-provided outline text into structured outline format
@@ -298,9 +435,19 @@ class AIService:
             List of outline items (may contain parts with pages or direct pages)
         """
         parse_prompt = get_outline_parsing_prompt(project_context, language)
-        outline = self.generate_json(parse_prompt, thinking_budget=1000)
+        outline = self.generate_json(parse_prompt, thinking_budget=1000, schema=OUTLINE_SCHEMA)
         return outline
     
+    def stream_parse_outline_text(self, project_context: ProjectContext, language: str = None) -> Iterator[Dict]:
+        """
+        Streaming variant of parse_outline_text
+        
+        Yields:
+            Top-level outline items (pages or parts with pages) as soon as each is complete
+        """
+        parse_prompt = get_outline_parsing_prompt(project_context, language)
+        return self.stream_json_array(parse_prompt, thinking_budget=1000)
+    
     def flatten_outline(self, outline: List[Dict]) -> List[Dict]:
         """
         Flatten outline structure to page list
@@ -320,7 +467,8 @@ class AIService:
         return pages
     
     def generate_page_description(self, project_context: ProjectContext, outline: List[Dict], 
-                                 page_outline: Dict, page_index: int, language='zh') -> str:
+                                 page_outline: Dict, page_index: int, language='zh',
+                                 shared_prefix: bool = False) -> str:
         """
         Generate description for a single page
         Based on demo.py gen_desc() logic
@@ -330,13 +478,162 @@ class AIService:
             outline: Complete outline
             page_outline: Outline for this specific page
             page_index: Page number (1-indexed)
+            shared_prefix: True when generating many pages of the same outline; the
+                common prompt prefix is then passed separately so the provider can cache it
         
         Returns:
             Text description for the page
         """
+        prefix, suffix = self._build_page_description_parts(
+            project_context, outline, page_outline, page_index, language
+        )
+        
+        if shared_prefix:
+            response_text = self.text_provider.generate_with_prefix(prefix, suffix, thinking_budget=1000)
+        else:
+            response_text = self.text_provider.generate_text(prefix + suffix, thinking_budget=1000)
+        
+        return dedent(response_text)
+    
+    def stream_page_description(self, project_context: ProjectContext, outline: List[Dict],
+                                page_outline: Dict, page_index: int, language='zh') -> Iterator[str]:
+        """
+        Streaming variant of generate_page_description
+        
+        Yields:
+            Raw text chunks (join and dedent them to get the same result as generate_page_description)
+        """
+        prefix, suffix = self._build_page_description_parts(
+            project_context, outline, page_outline, page_index, language
+        )
+        return self.text_provider.stream_text(prefix + suffix, thinking_budget=1000)
+    
+    async def agenerate_page_description(self, project_context: ProjectContext, outline: List[Dict],
+                                         page_outline: Dict, page_index: int, language='zh',
+                                         shared_prefix: bool = False) -> str:
+        """
+        Async variant of generate_page_description (awaits the provider's async client)
+        """
+        # Building the prompt may index and rank the reference files, so keep it off the event loop
+        prefix, suffix = await asyncio.to_thread(
+            self._build_page_description_parts, project_context, outline, page_outline, page_index, language
+        )
+        
+        if shared_prefix:
+            response_text = await self.text_provider.agenerate_with_prefix(prefix, suffix, thinking_budget=1000)
+        else:
+            response_text = await self.text_provider.agenerate_text(prefix + suffix, thinking_budget=1000)
+        
+        return dedent(response_text)
+    
+    def generate_page_descriptions_batch(self, project_context: ProjectContext, outline: List[Dict],
+                                         pages: List[Tuple[Dict, int]], language='zh') -> Dict[int, str]:
+        """
+        Generate descriptions for several pages with a single request
+        
+        The request shares its prompt prefix with the single-page prompts, so a
+        provider context cache serves both. Pages missing from the JSON response
+        or with a malformed entry (all pages, if the request or its JSON fails)
+        are generated again one by one with generate_page_description.
+        
+        Args:
+            project_context: 项目上下文对象，包含所有原始信息
+            outline: Complete outline
+            pages: (page outline, page number) pairs, page numbers 1-indexed
+            language: Output language
+        
+        Returns:
+            {page number: description}; pages whose per-page fallback also failed are left out
+        """
+        prefix, suffix = get_page_descriptions_batch_prompt_parts(project_context, outline, pages, language)
+        try:
+            response_text = self.text_provider.generate_with_prefix(prefix, suffix, thinking_budget=1000)
+            descriptions = self._parse_batch_descriptions(response_text, pages)
+        except Exception as e:
+            logger.warning(f"Batch description request for {len(pages)} pages failed, "
+                           f"falling back to per-page requests: {type(e).__name__}: {e}")
+            descriptions = {}
+        
+        for page_outline, page_index in pages:
+            if page_index in descriptions:
+                continue
+            try:
+                descriptions[page_index] = self.generate_page_description(
+                    project_context, outline, page_outline, page_index, language=language, shared_prefix=True
+                )
+            except Exception as e:
+                logger.error(f"Failed to generate description for page {page_index}: {type(e).__name__}: {e}",
+                             exc_info=True)
+        return descriptions
+    
+    async def agenerate_page_descriptions_batch(self, project_context: ProjectContext, outline: List[Dict],
+                                                pages: List[Tuple[Dict, int]], language='zh') -> Dict[int, str]:
+        """
+        Async variant of generate_page_descriptions_batch (fallback pages are requested concurrently)
+        """
+        prefix, suffix = await asyncio.to_thread(
+            get_page_descriptions_batch_prompt_parts, project_context, outline, pages, language
+        )
+        try:
+            response_text = await self.text_provider.agenerate_with_prefix(prefix, suffix, thinking_budget=1000)
+            descriptions = self._parse_batch_descriptions(response_text, pages)
+        except Exception as e:
+            logger.warning(f"Batch description request for {len(pages)} pages failed, "
+                           f"falling back to per-page requests: {type(e).__name__}: {e}")
+            descriptions = {}
+        
+        missing = [(page_outline, page_index) for page_outline, page_index in pages if page_index not in descriptions]
+        results = await asyncio.gather(*[
+            self.agenerate_page_description(project_context, outline, page_outline, page_index,
+                                            language=language, shared_prefix=True)
+            for page_outline, page_index in missing
+        ], return_exceptions=True)
+        for (_, page_index), result in zip(missing, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to generate description for page {page_index}: {type(result).__name__}: {result}",
+                             exc_info=result)
+            else:
+                descriptions[page_index] = result
+        return descriptions
+    
+    @classmethod
+    def _parse_batch_descriptions(cls, response_text: str, pages: List[Tuple[Dict, int]]) -> Dict[int, str]:
+        """
+        Valid {page number: description} entries of a batch response
+        
+        Entries for pages not in the batch, duplicates (the first one wins) and
+        empty or non-string descriptions are dropped.
+        
+        Raises:
+            json.JSONDecodeError / ValueError: The response is not a JSON array
+        """
+        wanted = {page_index for _, page_index in pages}
+        descriptions = {}
+        for item in cls._parse_json_response(response_text, BATCH_PAGE_DESCRIPTIONS_SCHEMA):
+            if not isinstance(item, dict):
+                continue
+            page_index, description = item.get('page_index'), item.get('description')
+            if isinstance(page_index, str) and page_index.strip().isdigit():
+                page_index = int(page_index)
+            if not isinstance(page_index, int) or isinstance(page_index, bool) or \
+                    page_index not in wanted or page_index in descriptions:
+                continue
+            if not isinstance(description, str) or not description.strip():
+                continue
+            descriptions[page_index] = dedent(description)
+        
+        missing = sorted(wanted - descriptions.keys())
+        if missing:
+            logger.warning(f"Batch description response is missing or malformed for pages {missing}")
+        return descriptions
+    
+    @staticmethod
+    def _build_page_description_parts(project_context: ProjectContext, outline: List[Dict],
+                                      page_outline: Dict, page_index: int, language='zh') -> tuple:
+        """Build the description prompt for a single page as (shared prefix, page suffix)"""
         part_info = f"\nThis page belongs to: {page_outline['part']}" if 'part' in page_outline else ""
         
-        desc_prompt = get_page_description_prompt(
+        return get_page_description_prompt_parts(
             project_context=project_context,
             outline=outline,
             page_outline=page_outline,
@@ -344,10 +641,6 @@ class AIService:
             part_info=part_info,
             language=language
         )
-        
-        response_text = self.text_provider.generate_text(desc_prompt, thinking_budget=1000)
-        
-        return dedent(response_text)
     
     def generate_outline_text(self, outline: List[Dict]) -> str:
         """
@@ -411,7 +704,7 @@ class AIService:
         
         return prompt
     
-    def generate_image(self, prompt: str, ref_image_path: Optional[str] = None, 
+    def generate_image(self, prompt: str, ref_image_path: Optional[Union[str, Image.Image]] = None, 
                       aspect_ratio: str = "16:9", resolution: str = "2K",
                       additional_ref_images: Optional[List[Union[str, Image.Image]]] = None) -> Optional[Image.Image]:
         """
@@ -420,7 +713,8 @@ class AIService:
         
         Args:
             prompt: Image generation prompt
-            ref_image_path: Path to reference image (optional). If None, will generate based on prompt only.
+            ref_image_path: Path to reference image or an in-memory PIL Image (optional).
+                If None, will generate based on prompt only.
             aspect_ratio: Image aspect ratio
             resolution: Image resolution (note: OpenAI format only supports 1K)
             additional_ref_images: 额外的参考图片列表，可以是本地路径、URL 或 PIL Image 对象
@@ -432,51 +726,7 @@ class AIService:
             Exception with detailed error message if generation fails
         """
         try:
-            logger.debug(f"Reference image: {ref_image_path}")
-            if additional_ref_images:
-                logger.debug(f"Additional reference images: {len(additional_ref_images)}")
-            logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}")
-
-            # 构建参考图片列表
-            ref_images = []
-            
-            # 添加主参考图片（如果提供了路径）
-            if ref_image_path:
-                if not os.path.exists(ref_image_path):
-                    raise FileNotFoundError(f"Reference image not found: {ref_image_path}")
-                main_ref_image = Image.open(ref_image_path)
-                ref_images.append(main_ref_image)
-            
-            # 添加额外的参考图片
-            if additional_ref_images:
-                for ref_img in additional_ref_images:
-                    if isinstance(ref_img, Image.Image):
-                        # 已经是 PIL Image 对象
-                        ref_images.append(ref_img)
-                    elif isinstance(ref_img, str):
-                        # 可能是本地路径或 URL
-                        if os.path.exists(ref_img):
-                            # 本地路径
-                            ref_images.append(Image.open(ref_img))
-                        elif ref_img.startswith('http://') or ref_img.startswith('https://'):
-                            # URL，需要下载
-                            downloaded_img = self.download_image_from_url(ref_img)
-                            if downloaded_img:
-                                ref_images.append(downloaded_img)
-                            else:
-                                logger.warning(f"Failed to download image from URL: {ref_img}, skipping...")
-                        elif ref_img.startswith('/files/mineru/'):
-                            # MinerU 本地文件路径，需要转换为文件系统路径（支持前缀匹配）
-                            local_path = self._convert_mineru_path_to_local(ref_img)
-                            if local_path and os.path.exists(local_path):
-                                ref_images.append(Image.open(local_path))
-                                logger.debug(f"Loaded MinerU image from local path: {local_path}")
-                            else:
-                                logger.warning(f"MinerU image file not found (with prefix matching): {ref_img}, skipping...")
-                        else:
-                            logger.warning(f"Invalid image reference: {ref_img}, skipping...")
-            
-            logger.debug(f"Calling image provider for generation with {len(ref_images)} reference images...")
+            ref_images = self._load_ref_images(ref_image_path, additional_ref_images, aspect_ratio, resolution)
             
             # 使用 image_provider 生成图片
             return self.image_provider.generate_image(
@@ -491,7 +741,91 @@ class AIService:
             logger.error(error_detail, exc_info=True)
             raise Exception(error_detail) from e
     
-    def edit_image(self, prompt: str, current_image_path: str,
+    async def agenerate_image(self, prompt: str, ref_image_path: Optional[Union[str, Image.Image]] = None,
+                              aspect_ratio: str = "16:9", resolution: str = "2K",
+                              additional_ref_images: Optional[List[Union[str, Image.Image]]] = None) -> Optional[Image.Image]:
+        """
+        Async variant of generate_image
+        
+        Reference images are loaded (and downloaded) in the event loop's executor,
+        then the provider's async client is awaited.
+        """
+        try:
+            ref_images = await asyncio.to_thread(
+                self._load_ref_images, ref_image_path, additional_ref_images, aspect_ratio, resolution
+            )
+            
+            return await self.image_provider.agenerate_image(
+                prompt=prompt,
+                ref_images=ref_images if ref_images else None,
+                aspect_ratio=aspect_ratio,
+                resolution=resolution
+            )
+            
+        except Exception as e:
+            error_detail = f"Error generating image: {type(e).__name__}: {str(e)}"
+            logger.error(error_detail, exc_info=True)
+            raise Exception(error_detail) from e
+    
+    def _load_ref_images(self, ref_image_path: Optional[Union[str, Image.Image]],
+                         additional_ref_images: Optional[List[Union[str, Image.Image]]],
+                         aspect_ratio: str, resolution: str) -> List[Image.Image]:
+        """
+        Load the main and additional reference images (local paths, URLs, MinerU paths or PIL Images)
+        
+        Raises:
+            FileNotFoundError: If the main reference image path does not exist
+        """
+        logger.debug(f"Reference image: {ref_image_path}")
+        if additional_ref_images:
+            logger.debug(f"Additional reference images: {len(additional_ref_images)}")
+        logger.debug(f"Config - aspect_ratio: {aspect_ratio}, resolution: {resolution}")
+
+        # 构建参考图片列表
+        ref_images = []
+        
+        # 添加主参考图片（可以是路径或已在内存中的 PIL Image）
+        if isinstance(ref_image_path, Image.Image):
+            ref_images.append(ref_image_path)
+        elif ref_image_path:
+            if not os.path.exists(ref_image_path):
+                raise FileNotFoundError(f"Reference image not found: {ref_image_path}")
+            main_ref_image = Image.open(ref_image_path)
+            ref_images.append(main_ref_image)
+        
+        # 添加额外的参考图片
+        if additional_ref_images:
+            for ref_img in additional_ref_images:
+                if isinstance(ref_img, Image.Image):
+                    # 已经是 PIL Image 对象
+                    ref_images.append(ref_img)
+                elif isinstance(ref_img, str):
+                    # 可能是本地路径或 URL
+                    if os.path.exists(ref_img):
+                        # 本地路径
+                        ref_images.append(Image.open(ref_img))
+                    elif ref_img.startswith('http://') or ref_img.startswith('https://'):
+                        # URL，需要下载
+                        downloaded_img = self.download_image_from_url(ref_img)
+                        if downloaded_img:
+                            ref_images.append(downloaded_img)
+                        else:
+                            logger.warning(f"Failed to download image from URL: {ref_img}, skipping...")
+                    elif ref_img.startswith('/files/mineru/'):
+                        # MinerU 本地文件路径，需要转换为文件系统路径（支持前缀匹配）
+                        local_path = self._convert_mineru_path_to_local(ref_img)
+                        if local_path and os.path.exists(local_path):
+                            ref_images.append(Image.open(local_path))
+                            logger.debug(f"Loaded MinerU image from local path: {local_path}")
+                        else:
+                            logger.warning(f"MinerU image file not found (with prefix matching): {ref_img}, skipping...")
+                    else:
+                        logger.warning(f"Invalid image reference: {ref_img}, skipping...")
+        
+        logger.debug(f"Calling image provider for generation with {len(ref_images)} reference images...")
+        return ref_images
+    
+    def edit_image(self, prompt: str, current_image: Union[str, Image.Image],
                   aspect_ratio: str = "16:9", resolution: str = "2K",
                   original_description: str = None,
                   additional_ref_images: Optional[List[Union[str, Image.Image]]] = None) -> Optional[Image.Image]:
@@ -501,7 +835,7 @@ class AIService:
         
         Args:
             prompt: Edit instruction
-            current_image_path: Path to current page image
+            current_image: Path to current page image, or an in-memory PIL Image
             aspect_ratio: Image aspect ratio
             resolution: Image resolution
             original_description: Original page description to include in prompt
@@ -515,7 +849,7 @@ class AIService:
             edit_instruction=prompt,
             original_description=original_description
         )
-        return self.generate_image(edit_instruction, current_image_path, aspect_ratio, resolution, additional_ref_images)
+        return self.generate_image(edit_instruction, current_image, aspect_ratio, resolution, additional_ref_images)
     
     def parse_description_to_outline(self, project_context: ProjectContext, language='zh') -> List[Dict]:
         """
@@ -528,7 +862,7 @@ class AIService:
             List of outline items (may contain parts with pages or direct pages)
         """
         parse_prompt = get_description_to_outline_prompt(project_context, language)
-        outline = self.generate_json(parse_prompt, thinking_budget=1000)
+        outline = self.generate_json(parse_prompt, thinking_budget=1000, schema=OUTLINE_SCHEMA)
         return outline
     
     def parse_description_to_page_descriptions(self, project_context: ProjectContext, 
@@ -545,7 +879,7 @@ class AIService:
             List of page descriptions (strings), one for each page in the outline
         """
         split_prompt = get_description_split_prompt(project_context, outline, language)
-        descriptions = self.generate_json(split_prompt, thinking_budget=1000)
+        descriptions = self.generate_json(split_prompt, thinking_budget=1000, schema=DESCRIPTIONS_SCHEMA)
         
         # 确保返回的是字符串列表
         if isinstance(descriptions, list):
@@ -576,7 +910,7 @@ class AIService:
             previous_requirements=previous_requirements,
             language=language
         )
-        outline = self.generate_json(refinement_prompt, thinking_budget=1000)
+        outline = self.generate_json(refinement_prompt, thinking_budget=1000, schema=OUTLINE_SCHEMA)
         return outline
     
     def refine_descriptions(self, current_descriptions: List[Dict], user_requirement: str,
@@ -605,11 +939,32 @@ class AIService:
             previous_requirements=previous_requirements,
             language=language
         )
-        descriptions = self.generate_json(refinement_prompt, thinking_budget=1000)
+        descriptions = self.generate_json(refinement_prompt, thinking_budget=1000, schema=DESCRIPTIONS_SCHEMA)
         
         # 确保返回的是字符串列表
         if isinstance(descriptions, list):
             return [str(desc) for desc in descriptions]
         else:
             raise ValueError("Expected a list of page descriptions, but got: " + str(type(descriptions)))
-
+    
+    def stream_refine_descriptions(self, current_descriptions: List[Dict], user_requirement: str,
+                                   project_context: ProjectContext,
+                                   outline: List[Dict] = None,
+                                   previous_requirements: Optional[List[str]] = None,
+                                   language='zh') -> Iterator[str]:
+        """
+        refine_descriptions 的流式版本：每页描述完整后立即产出
+        
+        Yields:
+            修改后的页面描述（字符串，按页面顺序）
+        """
+        refinement_prompt = get_descriptions_refinement_prompt(
+            current_descriptions=current_descriptions,
+            user_requirement=user_requirement,
+            project_context=project_context,
+            outline=outline,
+            previous_requirements=previous_requirements,
+            language=language
+        )
+        for description in self.stream_json_array(refinement_prompt, thinking_budget=1000):
+            yield str(description)
@@ -23,7 +23,11 @@ from threading import Lock
 from typing import Optional
 from flask import current_app, has_app_context
 from .ai_service import AIService
-from .ai_providers import get_text_provider, get_image_provider, TextProvider, ImageProvider
+from .ai_providers import (
+    get_text_provider, get_image_provider, get_provider_format, get_fallback_formats,
+    TextProvider, ImageProvider
+)
+from .ai_providers.fallback import FallbackTextProvider, FallbackImageProvider
 
 logger = logging.getLogger(__name__)
 
@@ -31,48 +35,61 @@ logger = logging.getLogger(__name__)
 _ai_service_instance: Optional[AIService] = None
 _lock = Lock()
 
-# Provider cache to avoid re-initialization when models don't change
+# Provider cache to avoid re-initialization when models don't change.
+# Keyed by (model, AI_PROVIDER_FORMAT, AI_FALLBACK_FORMATS); values are the circuit-breaker
+# guarded fallback chains so every request shares the same breaker state.
 _text_provider_cache: dict = {}
 _image_provider_cache: dict = {}
 _cache_lock = Lock()
 
 
+def _provider_cache_key(model: str) -> tuple:
+    """Cache key for a provider chain: model plus the primary and fallback formats"""
+    return (model, get_provider_format(), tuple(get_fallback_formats()))
+
+
 def _get_cached_text_provider(model: str) -> TextProvider:
     """
-    Get or create a cached text provider instance
+    Get or create a cached text provider chain
     
     Args:
         model: Model name to use
         
     Returns:
-        Cached or new TextProvider instance
+        Cached or new FallbackTextProvider over the primary and fallback formats
     """
+    key = _provider_cache_key(model)
     with _cache_lock:
-        if model not in _text_provider_cache:
-            logger.info(f"Creating new TextProvider for model: {model}")
-            _text_provider_cache[model] = get_text_provider(model=model)
+        if key not in _text_provider_cache:
+            logger.info(f"Creating new TextProvider chain for model: {model}, formats: {key[1:]}")
+            _text_provider_cache[key] = FallbackTextProvider(
+                AIService._provider_chain('text', get_text_provider, model)
+            )
         else:
-            logger.debug(f"Reusing cached TextProvider for model: {model}")
-        return _text_provider_cache[model]
+            logger.debug(f"Reusing cached TextProvider chain for model: {model}")
+        return _text_provider_cache[key]
 
 
 def _get_cached_image_provider(model: str) -> ImageProvider:
     """
-    Get or create a cached image provider instance
+    Get or create a cached image provider chain
     
     Args:
         model: Model name to use
         
     Returns:
-        Cached or new ImageProvider instance
+        Cached or new FallbackImageProvider over the primary and fallback formats
     """
+    key = _provider_cache_key(model)
     with _cache_lock:
-        if model not in _image_provider_cache:
-            logger.info(f"Creating new ImageProvider for model: {model}")
-            _image_provider_cache[model] = get_image_provider(model=model)
+        if key not in _image_provider_cache:
+            logger.info(f"Creating new ImageProvider chain for model: {model}, formats: {key[1:]}")
+            _image_provider_cache[key] = FallbackImageProvider(
+                AIService._provider_chain('image', get_image_provider, model)
+            )
         else:
-            logger.debug(f"Reusing cached ImageProvider for model: {model}")
-        return _image_provider_cache[model]
+            logger.debug(f"Reusing cached ImageProvider chain for model: {model}")
+        return _image_provider_cache[key]
 
 
 def get_ai_service(force_new: bool = False) -> AIService:
@@ -90,8 +107,9 @@ def get_ai_service(force_new: bool = False) -> AIService:
         AIService singleton instance with cached providers
         
     Note:
-        The providers are cached per model name. If TEXT_MODEL or IMAGE_MODEL
-        changes in Flask config, new providers will be created automatically.
+        The provider chains are cached per model name and provider formats. If TEXT_MODEL,
+        IMAGE_MODEL, AI_PROVIDER_FORMAT or AI_FALLBACK_FORMATS changes in Flask config,
+        new chains will be created automatically.
     """
     global _ai_service_instance
     
@@ -166,7 +184,7 @@ def get_provider_cache_info() -> dict:
     """
     with _cache_lock:
         return {
-            "text_providers": list(_text_provider_cache.keys()),
-            "image_providers": list(_image_provider_cache.keys()),
+            "text_providers": [list(key) for key in _text_provider_cache],
+            "image_providers": [list(key) for key in _image_provider_cache],
             "total_cached": len(_text_provider_cache) + len(_image_provider_cache)
         }
@@ -0,0 +1,118 @@
+"""
+Async Runner - shared asyncio event loop for network-bound AI calls
+
+Generation requests spend almost all of their time waiting on the provider
+(up to GENAI_TIMEOUT seconds). Running each one on its own thread ties up a
+thread per in-flight request; the runner instead keeps a single event loop in a
+background thread, so hundreds of requests can be in flight while only a small
+executor pool handles the blocking parts (database access, image decoding,
+file writes).
+
+Usage from synchronous code (e.g. a task thread):
+
+    runner = get_async_runner()
+    futures = runner.map_limited([agenerate(page) for page in pages], limit=8)
+    for future in as_completed(futures):
+        ...
+
+Provider async clients are bound to the loop they first run on, so async
+provider methods must always be awaited on this runner's loop.
+"""
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRunner:
+    """Event loop running in a dedicated background thread"""
+
+    def __init__(self, io_workers: int = 8):
+        """
+        Args:
+            io_workers: Size of the executor used for blocking work (asyncio.to_thread / run_in_app_context)
+        """
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='async-io')
+        )
+        self._thread = threading.Thread(target=self._run, name='async-runner', daemon=True)
+        self._thread.start()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, coro: Awaitable) -> Future:
+        """Schedule a coroutine on the loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block until it finishes"""
+        return self.submit(coro).result(timeout)
+
+    def map_limited(self, coros: Iterable[Awaitable], limit: int) -> List[Future]:
+        """
+        Schedule coroutines with at most `limit` of them running at once
+
+        Returns:
+            One future per coroutine, in input order (use as_completed to consume)
+        """
+        semaphore = asyncio.Semaphore(max(1, limit))
+
+        async def limited(coro):
+            async with semaphore:
+                return await coro
+
+        return [self.submit(limited(coro)) for coro in coros]
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the loop and wait for the thread to exit"""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+
+
+async def run_in_app_context(app, func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking function in the loop's executor inside a Flask app context
+
+    Use for database access and other blocking work from a coroutine.
+    """
+    def call():
+        with app.app_context():
+            return func(*args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(call))
+
+
+# Global runner (created on first use)
+_runner: Optional[AsyncRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_async_runner(io_workers: Optional[int] = None) -> AsyncRunner:
+    """
+    Return the shared runner, starting it on first use
+
+    Args:
+        io_workers: Executor size used when the runner is created (default: Config.AI_ASYNC_IO_WORKERS)
+    """
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                if io_workers is None:
+                    from config import get_config
+                    io_workers = get_config().AI_ASYNC_IO_WORKERS
+                _runner = AsyncRunner(io_workers=io_workers)
+                logger.info(f"Async runner started ({io_workers} executor threads)")
+    return _runner
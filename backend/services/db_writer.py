@@ -0,0 +1,192 @@
+"""
+Database Writer - optional single writer thread that serializes commits
+
+SQLite allows one writer at a time. When many background threads commit
+concurrently they queue on the database lock (up to busy_timeout). With the
+writer enabled, background code submits mutation closures instead; one thread
+runs them in small batches, each batch committed as a single transaction, while
+reads stay concurrent under WAL.
+
+Closures run inside the writer's own session, so they must re-query the rows
+they change by id (never touch ORM objects from the caller's session) and must
+only mutate the database: if one closure in a batch fails, the batch is rolled
+back and the remaining closures are executed again.
+
+When the writer is disabled, ``run_write`` executes the closure inline in the
+caller's session and commits, so call sites work the same either way.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+_WorkItem = Tuple[Callable, tuple, dict, Future]
+
+
+class DatabaseWriter:
+    """Single thread that executes database mutations in batched transactions"""
+
+    def __init__(self, app, max_batch: int = 50, batch_window: float = 0.005):
+        """
+        Args:
+            app: Flask app (the writer runs inside its app context)
+            max_batch: Maximum number of closures committed in one transaction
+            batch_window: Seconds to wait for more closures before committing a batch
+        """
+        self.app = app
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self._queue: "queue.Queue[Optional[_WorkItem]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self._thread.start()
+
+    @property
+    def thread(self) -> threading.Thread:
+        return self._thread
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Queue a mutation closure; the future resolves after its batch is committed"""
+        future: Future = Future()
+        self._queue.put((func, args, kwargs, future))
+        return future
+
+    def stop(self, timeout: Optional[float] = None):
+        """Finish queued work and stop the writer thread"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _next_batch(self, first: _WorkItem) -> Tuple[List[_WorkItem], bool]:
+        """Collect closures queued shortly after `first`; returns (batch, stop_requested)"""
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                batch, stop_requested = self._next_batch(item)
+                try:
+                    self._execute(batch)
+                except Exception as e:
+                    logger.error(f"Database writer failed: {e}", exc_info=True)
+                    for *_, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                finally:
+                    db.session.remove()
+                if stop_requested:
+                    break
+
+    def _execute(self, batch: List[_WorkItem]):
+        """Run a batch in one transaction, isolating closures that fail"""
+        batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+        while batch:
+            results = []
+            failed_index = None
+            for index, (func, args, kwargs, future) in enumerate(batch):
+                try:
+                    results.append(func(*args, **kwargs))
+                except Exception as e:
+                    db.session.rollback()
+                    future.set_exception(e)
+                    failed_index = index
+                    break
+
+            if failed_index is not None:
+                # Retry everything except the failed closure in a fresh transaction
+                batch = batch[:failed_index] + batch[failed_index + 1:]
+                continue
+
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Database writer batch commit failed: {e}", exc_info=True)
+                for *_, future in batch:
+                    future.set_exception(e)
+                return
+
+            for (*_, future), result in zip(batch, results):
+                future.set_result(result)
+            return
+
+
+# Global writer (None when disabled)
+_writer: Optional[DatabaseWriter] = None
+
+
+def init_db_writer(app) -> Optional[DatabaseWriter]:
+    """
+    Start the writer if SQLITE_SINGLE_WRITER is enabled and the database is SQLite
+
+    Returns:
+        The running writer, or None when writes stay inline
+    """
+    global _writer
+    if not app.config.get('SQLITE_SINGLE_WRITER'):
+        return None
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        logger.info("SQLITE_SINGLE_WRITER ignored: database is not SQLite")
+        return None
+    if _writer is None:
+        _writer = DatabaseWriter(
+            app,
+            max_batch=app.config.get('DB_WRITER_MAX_BATCH', 50),
+            batch_window=app.config.get('DB_WRITER_BATCH_WINDOW', 0.005)
+        )
+        logger.info("SQLite single writer thread started")
+    return _writer
+
+
+def get_db_writer() -> Optional[DatabaseWriter]:
+    """Return the global writer, or None when disabled"""
+    return _writer
+
+
+def run_write(func: Callable, *args, **kwargs) -> Any:
+    """
+    Execute a mutation closure and commit it
+
+    Uses the writer thread when enabled (blocking until the batch is committed),
+    otherwise runs inline in the current session. In writer mode a caller session
+    without pending changes is reset afterwards so it re-reads the committed rows.
+
+    Returns:
+        The closure's return value
+    """
+    writer = _writer
+    if writer is not None and threading.current_thread() is writer.thread:
+        # Nested call from a closure: becomes part of the current batch
+        return func(*args, **kwargs)
+    if writer is None:
+        try:
+            result = func(*args, **kwargs)
+            db.session.commit()
+            return result
+        except Exception:
+            db.session.rollback()
+            raise
+    result = writer.submit(func, *args, **kwargs).result()
+    # End the caller's (read-only) transaction so it re-reads the committed rows
+    session = db.session
+    if not (session.new or session.dirty or session.deleted):
+        session.rollback()
+    return result
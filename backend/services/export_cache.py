@@ -0,0 +1,134 @@
+"""
+Export Artifact Cache - reuses built PPTX/PDF files and deduplicates concurrent builds
+
+An export is identified by a key derived from (format, filename, page ids in order,
+current image version of each page, export options). The key of the build that
+produced a file is stored next to it (``<artifact>.key``), so a repeat request
+whose key still matches can return the existing file instantly, and identical
+requests that arrive while a build is running share that build's task.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from models import PageImageVersion
+
+logger = logging.getLogger(__name__)
+
+
+class ExportArtifactCache:
+    """Artifact cache + in-flight registry for image based exports"""
+
+    KEY_SUFFIX = '.key'
+    # Every in-progress build file ends with this suffix, so it is never served as an export
+    TMP_SUFFIX = '.tmp'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._inflight: Dict[str, str] = {}  # cache_key -> task_id
+
+    @staticmethod
+    def build_key(
+        export_format: str,
+        filename: str,
+        pages: List[Any],
+        image_paths: List[str],
+        options: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Build the cache key for an export request
+
+        Args:
+            export_format: 'pptx' or 'pdf'
+            filename: Output filename
+            pages: Page objects being exported, in export order
+            image_paths: Absolute image paths for those pages
+            options: Format specific options that change the output (e.g. dpi)
+
+        Returns:
+            Hex digest identifying the artifact
+        """
+        page_ids = [page.id for page in pages]
+        current_versions = {}
+        if page_ids:
+            rows = PageImageVersion.query.with_entities(
+                PageImageVersion.page_id, PageImageVersion.id
+            ).filter(
+                PageImageVersion.page_id.in_(page_ids),
+                PageImageVersion.is_current.is_(True)
+            ).all()
+            current_versions = {page_id: version_id for page_id, version_id in rows}
+
+        # File stats guard against images replaced in place without a new version row
+        image_stats = []
+        for path in image_paths:
+            try:
+                stat = os.stat(path)
+                image_stats.append([os.path.basename(path), stat.st_mtime_ns, stat.st_size])
+            except OSError:
+                image_stats.append([os.path.basename(path), None, None])
+
+        payload = {
+            'format': export_format,
+            'filename': filename,
+            'pages': [[page_id, current_versions.get(page_id)] for page_id in page_ids],
+            'images': image_stats,
+            'options': options or {},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def lookup(self, artifact_path: str, cache_key: str) -> bool:
+        """Return True if the artifact at artifact_path was built for cache_key"""
+        key_path = artifact_path + self.KEY_SUFFIX
+        if not (os.path.exists(artifact_path) and os.path.exists(key_path)):
+            return False
+        try:
+            with open(key_path, 'r', encoding='utf-8') as f:
+                return f.read().strip() == cache_key
+        except OSError:
+            return False
+
+    def publish(self, tmp_path: str, artifact_path: str, cache_key: str):
+        """
+        Move a finished build into place and record its key as one step
+
+        Builds with different keys can share an artifact path (same filename), so the
+        replace and the key write happen under the lock; otherwise interleaved builds
+        could leave one build's key next to another build's file.
+        """
+        with self.lock:
+            os.replace(tmp_path, artifact_path)
+            self.record(artifact_path, cache_key)
+
+    def record(self, artifact_path: str, cache_key: str):
+        """Remember which key produced the artifact"""
+        with open(artifact_path + self.KEY_SUFFIX, 'w', encoding='utf-8') as f:
+            f.write(cache_key)
+
+    def invalidate(self, artifact_path: str):
+        """Forget the key of an artifact that is about to be rebuilt"""
+        key_path = artifact_path + self.KEY_SUFFIX
+        with self.lock:
+            if os.path.exists(key_path):
+                os.remove(key_path)
+
+    def get_inflight(self, cache_key: str) -> Optional[str]:
+        """Task id of the registered build for cache_key (call with self.lock held)"""
+        return self._inflight.get(cache_key)
+
+    def register_inflight(self, cache_key: str, task_id: str):
+        """Mark cache_key as being built by task_id (call with self.lock held)"""
+        self._inflight[cache_key] = task_id
+
+    def release_inflight(self, cache_key: str, task_id: str):
+        """Drop the in-flight entry once the build finished (successfully or not)"""
+        with self.lock:
+            if self._inflight.get(cache_key) == task_id:
+                del self._inflight[cache_key]
+
+
+# Global export cache instance
+export_artifact_cache = ExportArtifactCache()
@@ -7,15 +7,14 @@ import json
 import logging
 import tempfile
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from textwrap import dedent
 from dataclasses import dataclass, field
 from pptx import Presentation
 from pptx.util import Inches
-from PIL import Image
 import io
 import tempfile
-import img2pdf
+from utils.pdf_writer import write_pdf_from_images
 logger = logging.getLogger(__name__)
 
 
@@ -134,7 +133,11 @@ class ExportService:
     # 使用方式: from services.image_editability import InpaintProviderFactory
     
     @staticmethod
-    def create_pptx_from_images(image_paths: List[str], output_file: str = None) -> bytes:
+    def create_pptx_from_images(
+        image_paths: List[str],
+        output_file: str = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> bytes:
         """
         Create PPTX file from image paths
         Based on demo.py create_pptx_from_images()
@@ -142,6 +145,7 @@ class ExportService:
         Args:
             image_paths: List of absolute paths to images
             output_file: Optional output file path (if None, returns bytes)
+            progress_callback: Optional callback(completed_pages, total_pages)
         
         Returns:
             PPTX file as bytes if output_file is None
@@ -154,7 +158,8 @@ class ExportService:
         prs.slide_height = Inches(5.625)
         
         # Add each image as a slide
-        for image_path in image_paths:
+        total = len(image_paths)
+        for idx, image_path in enumerate(image_paths, start=1):
             if not os.path.exists(image_path):
                 logger.warning(f"Image not found: {image_path}")
                 continue
@@ -171,6 +176,9 @@ class ExportService:
                 width=prs.slide_width,
                 height=prs.slide_height
             )
+            
+            if progress_callback:
+                progress_callback(idx, total)
         
         # Save or return bytes
         if output_file:
@@ -184,13 +192,22 @@ class ExportService:
             return pptx_bytes.getvalue()
     
     @staticmethod
-    def create_pdf_from_images(image_paths: List[str], output_file: str = None) -> Optional[bytes]:
+    def create_pdf_from_images(
+        image_paths: List[str],
+        output_file: str = None,
+        dpi: Optional[int] = None,
+        jpeg_quality: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Optional[bytes]:
         """
-        Create PDF file from image paths using img2pdf (low memory usage)
+        Create PDF file from image paths, streaming one page at a time (bounded memory)
 
         Args:
             image_paths: List of absolute paths to images
             output_file: Optional output file path (if None, returns bytes)
+            dpi: Optional target DPI; pages above it are down-sampled
+            jpeg_quality: Optional JPEG quality (1-95); pages are re-encoded as JPEG when set
+            progress_callback: Optional callback(completed_pages, total_pages)
 
         Returns:
             PDF file as bytes if output_file is None, otherwise None
@@ -206,34 +223,33 @@ class ExportService:
         if not valid_paths:
             raise ValueError("No valid images found for PDF export")
 
-        try:
-            logger.info(f"Using img2pdf for PDF export ({len(valid_paths)} pages, low memory mode)")
-
-            # Set page layout: 16:9 aspect ratio (10 inches × 5.625 inches)
-            layout_fun = img2pdf.get_layout_fun(
-                pagesize=(img2pdf.in_to_pt(10), img2pdf.in_to_pt(5.625))
-            )
+        logger.info(f"Streaming PDF export ({len(valid_paths)} pages, dpi={dpi}, jpeg_quality={jpeg_quality})")
 
-            # Convert images to PDF
-            pdf_bytes = img2pdf.convert(valid_paths, layout_fun=layout_fun)
+        if not output_file:
+            pdf_bytes = io.BytesIO()
+            write_pdf_from_images(valid_paths, pdf_bytes, dpi=dpi, jpeg_quality=jpeg_quality,
+                                  progress_callback=progress_callback)
+            return pdf_bytes.getvalue()
 
-            if output_file:
-                with open(output_file, "wb") as f:
-                    f.write(pdf_bytes)
-                return None
-            else:
-                return pdf_bytes
-        except (img2pdf.ImageOpenError, ValueError, IOError) as e:
-            logger.warning(f"img2pdf conversion failed: {e}. Falling back to Pillow (high memory usage).")
-            return ExportService.create_pdf_from_images_pillow(valid_paths, output_file)
+        # Write to a temp file next to the target, then rename, so readers never see a partial PDF
+        tmp_file = f"{output_file}.tmp"
+        try:
+            with open(tmp_file, 'wb') as f:
+                write_pdf_from_images(valid_paths, f, dpi=dpi, jpeg_quality=jpeg_quality,
+                                      progress_callback=progress_callback)
+            os.replace(tmp_file, output_file)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        return None
 
     @staticmethod
     def create_pdf_from_images_pillow(image_paths: List[str], output_file: str = None) -> Optional[bytes]:
         """
-        Create PDF file from image paths using Pillow (original method)
+        Create PDF file from image paths
 
-        Note: This method loads all images into memory at once.
-        For large projects (50+ pages with 20MB/page), use create_pdf_from_images instead.
+        Kept for backward compatibility; delegates to the streaming writer so pages
+        are no longer all loaded into memory at once.
 
         Args:
             image_paths: List of absolute paths to images
@@ -242,46 +258,8 @@ class ExportService:
         Returns:
             PDF file as bytes if output_file is None, otherwise None
         """
-        images = []
-
-        # Load all images
-        for image_path in image_paths:
-            if not os.path.exists(image_path):
-                logger.warning(f"Image not found: {image_path}")
-                continue
-
-            img = Image.open(image_path)
-
-            # Convert to RGB if necessary (PDF requires RGB)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-
-            images.append(img)
+        return ExportService.create_pdf_from_images(image_paths, output_file)
 
-        if not images:
-            raise ValueError("No valid images found for PDF export")
-
-        # Save as PDF
-        if output_file:
-            images[0].save(
-                output_file,
-                save_all=True,
-                append_images=images[1:],
-                format='PDF'
-            )
-            return None
-        else:
-            # Save to bytes
-            pdf_bytes = io.BytesIO()
-            images[0].save(
-                pdf_bytes,
-                save_all=True,
-                append_images=images[1:],
-                format='PDF'
-            )
-            pdf_bytes.seek(0)
-            return pdf_bytes.getvalue()
-       
     @staticmethod
     def _add_mineru_text_to_slide(builder, slide, text_item: Dict[str, Any], scale_x: float = 1.0, scale_y: float = 1.0):
         """
@@ -532,7 +510,7 @@ class ExportService:
             depth: 当前递归深度
         
         Returns:
-            元组列表，每个元组为 (element_id, image_path, text_content)
+            元组列表，每个元组为 (element_id, image, text_content)，image 为内存中的裁剪图片
         """
         text_items = []
         
@@ -541,10 +519,11 @@ class ExportService:
             
             # 文本类型元素需要提取样式
             if elem_type in ['text', 'title', 'table_cell', 'list', 'paragraph', 'header', 'footer', 'heading', 'table_caption', 'image_caption']:
-                if elem.content and elem.image_path and os.path.exists(elem.image_path):
+                if elem.content and elem.has_image:
                     text = elem.content.strip()
                     if text:
-                        text_items.append((elem.element_id, elem.image_path, text))
+                        # 直接使用内存中的裁剪图片，无需落盘
+                        text_items.append((elem.element_id, elem.get_image(), text))
             
             # 递归处理子元素
             if hasattr(elem, 'children') and elem.children:
@@ -571,7 +550,7 @@ class ExportService:
         备选方案：_batch_extract_text_styles_with_full_image 可一次性分析全图所有文本。
         
         Args:
-            text_items: 元组列表，每个元组为 (element_id, image_path, text_content)
+            text_items: 元组列表，每个元组为 (element_id, image, text_content)
             text_attribute_extractor: 文本属性提取器
             max_workers: 并发数
         
@@ -588,10 +567,10 @@ class ExportService:
         results = {}
         
         def extract_single(item):
-            element_id, image_path, text_content = item
+            element_id, image, text_content = item
             try:
                 style = text_attribute_extractor.extract(
-                    image=image_path,
+                    image=image,
                     text_content=text_content
                 )
                 return element_id, style
@@ -688,6 +667,7 @@ class ExportService:
             for editable_img in editable_images:
                 text_items = ExportService._collect_text_elements_for_extraction(editable_img.elements)
                 all_text_items.extend(text_items)
+                editable_img.release_images()  # 裁剪图已取出，释放根图片
             return ExportService._batch_extract_text_styles(
                 text_items=all_text_items,
                 text_attribute_extractor=text_attribute_extractor,
@@ -789,6 +769,7 @@ class ExportService:
             for editable_img in editable_images:
                 text_items = ExportService._collect_text_elements_for_extraction(editable_img.elements)
                 all_text_items.extend(text_items)
+                editable_img.release_images()  # 裁剪图已取出，释放根图片
             results = ExportService._batch_extract_text_styles(
                 text_items=all_text_items,
                 text_attribute_extractor=text_attribute_extractor,
@@ -801,13 +782,14 @@ class ExportService:
         logger.info(f"  - 单个识别: font_color")
         
         # Step 1: 收集所有文本元素
-        all_text_items = []  # 用于单个裁剪识别 (element_id, image_path, content)
+        all_text_items = []  # 用于单个裁剪识别 (element_id, image, content)
         page_text_elements = {}  # 用于全局识别 {page_idx: [text_elements]}
         
         for page_idx, editable_img in enumerate(editable_images):
             # 收集用于单个裁剪识别的数据
             text_items = ExportService._collect_text_elements_for_extraction(editable_img.elements)
             all_text_items.extend(text_items)
+            editable_img.release_images()  # 裁剪图已取出，释放根图片
             
             # 收集用于全局识别的数据
             batch_elements = ExportService._collect_text_elements_for_batch_extraction(editable_img.elements)
@@ -841,10 +823,10 @@ class ExportService:
         
         def extract_local_single(item):
             """单个裁剪识别"""
-            element_id, image_path, text_content = item
+            element_id, image, text_content = item
             try:
                 style = text_attribute_extractor.extract(
-                    image=image_path,
+                    image=image,
                     text_content=text_content
                 )
                 # 只要 style 不为 None 就算成功（黑色也是有效颜色）
@@ -1133,6 +1115,7 @@ class ExportService:
                 warnings=warnings  # 收集警告
             )
             
+            editable_img.release_images()  # 元素图片已落盘，释放根图片
             logger.info(f"    ✓ 第 {page_idx + 1} 页完成，添加了 {len(editable_img.elements)} 个元素")
         
         # 5. 保存或返回字节流
@@ -1182,7 +1165,7 @@ class ExportService:
             text_styles_cache: 预提取的文本样式缓存（可选），由 _batch_extract_text_styles 生成
         
         Note:
-            elem.image_path 现在是绝对路径，无需额外的目录参数
+            元素图片通过 elem.get_image_path() 按需落盘，返回绝对路径
         """
         if text_styles_cache is None:
             text_styles_cache = {}
@@ -1206,7 +1189,7 @@ class ExportService:
                 int(bbox.y1 * scale_y)
             ]
             
-            logger.info(f"{'  ' * depth}  添加元素: type={elem_type}, bbox={bbox_list}, content={elem.content[:30] if elem.content else None}, image_path={elem.image_path}, 使用{'全局' if depth > 0 else '局部'}坐标")
+            logger.info(f"{'  ' * depth}  添加元素: type={elem_type}, bbox={bbox_list}, content={elem.content[:30] if elem.content else None}, image={elem.image_path or (elem.crop.to_dict() if elem.crop else None)}, 使用{'全局' if depth > 0 else '局部'}坐标")
             
             # 根据类型添加元素（参考原实现的_add_mineru_text_to_slide和_add_mineru_image_to_slide）
             if elem_type in ['text', 'title', 'list', 'paragraph', 'header', 'footer', 'heading', 'table_caption', 'image_caption']:
@@ -1289,18 +1272,19 @@ class ExportService:
                     )
                 else:
                     # 没有子元素，添加整体表格图片
-                    # elem.image_path 现在是绝对路径
-                    if elem.image_path and os.path.exists(elem.image_path):
+                    # 惰性裁剪的元素在此时才落盘（python-pptx 需要文件路径）
+                    elem_image_path = elem.get_image_path()
+                    if elem_image_path and os.path.exists(elem_image_path):
                         try:
                             builder.add_image_element(
                                 slide=slide,
-                                image_path=elem.image_path,
+                                image_path=elem_image_path,
                                 bbox=bbox_list
                             )
                         except Exception as e:
                             logger.error(f"Failed to add table image: {e}")
                     else:
-                        logger.warning(f"Table image not found: {elem.image_path}")
+                        logger.warning(f"Table image not found: {elem_image_path}")
                         builder.add_image_placeholder(slide, bbox_list)
             
             elif elem_type in ['image', 'figure', 'chart']:
@@ -1353,18 +1337,19 @@ class ExportService:
                     )
                 else:
                     # 没有子元素或子元素占比过大，直接添加原图
-                    # elem.image_path 现在是绝对路径
-                    if elem.image_path and os.path.exists(elem.image_path):
+                    # 惰性裁剪的元素在此时才落盘（python-pptx 需要文件路径）
+                    elem_image_path = elem.get_image_path()
+                    if elem_image_path and os.path.exists(elem_image_path):
                         try:
                             builder.add_image_element(
                                 slide=slide,
-                                image_path=elem.image_path,
+                                image_path=elem_image_path,
                                 bbox=bbox_list
                             )
                         except Exception as e:
                             logger.error(f"Failed to add image: {e}")
                     else:
-                        logger.warning(f"Image file not found: {elem.image_path}")
+                        logger.warning(f"Image file not found: {elem_image_path}")
                         builder.add_image_placeholder(slide, bbox_list)
             
             else:
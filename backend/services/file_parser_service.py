@@ -13,6 +13,7 @@ from typing import Optional, List
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from PIL import Image
 from markitdown import MarkItDown
+from .http_session import get_http_session
 
 logger = logging.getLogger(__name__)
 
@@ -55,7 +56,8 @@ class FileParserService:
                  openai_api_key: str = "", openai_api_base: str = "",
                  image_caption_model: str = "gemini-3-flash-preview",
                  provider_format: str = None,
-                 mineru_model_version: str = "vlm"):
+                 mineru_model_version: str = "vlm",
+                 session: Optional[requests.Session] = None):
         """
         Initialize the file parser service
         
@@ -69,10 +71,12 @@ class FileParserService:
             image_caption_model: Model to use for image captioning
             provider_format: AI provider format ('gemini' or 'openai'). If not provided, reads from environment variable.
             mineru_model_version: MinerU model version ('vlm' or 'pipeline'). Default is 'vlm'.
+            session: HTTP session for MinerU and image downloads (default: shared pooled session)
         """
         self.mineru_token = mineru_token
         self.mineru_api_base = mineru_api_base
         self.mineru_model_version = mineru_model_version
+        self.session = session or get_http_session()
         self.get_upload_url_api = f"{mineru_api_base}/api/v4/file-urls/batch"
         self.get_result_api_template = f"{mineru_api_base}/api/v4/extract-results/batch/{{}}"
         
@@ -288,7 +292,7 @@ class FileParserService:
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.get_upload_url_api,
                 headers=headers,
                 json=upload_data,
@@ -315,7 +319,7 @@ class FileParserService:
         """Upload file to MinerU"""
         try:
             with open(file_path, 'rb') as f:
-                response = requests.put(
+                response = self.session.put(
                     upload_url,
                     data=f,
                     headers={"Authorization": None},  # Remove auth for upload
@@ -354,7 +358,7 @@ class FileParserService:
                 return None, None, error_msg
             
             try:
-                response = requests.get(result_url, headers=headers, timeout=30)
+                response = self.session.get(result_url, headers=headers, timeout=30)
                 response.raise_for_status()
                 task_info = response.json()
                 
@@ -390,7 +394,7 @@ class FileParserService:
             Tuple of (markdown_content, extract_id, error_message)
         """
         try:
-            response = requests.get(zip_url, timeout=60)
+            response = self.session.get(zip_url, timeout=60)
             response.raise_for_status()
             
             # Generate unique directory name for this extraction
@@ -631,7 +635,7 @@ class FileParserService:
             # Load image based on URL type
             if image_url.startswith('http://') or image_url.startswith('https://'):
                 # Download from HTTP(S) URL
-                response = requests.get(image_url, timeout=30)
+                response = self.session.get(image_url, timeout=30)
                 response.raise_for_status()
                 image = Image.open(io.BytesIO(response.content))
             elif image_url.startswith('/files/mineru/'):
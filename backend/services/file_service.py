@@ -161,6 +161,9 @@ class FileService:
         filepath = self.upload_folder / image_path.replace('\\', '/')
         if filepath.exists() and filepath.is_file():
             filepath.unlink()
+            # Remove the derived export variant as well
+            from services.image_variant_service import ImageVariantService
+            ImageVariantService(str(self.upload_folder)).delete_variants(image_path)
             return True
         return False
     
@@ -248,6 +251,12 @@ class FileService:
         if project_dir.exists():
             shutil.rmtree(project_dir)
         
+        # Cached thumbnails of the project's images
+        from services.thumbnail_service import ThumbnailService
+        thumbnail_dir = self.upload_folder / ThumbnailService.CACHE_DIR_NAME / project_id
+        if thumbnail_dir.exists():
+            shutil.rmtree(thumbnail_dir)
+        
         return True
     
     def file_exists(self, relative_path: str) -> bool:
@@ -0,0 +1,92 @@
+"""
+HTTP Session - shared pooled requests session for third-party HTTP APIs
+
+Module-level requests.get/post open a new connection (TCP + TLS handshake) for
+every call. Baidu OCR/inpainting, MinerU and image downloads instead share one
+Session whose adapters keep connections alive per host.
+
+- Pool size per host: HTTP_POOL_MAXSIZE (should cover the number of worker threads)
+- Retries with exponential backoff: connection errors for any method; 429/5xx
+  responses only for idempotent, body-less methods (GET/HEAD/OPTIONS)
+- Default timeout: HTTP_TIMEOUT, used when a call does not pass its own
+
+Services take an optional `session` argument and fall back to get_http_session().
+"""
+import logging
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to requests sent without one"""
+
+    def __init__(self, *args, timeout: Optional[float] = None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_http_session(pool_maxsize: Optional[int] = None,
+                        max_retries: Optional[int] = None,
+                        backoff_factor: Optional[float] = None,
+                        timeout: Optional[float] = None) -> requests.Session:
+    """
+    Create a requests Session with pooled keep-alive connections, retries and a default timeout
+
+    Args:
+        pool_maxsize: Connections kept per host (default: Config.HTTP_POOL_MAXSIZE)
+        max_retries: Retries for connection errors and retryable responses (default: Config.HTTP_MAX_RETRIES)
+        backoff_factor: Exponential backoff factor in seconds (default: Config.HTTP_RETRY_BACKOFF)
+        timeout: Default timeout in seconds (default: Config.HTTP_TIMEOUT)
+    """
+    from config import get_config
+    config = get_config()
+    pool_maxsize = config.HTTP_POOL_MAXSIZE if pool_maxsize is None else pool_maxsize
+    max_retries = config.HTTP_MAX_RETRIES if max_retries is None else max_retries
+    backoff_factor = config.HTTP_RETRY_BACKOFF if backoff_factor is None else backoff_factor
+    timeout = config.HTTP_TIMEOUT if timeout is None else timeout
+
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS'}),
+        raise_on_status=False,  # 重试耗尽后返回最后的响应，由调用方 raise_for_status
+    )
+    adapter = TimeoutHTTPAdapter(pool_maxsize=pool_maxsize, max_retries=retry, timeout=timeout)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Global session (created on first use)
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Return the shared HTTP session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_http_session()
+                logger.info("Shared HTTP session created")
+    return _session
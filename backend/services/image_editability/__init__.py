@@ -7,7 +7,7 @@
 - 单一职责 - 只负责单张图片的可编辑化，批量处理由调用者控制
 
 组件：
-- 数据模型（BBox, EditableElement, EditableImage）
+- 数据模型（BBox, EditableElement, EditableImage, ElementCrop）
 - 元素提取器（ElementExtractor及其实现）
 - Inpaint提供者（InpaintProvider及其实现）
 - 工厂和配置（ServiceConfig）
@@ -37,7 +37,7 @@ Example:
 """
 
 # 数据模型
-from .data_models import BBox, EditableElement, EditableImage
+from .data_models import BBox, EditableElement, EditableImage, ElementCrop, LazyImageSource
 
 # 坐标映射
 from .coordinate_mapper import CoordinateMapper
@@ -92,6 +92,8 @@ __all__ = [
     'BBox',
     'EditableElement',
     'EditableImage',
+    'ElementCrop',
+    'LazyImageSource',
     # 坐标映射
     'CoordinateMapper',
     # 元素提取器
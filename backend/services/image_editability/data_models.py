@@ -1,8 +1,11 @@
 """
 数据模型 - 图片可编辑化服务的核心数据结构
 """
+import os
+import threading
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, field
+from PIL import Image
 
 
 @dataclass
@@ -57,6 +60,93 @@ class BBox:
         )
 
 
+class LazyImageSource:
+    """
+    惰性加载的根图片
+    
+    同一张根图片的所有元素（包括递归子图中的元素）共享一个实例，只有在第一次裁剪时才真正加载图片。
+    release() 释放已加载的图片，之后需要时会从路径重新加载。
+    线程安全：样式提取等场景会在多个线程中并发裁剪。
+    """
+    
+    def __init__(self, source_path: str):
+        """
+        Args:
+            source_path: 根图片路径
+        """
+        self.source_path = str(source_path)
+        self._image: Optional[Image.Image] = None
+        self._lock = threading.Lock()
+    
+    def get(self) -> Image.Image:
+        """获取根图片（未加载或已释放时从路径加载）"""
+        with self._lock:
+            if self._image is None:
+                with Image.open(self.source_path) as img:
+                    img.load()
+                    self._image = img.copy()
+            return self._image
+    
+    def release(self):
+        """释放已加载的图片"""
+        with self._lock:
+            self._image = None
+
+
+class ElementCrop:
+    """
+    元素图片的惰性裁剪视图（根图片 + 根图片坐标系中的裁剪框）
+    
+    - get_image(): 访问时才在内存中裁剪，不缓存裁剪结果
+    - get_path(): 只有消费方需要文件路径时才落盘
+    """
+    
+    def __init__(
+        self,
+        source: LazyImageSource,
+        crop_box: Tuple[int, int, int, int],
+        output_path: str
+    ):
+        """
+        Args:
+            source: 根图片
+            crop_box: 根图片坐标系中的裁剪框 (x0, y0, x1, y1)
+            output_path: 需要落盘时的保存路径
+        """
+        self.source = source
+        self.crop_box = crop_box
+        self.output_path = output_path
+        self._lock = threading.Lock()
+    
+    @property
+    def is_materialized(self) -> bool:
+        """是否已经保存到磁盘"""
+        return os.path.exists(self.output_path)
+    
+    def get_image(self) -> Image.Image:
+        """获取裁剪后的图片"""
+        source = self.source.get()
+        x0, y0, x1, y1 = self.crop_box
+        image = source.crop((x0, y0, min(source.width, x1), min(source.height, y1)))
+        image.load()
+        return image
+    
+    def get_path(self) -> str:
+        """获取裁剪图片的文件路径（首次调用时保存到磁盘）"""
+        with self._lock:
+            if not self.is_materialized:
+                os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+                self.get_image().save(self.output_path)
+        return self.output_path
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（根图片路径 + 根图片坐标系中的裁剪框），不会落盘"""
+        return {
+            'source_path': self.source.source_path,
+            'crop_box': list(self.crop_box),
+        }
+
+
 @dataclass
 class EditableElement:
     """可编辑元素"""
@@ -65,7 +155,7 @@ class EditableElement:
     bbox: BBox  # 在父容器（EditableImage）坐标系中的位置
     bbox_global: BBox  # 在根图片（最顶层EditableImage）坐标系中的位置（预计算存储，避免前端/后续使用时重新遍历计算）
     content: Optional[str] = None  # 文字内容、HTML表格等
-    image_path: Optional[str] = None  # 图片路径（MinerU提取的）
+    image_path: Optional[str] = None  # 图片路径（已落盘的图片；惰性裁剪的元素请使用 get_image_path()）
     
     # 递归子元素（如果是图片或图表，可能有子元素）
     children: List['EditableElement'] = field(default_factory=list)
@@ -76,15 +166,43 @@ class EditableElement:
     # 元数据
     metadata: Dict[str, Any] = field(default_factory=dict)
     
+    # 惰性裁剪视图（从父图片按bbox裁剪，按需加载/落盘）
+    crop: Optional[ElementCrop] = field(default=None, repr=False, compare=False)
+    
+    @property
+    def has_image(self) -> bool:
+        """元素是否有可用的图片"""
+        if self.crop is not None:
+            return True
+        return bool(self.image_path) and os.path.exists(self.image_path)
+    
+    def get_image(self) -> Optional[Image.Image]:
+        """获取元素图片（内存中），不会落盘"""
+        if self.crop is not None:
+            return self.crop.get_image()
+        if self.image_path and os.path.exists(self.image_path):
+            return Image.open(self.image_path)
+        return None
+    
+    def get_image_path(self) -> Optional[str]:
+        """获取元素图片的文件路径，惰性裁剪的元素在此时才保存到磁盘"""
+        if self.image_path is None and self.crop is not None:
+            self.image_path = self.crop.get_path()
+        return self.image_path
+    
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典（可序列化）"""
+        """转换为字典（可序列化），惰性裁剪的元素只输出父图片路径和裁剪框，不会落盘"""
+        image_path = self.image_path
+        if image_path is None and self.crop is not None and self.crop.is_materialized:
+            image_path = self.crop.output_path
         result = {
             'element_id': self.element_id,
             'element_type': self.element_type,
             'bbox': self.bbox.to_dict(),
             'bbox_global': self.bbox_global.to_dict(),
             'content': self.content,
-            'image_path': self.image_path,
+            'image_path': image_path,
+            'crop': self.crop.to_dict() if self.crop is not None else None,
             'inpainted_background_path': self.inpainted_background_path,
             'metadata': self.metadata,
             'children': [child.to_dict() for child in self.children]
@@ -115,6 +233,14 @@ class EditableImage:
     # 元数据
     metadata: Dict[str, Any] = field(default_factory=dict)
     
+    # 元素裁剪共享的根图片
+    source: Optional[LazyImageSource] = field(default=None, repr=False, compare=False)
+    
+    def release_images(self):
+        """释放元素裁剪共享的根图片（之后需要时从路径重新加载）"""
+        if self.source is not None:
+            self.source.release()
+    
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典（可序列化）"""
         return {
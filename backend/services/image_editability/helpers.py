@@ -4,8 +4,7 @@
 纯函数，不依赖任何具体实现
 """
 import logging
-import tempfile
-from typing import List
+from typing import List, Union
 from PIL import Image
 
 from .data_models import EditableElement, BBox
@@ -32,29 +31,31 @@ def collect_bboxes_from_elements(elements: List[EditableElement]) -> List[tuple]
 
 
 def crop_element_from_image(
-    source_image_path: str,
+    source_image: Union[str, Image.Image],
     bbox: BBox
-) -> str:
+) -> Image.Image:
     """
-    从源图片中裁剪出元素区域
+    从源图片中裁剪出元素区域（在内存中完成，不落盘）
     
     Args:
-        source_image_path: 源图片路径
-        bbox: 裁剪区域
+        source_image: 源图片路径或已加载的PIL Image对象
+        bbox: 裁剪区域（会被限制在图片范围内）
         
     Returns:
-        裁剪后图片的临时文件路径
+        裁剪后的PIL Image对象
     """
-    img = Image.open(source_image_path)
+    img = Image.open(source_image) if isinstance(source_image, str) else source_image
     
-    # 裁剪
-    crop_box = (int(bbox.x0), int(bbox.y0), int(bbox.x1), int(bbox.y1))
+    # 裁剪（限制在图片边界内）
+    crop_box = (
+        max(0, int(bbox.x0)),
+        max(0, int(bbox.y0)),
+        min(img.width, int(bbox.x1)),
+        min(img.height, int(bbox.y1))
+    )
     cropped = img.crop(crop_box)
-    
-    # 保存到临时文件
-    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-        cropped.save(tmp.name)
-        return tmp.name
+    cropped.load()
+    return cropped
 
 
 def should_recurse_into_element(
@@ -11,7 +11,6 @@ Inpaint提供者 - 抽象不同的inpaint实现
 - InpaintProviderRegistry - 元素类型到重绘方法的映射注册表
 """
 import logging
-import tempfile
 from abc import ABC, abstractmethod
 from typing import List, Optional, Dict
 from PIL import Image
@@ -170,17 +169,12 @@ class GenerativeEditInpaintProvider(InpaintProvider):
             # 获取清理背景的prompt
             edit_instruction = get_clean_background_prompt()
             
-            # 保存临时图片文件（AI服务需要文件路径）
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                tmp_path = tmp_file.name
-                image.save(tmp_path)
-            
             logger.info("GenerativeEditInpaintProvider: 开始生成式编辑重绘...")
             
-            # 调用AI服务编辑图片
+            # 调用AI服务编辑图片（直接传入内存中的图片）
             clean_bg_image = self.ai_service.edit_image(
                 prompt=edit_instruction,
-                current_image_path=tmp_path,
+                current_image=image,
                 aspect_ratio=aspect_ratio,
                 resolution=resolution,
                 original_description=None,
@@ -387,11 +381,6 @@ class HybridInpaintProvider(InpaintProvider):
             提升画质后的图像
         """
         try:
-            # 保存临时图片
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                tmp_path = tmp_file.name
-                image.save(tmp_path)
-            
             # 将bboxes转换为百分比形式（相对于图片宽高）
             regions = None
             if inpainted_bboxes:
@@ -425,10 +414,10 @@ class HybridInpaintProvider(InpaintProvider):
             ar = aspect_ratio or self._generative_provider.aspect_ratio
             res = resolution or self._generative_provider.resolution
             
-            # 调用AI服务
+            # 调用AI服务（直接传入内存中的图片）
             enhanced_image = self._generative_provider.ai_service.edit_image(
                 prompt=enhance_prompt,
-                current_image_path=tmp_path,
+                current_image=image,
                 aspect_ratio=ar,
                 resolution=res,
                 original_description=None,
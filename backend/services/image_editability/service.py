@@ -8,11 +8,12 @@
 4. 零具体实现依赖 - 完全依赖抽象接口
 """
 import logging
+import os
 import uuid
 from typing import List, Optional, Tuple
 from PIL import Image
 
-from .data_models import BBox, EditableElement, EditableImage
+from .data_models import BBox, EditableElement, EditableImage, ElementCrop, LazyImageSource
 from .coordinate_mapper import CoordinateMapper
 from .extractors import ElementExtractor, ExtractionResult
 from .inpaint_providers import InpaintProvider
@@ -76,7 +77,9 @@ class ImageEditabilityService:
         parent_bbox: Optional[BBox] = None,
         root_image_size: Optional[Tuple[int, int]] = None,
         element_type: Optional[str] = None,
-        root_image_path: Optional[str] = None
+        root_image_path: Optional[str] = None,
+        source: Optional[LazyImageSource] = None,
+        source_offset: Tuple[int, int] = (0, 0)
     ) -> EditableImage:
         """
         将图片转换为可编辑结构（递归）
@@ -91,6 +94,9 @@ class ImageEditabilityService:
             root_image_size: 根图片尺寸（内部使用）
             element_type: 元素类型，用于选择提取器（内部使用）
             root_image_path: 根图片路径（内部使用）
+            source: 根图片的惰性加载实例（内部使用，子图递归时共享，元素裁剪视图直接引用它，
+                不依赖子图临时文件）
+            source_offset: 当前图片左上角在根图片中的位置（内部使用）
         
         Returns:
             EditableImage对象
@@ -115,6 +121,8 @@ class ImageEditabilityService:
             root_image_size = (width, height)
         if root_image_path is None:
             root_image_path = image_path
+        if source is None:
+            source = LazyImageSource(root_image_path)
         
         # 2. 提取元素
         extraction_result = self._extract_elements(
@@ -132,7 +140,8 @@ class ImageEditabilityService:
             parent_bbox=parent_bbox,
             image_size=extracted_image_size,
             root_image_size=root_image_size,
-            source_image_path=image_path  # 传入源图片路径用于裁剪
+            source=source,
+            source_offset=source_offset
         )
         
         logger.info(f"{'  ' * depth}提取到 {len(elements)} 个元素")
@@ -161,7 +170,9 @@ class ImageEditabilityService:
                 image_id=image_id,
                 root_image_size=root_image_size,
                 current_image_size=(width, height),
-                root_image_path=root_image_path
+                root_image_path=root_image_path,
+                source=source,
+                source_offset=source_offset
             )
         
         # 5. 构建结果
@@ -173,7 +184,8 @@ class ImageEditabilityService:
             elements=elements,
             clean_background=clean_background,
             depth=depth,
-            parent_id=parent_id
+            parent_id=parent_id,
+            source=source
         )
         
         logger.info(f"{'  ' * depth}[{image_id}] 处理完成")
@@ -212,26 +224,23 @@ class ImageEditabilityService:
         parent_bbox: Optional[BBox],
         image_size: Tuple[int, int],
         root_image_size: Tuple[int, int],
-        source_image_path: Optional[str] = None
+        source: Optional[LazyImageSource] = None,
+        source_offset: Tuple[int, int] = (0, 0)
     ) -> List[EditableElement]:
         """
         将提取器返回的字典转换为EditableElement对象
         
-        对每个元素根据 bbox 从原图裁剪并保存图片，不依赖 MinerU 提取的图片。
-        这样所有元素（包括文字）都有 image_path，可用于样式提取。
+        每个元素根据 bbox 挂载一个惰性裁剪视图（根图片 + 根图片坐标系中的裁剪框），
+        不依赖 MinerU 提取的图片。这样所有元素（包括文字）都能取到图片用于样式提取，
+        但只有真正访问时才裁剪，只有消费方需要文件路径时才保存到 editable_images/<image_id>/elements/。
         """
         elements = []
         
-        # 准备输出目录
+        # 根图片（所有元素共享，首次裁剪时才加载）
         output_dir = None
-        source_img = None
-        if source_image_path:
+        if source is not None:
             output_dir = self._upload_folder / 'editable_images' / image_id / 'elements'
-            output_dir.mkdir(parents=True, exist_ok=True)
-            try:
-                source_img = Image.open(source_image_path)
-            except Exception as e:
-                logger.warning(f"无法加载源图片进行裁剪: {e}")
+        offset_x, offset_y = source_offset
         
         for idx, elem_dict in enumerate(element_dicts):
             bbox_list = elem_dict['bbox']
@@ -253,25 +262,29 @@ class ImageEditabilityService:
                     parent_image_size=root_image_size
                 )
             
-            # 为每个元素裁剪并保存图片（统一使用自己裁剪的图片）
-            element_image_path = None
-            if source_img and output_dir:
-                try:
-                    # 裁剪元素区域
-                    crop_box = (
-                        max(0, int(local_bbox.x0)),
-                        max(0, int(local_bbox.y0)),
-                        min(source_img.width, int(local_bbox.x1)),
-                        min(source_img.height, int(local_bbox.y1))
+            # 为每个元素创建惰性裁剪视图（统一使用自己裁剪的图片）
+            crop = None
+            if source and output_dir:
+                # 裁剪元素区域（限制在当前图片内，再平移到根图片坐标系）
+                crop_box = (
+                    max(0, int(local_bbox.x0)),
+                    max(0, int(local_bbox.y0)),
+                    min(image_size[0], int(local_bbox.x1)),
+                    min(image_size[1], int(local_bbox.y1))
+                )
+                
+                # 检查裁剪区域有效性
+                if crop_box[2] > crop_box[0] and crop_box[3] > crop_box[1]:
+                    crop = ElementCrop(
+                        source=source,
+                        crop_box=(
+                            crop_box[0] + offset_x,
+                            crop_box[1] + offset_y,
+                            crop_box[2] + offset_x,
+                            crop_box[3] + offset_y
+                        ),
+                        output_path=str(output_dir / f"{idx}_{elem_dict['type']}.png")
                     )
-                    
-                    # 检查裁剪区域有效性
-                    if crop_box[2] > crop_box[0] and crop_box[3] > crop_box[1]:
-                        cropped = source_img.crop(crop_box)
-                        element_image_path = str(output_dir / f"{idx}_{elem_dict['type']}.png")
-                        cropped.save(element_image_path)
-                except Exception as e:
-                    logger.warning(f"裁剪元素 {idx} 失败: {e}")
             
             element = EditableElement(
                 element_id=f"{image_id}_{idx}",
@@ -279,16 +292,12 @@ class ImageEditabilityService:
                 bbox=local_bbox,
                 bbox_global=global_bbox,
                 content=elem_dict.get('content'),
-                image_path=element_image_path,  # 使用自己裁剪的图片路径
-                metadata=elem_dict.get('metadata', {})
+                metadata=elem_dict.get('metadata', {}),
+                crop=crop
             )
             
             elements.append(element)
         
-        # 关闭源图片
-        if source_img:
-            source_img.close()
-        
         return elements
     
     def _generate_clean_background(
@@ -392,7 +401,9 @@ class ImageEditabilityService:
         image_id: str,
         root_image_size: Tuple[int, int],
         current_image_size: Tuple[int, int],
-        root_image_path: str
+        root_image_path: str,
+        source: LazyImageSource,
+        source_offset: Tuple[int, int]
     ):
         """递归处理子元素（通过裁剪原图获取子图，并行处理多个子元素）"""
         logger.info(f"{'  ' * depth}递归处理子元素...")
@@ -414,16 +425,28 @@ class ImageEditabilityService:
         
         # 并行处理多个子元素
         from concurrent.futures import ThreadPoolExecutor, as_completed
+        import tempfile
+        
+        # 当前图片只加载一次，子图在内存中裁剪
+        with Image.open(current_image_path) as current_img:
+            current_img.load()
+            current_image = current_img.copy()
         
         def process_single_element(element):
             """处理单个子元素"""
+            child_image_path = None
             try:
                 # 从当前图片裁剪出子区域
-                child_image_path = crop_element_from_image(
-                    source_image_path=current_image_path,
+                child_image = crop_element_from_image(
+                    source_image=current_image,
                     bbox=element.bbox
                 )
                 
+                # 提取器（MinerU/百度OCR）需要文件路径，子图仅在递归分析期间落盘
+                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
+                    child_image_path = tmp.name
+                child_image.save(child_image_path)
+                
                 child_editable = self.make_image_editable(
                     image_path=child_image_path,
                     depth=depth + 1,
@@ -431,13 +454,22 @@ class ImageEditabilityService:
                     parent_bbox=element.bbox_global,
                     root_image_size=root_image_size,
                     element_type=element.element_type,
-                    root_image_path=root_image_path
+                    root_image_path=root_image_path,
+                    source=source,
+                    source_offset=(
+                        source_offset[0] + max(0, int(element.bbox.x0)),
+                        source_offset[1] + max(0, int(element.bbox.y0))
+                    )
                 )
                 
                 return element, child_editable, None
             
             except Exception as e:
                 return element, None, e
+            
+            finally:
+                if child_image_path and os.path.exists(child_image_path):
+                    os.remove(child_image_path)
         
         logger.info(f"{'  ' * depth}  并行处理 {len(elements_to_process)} 个子元素...")
         
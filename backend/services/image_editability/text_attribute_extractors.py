@@ -12,7 +12,11 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass, field, asdict
 from typing import Dict, Any, List, Optional, Tuple, Union
 from PIL import Image
-from services.prompts import get_text_attribute_extraction_prompt
+from services.prompts import (
+    get_text_attribute_extraction_prompt,
+    TEXT_ATTRIBUTE_SCHEMA,
+    BATCH_TEXT_ATTRIBUTE_SCHEMA
+)
 
 logger = logging.getLogger(__name__)
 
@@ -305,20 +309,13 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
         Returns:
             解析后的JSON结果
         """
-        import tempfile
-        import os
-        
-        # 保存临时图片文件
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-            tmp_path = tmp_file.name
-            image.save(tmp_path)
-        
         try:
-            # 使用 ai_service.generate_json_with_image（带重试机制）
+            # 使用 ai_service.generate_json_with_image（带重试机制），直接传入内存中的图片
             result = self.ai_service.generate_json_with_image(
                 prompt=prompt,
-                image_path=tmp_path,
-                thinking_budget=thinking_budget
+                image=image,
+                thinking_budget=thinking_budget,
+                schema=TEXT_ATTRIBUTE_SCHEMA
             )
             return result if isinstance(result, dict) else {}
         
@@ -331,10 +328,6 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
             # JSON 解析失败（重试3次后仍失败）
             logger.error(f"生成JSON失败（已重试3次）: {e}")
             return {}
-        
-        finally:
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
     
     @staticmethod
     def _hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
@@ -450,7 +443,6 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
             字典，key为element_id，value为TextStyleResult
         """
         import json
-        import tempfile
         from services.prompts import get_batch_text_attribute_extraction_prompt
         
         thinking_budget = kwargs.get('thinking_budget', 1000)
@@ -459,19 +451,6 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
             return {}
         
         try:
-            # 准备图片
-            if isinstance(full_image, str):
-                pil_image = Image.open(full_image)
-                tmp_path = full_image  # 如果已经是路径，直接使用
-                need_cleanup = False
-            else:
-                pil_image = full_image
-                # 保存临时图片文件
-                with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                    tmp_path = tmp_file.name
-                    pil_image.save(tmp_path)
-                need_cleanup = True
-            
             # 构建文本元素的 JSON 描述
             elements_for_prompt = []
             for elem in text_elements:
@@ -486,12 +465,13 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
             # 构建 prompt
             prompt = get_batch_text_attribute_extraction_prompt(text_elements_json)
             
-            # 调用 ai_service.generate_json_with_image（带重试机制）
+            # 调用 ai_service.generate_json_with_image（带重试机制），路径或内存图片均可直接传入
             try:
                 result = self.ai_service.generate_json_with_image(
                     prompt=prompt,
-                    image_path=tmp_path,
-                    thinking_budget=thinking_budget
+                    image=full_image,
+                    thinking_budget=thinking_budget,
+                    schema=BATCH_TEXT_ATTRIBUTE_SCHEMA
                 )
                 
                 # 确保结果是列表
@@ -513,12 +493,6 @@ class CaptionModelTextAttributeExtractor(TextAttributeExtractor):
             except Exception as e:
                 logger.error(f"批量提取JSON生成失败（已重试3次）: {e}")
                 return {}
-                
-            finally:
-                if need_cleanup:
-                    import os
-                    if os.path.exists(tmp_path):
-                        os.remove(tmp_path)
         
         except Exception as e:
             logger.error(f"批量提取文字属性失败: {e}", exc_info=True)
@@ -0,0 +1,178 @@
+"""
+Image Variant Service - derives an export-optimized variant from stored page images
+
+The original (master) image saved by FileService is never modified. From it this
+service derives a JPEG sized for the PPTX/PDF slide, much smaller than a 4K PNG.
+Resized copies for the web UI are served on demand by ThumbnailService instead.
+
+Variants live next to the master in the pages directory (``<stem>__w<width>.jpg``)
+and an index of them is stored on the owning PageImageVersion.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Format name -> (PIL format, file extension)
+_FORMATS = {
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+# Background executor for variant generation (kept separate from user visible tasks)
+_variant_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-variants')
+
+
+class ImageVariantService:
+    """Generates and resolves derived variants of page images"""
+
+    def __init__(self, upload_folder: str, quality: int = 80, export_width: int = 1920):
+        """
+        Args:
+            upload_folder: Upload root folder
+            quality: JPEG encoder quality
+            export_width: Width of the JPEG export variant
+        """
+        self.upload_folder = Path(upload_folder)
+        self.quality = quality
+        self.export_width = export_width
+
+    @classmethod
+    def from_config(cls, config) -> 'ImageVariantService':
+        """Create the service from a Flask config mapping"""
+        return cls(
+            upload_folder=config['UPLOAD_FOLDER'],
+            quality=config.get('IMAGE_VARIANT_QUALITY', 80),
+            export_width=config.get('IMAGE_EXPORT_VARIANT_WIDTH', 1920)
+        )
+
+    @staticmethod
+    def variant_relative_path(master_path: str, width: int, fmt: str) -> str:
+        """Relative path of a variant of master_path"""
+        master = Path(master_path.replace('\\', '/'))
+        return (master.parent / f"{master.stem}__w{width}.{_FORMATS[fmt][1]}").as_posix()
+
+    def _save_variant(self, image: Image.Image, master_path: str, width: int,
+                      fmt: str, purpose: str) -> Dict[str, Any]:
+        pil_format = _FORMATS[fmt][0]
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+        else:
+            resized = image
+        if pil_format == 'JPEG' and resized.mode == 'RGBA':
+            # Flatten onto white; convert('RGB') would expose whatever sits under the alpha
+            flattened = Image.new('RGB', resized.size, (255, 255, 255))
+            flattened.paste(resized, mask=resized.getchannel('A'))
+            resized = flattened
+
+        relative_path = self.variant_relative_path(master_path, resized.width, fmt)
+        absolute_path = self.upload_folder / relative_path
+        tmp_path = absolute_path.with_name(absolute_path.name + '.tmp')
+        resized.save(str(tmp_path), format=pil_format, quality=self.quality)
+        os.replace(tmp_path, absolute_path)
+
+        return {
+            'path': relative_path,
+            'format': fmt,
+            'purpose': purpose,
+            'width': resized.width,
+            'height': resized.height,
+            'bytes': absolute_path.stat().st_size,
+        }
+
+    def generate_variants(self, master_path: str) -> Dict[str, Any]:
+        """
+        Generate the export variant for a stored image
+
+        Args:
+            master_path: Master image path relative to the upload folder
+
+        Returns:
+            Variant index: {"master": {...}, "variants": [{path, format, purpose, width, height, bytes}]}
+        """
+        absolute_master = self.upload_folder / master_path.replace('\\', '/')
+        with Image.open(absolute_master) as img:
+            img.load()
+            master_info = {
+                'path': master_path,
+                'format': (img.format or '').lower(),
+                'width': img.width,
+                'height': img.height,
+                'bytes': absolute_master.stat().st_size,
+            }
+            has_alpha = 'A' in img.getbands() or 'transparency' in img.info
+            source = img if img.mode in ('RGB', 'RGBA') else img.convert('RGBA' if has_alpha else 'RGB')
+            # No upscaling: a master narrower than export_width is re-encoded at full size
+            variants = [self._save_variant(source, master_path, self.export_width, 'jpeg', 'export')]
+
+        return {'master': master_info, 'variants': variants}
+
+    def delete_variants(self, master_path: str):
+        """Remove every variant file derived from master_path"""
+        master = self.upload_folder / master_path.replace('\\', '/')
+        if not master.parent.exists():
+            return
+        for path in master.parent.glob(f"{master.stem}__w*"):
+            try:
+                path.unlink()
+            except OSError as e:
+                logger.warning(f"Failed to delete image variant {path}: {e}")
+
+    @staticmethod
+    def pick_variant(index: Optional[Dict[str, Any]], purpose: str, min_width: int = 0,
+                     formats: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Choose the smallest variant of the given purpose that is at least min_width wide
+
+        Falls back to the widest matching variant when none is wide enough.
+        """
+        if not index:
+            return None
+        candidates = [
+            v for v in index.get('variants', [])
+            if v.get('purpose') == purpose and (not formats or v.get('format') in formats)
+        ]
+        if not candidates:
+            return None
+        wide_enough = [v for v in candidates if v['width'] >= min_width]
+        if wide_enough:
+            return min(wide_enough, key=lambda v: (v['width'], v['bytes']))
+        return max(candidates, key=lambda v: v['width'])
+
+
+def _generate_variants_for_version(version_id: str, app):
+    """Worker: generate variants for one PageImageVersion and store the index"""
+    with app.app_context():
+        from models import db, PageImageVersion
+        try:
+            version = PageImageVersion.query.get(version_id)
+            if not version:
+                return
+            service = ImageVariantService.from_config(app.config)
+            index = service.generate_variants(version.image_path)
+            version = PageImageVersion.query.get(version_id)
+            if version:
+                version.variants = index
+                db.session.commit()
+            logger.debug(f"Generated {len(index['variants'])} image variants for version {version_id}")
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Failed to generate image variants for version {version_id}: {e}", exc_info=True)
+
+
+def schedule_image_variants(version_id: str, app) -> bool:
+    """
+    Queue background variant generation for a PageImageVersion
+
+    Returns:
+        True if generation was scheduled (variants enabled in config)
+    """
+    if not app.config.get('IMAGE_VARIANTS_ENABLED', False):
+        return False
+    _variant_executor.submit(_generate_variants_for_version, version_id, app)
+    return True
@@ -0,0 +1,215 @@
+"""
+Prompt size accounting and budget-aware prompt assembly
+
+Prompts are built from sections with a priority. When the estimated size
+exceeds PROMPT_TOKEN_BUDGET, assemble_prompt shrinks the least important
+sections first: a section's summary (e.g. the outline reduced to titles) is
+tried before truncation, and required sections (priority 0) are never
+touched. The result only depends on the inputs, so the same page always gets
+the same prompt.
+
+Every prompt's estimated size is logged and, inside a track_prompt_stats()
+scope, added to a PromptStats that a task stores in its progress.
+"""
+import logging
+import math
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+')
+
+TRUNCATION_MARKER = '\n...(truncated)\n'
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count without a tokenizer: one token per CJK character,
+    about four characters per token for everything else
+    """
+    if not text:
+        return 0
+    cjk_chars = sum(len(run) for run in _CJK_RE.findall(text))
+    return cjk_chars + math.ceil((len(text) - cjk_chars) / 4)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Keep the head of text within max_tokens (whole lines where possible)
+
+    A truncation marker is appended (and counted) when anything is cut.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max_tokens - estimate_tokens(TRUNCATION_MARKER)
+    if limit <= 0:
+        return ''
+
+    kept, used = [], 0
+    for line in text.split('\n'):
+        cost = estimate_tokens(line + '\n')
+        if used + cost > limit:
+            if not kept:
+                # 第一行就超出：二分查找能放下的最长前缀
+                low, high = 0, len(line)
+                while low < high:
+                    middle = (low + high + 1) // 2
+                    if estimate_tokens(line[:middle]) <= limit:
+                        low = middle
+                    else:
+                        high = middle - 1
+                kept.append(line[:low])
+            break
+        kept.append(line)
+        used += cost
+    return '\n'.join(kept) + TRUNCATION_MARKER
+
+
+@dataclass
+class PromptSection:
+    """A part of a prompt; sections are concatenated in order"""
+    name: str
+    text: str
+    priority: int = 0  # 0 = required; higher values are shrunk first
+    summary: Optional[str] = None  # shorter replacement tried before truncation
+    truncate: Optional[Callable[[str, int], str]] = None  # custom truncation (text, max_tokens) -> text
+
+
+class PromptStats:
+    """Per-task prompt size accounting (thread-safe)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_tokens = 0
+        self.max_tokens = 0
+        self.trimmed = 0
+        self.by_prompt: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, tokens: int, trimmed: bool = False):
+        with self._lock:
+            self.count += 1
+            self.total_tokens += tokens
+            self.max_tokens = max(self.max_tokens, tokens)
+            self.trimmed += int(trimmed)
+            entry = self.by_prompt.setdefault(name, {'count': 0, 'total_tokens': 0})
+            entry['count'] += 1
+            entry['total_tokens'] += tokens
+
+    def summary(self) -> Dict:
+        """Snapshot for task progress / API responses"""
+        with self._lock:
+            return {
+                'prompts': self.count,
+                'total_tokens': self.total_tokens,
+                'max_tokens': self.max_tokens,
+                'trimmed': self.trimmed,
+                'by_prompt': {name: dict(entry) for name, entry in self.by_prompt.items()},
+            }
+
+
+_current_stats: ContextVar[Optional[PromptStats]] = ContextVar('prompt_stats', default=None)
+
+
+@contextmanager
+def track_prompt_stats(stats: Optional[PromptStats]):
+    """Record prompts built within this block (current thread / coroutine) into stats"""
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def record_prompt(name: str, prompt: str, original_tokens: Optional[int] = None,
+                  trimmed_sections: Iterable[str] = ()) -> int:
+    """
+    Log a prompt's estimated size and add it to the current PromptStats
+
+    Returns:
+        Estimated token count
+    """
+    tokens = estimate_tokens(prompt)
+    trimmed_sections = list(trimmed_sections)
+    if trimmed_sections:
+        logger.info(f"[{name}] ~{tokens} prompt tokens (trimmed from ~{original_tokens}: {', '.join(trimmed_sections)})")
+    else:
+        logger.info(f"[{name}] ~{tokens} prompt tokens")
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(name, tokens, trimmed=bool(trimmed_sections))
+    return tokens
+
+
+def get_prompt_token_budget() -> int:
+    """Configured PROMPT_TOKEN_BUDGET (0 = unlimited)"""
+    from config import get_config
+    return get_config().PROMPT_TOKEN_BUDGET
+
+
+def fit_sections(sections: List[PromptSection], budget: int) -> Tuple[str, int, List[str]]:
+    """
+    Concatenate sections, shrinking low-priority ones to fit the token budget
+
+    Sections are shrunk from the highest priority value down (later sections
+    first on ties): the summary replaces the text if it is shorter, then the
+    section is truncated to what is still over budget (possibly to nothing).
+    Required sections (priority 0) are kept even if the budget is exceeded.
+
+    Args:
+        sections: Prompt sections in output order
+        budget: Token budget (0 = unlimited)
+
+    Returns:
+        (text, estimated tokens before shrinking, names of shrunk sections)
+    """
+    texts = [section.text or '' for section in sections]
+    sizes = [estimate_tokens(text) for text in texts]
+    original_tokens = sum(sizes)
+    trimmed = []
+
+    if budget > 0 and original_tokens > budget:
+        order = sorted(
+            (i for i, section in enumerate(sections) if section.priority > 0),
+            key=lambda i: (-sections[i].priority, -i)
+        )
+        for i in order:
+            over = sum(sizes) - budget
+            if over <= 0:
+                break
+            section = sections[i]
+            if section.summary is not None and estimate_tokens(section.summary) < sizes[i]:
+                texts[i] = section.summary
+                sizes[i] = estimate_tokens(section.summary)
+                over = sum(sizes) - budget
+            if over > 0:
+                truncate = section.truncate or truncate_to_tokens
+                texts[i] = truncate(texts[i], max(0, sizes[i] - over))
+                sizes[i] = estimate_tokens(texts[i])
+            trimmed.append(section.name)
+
+    return ''.join(texts), original_tokens, trimmed
+
+
+def assemble_prompt(name: str, sections: List[PromptSection], budget: Optional[int] = None) -> str:
+    """
+    Fit sections to the token budget (see fit_sections) and record the prompt size
+
+    Args:
+        name: Prompt name for logging and stats
+        sections: Prompt sections in output order
+        budget: Token budget (defaults to PROMPT_TOKEN_BUDGET; 0 = unlimited)
+
+    Returns:
+        Assembled prompt
+    """
+    if budget is None:
+        budget = get_prompt_token_budget()
+    prompt, original_tokens, trimmed = fit_sections(sections, budget)
+    record_prompt(name, prompt, original_tokens=original_tokens, trimmed_sections=trimmed)
+    return prompt
@@ -4,7 +4,12 @@ AI Service Prompts - 集中管理所有 AI 服务的 prompt 模板
 import json
 import logging
 from textwrap import dedent
-from typing import List, Dict, Optional, TYPE_CHECKING
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
+
+from services.prompt_budget import (
+    PromptSection, assemble_prompt, estimate_tokens, fit_sections, get_prompt_token_budget,
+    record_prompt, truncate_to_tokens
+)
 
 if TYPE_CHECKING:
     from services.ai_service import ProjectContext
@@ -12,6 +17,90 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+# ===== 结构化输出 JSON Schema =====
+# 与下方 prompt 中描述的输出格式一致，传给支持结构化输出的 provider 约束生成结果
+
+_OUTLINE_PAGE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "points": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["title", "points"],
+}
+
+# 大纲：页面，或带 part 的章节（pages 为该章节下的页面）
+OUTLINE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string"},
+            "points": {"type": "array", "items": {"type": "string"}},
+            "part": {"type": "string"},
+            "pages": {"type": "array", "items": _OUTLINE_PAGE_SCHEMA},
+        },
+    },
+}
+
+# 页面描述列表（按页面顺序）
+DESCRIPTIONS_SCHEMA = {
+    "type": "array",
+    "items": {"type": "string"},
+}
+
+# 单个文字区域的颜色片段
+TEXT_ATTRIBUTE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "colored_segments": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "text": {"type": "string"},
+                    "color": {"type": "string"},
+                    "is_latex": {"type": "boolean"},
+                },
+                "required": ["text", "color"],
+            },
+        },
+    },
+    "required": ["colored_segments"],
+}
+
+# 多页批量生成的页面描述（page_index 为页面编号，从1开始）
+BATCH_PAGE_DESCRIPTIONS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "page_index": {"type": "integer"},
+            "description": {"type": "string"},
+        },
+        "required": ["page_index", "description"],
+    },
+}
+
+# 批量文字样式（与输入元素一一对应）
+BATCH_TEXT_ATTRIBUTE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "element_id": {"type": "string"},
+            "text_content": {"type": "string"},
+            "font_color": {"type": "string"},
+            "is_bold": {"type": "boolean"},
+            "is_italic": {"type": "boolean"},
+            "is_underline": {"type": "boolean"},
+            "text_alignment": {"type": "string", "enum": ["left", "center", "right", "justify"]},
+        },
+        "required": ["element_id", "font_color", "is_bold", "is_italic", "is_underline", "text_alignment"],
+    },
+}
+
+
 # 语言配置映射
 LANGUAGE_CONFIG = {
     'zh': {
@@ -106,6 +195,65 @@ def _format_reference_files_xml(reference_files_content: Optional[List[Dict[str,
     return '\n'.join(xml_parts)
 
 
+def _reference_files_section(reference_files_content: Optional[List[Dict[str, str]]],
+                             priority: int = 2) -> PromptSection:
+    """
+    Reference files as a prompt section that can be shrunk to a token budget
+    
+    Truncation shortens file contents in order (later files first lose their
+    content) and keeps the XML structure intact.
+    """
+    files = reference_files_content or []
+    
+    def truncate(_text: str, max_tokens: int) -> str:
+        overhead = estimate_tokens(_format_reference_files_xml(
+            [{'filename': f.get('filename', 'unknown'), 'content': ''} for f in files]
+        ))
+        remaining = max_tokens - overhead
+        kept = []
+        for file_info in files:
+            if remaining <= 0:
+                break
+            content = truncate_to_tokens(file_info.get('content', ''), remaining)
+            if not content:
+                break
+            kept.append({'filename': file_info.get('filename', 'unknown'), 'content': content})
+            remaining -= estimate_tokens(content)
+        return _format_reference_files_xml(kept)
+    
+    return PromptSection('reference_files', _format_reference_files_xml(files), priority, truncate=truncate)
+
+
+def _outline_titles(outline: list) -> list:
+    """Outline reduced to page titles (and part names), used when the full outline does not fit"""
+    titles = []
+    for item in outline:
+        if isinstance(item, dict) and 'part' in item and 'pages' in item:
+            titles.append({'part': item['part'], 'pages': [{'title': page.get('title')} for page in item['pages']]})
+        elif isinstance(item, dict):
+            titles.append({'title': item.get('title')})
+        else:
+            titles.append(item)
+    return titles
+
+
+def _page_outline_query(page_outline: dict) -> str:
+    """
+    Build the reference retrieval query for a page from its outline
+    
+    Args:
+        page_outline: Page outline dict with 'title', 'points' and optional 'part'
+        
+    Returns:
+        Query text (part, title and points)
+    """
+    points = page_outline.get('points') or []
+    if isinstance(points, str):
+        points = [points]
+    parts = [page_outline.get('part') or '', page_outline.get('title') or ''] + [str(point) for point in points]
+    return '\n'.join(part for part in parts if part)
+
+
 def get_outline_generation_prompt(project_context: 'ProjectContext', language: str = None) -> str:
     """
     生成 PPT 大纲的 prompt
@@ -117,7 +265,6 @@ def get_outline_generation_prompt(project_context: 'ProjectContext', language: s
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
     idea_prompt = project_context.idea_prompt or ""
     
     prompt = (f"""\
@@ -153,7 +300,10 @@ The user's request: {idea_prompt}. Now generate the outline, don't include any o
 {get_language_instruction(language)}
 """)
     
-    final_prompt = files_xml + prompt
+    final_prompt = assemble_prompt('outline_generation', [
+        _reference_files_section(project_context.reference_files_content),
+        PromptSection('instructions', prompt),
+    ])
     logger.debug(f"[get_outline_generation_prompt] Final prompt:\n{final_prompt}")
     return final_prompt
 
@@ -168,7 +318,6 @@ def get_outline_parsing_prompt(project_context: 'ProjectContext', language: str
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
     outline_text = project_context.outline_text or ""
     
     prompt = (f"""\
@@ -217,7 +366,10 @@ Now parse the outline text above into the structured format. Return only the JSO
 {get_language_instruction(language)}
 """)
     
-    final_prompt = files_xml + prompt
+    final_prompt = assemble_prompt('outline_parsing', [
+        _reference_files_section(project_context.reference_files_content),
+        PromptSection('instructions', prompt),
+    ])
     logger.debug(f"[get_outline_parsing_prompt] Final prompt:\n{final_prompt}")
     return final_prompt
 
@@ -239,25 +391,14 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
-    # 根据项目类型选择最相关的原始输入
-    if project_context.creation_type == 'idea' and project_context.idea_prompt:
-        original_input = project_context.idea_prompt
-    elif project_context.creation_type == 'outline' and project_context.outline_text:
-        original_input = f"用户提供的大纲：\n{project_context.outline_text}"
-    elif project_context.creation_type == 'descriptions' and project_context.description_text:
-        original_input = f"用户提供的描述：\n{project_context.description_text}"
-    else:
-        original_input = project_context.idea_prompt or ""
-    
-    prompt = (f"""\
-我们正在为PPT的每一页生成内容描述。
-用户的原始需求是：\n{original_input}\n
-我们已经有了完整的大纲：\n{outline}\n{part_info}
-现在请为第 {page_index} 页生成描述：
-{page_outline}
-{"**除非特殊要求，第一页的内容需要保持极简，只放标题副标题以及演讲人等（输出到标题后）, 不添加任何素材。**" if page_index == 1 else ""}
+    return ''.join(get_page_description_prompt_parts(
+        project_context, outline, page_outline, page_index, part_info, language
+    ))
 
+
+def _page_description_requirements(first_page: bool) -> str:
+    """页面描述的格式要求与示例（单页和多页批量 prompt 共用）"""
+    return f"""\
 【重要提示】生成的"页面文字"部分会直接渲染到PPT页面上，因此请务必注意：
 1. 文字内容要简洁精炼，每条要点控制在15-25字以内
 2. 条理清晰，使用列表形式组织内容
@@ -267,7 +408,7 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
 
 输出格式示例：
 页面标题：原始社会：与自然共生
-{"副标题：人类祖先和自然的相处之道" if page_index == 1 else ""}
+{"副标题：人类祖先和自然的相处之道" if first_page else ""}
 
 页面文字：
 - 狩猎采集文明：人类活动规模小，对环境影响有限
@@ -278,13 +419,189 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
 其他页面素材（如果文件中存在请积极添加，包括markdown图片链接、公式、表格等）
 
 【关于图片】如果参考文件中包含以 /files/ 开头的本地文件URL图片（例如 /files/mineru/xxx/image.png），请将这些图片以markdown格式输出，例如：![图片描述](/files/mineru/xxx/image.png)。这些图片会被包含在PPT页面中。
+"""
+
+
+_FIRST_PAGE_NOTE = "**除非特殊要求，第一页的内容需要保持极简，只放标题副标题以及演讲人等（输出到标题后）, 不添加任何素材。**"
+
+
+def _page_description_page_prompt(page_outline: dict, page_index: int, part_info: str = "",
+                                  language: str = None) -> str:
+    """单页 prompt 中本页的大纲与要求部分"""
+    return (f"""\
+{part_info}
+现在请为第 {page_index} 页生成描述：
+{page_outline}
+{_FIRST_PAGE_NOTE if page_index == 1 else ""}
 
+{_page_description_requirements(page_index == 1)}
 {get_language_instruction(language)}
 """)
+
+
+def _page_description_suffix_reserve(outline: list, shared_references: bool) -> int:
+    """
+    为每页后缀预留的 token 数：大纲中最长的单页要求，加上按页检索的参考片段预算
     
-    final_prompt = files_xml + prompt
-    logger.debug(f"[get_page_description_prompt] Final prompt:\n{final_prompt}")
-    return final_prompt
+    只依赖项目和大纲（与本页、输出语言无关），保证同一任务中各页的前缀相同
+    """
+    from config import get_config
+    
+    pages = []
+    for item in outline:
+        if isinstance(item, dict) and 'part' in item and 'pages' in item:
+            pages.extend((page, f"This page belongs to: {item['part']}\n") for page in item['pages'])
+        else:
+            pages.append((item, ""))
+    language_tokens = max(estimate_tokens(config['instruction']) for config in LANGUAGE_CONFIG.values())
+    page_tokens = max(
+        (estimate_tokens(_page_description_page_prompt(page, page_index, part_info, 'auto'))
+         for page_index, (page, part_info) in enumerate(pages, 1)),
+        default=estimate_tokens(_page_description_page_prompt({}, 1, "", 'auto'))
+    )
+    reference_tokens = 0 if shared_references else max(0, get_config().REFERENCE_TOKEN_BUDGET)
+    return page_tokens + language_tokens + reference_tokens
+
+
+def _page_description_prefix(project_context: 'ProjectContext', outline: list) -> Tuple[str, int, List[str], bool]:
+    """
+    构建页面描述 prompt 的共用前缀（原始需求、完整大纲，以及未超出检索预算时的全部参考文件）
+    
+    前缀压缩到 PROMPT_TOKEN_BUDGET 减去每页后缀的固定预留，使前缀在各页间保持相同，
+    且加上后缀后仍不超出预算
+    
+    Returns:
+        (前缀, 压缩前的估算 token 数, 被压缩的部分, 前缀是否已包含全部参考文件)
+    """
+    # 根据项目类型选择最相关的原始输入
+    if project_context.creation_type == 'idea' and project_context.idea_prompt:
+        original_input = project_context.idea_prompt
+    elif project_context.creation_type == 'outline' and project_context.outline_text:
+        original_input = f"用户提供的大纲：\n{project_context.outline_text}"
+    elif project_context.creation_type == 'descriptions' and project_context.description_text:
+        original_input = f"用户提供的描述：\n{project_context.description_text}"
+    else:
+        original_input = project_context.idea_prompt or ""
+    
+    shared_references = project_context.reference_files_fit_budget()
+    budget = get_prompt_token_budget()
+    if budget > 0:
+        # 预留后至少保留 1 个 token 的预算（0 表示不限制）
+        budget = max(1, budget - _page_description_suffix_reserve(outline, shared_references))
+    # 前缀超出 token 预算时依次压缩：参考文件 → 原始输入 → 完整大纲（退化为只含标题）
+    prefix, prefix_tokens, trimmed = fit_sections([
+        _reference_files_section(project_context.reference_files_content if shared_references else [], priority=3),
+        PromptSection('header', "我们正在为PPT的每一页生成内容描述。\n用户的原始需求是：\n"),
+        PromptSection('original_input', f"{original_input}\n\n", priority=2),
+        PromptSection('outline_header', "我们已经有了完整的大纲：\n"),
+        PromptSection('outline', f"{outline}\n", priority=1, summary=f"{_outline_titles(outline)}\n"),
+    ], budget)
+    return prefix, prefix_tokens, trimmed, shared_references
+
+
+def _page_description_suffix(prefix: str, page_references: List[Dict[str, str]],
+                             page_prompt: str) -> Tuple[str, int, List[str]]:
+    """
+    拼接本页（本批）后缀：检索到的参考片段 + 本页要求
+    
+    参考片段在前缀之外剩余的预算内压缩，本页要求始终保留
+    
+    Returns:
+        (后缀, 压缩前的估算 token 数, 被压缩的部分)
+    """
+    budget = get_prompt_token_budget()
+    if budget > 0:
+        budget = max(1, budget - estimate_tokens(prefix))
+    return fit_sections([
+        _reference_files_section(page_references, priority=1),
+        PromptSection('page', page_prompt),
+    ], budget)
+
+
+def get_page_description_prompt_parts(project_context: 'ProjectContext', outline: list,
+                                      page_outline: dict, page_index: int,
+                                      part_info: str = "",
+                                      language: str = None) -> Tuple[str, str]:
+    """
+    生成单个页面描述的 prompt，拆分为各页共用的前缀和本页的后缀
+    
+    前缀（原始需求、完整大纲，以及未超出检索预算时的全部参考文件）只依赖项目和大纲，
+    同一任务中各页完全相同，可由 provider 作为上下文缓存；后缀包含本页相关的参考文件片段和本页要求
+    
+    Args:
+        同 get_page_description_prompt
+        
+    Returns:
+        (共用前缀, 本页后缀)
+    """
+    page_prompt = _page_description_page_prompt(page_outline, page_index, part_info, language)
+    
+    prefix, prefix_tokens, trimmed, shared_references = _page_description_prefix(project_context, outline)
+    
+    # 参考文件超出检索预算时，只附带与本页相关的片段（大小受 REFERENCE_TOKEN_BUDGET 限制）
+    page_references = [] if shared_references else project_context.get_relevant_reference_files(
+        _page_outline_query(page_outline)
+    )
+    suffix, suffix_tokens, suffix_trimmed = _page_description_suffix(prefix, page_references, page_prompt)
+    
+    record_prompt('page_description', prefix + suffix,
+                  original_tokens=prefix_tokens + suffix_tokens, trimmed_sections=trimmed + suffix_trimmed)
+    logger.debug(f"[get_page_description_prompt] Final prompt:\n{prefix + suffix}")
+    return prefix, suffix
+
+
+def get_page_descriptions_batch_prompt_parts(project_context: 'ProjectContext', outline: list,
+                                             pages: List[Tuple[dict, int]],
+                                             language: str = None) -> Tuple[str, str]:
+    """
+    一次请求生成多个页面描述的 prompt，拆分为共用前缀和本批页面的后缀
+    
+    前缀与单页 prompt 完全相同（可共用 provider 的上下文缓存）；后缀列出本批各页的大纲，
+    要求按 BATCH_PAGE_DESCRIPTIONS_SCHEMA 输出 JSON 数组。参考文件超出检索预算时，
+    以本批所有页面的大纲检索相关片段（共用一份 REFERENCE_TOKEN_BUDGET）
+    
+    Args:
+        project_context: 项目上下文对象
+        outline: 完整大纲
+        pages: 本批页面 [(页面大纲, 页面编号)]，页面编号从1开始
+        language: 输出语言
+        
+    Returns:
+        (共用前缀, 本批后缀)
+    """
+    page_blocks = []
+    for page_outline, page_index in pages:
+        part_info = f"This page belongs to: {page_outline['part']}\n" if 'part' in page_outline else ""
+        page_blocks.append(f'<page index="{page_index}">\n{part_info}{page_outline}\n</page>\n')
+    first_page = any(page_index == 1 for _, page_index in pages)
+    page_indices = ', '.join(str(page_index) for _, page_index in pages)
+    
+    batch_prompt = (f"""\
+现在请为以下 {len(pages)} 页（第 {page_indices} 页）分别生成描述：
+{''.join(page_blocks)}{_FIRST_PAGE_NOTE if first_page else ""}
+
+每一页的描述都需要满足以下要求：
+{_page_description_requirements(first_page)}
+请以 JSON 数组格式输出，每页一个对象，按页面编号顺序排列，不要遗漏任何一页：
+[
+  {{"page_index": {pages[0][1]}, "description": "页面标题：...\\n\\n页面文字：\\n- ..."}}
+]
+其中 page_index 为上面 <page> 标签中的页面编号，description 为该页的完整描述（即单页输出的全部文本，换行使用 \\n）。
+只输出 JSON 数组，不要包含任何其他文字。
+{get_language_instruction(language)}
+""")
+    
+    prefix, prefix_tokens, trimmed, shared_references = _page_description_prefix(project_context, outline)
+    
+    batch_references = [] if shared_references else project_context.get_relevant_reference_files(
+        '\n'.join(_page_outline_query(page_outline) for page_outline, _ in pages)
+    )
+    suffix, suffix_tokens, suffix_trimmed = _page_description_suffix(prefix, batch_references, batch_prompt)
+    
+    record_prompt('page_description_batch', prefix + suffix,
+                  original_tokens=prefix_tokens + suffix_tokens, trimmed_sections=trimmed + suffix_trimmed)
+    logger.debug(f"[get_page_descriptions_batch_prompt_parts] Final prompt:\n{prefix + suffix}")
+    return prefix, suffix
 
 
 def get_image_generation_prompt(page_desc: str, outline_text: str, 
@@ -356,6 +673,7 @@ def get_image_generation_prompt(page_desc: str, outline_text: str,
 {"**注意：当前页面为ppt的封面页，请你采用专业的封面设计美学技巧，务必凸显出页面标题，分清主次，确保一下就能抓住观众的注意力。**" if page_index == 1 else ""}
 """)
     
+    record_prompt('image_generation', prompt)
     logger.debug(f"[get_image_generation_prompt] Final prompt:\n{prompt}")
     return prompt
 
@@ -387,6 +705,7 @@ def get_image_edit_prompt(edit_instruction: str, original_description: str = Non
     else:
         prompt = f"根据以下指令修改这张PPT页面：{edit_instruction}\n保持原有的内容结构和设计风格，只按照指令进行修改。提供的参考图中既有新素材，也有用户手动框选出的区域，请你根据原图和参考图的关系智能判断用户意图。"
     
+    record_prompt('image_edit', prompt)
     logger.debug(f"[get_image_edit_prompt] Final prompt:\n{prompt}")
     return prompt
 
@@ -401,7 +720,6 @@ def get_description_to_outline_prompt(project_context: 'ProjectContext', languag
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
     description_text = project_context.description_text or ""
     
     prompt = (f"""\
@@ -451,7 +769,10 @@ Now extract the outline structure from the description text above. Return only t
 {get_language_instruction(language)}
 """)
     
-    final_prompt = files_xml + prompt
+    final_prompt = assemble_prompt('description_to_outline', [
+        _reference_files_section(project_context.reference_files_content),
+        PromptSection('instructions', prompt),
+    ])
     logger.debug(f"[get_description_to_outline_prompt] Final prompt:\n{final_prompt}")
     return final_prompt
 
@@ -514,6 +835,7 @@ Now split the description text into individual page descriptions. Return only th
 {get_language_instruction(language)}
 """)
     
+    record_prompt('description_split', prompt)
     logger.debug(f"[get_description_split_prompt] Final prompt:\n{prompt}")
     return prompt
 
@@ -534,7 +856,6 @@ def get_outline_refinement_prompt(current_outline: List[Dict], user_requirement:
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
     
     # 处理空大纲的情况
     if not current_outline or len(current_outline) == 0:
@@ -606,7 +927,10 @@ You are a helpful assistant that modifies PPT outlines based on user requirement
 {get_language_instruction(language)}
 """)
     
-    final_prompt = files_xml + prompt
+    final_prompt = assemble_prompt('outline_refinement', [
+        _reference_files_section(project_context.reference_files_content),
+        PromptSection('instructions', prompt),
+    ])
     logger.debug(f"[get_outline_refinement_prompt] Final prompt:\n{final_prompt}")
     return final_prompt
 
@@ -629,7 +953,6 @@ def get_descriptions_refinement_prompt(current_descriptions: List[Dict], user_re
     Returns:
         格式化后的 prompt 字符串
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
     
     # 构建之前的修改历史记录
     previous_req_text = ""
@@ -713,7 +1036,10 @@ You are a helpful assistant that modifies PPT page descriptions based on user re
 {get_language_instruction(language)}
 """)
     
-    final_prompt = files_xml + prompt
+    final_prompt = assemble_prompt('descriptions_refinement', [
+        _reference_files_section(project_context.reference_files_content),
+        PromptSection('instructions', prompt),
+    ])
     logger.debug(f"[get_descriptions_refinement_prompt] Final prompt:\n{final_prompt}")
     return final_prompt
 
@@ -735,6 +1061,7 @@ def get_clean_background_prompt() -> str:
 
 注意，**任意位置的, 所有的**文字和图表都应该被彻底移除，**输出不应该包含任何文字和图表。**
 """
+    record_prompt('clean_background', prompt)
     logger.debug(f"[get_clean_background_prompt] Final prompt:\n{prompt}")
     return prompt
 
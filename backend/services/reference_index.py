@@ -0,0 +1,197 @@
+"""
+Reference file retrieval index
+
+Parsed reference files can be tens of thousands of tokens long. Instead of
+pasting every file into every per-page prompt, the markdown is split into
+heading-aware chunks when parsing completes (build_chunks, stored on the
+ReferenceFile row) and a BM25 index over all chunks of a project picks the
+top-k chunks relevant to a page, within a token budget.
+
+Tokenization is local and dependency-free: lowercase latin words/numbers plus
+character bigrams for CJK runs, which is the usual way to run BM25 on Chinese
+and Japanese text without a segmenter.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from .prompt_budget import estimate_tokens
+
+_WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+_CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+')
+_HEADING_RE = re.compile(r'^#{1,6}\s+\S')
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into BM25 terms (latin words and CJK character bigrams)"""
+    terms = []
+    for word in _WORD_RE.findall(text.lower()):
+        for part in _CJK_RE.split(word):
+            if len(part) > 1 or part.isdigit():
+                terms.append(part)
+        for run in _CJK_RE.findall(word):
+            if len(run) == 1:
+                terms.append(run)
+            else:
+                terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def _split_oversized(block: str, max_tokens: int) -> List[str]:
+    """Split a block larger than max_tokens by lines, then by characters"""
+    pieces, current = [], ''
+    for line in block.split('\n'):
+        while estimate_tokens(line) > max_tokens:
+            # 没有换行的超长行：按字符数硬切（CJK 按 1 字符/token 估计，取保守值）
+            pieces.extend([current] if current else [])
+            current = ''
+            pieces.append(line[:max_tokens])
+            line = line[max_tokens:]
+        candidate = f'{current}\n{line}' if current else line
+        if current and estimate_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def build_chunks(markdown: Optional[str], max_tokens: int = 400) -> List[Dict]:
+    """
+    Split markdown into retrieval chunks
+
+    Paragraph blocks are packed into chunks of at most max_tokens; a heading
+    always starts a new chunk, and a chunk continuing a section repeats the
+    section heading so it stays understandable (and matchable) on its own.
+
+    Returns:
+        List of {"text": chunk markdown, "terms": {term: frequency}}
+    """
+    if not markdown:
+        return []
+
+    chunks: List[Dict] = []
+    heading = ''
+    current: List[str] = []
+
+    def flush():
+        if current:
+            text = '\n\n'.join(current)
+            chunks.append({'text': text, 'terms': dict(Counter(tokenize(text)))})
+            current.clear()
+
+    for block in re.split(r'\n\s*\n', markdown.strip()):
+        block = block.strip()
+        if not block:
+            continue
+        if _HEADING_RE.match(block):
+            flush()
+            heading = block.split('\n', 1)[0]
+        for piece in _split_oversized(block, max_tokens):
+            if current and estimate_tokens('\n\n'.join(current + [piece])) > max_tokens:
+                flush()
+                if heading and not piece.startswith(heading):
+                    current.append(heading)
+            current.append(piece)
+    flush()
+    return chunks
+
+
+class ReferenceIndex:
+    """BM25 index over the chunks of a project's reference files"""
+
+    def __init__(self, reference_files: List[Dict], chunk_tokens: int = 400):
+        """
+        Args:
+            reference_files: Dicts with 'filename', 'content' and optionally the
+                precomputed 'chunks' (from build_chunks); files without chunks
+                are chunked here
+            chunk_tokens: Chunk size used for files without precomputed chunks
+        """
+        self.filenames: List[str] = []
+        # (file index, chunk index, text, term frequencies, length, token estimate)
+        self.entries: List[Tuple[int, int, str, Dict[str, int], int, int]] = []
+        for file_index, file_info in enumerate(reference_files):
+            self.filenames.append(file_info.get('filename', 'unknown'))
+            chunks = file_info.get('chunks') or build_chunks(file_info.get('content'), chunk_tokens)
+            for chunk_index, chunk in enumerate(chunks):
+                terms = chunk.get('terms') or dict(Counter(tokenize(chunk['text'])))
+                self.entries.append((
+                    file_index, chunk_index, chunk['text'], terms,
+                    sum(terms.values()), estimate_tokens(chunk['text'])
+                ))
+
+        self.document_frequency: Counter = Counter()
+        for entry in self.entries:
+            self.document_frequency.update(entry[3].keys())
+        self.average_length = (sum(entry[4] for entry in self.entries) / len(self.entries)) if self.entries else 0
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(entry[5] for entry in self.entries)
+
+    def _idf(self, term: str) -> float:
+        n = len(self.entries)
+        df = self.document_frequency.get(term, 0)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, top_k: int = 8) -> List[Tuple[float, int]]:
+        """
+        Rank chunks against the query
+
+        Returns:
+            (score, entry index) pairs with a positive score, best first
+        """
+        query_terms = set(tokenize(query))
+        if not query_terms or not self.entries:
+            return []
+
+        idf = {term: self._idf(term) for term in query_terms if term in self.document_frequency}
+        scored = []
+        for index, (_, _, _, terms, length, _) in enumerate(self.entries):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (self.average_length or 1))
+            score = 0.0
+            for term, weight in idf.items():
+                tf = terms.get(term)
+                if tf:
+                    score += weight * tf * (BM25_K1 + 1) / (tf + norm)
+            if score > 0:
+                scored.append((score, index))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored[:top_k]
+
+    def select(self, query: str, top_k: int = 8, token_budget: int = 4000) -> List[Dict[str, str]]:
+        """
+        Pick the most relevant chunks within a token budget
+
+        Chunks are taken best first (skipping any that no longer fit) and
+        returned grouped by file in document order, in the same shape as the
+        full reference file list so the prompt formatting stays unchanged.
+
+        Returns:
+            List of dicts with 'filename' and 'content' keys
+        """
+        chosen = []
+        used = 0
+        for _, index in self.search(query, top_k):
+            tokens = self.entries[index][5]
+            if used + tokens > token_budget:
+                continue
+            chosen.append(index)
+            used += tokens
+
+        selected: Dict[int, List[str]] = {}
+        for index in sorted(chosen, key=lambda i: self.entries[i][:2]):
+            file_index, _, text, _, _, _ = self.entries[index]
+            selected.setdefault(file_index, []).append(text)
+        return [
+            {'filename': self.filenames[file_index], 'content': '\n\n...\n\n'.join(texts)}
+            for file_index, texts in sorted(selected.items())
+        ]
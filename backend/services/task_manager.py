@@ -10,6 +10,10 @@ from datetime import datetime
 from sqlalchemy import func
 from models import db, Task, Page, Material, PageImageVersion
 from utils import get_filtered_pages
+from services.db_writer import run_write
+from services.async_runner import get_async_runner, run_in_app_context
+from services.ai_providers.image.hedged_provider import HedgeBudget, use_hedge_budget
+from services.prompt_budget import PromptStats, track_prompt_stats
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -66,6 +70,49 @@ class TaskManager:
 task_manager = TaskManager(max_workers=4)
 
 
+def _set_page_status(page_id: str, status: str):
+    """写操作：更新页面状态（通过 run_write 提交）"""
+    page = Page.query.get(page_id)
+    if page:
+        page.status = status
+
+
+def _update_task_progress(task_id: str, progress: Dict = None, completed: int = None,
+                          failed: int = None, prompt_tokens: Dict = None):
+    """写操作：覆盖或增量更新任务进度（通过 run_write 提交），prompt_tokens 为 PromptStats.summary()"""
+    task = Task.query.get(task_id)
+    if task:
+        if progress is not None:
+            task.set_progress(progress)
+        if completed is not None or failed is not None:
+            task.update_progress(completed=completed, failed=failed)
+        if prompt_tokens is not None:
+            prog = task.get_progress()
+            prog['prompt_tokens'] = prompt_tokens
+            task.set_progress(prog)
+
+
+def _iter_page_results(jobs: List[tuple], worker: Callable, async_worker: Callable,
+                       max_workers: int):
+    """
+    并发执行每页的生成任务，按完成顺序产出结果（需在应用上下文中调用）
+    
+    启用 AI_ASYNC_ENABLED 时 async_worker 在共享事件循环中运行（每页一个协程，最多 max_workers 个同时进行），
+    否则 worker 在线程池中运行（每页占用一个线程）
+    """
+    from flask import current_app
+    if current_app.config.get('AI_ASYNC_ENABLED'):
+        futures = get_async_runner().map_limited([async_worker(*job) for job in jobs], max_workers)
+        for future in as_completed(futures):
+            yield future.result()
+        return
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(worker, *job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
 def save_image_with_version(image, project_id: str, page_id: str, file_service, 
                             page_obj=None, image_format: str = 'PNG') -> tuple[str, int]:
     """
@@ -83,43 +130,60 @@ def save_image_with_version(image, project_id: str, page_id: str, file_service,
         tuple: (image_path, version_number) - 图片路径和版本号
     
     这个函数会：
-    1. 计算下一个版本号（使用 MAX 查询确保安全）
-    2. 标记所有旧版本为非当前版本
-    3. 保存图片到最终位置
-    4. 创建新版本记录
+    1. 保存图片到唯一文件名（带时间戳，写入后不再移动）
+    2. 计算下一个版本号（使用 MAX 查询确保安全）
+    3. 标记所有旧版本为非当前版本
+    4. 创建指向该文件的新版本记录
     5. 如果提供了 page_obj，更新页面状态和图片路径
+    
+    第 2-5 步通过 run_write 在一个事务中提交（事务可能被重试，因此其中不操作文件），
+    提交后记录指向的文件已经就位；提交失败时删除图片文件
     """
-    # 使用 MAX 查询确保版本号安全（即使有版本被删除也不会重复）
-    max_version = db.session.query(func.max(PageImageVersion.version_number)).filter_by(page_id=page_id).scalar() or 0
-    next_version = max_version + 1
-    
-    # 批量更新：标记所有旧版本为非当前版本（使用单条 SQL 更高效）
-    PageImageVersion.query.filter_by(page_id=page_id).update({'is_current': False})
-    
-    # 保存图片到最终位置（使用版本号）
-    image_path = file_service.save_generated_image(
-        image, project_id, page_id,
-        version_number=next_version,
-        image_format=image_format
-    )
-    
-    # 创建新版本记录
-    new_version = PageImageVersion(
-        page_id=page_id,
-        image_path=image_path,
-        version_number=next_version,
-        is_current=True
-    )
-    db.session.add(new_version)
-    
-    # 如果提供了 page_obj，更新页面状态和图片路径
-    if page_obj:
-        page_obj.generated_image_path = image_path
-        page_obj.status = 'COMPLETED'
-        page_obj.updated_at = datetime.utcnow()
-    
-    # 提交事务
-    db.session.commit()
+    # 先写入最终文件（图片编码和写盘不占用数据库写锁）
+    image_path = file_service.save_generated_image(image, project_id, page_id, image_format=image_format)
+    update_page = page_obj is not None
+    
+    def record_version():
+        # 使用 MAX 查询确保版本号安全（即使有版本被删除也不会重复）
+        max_version = db.session.query(func.max(PageImageVersion.version_number)).filter_by(page_id=page_id).scalar() or 0
+        next_version = max_version + 1
+        
+        # 批量更新：标记所有旧版本为非当前版本（使用单条 SQL 更高效）
+        PageImageVersion.query.filter_by(page_id=page_id).update({'is_current': False})
+        
+        # 创建新版本记录
+        new_version = PageImageVersion(
+            page_id=page_id,
+            image_path=image_path,
+            version_number=next_version,
+            is_current=True
+        )
+        db.session.add(new_version)
+        
+        # 如果提供了 page_obj，更新页面状态和图片路径
+        if update_page:
+            page = Page.query.get(page_id)
+            if page:
+                page.generated_image_path = image_path
+                page.status = 'COMPLETED'
+                page.updated_at = datetime.utcnow()
+        
+        db.session.flush()
+        return next_version, new_version.id
+    
+    # 在同一事务中分配版本号并写入记录（启用单写线程时由写线程提交）
+    try:
+        next_version, version_id = run_write(record_version)
+    except Exception:
+        image_file = Path(file_service.get_absolute_path(image_path))
+        if image_file.exists():
+            image_file.unlink()
+        raise
+    
+    # 后台生成导出用 JPEG 版本，不阻塞当前任务
+    from flask import current_app
+    from services.image_variant_service import schedule_image_variants
+    schedule_image_variants(version_id, current_app._get_current_object())
     
     logger.debug(f"Page {page_id} image saved as version {next_version}: {image_path}")
     
@@ -129,7 +193,7 @@ def save_image_with_version(image, project_id: str, page_id: str, file_service,
 def generate_descriptions_task(task_id: str, project_id: str, ai_service, 
                                project_context, outline: List[Dict], 
                                max_workers: int = 5, app=None,
-                               language: str = None):
+                               language: str = None, batch_size: int = 1):
     """
     Background task for generating page descriptions
     Based on demo.py gen_desc() with parallel processing
@@ -145,6 +209,8 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
         max_workers: Maximum number of parallel workers
         app: Flask app instance
         language: Output language (zh, en, ja, auto)
+        batch_size: Pages per request (1 = one request per page); pages missing from
+            or malformed in a batch response are regenerated one by one
     """
     if app is None:
         raise ValueError("Flask app instance must be provided")
@@ -182,6 +248,8 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
             # Generate descriptions in parallel
             completed = 0
             failed = 0
+            # 本任务各页 prompt 的 token 统计，随进度写入 task.progress['prompt_tokens']
+            prompt_stats = PromptStats()
             
             def generate_single_desc(page_id, page_outline, page_index):
                 """
@@ -195,10 +263,11 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                         from services.ai_service_manager import get_ai_service
                         ai_service = get_ai_service()
                         
-                        desc_text = ai_service.generate_page_description(
-                            project_context, outline, page_outline, page_index,
-                            language=language
-                        )
+                        with track_prompt_stats(prompt_stats):
+                            desc_text = ai_service.generate_page_description(
+                                project_context, outline, page_outline, page_index,
+                                language=language, shared_prefix=True
+                            )
                         
                         # Parse description into structured format
                         # This is a simplified version - you may want more sophisticated parsing
@@ -214,39 +283,104 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                         logger.error(f"Failed to generate description for page {page_id}: {error_detail}")
                         return (page_id, None, str(e))
             
-            # Use ThreadPoolExecutor for parallel generation
-            # 关键：提前提取 page.id，不要传递 ORM 对象到子线程
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(generate_single_desc, page.id, page_data, i)
-                    for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
+            async def agenerate_single_desc(page_id, page_outline, page_index):
+                """Async variant of generate_single_desc (runs on the shared event loop)"""
+                try:
+                    with track_prompt_stats(prompt_stats):
+                        desc_text = await ai_service.agenerate_page_description(
+                            project_context, outline, page_outline, page_index,
+                            language=language, shared_prefix=True
+                        )
+                    desc_content = {
+                        "text": desc_text,
+                        "generated_at": datetime.utcnow().isoformat()
+                    }
+                    return (page_id, desc_content, None)
+                except Exception as e:
+                    import traceback
+                    error_detail = traceback.format_exc()
+                    logger.error(f"Failed to generate description for page {page_id}: {error_detail}")
+                    return (page_id, None, str(e))
+            
+            def batch_results(batch, descriptions):
+                """将批量生成结果转换为每页的 (page_id, desc_content, error)，缺少描述的页面记为失败"""
+                generated_at = datetime.utcnow().isoformat()
+                return [
+                    (page_id, {"text": descriptions[page_index], "generated_at": generated_at}, None)
+                    if page_index in descriptions else (page_id, None, "Description generation failed")
+                    for page_id, _, page_index in batch
                 ]
+            
+            def generate_batch_desc(batch):
+                """一次请求生成多页描述，批量结果中缺失或格式错误的页面逐页重新生成"""
+                with app.app_context():
+                    try:
+                        from services.ai_service_manager import get_ai_service
+                        ai_service = get_ai_service()
+                        
+                        with track_prompt_stats(prompt_stats):
+                            descriptions = ai_service.generate_page_descriptions_batch(
+                                project_context, outline,
+                                [(page_outline, page_index) for _, page_outline, page_index in batch],
+                                language=language
+                            )
+                        return batch_results(batch, descriptions)
+                    except Exception as e:
+                        logger.error(f"Failed to generate descriptions for pages {[job[0] for job in batch]}: {e}",
+                                     exc_info=True)
+                        return [(page_id, None, str(e)) for page_id, _, _ in batch]
+            
+            async def agenerate_batch_desc(batch):
+                """Async variant of generate_batch_desc (runs on the shared event loop)"""
+                try:
+                    with track_prompt_stats(prompt_stats):
+                        descriptions = await ai_service.agenerate_page_descriptions_batch(
+                            project_context, outline,
+                            [(page_outline, page_index) for _, page_outline, page_index in batch],
+                            language=language
+                        )
+                    return batch_results(batch, descriptions)
+                except Exception as e:
+                    logger.error(f"Failed to generate descriptions for pages {[job[0] for job in batch]}: {e}",
+                                 exc_info=True)
+                    return [(page_id, None, str(e)) for page_id, _, _ in batch]
+            
+            # 关键：提前提取 page.id，不要传递 ORM 对象到子线程
+            jobs = [(page.id, page_data, i) for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)]
+            
+            # batch_size > 1 时每个请求生成连续的多页，否则逐页请求；两种方式都按批产出每页结果
+            if batch_size and batch_size > 1:
+                batches = [(jobs[i:i + batch_size],) for i in range(0, len(jobs), batch_size)]
+                result_batches = _iter_page_results(batches, generate_batch_desc, agenerate_batch_desc, max_workers)
+            else:
+                result_batches = ([result] for result in _iter_page_results(
+                    jobs, generate_single_desc, agenerate_single_desc, max_workers
+                ))
+            
+            # Process results as they complete
+            for page_id, desc_content, error in (result for batch in result_batches for result in batch):
+                db.session.expire_all()
                 
-                # Process results as they complete
-                for future in as_completed(futures):
-                    page_id, desc_content, error = future.result()
-                    
-                    db.session.expire_all()
-                    
-                    # Update page in database
+                if error:
+                    failed += 1
+                else:
+                    completed += 1
+                
+                def record_description(page_id=page_id, desc_content=desc_content, error=error,
+                                       completed=completed, failed=failed):
+                    # Update page and task progress in one transaction
                     page = Page.query.get(page_id)
                     if page:
                         if error:
                             page.status = 'FAILED'
-                            failed += 1
                         else:
                             page.set_description_content(desc_content)
                             page.status = 'DESCRIPTION_GENERATED'
-                            completed += 1
-                        
-                        db.session.commit()
-                    
-                    # Update task progress
-                    task = Task.query.get(task_id)
-                    if task:
-                        task.update_progress(completed=completed, failed=failed)
-                        db.session.commit()
-                        logger.info(f"Description Progress: {completed}/{len(pages)} pages completed")
+                    _update_task_progress(task_id, completed=completed, failed=failed,
+                                          prompt_tokens=prompt_stats.summary())
+                
+                run_write(record_description)
+                logger.info(f"Description Progress: {completed}/{len(pages)} pages completed")
             
             # Mark task as completed
             task = Task.query.get(task_id)
@@ -323,6 +457,77 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
             completed = 0
             failed = 0
             
+            # 请求对冲的额外请求预算（仅在 IMAGE_HEDGING_ENABLED 时生效）
+            hedge_budget = HedgeBudget.for_pages(len(pages), app.config.get('IMAGE_HEDGE_BUDGET_RATIO', 0))
+            prompt_stats = PromptStats()
+            
+            def prepare_image_request(page_id, page_data, page_index):
+                """
+                Mark the page as generating and build its image prompt and reference images
+                （需在应用上下文中调用）
+                
+                Returns:
+                    tuple: (page_obj, prompt, ref_image_path, additional_ref_images)
+                """
+                logger.debug(f"Starting image generation for page {page_id}, index {page_index}")
+                # Get page from database in this thread
+                page_obj = Page.query.get(page_id)
+                if not page_obj:
+                    raise ValueError(f"Page {page_id} not found")
+                
+                # Update page status
+                run_write(_set_page_status, page_id, 'GENERATING')
+                logger.debug(f"Page {page_id} status updated to GENERATING")
+                
+                # Get description content
+                desc_content = page_obj.get_description_content()
+                if not desc_content:
+                    raise ValueError("No description content for page")
+                
+                # 获取描述文本（可能是 text 字段或 text_content 数组）
+                desc_text = desc_content.get('text', '')
+                if not desc_text and desc_content.get('text_content'):
+                    # 如果 text 字段不存在，尝试从 text_content 数组获取
+                    text_content = desc_content.get('text_content', [])
+                    if isinstance(text_content, list):
+                        desc_text = '\n'.join(text_content)
+                    else:
+                        desc_text = str(text_content)
+                
+                logger.debug(f"Got description text for page {page_id}: {desc_text[:100]}...")
+                
+                # 从当前页面的描述内容中提取图片 URL
+                page_additional_ref_images = []
+                has_material_images = False
+                
+                # 从描述文本中提取图片
+                if desc_text:
+                    image_urls = ai_service.extract_image_urls_from_markdown(desc_text)
+                    if image_urls:
+                        logger.info(f"Found {len(image_urls)} image(s) in page {page_id} description")
+                        page_additional_ref_images = image_urls
+                        has_material_images = True
+                
+                # 在子线程中动态获取模板路径，确保使用最新模板
+                page_ref_image_path = None
+                if use_template:
+                    page_ref_image_path = file_service.get_template_path(project_id)
+                    # 注意：如果有风格描述，即使没有模板图片也允许生成
+                    # 这个检查已经在 controller 层完成，这里不再检查
+                
+                # Generate image prompt
+                with track_prompt_stats(prompt_stats):
+                    prompt = ai_service.generate_image_prompt(
+                        outline, page_data, desc_text, page_index,
+                        has_material_images=has_material_images,
+                        extra_requirements=extra_requirements,
+                        language=language,
+                        has_template=use_template
+                    )
+                logger.debug(f"Generated image prompt for page {page_id}")
+                
+                return page_obj, prompt, page_ref_image_path, page_additional_ref_images or None
+            
             def generate_single_image(page_id, page_data, page_index):
                 """
                 Generate image for a single page
@@ -331,69 +536,17 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                 # 关键修复：在子线程中也需要应用上下文
                 with app.app_context():
                     try:
-                        logger.debug(f"Starting image generation for page {page_id}, index {page_index}")
-                        # Get page from database in this thread
-                        page_obj = Page.query.get(page_id)
-                        if not page_obj:
-                            raise ValueError(f"Page {page_id} not found")
-                        
-                        # Update page status
-                        page_obj.status = 'GENERATING'
-                        db.session.commit()
-                        logger.debug(f"Page {page_id} status updated to GENERATING")
-                        
-                        # Get description content
-                        desc_content = page_obj.get_description_content()
-                        if not desc_content:
-                            raise ValueError("No description content for page")
-                        
-                        # 获取描述文本（可能是 text 字段或 text_content 数组）
-                        desc_text = desc_content.get('text', '')
-                        if not desc_text and desc_content.get('text_content'):
-                            # 如果 text 字段不存在，尝试从 text_content 数组获取
-                            text_content = desc_content.get('text_content', [])
-                            if isinstance(text_content, list):
-                                desc_text = '\n'.join(text_content)
-                            else:
-                                desc_text = str(text_content)
-                        
-                        logger.debug(f"Got description text for page {page_id}: {desc_text[:100]}...")
-                        
-                        # 从当前页面的描述内容中提取图片 URL
-                        page_additional_ref_images = []
-                        has_material_images = False
-                        
-                        # 从描述文本中提取图片
-                        if desc_text:
-                            image_urls = ai_service.extract_image_urls_from_markdown(desc_text)
-                            if image_urls:
-                                logger.info(f"Found {len(image_urls)} image(s) in page {page_id} description")
-                                page_additional_ref_images = image_urls
-                                has_material_images = True
-                        
-                        # 在子线程中动态获取模板路径，确保使用最新模板
-                        page_ref_image_path = None
-                        if use_template:
-                            page_ref_image_path = file_service.get_template_path(project_id)
-                            # 注意：如果有风格描述，即使没有模板图片也允许生成
-                            # 这个检查已经在 controller 层完成，这里不再检查
-                        
-                        # Generate image prompt
-                        prompt = ai_service.generate_image_prompt(
-                            outline, page_data, desc_text, page_index,
-                            has_material_images=has_material_images,
-                            extra_requirements=extra_requirements,
-                            language=language,
-                            has_template=use_template
+                        page_obj, prompt, ref_image_path, additional_ref_images = prepare_image_request(
+                            page_id, page_data, page_index
                         )
-                        logger.debug(f"Generated image prompt for page {page_id}")
                         
                         # Generate image
                         logger.info(f"🎨 Calling AI service to generate image for page {page_index}/{len(pages)}...")
-                        image = ai_service.generate_image(
-                            prompt, page_ref_image_path, aspect_ratio, resolution,
-                            additional_ref_images=page_additional_ref_images if page_additional_ref_images else None
-                        )
+                        with use_hedge_budget(hedge_budget):
+                            image = ai_service.generate_image(
+                                prompt, ref_image_path, aspect_ratio, resolution,
+                                additional_ref_images=additional_ref_images
+                            )
                         logger.info(f"✅ Image generated successfully for page {page_index}")
                         
                         if not image:
@@ -413,39 +566,62 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                         logger.error(f"Failed to generate image for page {page_id}: {error_detail}")
                         return (page_id, None, str(e))
             
-            # Use ThreadPoolExecutor for parallel generation
-            # 关键：提前提取 page.id，不要传递 ORM 对象到子线程
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(generate_single_image, page.id, page_data, i)
-                    for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)
-                ]
-                
-                # Process results as they complete
-                for future in as_completed(futures):
-                    page_id, image_path, error = future.result()
+            async def agenerate_single_image(page_id, page_data, page_index):
+                """
+                Async variant of generate_single_image (runs on the shared event loop)
+                数据库读写和图片保存在执行器线程中完成，等待 AI 响应期间不占用线程
+                """
+                try:
+                    page_obj, prompt, ref_image_path, additional_ref_images = await run_in_app_context(
+                        app, prepare_image_request, page_id, page_data, page_index
+                    )
                     
-                    db.session.expire_all()
+                    logger.info(f"🎨 Calling AI service to generate image for page {page_index}/{len(pages)}...")
+                    with use_hedge_budget(hedge_budget):
+                        image = await ai_service.agenerate_image(
+                            prompt, ref_image_path, aspect_ratio, resolution,
+                            additional_ref_images=additional_ref_images
+                        )
+                    logger.info(f"✅ Image generated successfully for page {page_index}")
                     
-                    # Update page in database (主要是为了更新失败状态)
-                    page = Page.query.get(page_id)
-                    if page:
-                        if error:
-                            page.status = 'FAILED'
-                            failed += 1
-                            db.session.commit()
-                        else:
-                            # 图片已在子线程中保存并创建版本记录，这里只需要更新计数
-                            completed += 1
-                            # 刷新页面对象以获取最新状态
-                            db.session.refresh(page)
+                    if not image:
+                        raise ValueError("Failed to generate image")
+                    
+                    image_path, next_version = await run_in_app_context(
+                        app, save_image_with_version, image, project_id, page_id, file_service, page_obj=page_obj
+                    )
                     
-                    # Update task progress
-                    task = Task.query.get(task_id)
-                    if task:
-                        task.update_progress(completed=completed, failed=failed)
-                        db.session.commit()
-                        logger.info(f"Image Progress: {completed}/{len(pages)} pages completed")
+                    return (page_id, image_path, None)
+                    
+                except Exception as e:
+                    import traceback
+                    error_detail = traceback.format_exc()
+                    logger.error(f"Failed to generate image for page {page_id}: {error_detail}")
+                    return (page_id, None, str(e))
+            
+            # 关键：提前提取 page.id，不要传递 ORM 对象到子线程
+            jobs = [(page.id, page_data, i) for i, (page, page_data) in enumerate(zip(pages, pages_data), 1)]
+            
+            # Process results as they complete
+            for page_id, image_path, error in _iter_page_results(
+                jobs, generate_single_image, agenerate_single_image, max_workers
+            ):
+                db.session.expire_all()
+                
+                # 图片已在生成任务中保存并创建版本记录，这里只需要更新失败状态和计数
+                if error:
+                    failed += 1
+                else:
+                    completed += 1
+                
+                def record_image_result(page_id=page_id, error=error, completed=completed, failed=failed):
+                    if error:
+                        _set_page_status(page_id, 'FAILED')
+                    _update_task_progress(task_id, completed=completed, failed=failed,
+                                          prompt_tokens=prompt_stats.summary())
+                
+                run_write(record_image_result)
+                logger.info(f"Image Progress: {completed}/{len(pages)} pages completed")
             
             # Mark task as completed
             task = Task.query.get(task_id)
@@ -453,7 +629,8 @@ def generate_images_task(task_id: str, project_id: str, ai_service, file_service
                 task.status = 'COMPLETED'
                 task.completed_at = datetime.utcnow()
                 db.session.commit()
-                logger.info(f"Task {task_id} COMPLETED - {completed} images generated, {failed} failed")
+                logger.info(f"Task {task_id} COMPLETED - {completed} images generated, {failed} failed"
+                            + (f", {hedge_budget.used} hedged requests" if hedge_budget.used else ""))
             
             # Update project status
             from models import Project
@@ -902,17 +1079,14 @@ def export_editable_pptx_with_recursive_analysis_task(
                         progress_messages = progress_messages[-max_messages:]
                     
                     # 更新数据库
-                    task = Task.query.get(task_id)
-                    if task:
-                        task.set_progress({
-                            "total": 100,
-                            "completed": percent,
-                            "failed": 0,
-                            "current_step": message,
-                            "percent": percent,
-                            "messages": progress_messages.copy()
-                        })
-                        db.session.commit()
+                    run_write(_update_task_progress, task_id, progress={
+                        "total": 100,
+                        "completed": percent,
+                        "failed": 0,
+                        "current_step": message,
+                        "percent": percent,
+                        "messages": progress_messages.copy()
+                    })
                 except Exception as e:
                     logger.warning(f"更新进度失败: {e}")
             
@@ -1015,3 +1189,103 @@ def export_editable_pptx_with_recursive_analysis_task(
                 task.error_message = str(e)
                 task.completed_at = datetime.utcnow()
                 db.session.commit()
+
+
+def export_images_task(
+    task_id: str,
+    project_id: str,
+    export_format: str,
+    image_paths: List[str],
+    output_path: str,
+    filename: str,
+    cache_key: str,
+    options: Dict[str, Any] = None,
+    app=None
+):
+    """
+    Background task for image based PPTX/PDF export (artifact cached and deduplicated)
+    
+    Args:
+        task_id: Task ID
+        project_id: Project ID
+        export_format: 'pptx' or 'pdf'
+        image_paths: Absolute image paths, in page order
+        output_path: Final artifact path
+        filename: Artifact filename (used for the download URL)
+        cache_key: Export cache key, recorded next to the artifact on success
+        options: Format options (pdf: dpi, jpeg_quality)
+        app: Flask app instance
+    """
+    if app is None:
+        raise ValueError("Flask app instance must be provided")
+    
+    import os
+    from services.export_service import ExportService
+    from services.export_cache import export_artifact_cache
+    
+    options = options or {}
+    
+    with app.app_context():
+        tmp_path = f"{output_path}.{task_id}{export_artifact_cache.TMP_SUFFIX}"
+        try:
+            task = Task.query.get(task_id)
+            if not task:
+                return
+            
+            total = len(image_paths)
+            task.status = 'PROCESSING'
+            task.set_progress({"total": total, "completed": 0, "failed": 0})
+            db.session.commit()
+            
+            def progress_callback(completed: int, total_pages: int):
+                try:
+                    run_write(_update_task_progress, task_id, completed=completed)
+                except Exception as e:
+                    logger.warning(f"更新进度失败: {e}")
+            
+            # Build into a temp file so the previous artifact stays downloadable until replaced
+            export_artifact_cache.invalidate(output_path)
+            if export_format == 'pdf':
+                ExportService.create_pdf_from_images(
+                    image_paths,
+                    output_file=tmp_path,
+                    dpi=options.get('dpi'),
+                    jpeg_quality=options.get('jpeg_quality'),
+                    progress_callback=progress_callback
+                )
+            else:
+                ExportService.create_pptx_from_images(
+                    image_paths,
+                    output_file=tmp_path,
+                    progress_callback=progress_callback
+                )
+            export_artifact_cache.publish(tmp_path, output_path, cache_key)
+            
+            task = Task.query.get(task_id)
+            if task:
+                task.status = 'COMPLETED'
+                task.completed_at = datetime.utcnow()
+                task.set_progress({
+                    "total": total,
+                    "completed": total,
+                    "failed": 0,
+                    "download_url": f"/files/{project_id}/exports/{filename}",
+                    "filename": filename
+                })
+                db.session.commit()
+            logger.info(f"Task {task_id} COMPLETED - {export_format} export: {output_path}")
+        
+        except Exception as e:
+            logger.error(f"Task {task_id} FAILED: {str(e)}", exc_info=True)
+            db.session.rollback()
+            task = Task.query.get(task_id)
+            if task:
+                task.status = 'FAILED'
+                task.error_message = str(e)
+                task.completed_at = datetime.utcnow()
+                db.session.commit()
+        
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            export_artifact_cache.release_inflight(cache_key, task_id)
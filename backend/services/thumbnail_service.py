@@ -0,0 +1,111 @@
+"""
+Thumbnail Service - on-demand resized copies of uploaded images, cached on disk
+
+Thumbnails are generated once per (source file, width) and stored under
+``<upload_folder>/.thumbnails``. The cache file name embeds the source mtime and
+size, so replacing the source automatically produces a fresh thumbnail while the
+stale one is cleaned up.
+"""
+import glob
+import logging
+import os
+import threading
+from pathlib import Path
+
+from PIL import Image, features
+
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailService:
+    """Service for cached image thumbnails"""
+
+    # Requested widths are snapped up to one of these buckets to bound the cache size
+    WIDTH_BUCKETS = (160, 320, 480, 640, 960, 1280)
+    CACHE_DIR_NAME = '.thumbnails'
+
+    # Fixed pool of striped locks: thumbnails hashing to the same stripe are generated serially
+    LOCK_STRIPES = 64
+    _locks = tuple(threading.Lock() for _ in range(LOCK_STRIPES))
+
+    def __init__(self, upload_folder: str, quality: int = 80):
+        """
+        Args:
+            upload_folder: Upload root folder (sources must live inside it)
+            quality: Encoder quality for thumbnails
+        """
+        self.upload_folder = Path(upload_folder)
+        self.cache_root = self.upload_folder / self.CACHE_DIR_NAME
+        self.quality = quality
+        if features.check('webp'):
+            self.format, self.extension, self.mimetype = 'WEBP', 'webp', 'image/webp'
+        else:
+            self.format, self.extension, self.mimetype = 'JPEG', 'jpg', 'image/jpeg'
+
+    @classmethod
+    def snap_width(cls, width: int) -> int:
+        """Round a requested width up to the nearest bucket (capped at the largest)"""
+        for bucket in cls.WIDTH_BUCKETS:
+            if width <= bucket:
+                return bucket
+        return cls.WIDTH_BUCKETS[-1]
+
+    @classmethod
+    def _lock_for(cls, key: str) -> threading.Lock:
+        return cls._locks[hash(key) % cls.LOCK_STRIPES]
+
+    def _cache_path(self, source_path: Path, width: int, stat: os.stat_result) -> Path:
+        relative = source_path.resolve().relative_to(self.upload_folder.resolve())
+        # The full source name (with extension) keeps a.png and a.jpg in separate cache entries
+        name = f"{relative.name}__t{width}_{stat.st_mtime_ns}_{stat.st_size}.{self.extension}"
+        return self.cache_root / relative.parent / name
+
+    def get_thumbnail(self, source_path: str, width: int) -> str:
+        """
+        Return the path of a cached thumbnail for source_path, generating it if needed
+
+        Args:
+            source_path: Absolute path of the source image (inside the upload folder)
+            width: Requested width in pixels (snapped to WIDTH_BUCKETS)
+
+        Returns:
+            Absolute path of the thumbnail file
+        """
+        source = Path(source_path)
+        width = self.snap_width(width)
+        stat = source.stat()
+        cache_path = self._cache_path(source, width, stat)
+        if cache_path.exists():
+            return str(cache_path)
+
+        with self._lock_for(str(cache_path)):
+            if cache_path.exists():
+                return str(cache_path)
+
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with Image.open(source) as img:
+                img.draft('RGB', (width, width))  # JPEG: decode at reduced scale
+                if img.width > width:
+                    height = max(1, round(img.height * width / img.width))
+                    thumb = img.resize((width, height), Image.LANCZOS, reducing_gap=2.0)
+                else:
+                    thumb = img.copy()
+                if self.format == 'JPEG' and thumb.mode != 'RGB':
+                    thumb = thumb.convert('RGB')
+                elif thumb.mode not in ('RGB', 'RGBA'):
+                    thumb = thumb.convert('RGBA' if 'A' in thumb.getbands() or 'transparency' in img.info else 'RGB')
+
+            tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+            thumb.save(str(tmp_path), format=self.format, quality=self.quality)
+            os.replace(tmp_path, cache_path)
+
+            # Drop thumbnails of older revisions of the same source at this width
+            for stale in cache_path.parent.glob(f"{glob.escape(source.name)}__t{width}_*"):
+                if stale != cache_path:
+                    try:
+                        stale.unlink()
+                    except OSError:
+                        pass
+
+        logger.debug(f"Generated thumbnail {cache_path.name} for {source.name}")
+        return str(cache_path)
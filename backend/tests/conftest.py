@@ -21,16 +21,18 @@ os.environ['USE_MOCK_AI'] = 'true'  # 标记使用mock AI服务
 os.environ['GOOGLE_API_KEY'] = os.environ.get('GOOGLE_API_KEY', 'mock-api-key-for-testing')
 os.environ['FLASK_ENV'] = 'testing'
 
+# 测试数据库 - 默认使用临时SQLite；设置 TEST_DATABASE_URL 可在 PostgreSQL 等数据库上运行
+# （必须在导入 config 之前设置，测试会清空数据表，请勿指向正式数据库）
+_test_temp_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = os.environ.get('TEST_DATABASE_URL') or \
+    f"sqlite:///{os.path.join(_test_temp_dir, 'test.db')}"
+
 
 @pytest.fixture(scope='session')
 def app():
     """创建Flask测试应用"""
-    # 创建临时目录用于测试
-    temp_dir = tempfile.mkdtemp()
-    temp_db = os.path.join(temp_dir, 'test.db')
-    
-    # 设置测试数据库路径
-    os.environ['DATABASE_URL'] = f'sqlite:///{temp_db}'
+    # 临时目录用于上传文件（及默认的SQLite测试库）
+    temp_dir = _test_temp_dir
     
     # 现在导入app
     from app import create_app
@@ -41,7 +43,6 @@ def app():
     # 覆盖配置
     test_app.config.update({
         'TESTING': True,
-        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{temp_db}',
         'WTF_CSRF_ENABLED': False,
         'UPLOAD_FOLDER': temp_dir,
     })
@@ -135,6 +136,22 @@ def mock_ai_service():
         yield mock_instance
 
 
+from services.ai_providers import ImageProvider  # noqa: E402  (需在设置测试环境变量之后导入)
+from services.ai_service import AIService  # noqa: E402
+
+
+class DummyImageProvider(ImageProvider):
+    """只测试文本生成时使用的图片 provider，被调用即失败"""
+
+    def generate_image(self, prompt, ref_images=None, aspect_ratio="16:9", resolution="2K"):
+        raise AssertionError('不应生成图片')
+
+
+def make_ai_service(text_provider):
+    """使用给定文本 provider 的 AIService（不生成图片）"""
+    return AIService(text_provider=text_provider, image_provider=DummyImageProvider())
+
+
 @pytest.fixture
 def temp_upload_dir():
     """创建临时上传目录"""
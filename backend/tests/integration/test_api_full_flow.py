@@ -118,7 +118,7 @@ def wait_for_task_completion(project_id: str, task_id: str, timeout: int = 120):
             
             if task_status == 'COMPLETED':
                 print(f"✓ Task {task_id[:8]}... completed (took {elapsed}s)")
-                return
+                return data['data']
             
             if task_status == 'FAILED':
                 error_msg = data['data'].get('error_message', 'Unknown error')
@@ -310,17 +310,21 @@ class TestAPIFullFlow:
             timeout=60
         )
         
-        assert response.status_code == 200
+        assert response.status_code in (200, 202)
         data = response.json()
         assert data['success'] is True
-        assert 'download_url' in data['data']
-        assert '.pptx' in data['data']['download_url']
+        if 'download_url' in data['data']:
+            download_url = data['data']['download_url']
+        else:
+            # Export runs as a task unless an identical artifact is cached
+            task_data = wait_for_task_completion(pid, data['data']['task_id'])
+            download_url = task_data['progress']['download_url']
+        assert '.pptx' in download_url
         
-        print(f"  Export URL: {data['data']['download_url']}")
+        print(f"  Export URL: {download_url}")
         
         # Step 7: Verify PPT can be downloaded
         print('📥 Step 7: Verifying PPT file can be downloaded...')
-        download_url = data['data']['download_url']
         response = requests.get(f"{BASE_URL}{download_url}", timeout=30)
         
         assert response.status_code == 200
@@ -0,0 +1,218 @@
+"""
+导出API单元测试
+
+验证PPTX/PDF导出的异步任务、产物缓存与去重
+"""
+
+import os
+import time
+
+from PIL import Image
+
+from conftest import assert_success_response
+
+
+def _create_project_with_images(client, app, page_count=2):
+    """创建项目并为每页写入生成图片"""
+    response = client.post('/api/projects', json={
+        'creation_type': 'idea',
+        'idea_prompt': '导出测试'
+    })
+    project_id = response.get_json()['data']['project_id']
+
+    from models import db, Page
+    pages_dir = os.path.join(app.config['UPLOAD_FOLDER'], project_id, 'pages')
+    os.makedirs(pages_dir, exist_ok=True)
+    for i in range(page_count):
+        relative_path = f'{project_id}/pages/page_{i}.png'
+        Image.new('RGB', (320, 180), (i * 60, 120, 200)).save(
+            os.path.join(app.config['UPLOAD_FOLDER'], relative_path)
+        )
+        db.session.add(Page(
+            project_id=project_id,
+            order_index=i,
+            generated_image_path=relative_path,
+            status='COMPLETED'
+        ))
+    db.session.commit()
+    return project_id
+
+
+def _wait_for_task(client, project_id, task_id, timeout=10):
+    """轮询任务直到完成"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        data = client.get(f'/api/projects/{project_id}/tasks/{task_id}').get_json()['data']
+        if data['status'] in ('COMPLETED', 'FAILED'):
+            return data
+        time.sleep(0.05)
+    raise AssertionError(f'Task {task_id} did not finish in {timeout}s')
+
+
+class TestImageExport:
+    """PPTX/PDF导出测试"""
+
+    def test_export_creates_task_then_hits_cache(self, client, app):
+        """首次导出创建任务，相同请求再次导出直接返回缓存文件"""
+        project_id = _create_project_with_images(client, app)
+
+        response = client.get(f'/api/projects/{project_id}/export/pptx')
+        data = assert_success_response(response, 202)
+        task = _wait_for_task(client, project_id, data['data']['task_id'])
+        assert task['status'] == 'COMPLETED'
+        assert task['progress']['download_url'].endswith('.pptx')
+
+        response = client.get(f'/api/projects/{project_id}/export/pptx')
+        data = assert_success_response(response, 200)
+        assert data['data']['cached'] is True
+        assert data['data']['download_url'] == task['progress']['download_url']
+
+    def test_changed_image_invalidates_cache(self, client, app):
+        """页面图片变化后重新构建"""
+        project_id = _create_project_with_images(client, app)
+
+        data = assert_success_response(client.get(f'/api/projects/{project_id}/export/pdf'), 202)
+        _wait_for_task(client, project_id, data['data']['task_id'])
+
+        image_path = os.path.join(app.config['UPLOAD_FOLDER'], project_id, 'pages', 'page_0.png')
+        Image.new('RGB', (640, 360), 'white').save(image_path)
+
+        response = client.get(f'/api/projects/{project_id}/export/pdf')
+        assert response.status_code == 202
+
+    def test_different_options_use_different_keys(self, client, app):
+        """导出选项不同则不复用缓存"""
+        project_id = _create_project_with_images(client, app, page_count=1)
+
+        data = assert_success_response(client.get(f'/api/projects/{project_id}/export/pdf'), 202)
+        _wait_for_task(client, project_id, data['data']['task_id'])
+
+        response = client.get(f'/api/projects/{project_id}/export/pdf?jpeg_quality=80')
+        assert response.status_code == 202
+
+    def test_dpi_zero_keeps_original_resolution(self, client, app, monkeypatch):
+        """dpi=0 表示保持原始分辨率，不会被配置的默认 DPI 覆盖"""
+        monkeypatch.setitem(app.config, 'EXPORT_PDF_DPI', 72)
+        project_id = _create_project_with_images(client, app, page_count=1)
+
+        data = assert_success_response(client.get(f'/api/projects/{project_id}/export/pdf?dpi=0'), 202)
+        _wait_for_task(client, project_id, data['data']['task_id'])
+
+        response = client.get(f'/api/projects/{project_id}/export/pdf?dpi=0')
+        assert response.status_code == 200
+        # 使用配置 DPI 的导出是不同的产物
+        response = client.get(f'/api/projects/{project_id}/export/pdf')
+        assert response.status_code == 202
+
+    def test_invalid_pdf_options_rejected(self, client, app):
+        """非整数或超出范围的 dpi / jpeg_quality 返回 400"""
+        project_id = _create_project_with_images(client, app, page_count=1)
+
+        for query in ('dpi=-1', 'dpi=100000', 'dpi=abc', 'jpeg_quality=0', 'jpeg_quality=x'):
+            response = client.get(f'/api/projects/{project_id}/export/pdf?{query}')
+            assert response.status_code == 400, query
+
+    def test_key_sidecar_not_served(self, client, app):
+        """导出目录中的缓存 key 文件不对外提供"""
+        project_id = _create_project_with_images(client, app, page_count=1)
+        data = assert_success_response(client.get(f'/api/projects/{project_id}/export/pdf'), 202)
+        task = _wait_for_task(client, project_id, data['data']['task_id'])
+        download_url = task['progress']['download_url']
+
+        assert client.get(download_url).status_code == 200
+        assert client.get(download_url + '.key').status_code == 404
+
+        # 构建中的临时文件同样不可下载
+        exports_dir = os.path.join(app.config['UPLOAD_FOLDER'], project_id, 'exports')
+        artifact_name = download_url.rsplit('/', 1)[-1]
+        with open(os.path.join(exports_dir, artifact_name + '.task.tmp'), 'wb') as f:
+            f.write(b'partial')
+        assert client.get(download_url + '.task.tmp').status_code == 404
+
+    def test_concurrent_identical_exports_share_one_task(self, client, app, monkeypatch):
+        """任务提交数据库较慢时，并发的相同导出请求仍共用同一个任务"""
+        import threading
+        from models import db
+        from services import task_manager as task_manager_module
+
+        project_id = _create_project_with_images(client, app, page_count=1)
+        runs = []
+        original_task = task_manager_module.export_images_task
+
+        def counting_task(task_id, *args, **kwargs):
+            runs.append(task_id)
+            return original_task(task_id, *args, **kwargs)
+
+        original_commit = db.session.commit
+
+        def slow_commit():
+            time.sleep(0.3)
+            original_commit()
+
+        monkeypatch.setattr(task_manager_module, 'export_images_task', counting_task)
+        monkeypatch.setattr(db.session, 'commit', slow_commit)
+
+        results = []
+
+        def request_export():
+            with app.test_client() as other_client:
+                response = other_client.get(f'/api/projects/{project_id}/export/pdf')
+                results.append((response.status_code, response.get_json()['data']['task_id']))
+
+        threads = [threading.Thread(target=request_export) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        for thread in threads:
+            thread.join(10)
+        monkeypatch.setattr(db.session, 'commit', original_commit)
+
+        assert [status for status, _ in results] == [202, 202]
+        assert results[0][1] == results[1][1]
+        _wait_for_task(client, project_id, results[0][1])
+        assert runs == [results[0][1]]
+
+    def test_task_committed_outside_cache_lock(self, client, app, monkeypatch):
+        """任务提交数据库时不持有进程级缓存锁"""
+        from models import db
+        from services.export_cache import export_artifact_cache
+
+        project_id = _create_project_with_images(client, app, page_count=1)
+        lock_held = []
+        original_commit = db.session.commit
+
+        def commit():
+            lock_held.append(export_artifact_cache.lock.locked())
+            original_commit()
+
+        monkeypatch.setattr(db.session, 'commit', commit)
+        data = assert_success_response(client.get(f'/api/projects/{project_id}/export/pdf'), 202)
+        monkeypatch.undo()
+        _wait_for_task(client, project_id, data['data']['task_id'])
+
+        assert lock_held and not any(lock_held)
+
+
+class TestExportArtifactCache:
+    """导出产物缓存测试"""
+
+    def test_publish_replaces_and_records_under_lock(self, tmp_path):
+        """替换产物与写入 key 在同一把锁内完成，避免并发构建交错"""
+        import threading
+        from services.export_cache import ExportArtifactCache
+
+        cache = ExportArtifactCache()
+        artifact = str(tmp_path / 'presentation.pdf')
+        tmp_file = artifact + '.task.tmp'
+        with open(tmp_file, 'w') as f:
+            f.write('new')
+
+        with cache.lock:
+            thread = threading.Thread(target=cache.publish, args=(tmp_file, artifact, 'key-a'))
+            thread.start()
+            thread.join(0.1)
+            assert not os.path.exists(artifact)
+        thread.join(5)
+
+        assert cache.lookup(artifact, 'key-a')
+        assert not os.path.exists(tmp_file)
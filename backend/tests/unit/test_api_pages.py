@@ -0,0 +1,86 @@
+"""
+页面批量操作单元测试
+
+验证批量创建/删除页面以及一次性重排页面顺序
+"""
+
+from conftest import assert_success_response, assert_error_response
+
+
+def _create_pages(project_id, titles):
+    """批量创建页面，返回按顺序排列的页面ID"""
+    from models import db, Page
+    page_ids = Page.bulk_create(project_id, [
+        {'order_index': i, 'outline_content': {'title': title, 'points': []}}
+        for i, title in enumerate(titles)
+    ])
+    db.session.commit()
+    return page_ids
+
+
+def _ordered_titles(project_id):
+    from models import Page
+    pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+    return [page.get_outline_content()['title'] for page in pages]
+
+
+class TestPageBulkOperations:
+    """页面批量写入测试"""
+
+    def test_bulk_create_and_delete(self, client, sample_project):
+        """批量创建的页面顺序正确，批量删除同时删除图片版本"""
+        from models import db, Page, PageImageVersion
+        project_id = sample_project['project_id']
+        page_ids = _create_pages(project_id, ['封面', '目录', '总结'])
+        db.session.add(PageImageVersion(page_id=page_ids[0], image_path='p_v1.png', version_number=1))
+        db.session.commit()
+
+        assert _ordered_titles(project_id) == ['封面', '目录', '总结']
+        assert Page.query.get(page_ids[0]).status == 'DRAFT'
+
+        assert Page.delete_for_project(project_id) == 3
+        db.session.commit()
+
+        assert Page.query.filter_by(project_id=project_id).count() == 0
+        assert PageImageVersion.query.count() == 0
+
+    def test_create_page_shifts_following_pages(self, client, sample_project):
+        """插入页面时后续页面顺序整体后移"""
+        project_id = sample_project['project_id']
+        _create_pages(project_id, ['第一页', '第二页'])
+
+        response = client.post(f'/api/projects/{project_id}/pages', json={
+            'order_index': 1,
+            'outline_content': {'title': '插入页', 'points': []}
+        })
+
+        assert_success_response(response, 201)
+        assert _ordered_titles(project_id) == ['第一页', '插入页', '第二页']
+
+
+class TestPagesOrder:
+    """页面重排接口测试"""
+
+    def test_reorder_all_pages(self, client, sample_project):
+        """按给定ID顺序重写全部页面的order_index"""
+        project_id = sample_project['project_id']
+        first, second, third = _create_pages(project_id, ['A', 'B', 'C'])
+
+        response = client.put(f'/api/projects/{project_id}/pages/order',
+                              json={'page_ids': [third, first, second]})
+
+        data = assert_success_response(response)
+        assert data['data']['page_ids'] == [third, first, second]
+        assert _ordered_titles(project_id) == ['C', 'A', 'B']
+
+    def test_reorder_requires_every_page(self, client, sample_project):
+        """缺少页面或包含重复ID时返回400"""
+        project_id = sample_project['project_id']
+        first, second = _create_pages(project_id, ['A', 'B'])
+
+        response = client.put(f'/api/projects/{project_id}/pages/order', json={'page_ids': [first]})
+        assert_error_response(response, 400)
+
+        response = client.put(f'/api/projects/{project_id}/pages/order', json={'page_ids': [first, first]})
+        assert_error_response(response, 400)
+        assert _ordered_titles(project_id) == ['A', 'B']
@@ -122,3 +122,45 @@ class TestProjectDelete:
         
         assert response.status_code == 404
 
+
+
+class TestProjectList:
+    """项目列表测试"""
+
+    def test_list_projects_summary_view(self, client):
+        """summary视图返回页面统计而不返回页面内容"""
+        from models import db, Project, Page
+
+        project = Project(creation_type='outline')
+        db.session.add(project)
+        db.session.flush()
+        db.session.add_all([
+            Page(project_id=project.id, order_index=0, status='DRAFT',
+                 outline_content={'title': '第一页', 'points': []}),
+            Page(project_id=project.id, order_index=1, status='COMPLETED',
+                 description_content={'text': '描述'},
+                 generated_image_path=f'{project.id}/pages/p2_v1.png'),
+            Page(project_id=project.id, order_index=2, status='COMPLETED',
+                 generated_image_path=f'{project.id}/pages/p3_v1.png'),
+        ])
+        db.session.commit()
+
+        response = client.get('/api/projects?view=summary')
+
+        data = assert_success_response(response)
+        item = data['data']['projects'][0]
+        assert 'pages' not in item
+        summary = item['summary']
+        assert summary['page_count'] == 3
+        assert summary['status_counts'] == {'DRAFT': 1, 'COMPLETED': 2}
+        assert summary['image_page_count'] == 2
+        assert summary['description_page_count'] == 1
+        assert summary['first_page_title'] == '第一页'
+        assert summary['first_page_image_url'] == f'/files/{project.id}/pages/p2_v1.png'
+
+    def test_list_projects_default_includes_pages(self, client, sample_project):
+        """默认视图仍包含页面列表"""
+        response = client.get('/api/projects')
+
+        data = assert_success_response(response)
+        assert data['data']['projects'][0]['pages'] == []
@@ -0,0 +1,167 @@
+"""
+异步生成单元测试
+
+验证共享事件循环、provider 异步接口以及批量生成任务的异步执行路径
+"""
+
+import asyncio
+import threading
+
+import pytest
+from PIL import Image
+
+from services.ai_providers import TextProvider, ImageProvider
+from services.ai_service import AIService, ProjectContext
+from services.async_runner import AsyncRunner, run_in_app_context
+
+
+class FakeTextProvider(TextProvider):
+    """只实现同步接口的文本 provider（异步接口使用基类默认实现）"""
+
+    def generate_text(self, prompt, thinking_budget=1000):
+        return f'描述: {threading.current_thread().name}'
+
+
+class FakeAsyncImageProvider(ImageProvider):
+    """实现异步接口的图片 provider，记录最大并发数"""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+
+    def generate_image(self, prompt, ref_images=None, aspect_ratio="16:9", resolution="2K"):
+        raise AssertionError('异步模式下不应调用同步接口')
+
+    async def agenerate_image(self, prompt, ref_images=None, aspect_ratio="16:9", resolution="2K"):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.02)
+        self.active -= 1
+        return Image.new('RGB', (32, 18), 'green')
+
+
+@pytest.fixture
+def runner():
+    instance = AsyncRunner(io_workers=2)
+    yield instance
+    instance.stop(timeout=5)
+
+
+class TestAsyncRunner:
+    """事件循环运行器测试"""
+
+    def test_map_limited_bounds_concurrency(self, runner):
+        """同时运行的协程数不超过 limit，结果按输入顺序返回"""
+        state = {'active': 0, 'max_active': 0}
+
+        async def job(i):
+            state['active'] += 1
+            state['max_active'] = max(state['max_active'], state['active'])
+            await asyncio.sleep(0.01)
+            state['active'] -= 1
+            return i
+
+        futures = runner.map_limited([job(i) for i in range(20)], limit=3)
+
+        assert [future.result(timeout=5) for future in futures] == list(range(20))
+        assert state['max_active'] == 3
+
+    def test_run_in_app_context(self, runner, app):
+        """阻塞函数在执行器线程中运行且带有应用上下文"""
+        from flask import current_app
+
+        async def main():
+            return await run_in_app_context(app, lambda: current_app.name)
+
+        assert runner.run(main(), timeout=5) == app.name
+
+    def test_default_async_provider_uses_executor(self, runner):
+        """未覆盖异步接口的 provider 在执行器线程中调用同步接口"""
+        text = runner.run(FakeTextProvider().agenerate_text('提示词'), timeout=5)
+
+        assert text.startswith('描述: async-io')
+
+
+    def test_description_prompts_built_off_event_loop(self, runner, monkeypatch):
+        """页面描述 prompt（可能需要建立参考文件索引）在执行器线程中构建，不阻塞事件循环"""
+        from services import ai_service as ai_service_module
+
+        threads = []
+
+        def fake_parts(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return '前缀', '后缀'
+
+        monkeypatch.setattr(ai_service_module, 'get_page_description_prompt_parts', fake_parts)
+        monkeypatch.setattr(ai_service_module, 'get_page_descriptions_batch_prompt_parts', fake_parts)
+        service = AIService(text_provider=FakeTextProvider(), image_provider=FakeAsyncImageProvider())
+        context = ProjectContext({'idea_prompt': '测试', 'creation_type': 'idea'})
+        outline = [{'title': '第1页', 'points': []}]
+
+        async def main():
+            await service.agenerate_page_description(context, outline, outline[0], 1)
+            await service.agenerate_page_descriptions_batch(context, outline, [(outline[0], 1)])
+            return threading.current_thread()
+
+        loop_thread = runner.run(main(), timeout=5)
+
+        assert len(threads) >= 2
+        assert all(thread is not loop_thread for thread in threads)
+
+
+class TestAsyncGenerationTasks:
+    """批量生成任务的异步执行路径测试"""
+
+    def _setup_project(self, titles):
+        from models import db, Project, Page, Task
+        project = Project(creation_type='outline', idea_prompt='异步项目')
+        db.session.add(project)
+        db.session.flush()
+        Page.bulk_create(project.id, [
+            {'order_index': i, 'outline_content': {'title': title, 'points': []},
+             'description_content': {'text': f'{title}的描述'}}
+            for i, title in enumerate(titles)
+        ])
+        task = Task(project_id=project.id, task_type='GENERATE_IMAGES', status='PENDING')
+        db.session.add(task)
+        db.session.commit()
+        outline = [{'title': title, 'points': []} for title in titles]
+        return project.id, task.id, outline
+
+    def test_descriptions_task_async(self, client, app, monkeypatch):
+        """开启异步生成后描述任务在事件循环中完成"""
+        from models import Page, Task
+        from services.task_manager import generate_descriptions_task
+        monkeypatch.setitem(app.config, 'AI_ASYNC_ENABLED', True)
+        project_id, task_id, outline = self._setup_project(['第一页', '第二页', '第三页'])
+        ai_service = AIService(text_provider=FakeTextProvider(), image_provider=FakeAsyncImageProvider())
+        context = ProjectContext({'idea_prompt': '异步项目', 'creation_type': 'idea'})
+
+        generate_descriptions_task(task_id, project_id, ai_service, context, outline,
+                                   max_workers=2, app=app, language='zh')
+
+        task = Task.query.get(task_id)
+        assert task.status == 'COMPLETED'
+        assert task.get_progress()['completed'] == 3
+        pages = Page.query.filter_by(project_id=project_id).all()
+        assert all(page.status == 'DESCRIPTION_GENERATED' for page in pages)
+
+    def test_images_task_async(self, client, app, monkeypatch):
+        """开启异步生成后图片任务并发数受 max_workers 限制且图片被保存"""
+        from models import Page, Task
+        from services import FileService
+        from services.task_manager import generate_images_task
+        monkeypatch.setitem(app.config, 'AI_ASYNC_ENABLED', True)
+        project_id, task_id, outline = self._setup_project([f'第{i}页' for i in range(6)])
+        image_provider = FakeAsyncImageProvider()
+        ai_service = AIService(text_provider=FakeTextProvider(), image_provider=image_provider)
+
+        generate_images_task(task_id, project_id, ai_service, FileService(app.config['UPLOAD_FOLDER']),
+                             outline, use_template=False, max_workers=2, app=app, language='zh')
+
+        task = Task.query.get(task_id)
+        assert task.status == 'COMPLETED'
+        assert task.get_progress()['completed'] == 6
+        assert image_provider.max_active == 2
+        pages = Page.query.filter_by(project_id=project_id).all()
+        assert all(page.status == 'COMPLETED' and page.image_versions.one().version_number == 1 for page in pages)
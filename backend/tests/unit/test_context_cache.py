@@ -0,0 +1,305 @@
+"""
+共享前缀与上下文缓存单元测试
+
+验证页面描述 prompt 拆分为各页相同的前缀和本页后缀、前缀缓存只创建一次、
+GenAI provider 通过缓存名称引用前缀，以及缓存不可用时回退为完整 prompt
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from config import get_config
+from conftest import make_ai_service
+from services.ai_providers import TextProvider
+from services.ai_providers.text.context_cache import PrefixCache
+from services.ai_providers.text.genai_provider import GenAITextProvider
+from services.ai_service import ProjectContext
+from services.prompt_budget import estimate_tokens
+from services.prompts import (
+    get_page_description_prompt, get_page_description_prompt_parts, get_page_descriptions_batch_prompt_parts
+)
+
+OUTLINE = [{'title': f'第{i}页', 'points': [f'要点{i}']} for i in range(1, 4)]
+
+
+class TestPromptParts:
+    """前缀/后缀拆分测试"""
+
+    def test_prefix_identical_across_pages(self):
+        """各页前缀完全相同，后缀包含本页内容，拼接结果与完整 prompt 一致"""
+        context = ProjectContext({'idea_prompt': '前缀测试', 'creation_type': 'idea'},
+                                 [{'filename': 'a.md', 'content': '# 资料\n\n简短的参考资料。'}])
+
+        parts = [get_page_description_prompt_parts(context, OUTLINE, page, i)
+                 for i, page in enumerate(OUTLINE, 1)]
+
+        assert len({prefix for prefix, _ in parts}) == 1
+        prefix = parts[0][0]
+        assert '前缀测试' in prefix and '第3页' in prefix and '<file name="a.md">' in prefix
+        assert "现在请为第 2 页生成描述：\n{'title': '第2页'" in parts[1][1]
+        assert ''.join(parts[1]) == get_page_description_prompt(context, OUTLINE, OUTLINE[1], 2)
+
+    def test_retrieved_chunks_go_to_suffix(self, monkeypatch):
+        """参考文件超出检索预算时，按页检索的片段放在后缀中，前缀保持不变"""
+        monkeypatch.setattr(get_config(), 'REFERENCE_TOKEN_BUDGET', 150)
+        content = '\n\n'.join(f'# 要点{i}\n\n' + f'关于要点{i}的详细资料。' * 10 for i in range(1, 4))
+        context = ProjectContext({'idea_prompt': '检索', 'creation_type': 'idea'},
+                                 [{'filename': 'a.md', 'content': content}])
+
+        (prefix1, suffix1), (prefix2, suffix2) = [
+            get_page_description_prompt_parts(context, OUTLINE, page, i) for i, page in enumerate(OUTLINE[:2], 1)
+        ]
+
+        assert prefix1 == prefix2 and '<uploaded_files>' not in prefix1
+        assert '# 要点1' in suffix1 and '# 要点2' in suffix2
+
+    def test_prefix_and_suffix_fit_token_budget(self, monkeypatch):
+        """前缀为每页后缀预留空间：单页和批量 prompt 的总长度都不超出 PROMPT_TOKEN_BUDGET"""
+        monkeypatch.setattr(get_config(), 'PROMPT_TOKEN_BUDGET', 1500)
+        monkeypatch.setattr(get_config(), 'REFERENCE_TOKEN_BUDGET', 300)
+        content = '\n\n'.join(f'# 要点{i}\n\n' + f'关于要点{i}的详细资料。' * 20 for i in range(1, 4))
+        context = ProjectContext({'idea_prompt': '很长的原始需求。' * 400, 'creation_type': 'idea'},
+                                 [{'filename': 'a.md', 'content': content}])
+
+        parts = [get_page_description_prompt_parts(context, OUTLINE, page, i) for i, page in enumerate(OUTLINE, 1)]
+        parts.append(get_page_descriptions_batch_prompt_parts(context, OUTLINE, [(OUTLINE[1], 2), (OUTLINE[2], 3)]))
+
+        assert len({prefix for prefix, _ in parts}) == 1
+        assert '# 要点2' in parts[1][1]
+        for prefix, suffix in parts:
+            assert estimate_tokens(prefix + suffix) <= 1500
+
+
+class TestPrefixCache:
+    """前缀缓存测试"""
+
+    def test_concurrent_callers_create_once(self):
+        """相同前缀并发请求只创建一次缓存"""
+        created = []
+
+        def create(prefix, ttl):
+            time.sleep(0.05)
+            created.append(prefix)
+            return f'cachedContents/{len(created)}'
+
+        cache = PrefixCache(create, ttl_seconds=300, min_tokens=1)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get('共享前缀'))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ['cachedContents/1'] * 5
+        assert len(created) == 1
+
+    def test_short_prefix_not_cached(self):
+        """小于最小 token 数的前缀不缓存"""
+        cache = PrefixCache(lambda prefix, ttl: pytest.fail('不应创建缓存'), min_tokens=100)
+
+        assert cache.get('短前缀') is None
+
+    def test_failed_creation_is_remembered(self):
+        """创建失败后在有效期内不再重复尝试"""
+        attempts = []
+
+        def create(prefix, ttl):
+            attempts.append(prefix)
+            raise RuntimeError('caching not supported')
+
+        cache = PrefixCache(create, min_tokens=1)
+
+        assert cache.get('前缀') is None
+        assert cache.get('前缀') is None
+        assert len(attempts) == 1
+
+    def test_expiry_and_invalidate(self):
+        """过期或失效后重新创建"""
+        counter = iter(range(1, 10))
+        cache = PrefixCache(lambda prefix, ttl: f'cache-{next(counter)}', ttl_seconds=1,
+                            min_tokens=1, expiry_margin=0.95)
+
+        assert cache.get('前缀') == 'cache-1'
+        time.sleep(0.1)
+        assert cache.get('前缀') == 'cache-2'
+        cache.invalidate('前缀')
+        assert cache.get('前缀') == 'cache-3'
+
+    def test_replaced_handles_are_deleted(self):
+        """本地过期或失效而被替换的缓存在 provider 端删除；已被替换的旧句柄不会使新缓存失效"""
+        counter = iter(range(1, 10))
+        deleted = []
+        cache = PrefixCache(lambda prefix, ttl: f'cache-{next(counter)}', ttl_seconds=1,
+                            min_tokens=1, expiry_margin=0.5, delete=deleted.append)
+
+        cache.get('前缀')
+        time.sleep(0.55)
+        assert cache.get('前缀') == 'cache-2'
+        assert deleted == ['cache-1']
+
+        cache.invalidate('前缀', 'cache-1')
+        assert cache.get('前缀') == 'cache-2'
+        cache.invalidate('前缀', 'cache-2')
+        assert deleted == ['cache-1', 'cache-2']
+
+
+class FakeGenAIClient:
+    """记录请求的 GenAI client 替身"""
+
+    def __init__(self, cache_error=None, request_errors=()):
+        self.cache_error = cache_error
+        self.request_errors = list(request_errors)
+        self.cache_creates = []
+        self.cache_deletes = []
+        self.requests = []
+        self.caches = SimpleNamespace(create=self._create_cache, delete=self._delete_cache)
+        self.models = SimpleNamespace(generate_content=self._generate_content)
+
+    def _create_cache(self, model, config):
+        if self.cache_error:
+            raise self.cache_error
+        self.cache_creates.append(config)
+        return SimpleNamespace(name=f'cachedContents/{len(self.cache_creates)}')
+
+    def _delete_cache(self, name):
+        self.cache_deletes.append(name)
+
+    def _generate_content(self, model, contents, config):
+        self.requests.append((contents, config.cached_content))
+        if self.request_errors:
+            raise self.request_errors.pop(0)
+        return SimpleNamespace(text=f'描述 {len(self.requests)}')
+
+
+class FakeAPIError(Exception):
+    """带 HTTP 状态码的 API 错误"""
+
+    def __init__(self, code, message):
+        super().__init__(f'{code} {message}')
+        self.code = code
+
+
+@pytest.fixture
+def genai_provider(monkeypatch):
+    config = get_config()
+    monkeypatch.setattr(config, 'GENAI_CONTEXT_CACHE_ENABLED', True)
+    monkeypatch.setattr(config, 'GENAI_CONTEXT_CACHE_MIN_TOKENS', 10)
+    return GenAITextProvider(api_key='test-key', model='gemini-test')
+
+
+class TestGenAIContextCache:
+    """GenAI 显式上下文缓存测试"""
+
+    def test_prefix_uploaded_once(self, genai_provider):
+        """多次调用只上传一次前缀，请求只发送后缀并引用缓存名称"""
+        genai_provider.client = FakeGenAIClient()
+        prefix = '共享的项目背景与大纲。' * 5
+
+        for i in range(3):
+            genai_provider.generate_with_prefix(prefix, f'第{i}页')
+
+        assert len(genai_provider.client.cache_creates) == 1
+        assert genai_provider.client.cache_creates[0].contents == [prefix]
+        assert genai_provider.client.cache_creates[0].ttl == f'{get_config().GENAI_CONTEXT_CACHE_TTL}s'
+        assert genai_provider.client.requests == [(f'第{i}页', 'cachedContents/1') for i in range(3)]
+
+    def test_transient_error_keeps_cache(self, genai_provider):
+        """限流等临时错误重试时继续使用原缓存，不重新上传前缀"""
+        genai_provider.client = FakeGenAIClient(request_errors=[FakeAPIError(429, 'RESOURCE_EXHAUSTED')])
+        prefix = '共享的项目背景与大纲。' * 5
+        attempt = GenAITextProvider.generate_with_prefix.__wrapped__
+
+        with pytest.raises(FakeAPIError):
+            attempt(genai_provider, prefix, '后缀')
+        assert attempt(genai_provider, prefix, '后缀') == '描述 2'
+
+        assert len(genai_provider.client.cache_creates) == 1
+        assert genai_provider.client.cache_deletes == []
+
+    def test_missing_cache_is_recreated_and_deleted(self, genai_provider):
+        """缓存已不存在时失效并重新创建，被替换的缓存会被删除"""
+        genai_provider.client = FakeGenAIClient(
+            request_errors=[FakeAPIError(404, 'NOT_FOUND. CachedContent not found (or permission denied)')]
+        )
+        prefix = '共享的项目背景与大纲。' * 5
+        attempt = GenAITextProvider.generate_with_prefix.__wrapped__
+
+        with pytest.raises(FakeAPIError):
+            attempt(genai_provider, prefix, '后缀')
+        attempt(genai_provider, prefix, '后缀')
+
+        assert genai_provider.client.cache_deletes == ['cachedContents/1']
+        assert genai_provider.client.requests[-1] == ('后缀', 'cachedContents/2')
+
+    def test_falls_back_to_full_prompt(self, genai_provider):
+        """缓存创建失败（如代理不支持）时发送完整 prompt"""
+        genai_provider.client = FakeGenAIClient(cache_error=RuntimeError('404 cachedContents'))
+        prefix = '共享的项目背景与大纲。' * 5
+
+        assert genai_provider.generate_with_prefix(prefix, '后缀') == '描述 1'
+        assert genai_provider.client.requests == [(prefix + '后缀', None)]
+
+    def test_disabled_by_default(self):
+        """默认不创建计费的缓存内容，直接发送完整 prompt"""
+        assert get_config().GENAI_CONTEXT_CACHE_ENABLED is False
+        provider = GenAITextProvider(api_key='test-key', model='gemini-test')
+        provider.client = FakeGenAIClient()
+        prefix = '共享的项目背景与大纲。' * 5
+
+        provider.generate_with_prefix(prefix, '后缀')
+
+        assert provider.client.cache_creates == []
+        assert provider.client.requests == [(prefix + '后缀', None)]
+
+
+class PrefixRecordingProvider(TextProvider):
+    """记录前缀/后缀调用的文本 provider"""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate_text(self, prompt, thinking_budget=1000):
+        raise AssertionError('批量任务应使用 generate_with_prefix')
+
+    def generate_with_prefix(self, prefix, suffix, thinking_budget=1000):
+        with self._lock:
+            self.calls.append((prefix, suffix))
+        return '页面标题：测试'
+
+
+class TestDescriptionsTaskSharedPrefix:
+    """描述生成任务使用共享前缀测试"""
+
+    def test_task_passes_shared_prefix(self, client, app, monkeypatch):
+        """批量生成描述时各页以相同前缀调用 provider"""
+        from models import db, Project, Page, Task
+        from services import ai_service_manager
+        from services.task_manager import generate_descriptions_task
+
+        provider = PrefixRecordingProvider()
+        ai_service = make_ai_service(provider)
+        monkeypatch.setattr(ai_service_manager, 'get_ai_service', lambda: ai_service)
+
+        project = Project(creation_type='idea', idea_prompt='共享前缀项目')
+        db.session.add(project)
+        db.session.flush()
+        Page.bulk_create(project.id, [
+            {'order_index': i, 'outline_content': page} for i, page in enumerate(OUTLINE)
+        ])
+        task = Task(project_id=project.id, task_type='GENERATE_DESCRIPTIONS', status='PENDING')
+        db.session.add(task)
+        db.session.flush()
+        project_id, task_id = project.id, task.id
+        db.session.commit()
+        context = ProjectContext({'idea_prompt': '共享前缀项目', 'creation_type': 'idea'})
+
+        generate_descriptions_task(task_id, project_id, ai_service, context, OUTLINE,
+                                   max_workers=3, app=app, language='zh')
+
+        assert len(provider.calls) == 3
+        assert len({prefix for prefix, _ in provider.calls}) == 1
+        assert len({suffix for _, suffix in provider.calls}) == 3
@@ -0,0 +1,40 @@
+"""
+数据库配置单元测试
+
+验证 DATABASE_URL 规范化与按数据库类型生成的连接池参数
+"""
+
+import os
+
+from config import build_engine_options, normalize_database_url
+
+
+class TestDatabaseConfig:
+    """数据库配置测试"""
+
+    def test_normalize_postgres_scheme(self):
+        """postgres:// 写法被转换为 SQLAlchemy 可识别的 postgresql://"""
+        assert normalize_database_url('postgres://u:p@db/app') == 'postgresql://u:p@db/app'
+        assert normalize_database_url('sqlite:///x.db') == 'sqlite:///x.db'
+
+    def test_sqlite_options(self):
+        """SQLite 允许跨线程并设置写锁等待，不设置连接池大小"""
+        options = build_engine_options('sqlite:///x.db', sqlite_timeout=15)
+
+        assert options['connect_args'] == {'check_same_thread': False, 'timeout': 15}
+        assert 'pool_size' not in options
+
+    def test_postgresql_pool_options(self):
+        """PostgreSQL 使用可配置的连接池"""
+        options = build_engine_options('postgresql://u:p@db/app', pool_size=5, max_overflow=3,
+                                       pool_timeout=10, pool_recycle=600)
+
+        assert 'connect_args' not in options
+        assert options['pool_size'] == 5
+        assert options['max_overflow'] == 3
+        assert options['pool_timeout'] == 10
+        assert options['pool_recycle'] == 600
+
+    def test_app_uses_configured_database(self, app):
+        """应用使用 DATABASE_URL 指定的数据库而非固定路径"""
+        assert app.config['SQLALCHEMY_DATABASE_URI'] == os.environ['DATABASE_URL']
@@ -0,0 +1,137 @@
+"""
+数据库单写线程单元测试
+
+验证写操作批量提交、失败隔离以及图片版本记录在写线程模式下的正确性
+"""
+
+import os
+import threading
+
+import pytest
+from PIL import Image
+
+from services import db_writer
+from services.db_writer import DatabaseWriter, run_write
+
+
+def _create_project(name):
+    from models import db, Project
+    project = Project(creation_type='idea', idea_prompt=name)
+    db.session.add(project)
+    db.session.flush()
+    return project.id
+
+
+@pytest.fixture
+def writer(client, app, monkeypatch):
+    """启用全局写线程"""
+    instance = DatabaseWriter(app, batch_window=0.02)
+    monkeypatch.setattr(db_writer, '_writer', instance)
+    yield instance
+    instance.stop(timeout=5)
+
+
+class TestDatabaseWriter:
+    """单写线程测试"""
+
+    def test_concurrent_writes_are_committed(self, writer):
+        """多个线程提交的写操作全部提交成功"""
+        from models import db, Project
+        results = []
+
+        def worker(i):
+            results.append(writer.submit(_create_project, f'并发项目{i}').result(timeout=5))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        db.session.rollback()
+        assert len(set(results)) == 20
+        assert Project.query.count() == 20
+
+    def test_failing_closure_does_not_affect_batch(self, writer):
+        """同一批次中失败的写操作不影响其他写操作"""
+        from models import db, Project
+
+        def fail():
+            _create_project('失败项目')
+            raise ValueError('boom')
+
+        ok_before = writer.submit(_create_project, '成功项目1')
+        failed = writer.submit(fail)
+        ok_after = writer.submit(_create_project, '成功项目2')
+
+        assert ok_before.result(timeout=5)
+        assert ok_after.result(timeout=5)
+        with pytest.raises(ValueError):
+            failed.result(timeout=5)
+
+        db.session.rollback()
+        prompts = {p.idea_prompt for p in Project.query.all()}
+        assert prompts == {'成功项目1', '成功项目2'}
+
+    def test_run_write_inline_when_disabled(self, client):
+        """未启用写线程时在当前会话中执行并提交"""
+        from models import Project
+        assert db_writer.get_db_writer() is None
+
+        project_id = run_write(_create_project, '内联项目')
+
+        assert Project.query.get(project_id).idea_prompt == '内联项目'
+
+    def test_image_versions_through_writer(self, writer, app):
+        """写线程模式下图片版本号依次递增，提交的记录指向已写好的文件"""
+        from models import db, Page, PageImageVersion
+        from services import FileService
+        from services.task_manager import save_image_with_version
+
+        project_id = run_write(_create_project, '版本项目')
+        page = Page(project_id=project_id, order_index=0)
+        db.session.add(page)
+        db.session.commit()
+        page_id = page.id
+        file_service = FileService(app.config['UPLOAD_FOLDER'])
+
+        first_path, first_version = save_image_with_version(
+            Image.new('RGB', (32, 18), 'red'), project_id, page_id, file_service, page_obj=page
+        )
+        second_path, second_version = save_image_with_version(
+            Image.new('RGB', (32, 18), 'blue'), project_id, page_id, file_service, page_obj=page
+        )
+
+        assert (first_version, second_version) == (1, 2)
+        assert first_path != second_path
+        assert os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], first_path))
+        assert os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], second_path))
+        versions = PageImageVersion.query.filter_by(page_id=page_id).all()
+        assert [v.is_current for v in sorted(versions, key=lambda v: v.version_number)] == [False, True]
+        assert Page.query.get(page_id).generated_image_path == second_path
+
+    def test_failed_commit_leaves_no_image_file(self, client, app, monkeypatch):
+        """版本记录提交失败时删除已写入的图片文件"""
+        from models import db, Page, PageImageVersion
+        from services import FileService, task_manager
+        from services.task_manager import save_image_with_version
+
+        def failing_run_write(func, *args, **kwargs):
+            func(*args, **kwargs)
+            db.session.rollback()
+            raise RuntimeError('commit failed')
+
+        monkeypatch.setattr(task_manager, 'run_write', failing_run_write)
+        project_id = _create_project('失败版本项目')
+        page = Page(project_id=project_id, order_index=0)
+        db.session.add(page)
+        db.session.commit()
+        page_id = page.id
+        file_service = FileService(app.config['UPLOAD_FOLDER'])
+
+        with pytest.raises(RuntimeError):
+            save_image_with_version(Image.new('RGB', (32, 18), 'red'), project_id, page_id, file_service)
+
+        pages_dir = os.path.join(app.config['UPLOAD_FOLDER'], project_id, 'pages')
+        assert not os.path.isdir(pages_dir) or os.listdir(pages_dir) == []
+        assert PageImageVersion.query.filter_by(page_id=page_id).count() == 0
@@ -0,0 +1,230 @@
+"""
+多页批量生成描述单元测试
+
+验证批量 prompt 与单页 prompt 共用前缀、批量结果解析、缺失或格式错误页面的逐页回退，
+以及描述生成任务按 batch_size 分组请求
+"""
+
+import asyncio
+import json
+import re
+import threading
+
+import pytest
+
+from conftest import make_ai_service
+from services.ai_providers import TextProvider
+from services.ai_service import ProjectContext
+from services.prompts import get_page_description_prompt_parts, get_page_descriptions_batch_prompt_parts
+
+OUTLINE = [{'title': f'第{i}页', 'points': [f'要点{i}']} for i in range(1, 6)]
+PAGES = [(page, i) for i, page in enumerate(OUTLINE, 1)]
+
+
+def _context():
+    return ProjectContext({'idea_prompt': '批量测试', 'creation_type': 'idea'})
+
+
+class BatchStubProvider(TextProvider):
+    """
+    按请求内容返回结果的文本 provider
+
+    批量请求返回 batch_response(页面编号列表) 的结果，单页请求返回该页的描述
+    """
+
+    def __init__(self, batch_response=None):
+        self.batch_response = batch_response or (
+            lambda indices: json.dumps([{'page_index': i, 'description': f'批量描述{i}'} for i in indices])
+        )
+        self.batch_calls = []
+        self.page_calls = []
+        self._lock = threading.Lock()
+
+    def generate_text(self, prompt, thinking_budget=1000):
+        raise AssertionError('描述生成应使用 generate_with_prefix')
+
+    def generate_with_prefix(self, prefix, suffix, thinking_budget=1000):
+        indices = [int(i) for i in re.findall(r'<page index="(\d+)">', suffix)]
+        with self._lock:
+            if indices:
+                self.batch_calls.append(indices)
+            else:
+                page_index = int(re.search(r'现在请为第 (\d+) 页生成描述', suffix).group(1))
+                self.page_calls.append(page_index)
+        if indices:
+            return self.batch_response(indices)
+        return f'单页描述{page_index}'
+
+    async def agenerate_with_prefix(self, prefix, suffix, thinking_budget=1000):
+        return await asyncio.to_thread(self.generate_with_prefix, prefix, suffix, thinking_budget)
+
+
+class TestBatchPrompt:
+    """批量 prompt 测试"""
+
+    def test_shares_prefix_with_single_page_prompt(self):
+        """批量 prompt 的前缀与单页 prompt 相同，后缀列出本批所有页面"""
+        context = _context()
+
+        prefix, suffix = get_page_descriptions_batch_prompt_parts(context, OUTLINE, PAGES[1:3], 'zh')
+
+        assert prefix == get_page_description_prompt_parts(context, OUTLINE, OUTLINE[0], 1)[0]
+        assert re.findall(r'<page index="(\d+)">', suffix) == ['2', '3']
+        assert "{'title': '第3页'" in suffix and '"page_index"' in suffix
+        assert '第一页的内容需要保持极简' not in suffix
+
+
+class TestBatchGeneration:
+    """批量生成与回退测试"""
+
+    def test_complete_batch_needs_one_request(self):
+        """批量结果完整时只发送一次请求"""
+        provider = BatchStubProvider()
+
+        descriptions = make_ai_service(provider).generate_page_descriptions_batch(_context(), OUTLINE, PAGES[:3])
+
+        assert descriptions == {1: '批量描述1', 2: '批量描述2', 3: '批量描述3'}
+        assert provider.batch_calls == [[1, 2, 3]] and provider.page_calls == []
+
+    def test_missing_and_malformed_pages_fall_back(self):
+        """缺失、描述为空、编号不在本批或重复的条目只对相应页面逐页重新生成"""
+        provider = BatchStubProvider(lambda indices: '```json\n' + json.dumps([
+            {'page_index': 1, 'description': '批量描述1'},
+            {'page_index': 1, 'description': '重复条目'},
+            {'page_index': '2', 'description': '批量描述2'},
+            {'page_index': 3, 'description': '  '},
+            {'page_index': 9, 'description': '不在本批'},
+            '不是对象',
+        ]) + '\n```')
+
+        descriptions = make_ai_service(provider).generate_page_descriptions_batch(_context(), OUTLINE, PAGES[:4])
+
+        assert descriptions == {1: '批量描述1', 2: '批量描述2', 3: '单页描述3', 4: '单页描述4'}
+        assert sorted(provider.page_calls) == [3, 4]
+
+    def test_unparseable_response_falls_back_for_all(self):
+        """批量结果无法解析时所有页面逐页生成"""
+        provider = BatchStubProvider(lambda indices: '抱歉，我无法完成')
+
+        descriptions = make_ai_service(provider).generate_page_descriptions_batch(_context(), OUTLINE, PAGES[:2])
+
+        assert descriptions == {1: '单页描述1', 2: '单页描述2'}
+
+    def test_async_variant(self):
+        """异步版本的结果与回退行为相同"""
+        provider = BatchStubProvider(lambda indices: json.dumps([{'page_index': indices[0], 'description': '批量'}]))
+
+        descriptions = asyncio.run(
+            make_ai_service(provider).agenerate_page_descriptions_batch(_context(), OUTLINE, PAGES[:3])
+        )
+
+        assert descriptions == {1: '批量', 2: '单页描述2', 3: '单页描述3'}
+        assert sorted(provider.page_calls) == [2, 3]
+
+
+class TestDescriptionsTaskBatching:
+    """描述生成任务的批量模式测试"""
+
+    def _create_task(self):
+        from models import db, Project, Page, Task
+        project = Project(creation_type='idea', idea_prompt='批量测试')
+        db.session.add(project)
+        db.session.flush()
+        Page.bulk_create(project.id, [
+            {'order_index': i, 'outline_content': page} for i, page in enumerate(OUTLINE)
+        ])
+        task = Task(project_id=project.id, task_type='GENERATE_DESCRIPTIONS', status='PENDING')
+        db.session.add(task)
+        db.session.flush()
+        project_id, task_id = project.id, task.id
+        db.session.commit()
+        return project_id, task_id
+
+    @pytest.mark.parametrize('async_enabled', [False, True])
+    def test_pages_grouped_by_batch_size(self, client, app, monkeypatch, async_enabled):
+        """按 batch_size 分组请求，回退生成的页面同样写入描述（线程池与异步两种执行方式）"""
+        from models import Page, Task
+        from services import ai_service_manager
+        from services.task_manager import generate_descriptions_task
+
+        provider = BatchStubProvider(lambda indices: json.dumps(
+            [{'page_index': i, 'description': f'批量描述{i}'} for i in indices if i != 4]
+        ))
+        ai_service = make_ai_service(provider)
+        monkeypatch.setattr(ai_service_manager, 'get_ai_service', lambda: ai_service)
+        monkeypatch.setitem(app.config, 'AI_ASYNC_ENABLED', async_enabled)
+        project_id, task_id = self._create_task()
+
+        generate_descriptions_task(task_id, project_id, ai_service, _context(), OUTLINE,
+                                   max_workers=2, app=app, language='zh', batch_size=2)
+
+        assert sorted(provider.batch_calls) == [[1, 2], [3, 4], [5]]
+        assert provider.page_calls == [4]
+        pages = Page.query.filter_by(project_id=project_id).order_by(Page.order_index).all()
+        assert [page.get_description_content()['text'] for page in pages] == \
+            ['批量描述1', '批量描述2', '批量描述3', '单页描述4', '批量描述5']
+        progress = Task.query.get(task_id).get_progress()
+        assert progress['completed'] == 5 and progress['failed'] == 0
+        assert progress['prompt_tokens']['by_prompt']['page_description_batch']['count'] == 3
+
+    def test_default_is_per_page(self, client, app, monkeypatch):
+        """默认 batch_size 为 1，逐页请求"""
+        from config import get_config
+        from services import ai_service_manager
+        from services.task_manager import generate_descriptions_task
+
+        assert get_config().DESCRIPTION_BATCH_SIZE == 1
+        provider = BatchStubProvider()
+        ai_service = make_ai_service(provider)
+        monkeypatch.setattr(ai_service_manager, 'get_ai_service', lambda: ai_service)
+        project_id, task_id = self._create_task()
+
+        generate_descriptions_task(task_id, project_id, ai_service, _context(), OUTLINE,
+                                   max_workers=2, app=app, language='zh')
+
+        assert provider.batch_calls == []
+        assert sorted(provider.page_calls) == [1, 2, 3, 4, 5]
+
+
+class TestBatchSizeValidation:
+    """接口 batch_size 参数校验测试"""
+
+    @pytest.fixture
+    def submitted(self, client, monkeypatch):
+        """创建已有大纲的项目，记录提交的后台任务参数"""
+        from controllers import project_controller
+        from models import db, Project, Page
+
+        calls = []
+        monkeypatch.setattr(project_controller, 'get_ai_service', lambda: None)
+        monkeypatch.setattr(project_controller.task_manager, 'submit_task',
+                            lambda task_id, func, *args: calls.append(args))
+        project = Project(creation_type='idea', idea_prompt='校验测试', status='OUTLINE_GENERATED')
+        db.session.add(project)
+        db.session.flush()
+        Page.bulk_create(project.id, [{'order_index': 0, 'outline_content': OUTLINE[0]}])
+        project_id = project.id
+        db.session.commit()
+        return project_id, calls
+
+    @pytest.mark.parametrize('batch_size', ['abc', 2.5, 0, -1, True, None, 11, 1000])
+    def test_invalid_batch_size_rejected(self, client, submitted, batch_size):
+        """非整数、小于 1 或超过 MAX_DESCRIPTION_BATCH_SIZE 的 batch_size 返回 400，不提交任务"""
+        project_id, calls = submitted
+
+        response = client.post(f'/api/projects/{project_id}/generate/descriptions',
+                               json={'batch_size': batch_size})
+
+        assert response.status_code == 400
+        assert calls == []
+
+    @pytest.mark.parametrize('batch_size, expected', [('4', 4), (3.0, 3), (2, 2)])
+    def test_numeric_batch_size_coerced(self, client, submitted, batch_size, expected):
+        """数字字符串等可转换为整数的值按整数传给任务"""
+        project_id, calls = submitted
+
+        response = client.post(f'/api/projects/{project_id}/generate/descriptions',
+                               json={'batch_size': batch_size})
+
+        assert response.status_code == 202
+        assert calls[0][-1] == expected
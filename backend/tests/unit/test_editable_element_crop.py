@@ -0,0 +1,136 @@
+"""
+可编辑元素惰性裁剪测试
+
+验证元素图片只在访问时裁剪、只在需要路径时落盘，并且不长期持有根图片
+"""
+
+import os
+
+from PIL import Image
+
+from services.image_editability.data_models import (
+    BBox, EditableElement, EditableImage, ElementCrop, LazyImageSource
+)
+
+
+def _write_source(tmp_path, color='blue', size=(100, 80)):
+    source_path = str(tmp_path / 'page.png')
+    Image.new('RGB', size, color).save(source_path)
+    return source_path
+
+
+def _make_element(source, output_path, crop_box=(10, 10, 60, 40)):
+    bbox = BBox(*crop_box)
+    return EditableElement(
+        element_id='img_0',
+        element_type='text',
+        bbox=bbox,
+        bbox_global=bbox,
+        content='标题',
+        crop=ElementCrop(source=source, crop_box=crop_box, output_path=output_path)
+    )
+
+
+class TestLazyElementCrop:
+    """惰性裁剪测试"""
+
+    def test_crop_not_written_until_path_requested(self, tmp_path):
+        """访问内存图片不会落盘，请求路径时才保存"""
+        output_path = str(tmp_path / 'elements' / '0_text.png')
+        source = LazyImageSource(_write_source(tmp_path, 'red'))
+        element = _make_element(source, output_path)
+
+        assert element.has_image
+        assert element.image_path is None
+
+        image = element.get_image()
+        assert image.size == (50, 30)
+        assert not os.path.exists(output_path)
+
+        assert element.get_image_path() == output_path
+        assert os.path.exists(output_path)
+        assert element.image_path == output_path
+
+    def test_source_path_loaded_lazily(self, tmp_path):
+        """根图片路径只在第一次裁剪时加载"""
+        source = LazyImageSource(_write_source(tmp_path))
+        element = _make_element(source, str(tmp_path / 'out.png'), crop_box=(50, 40, 120, 90))
+
+        assert source._image is None
+        image = element.get_image()
+        # 超出根图片的部分会被限制在图片范围内
+        assert image.size == (50, 40)
+        assert image.getpixel((0, 0)) == (0, 0, 255)
+
+    def test_release_drops_source_and_reloads(self, tmp_path):
+        """释放后不再持有根图片，再次裁剪时从路径重新加载"""
+        source = LazyImageSource(_write_source(tmp_path))
+        element = _make_element(source, str(tmp_path / 'out.png'))
+        editable = EditableImage(image_id='img', image_path=source.source_path, width=100, height=80,
+                                 elements=[element], source=source)
+
+        element.get_image()
+        assert source._image is not None
+        editable.release_images()
+        assert source._image is None
+
+        assert element.get_image().size == (50, 30)
+
+    def test_to_dict_does_not_write_crop(self, tmp_path):
+        """序列化只输出根图片路径和裁剪框，不会落盘"""
+        source_path = _write_source(tmp_path)
+        output_path = str(tmp_path / 'elements' / '0_text.png')
+        element = _make_element(LazyImageSource(source_path), output_path)
+
+        data = element.to_dict()
+        assert data['image_path'] is None
+        assert data['crop'] == {'source_path': source_path, 'crop_box': [10, 10, 60, 40]}
+        assert not os.path.exists(output_path)
+
+        # 导出需要文件时才落盘，之后序列化带上已落盘的路径
+        element.get_image_path()
+        assert element.to_dict()['image_path'] == output_path
+
+
+class TestRecursiveCrops:
+    """递归子图元素裁剪测试"""
+
+    def test_child_crops_use_root_coordinates(self, tmp_path):
+        """子图元素按根图片坐标裁剪并序列化，不依赖子图临时文件"""
+        from PIL import ImageDraw
+        from services.image_editability.extractors import (
+            ElementExtractor, ExtractionResult, ExtractorRegistry
+        )
+        from services.image_editability.factories import ServiceConfig
+        from services.image_editability.inpaint_providers import InpaintProviderRegistry
+        from services.image_editability.service import ImageEditabilityService
+
+        class FakeExtractor(ElementExtractor):
+            def extract(self, image_path, element_type=None, **kwargs):
+                if element_type is None:
+                    return ExtractionResult([{'bbox': [100, 50, 300, 250], 'type': 'image'}])
+                return ExtractionResult([{'bbox': [20, 20, 60, 40], 'type': 'text', 'content': '子图文字'}])
+
+            def supports_type(self, element_type):
+                return True
+
+        root_path = str(tmp_path / 'page.png')
+        image = Image.new('RGB', (400, 300), 'white')
+        ImageDraw.Draw(image).rectangle((120, 70, 159, 89), fill='red')
+        image.save(root_path)
+
+        service = ImageEditabilityService(ServiceConfig(
+            upload_folder=tmp_path,
+            extractor_registry=ExtractorRegistry().register_default(FakeExtractor()),
+            inpaint_registry=InpaintProviderRegistry(),
+            max_depth=2,
+            min_image_size=50,
+            min_image_area=100
+        ))
+        editable = service.make_image_editable(root_path)
+
+        child = editable.elements[0].children[0]
+        assert child.to_dict()['crop'] == {'source_path': root_path, 'crop_box': [120, 70, 160, 90]}
+        crop = child.get_image()
+        assert crop.size == (40, 20)
+        assert crop.getcolors() == [(800, (255, 0, 0))]
@@ -0,0 +1,99 @@
+"""
+文件路由HTTP缓存测试
+
+验证ETag/Last-Modified条件请求与版本化文件的immutable缓存
+"""
+
+import os
+
+from PIL import Image
+
+
+def _write_file(app, project_id, file_type, filename):
+    """在上传目录写入一张图片"""
+    file_dir = os.path.join(app.config['UPLOAD_FOLDER'], project_id, file_type)
+    os.makedirs(file_dir, exist_ok=True)
+    Image.new('RGB', (64, 36), 'red').save(os.path.join(file_dir, filename))
+
+
+class TestFileCaching:
+    """文件缓存响应头测试"""
+
+    def test_versioned_page_image_is_immutable(self, client, app):
+        """版本化页面图片可长期缓存"""
+        _write_file(app, 'cache-project', 'pages', 'page-1_v3.png')
+
+        response = client.get('/files/cache-project/pages/page-1_v3.png')
+
+        assert response.status_code == 200
+        cache_control = response.headers['Cache-Control']
+        assert 'immutable' in cache_control
+        assert 'max-age=31536000' in cache_control
+
+    def test_timestamped_page_image_is_immutable(self, client, app):
+        """带时间戳的页面图片不会被覆盖，可长期缓存"""
+        _write_file(app, 'cache-project', 'pages', 'page-1_1760000000000.png')
+
+        response = client.get('/files/cache-project/pages/page-1_1760000000000.png')
+
+        assert 'immutable' in response.headers['Cache-Control']
+
+    def test_mutable_file_is_revalidated(self, client, app):
+        """可被覆盖的文件每次重新验证，ETag匹配时返回304"""
+        _write_file(app, 'cache-project', 'template', 'template.png')
+
+        response = client.get('/files/cache-project/template/template.png')
+        assert response.status_code == 200
+        assert 'no-cache' in response.headers['Cache-Control']
+        assert response.headers.get('Last-Modified')
+
+        response = client.get('/files/cache-project/template/template.png',
+                              headers={'If-None-Match': response.headers['ETag']})
+        assert response.status_code == 304
+        assert response.data == b''
+
+    def test_versioned_export_name_is_revalidated(self, client, app):
+        """导出文件名由用户指定且会原名重建，即使形如 _v2 也不作为 immutable 缓存"""
+        for file_type, filename in (('exports', 'deck_v2.png'), ('template', 'template_v2.png')):
+            _write_file(app, 'cache-project', file_type, filename)
+
+            response = client.get(f'/files/cache-project/{file_type}/{filename}')
+
+            assert response.status_code == 200
+            assert 'immutable' not in response.headers['Cache-Control']
+            assert 'no-cache' in response.headers['Cache-Control']
+
+    def test_missing_file_returns_not_found(self, client):
+        """文件不存在时返回404"""
+        response = client.get('/files/cache-project/pages/missing_v1.png')
+
+        assert response.status_code == 404
+        assert response.get_json()['success'] is False
+
+
+class TestAccelRedirect:
+    """X-Accel-Redirect 文件发送测试"""
+
+    def test_offloads_to_nginx_when_requested(self, client, app):
+        """经 nginx 代理的请求只返回内部重定向头"""
+        _write_file(app, 'accel-project', 'pages', 'page-1_v1.png')
+        app.config['FILE_ACCEL_REDIRECT_PREFIX'] = '/protected-uploads'
+
+        response = client.get('/files/accel-project/pages/page-1_v1.png',
+                              headers={'X-Sendfile-Type': 'X-Accel-Redirect'})
+
+        assert response.status_code == 200
+        assert response.headers['X-Accel-Redirect'] == '/protected-uploads/accel-project/pages/page-1_v1.png'
+        assert response.headers['Content-Type'] == 'image/png'
+        assert 'immutable' in response.headers['Cache-Control']
+        assert response.data == b''
+
+    def test_direct_request_falls_back_to_python(self, client, app):
+        """未经 nginx 的请求由 Flask 直接发送文件"""
+        _write_file(app, 'accel-project', 'pages', 'page-1_v1.png')
+        app.config['FILE_ACCEL_REDIRECT_PREFIX'] = '/protected-uploads'
+
+        response = client.get('/files/accel-project/pages/page-1_v1.png')
+
+        assert 'X-Accel-Redirect' not in response.headers
+        assert response.data.startswith(b'\x89PNG')
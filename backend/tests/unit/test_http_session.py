@@ -0,0 +1,113 @@
+"""
+共享 HTTP 会话单元测试
+
+验证连接池复用、默认超时、重试配置以及服务注入
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from services import http_session
+from services.http_session import create_http_session, get_http_session
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """记录客户端端口的 HTTP/1.1 处理器"""
+
+    protocol_version = 'HTTP/1.1'
+    client_ports = []
+
+    def do_GET(self):
+        self.client_ports.append(self.client_address[1])
+        body = b'ok'
+        self.send_response(404 if self.path == '/missing' else 200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    _KeepAliveHandler.client_ports = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpSession:
+    """连接池会话测试"""
+
+    def test_connections_are_reused(self, local_server):
+        """同一主机的多次请求复用同一个连接"""
+        session = create_http_session()
+
+        for _ in range(3):
+            assert session.get(f'{local_server}/ping').text == 'ok'
+
+        assert len(_KeepAliveHandler.client_ports) == 3
+        assert len(set(_KeepAliveHandler.client_ports)) == 1
+
+    def test_pool_and_retry_configuration(self):
+        """适配器使用配置的连接池大小与重试策略（POST 不按状态码重试）"""
+        session = create_http_session(pool_maxsize=4, max_retries=5, backoff_factor=0.1)
+        adapter = session.get_adapter('https://example.com')
+
+        assert adapter._pool_maxsize == 4
+        assert adapter.max_retries.total == 5
+        assert adapter.max_retries.backoff_factor == 0.1
+        assert 503 in adapter.max_retries.status_forcelist
+        assert 'GET' in adapter.max_retries.allowed_methods
+        assert 'POST' not in adapter.max_retries.allowed_methods
+
+    def test_default_timeout_applied(self, monkeypatch):
+        """未指定超时的请求使用默认超时，显式超时保持不变"""
+        sent = []
+
+        def fake_send(self, request, **kwargs):
+            sent.append(kwargs['timeout'])
+            response = requests.Response()
+            response.status_code = 200
+            response.request = request
+            return response
+
+        monkeypatch.setattr(HTTPAdapter, 'send', fake_send)
+        session = create_http_session(timeout=7)
+
+        session.get('http://example.com/a')
+        session.get('http://example.com/b', timeout=3)
+
+        assert sent == [7, 3]
+
+    def test_shared_session_and_injection(self, monkeypatch):
+        """服务默认使用共享会话，也可注入自定义会话"""
+        from services.ai_providers.ocr.baidu_table_ocr_provider import BaiduTableOCRProvider
+        monkeypatch.setattr(http_session, '_session', None)
+
+        shared = get_http_session()
+        custom = create_http_session()
+
+        assert get_http_session() is shared
+        assert BaiduTableOCRProvider('token').session is shared
+        assert BaiduTableOCRProvider('token', session=custom).session is custom
+
+    def test_failed_image_download_returns_connection(self, local_server, monkeypatch):
+        """图片下载失败时关闭响应，连接归还连接池供后续请求复用"""
+        from services.ai_service import AIService
+        session = create_http_session()
+        monkeypatch.setattr(http_session, '_session', session)
+
+        for _ in range(2):
+            assert AIService.download_image_from_url(f'{local_server}/missing') is None
+        assert session.get(f'{local_server}/ping').text == 'ok'
+
+        assert len(set(_KeepAliveHandler.client_ports)) == 1
@@ -0,0 +1,175 @@
+"""
+图片请求对冲单元测试
+
+验证延迟分位数统计、超过分位数后发送对冲请求、预算上限以及失败回退
+"""
+
+import asyncio
+import threading
+import time
+
+from PIL import Image
+
+from services.ai_providers.image import ImageProvider, HedgedImageProvider, HedgeBudget, use_hedge_budget
+from services.ai_providers.image.hedged_provider import LatencyTracker
+
+
+class ScriptedImageProvider(ImageProvider):
+    """按调用顺序使用预设耗时（及可选异常）的图片 provider"""
+
+    def __init__(self, delays, errors=None):
+        self.delays = list(delays)
+        self.errors = errors or {}
+        self.calls = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+        return index, self.delays[index]
+
+    def generate_image(self, prompt, ref_images=None, aspect_ratio="16:9", resolution="2K"):
+        index, delay = self._next()
+        time.sleep(delay)
+        if index in self.errors:
+            raise self.errors[index]
+        return Image.new('RGB', (8, 8), (index, 0, 0))
+
+    async def agenerate_image(self, prompt, ref_images=None, aspect_ratio="16:9", resolution="2K"):
+        index, delay = self._next()
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if index in self.errors:
+            raise self.errors[index]
+        return Image.new('RGB', (8, 8), (index, 0, 0))
+
+
+def _warmed_up(provider, samples=(0.01, 0.01, 0.02, 0.02, 0.05)):
+    """创建已有延迟样本的对冲 provider（p90 = 0.05s）"""
+    hedged = HedgedImageProvider(provider, percentile=0.9, min_samples=len(samples))
+    for seconds in samples:
+        hedged.latencies.record(seconds)
+    return hedged
+
+
+class TestLatencyTracker:
+    """延迟统计测试"""
+
+    def test_percentile_requires_min_samples(self):
+        """样本不足时不给出分位数"""
+        tracker = LatencyTracker(window=10, min_samples=3)
+        tracker.record(1.0)
+        tracker.record(2.0)
+        assert tracker.percentile(0.9) is None
+
+        tracker.record(3.0)
+        assert tracker.percentile(0.5) == 2.0
+        assert tracker.percentile(0.9) == 3.0
+
+    def test_window_keeps_recent_samples(self):
+        """只保留最近 window 个样本"""
+        tracker = LatencyTracker(window=3, min_samples=1)
+        for seconds in (100.0, 1.0, 2.0, 3.0):
+            tracker.record(seconds)
+        assert tracker.percentile(1.0) == 3.0
+
+
+class TestHedgedImageProvider:
+    """对冲请求测试"""
+
+    def test_no_hedging_without_budget_scope(self):
+        """不在预算范围内的调用不对冲"""
+        provider = ScriptedImageProvider([0.2])
+        hedged = _warmed_up(provider)
+
+        assert hedged.generate_image('prompt') is not None
+        assert provider.calls == 1
+
+    def test_slow_call_is_hedged_and_faster_result_wins(self):
+        """超过 p90 的调用发送对冲请求，返回先完成的结果"""
+        provider = ScriptedImageProvider([1.0, 0.01])
+        hedged = _warmed_up(provider)
+        budget = HedgeBudget(1)
+
+        started = time.monotonic()
+        with use_hedge_budget(budget):
+            image = hedged.generate_image('prompt')
+
+        assert time.monotonic() - started < 0.5
+        assert image.getpixel((0, 0))[0] == 1  # 第二次调用（对冲请求）的结果
+        assert provider.calls == 2
+        assert budget.used == 1
+
+    def test_budget_caps_extra_requests(self):
+        """预算用完后不再对冲，等待原请求完成"""
+        provider = ScriptedImageProvider([0.15, 0.15])
+        hedged = _warmed_up(provider)
+        budget = HedgeBudget(0)
+
+        with use_hedge_budget(budget):
+            image = hedged.generate_image('prompt')
+
+        assert image.getpixel((0, 0))[0] == 0
+        assert provider.calls == 1
+
+    def test_queue_time_does_not_trigger_hedge(self):
+        """线程池繁忙时原请求排队的时间不计入延迟，不会因此发送对冲请求"""
+        provider = ScriptedImageProvider([0.01])
+        hedged = HedgedImageProvider(provider, percentile=0.9, min_samples=1, max_workers=1)
+        hedged.latencies.record(0.05)
+        budget = HedgeBudget(1)
+        hedged._executor.submit(time.sleep, 0.2)
+
+        with use_hedge_budget(budget):
+            image = hedged.generate_image('prompt')
+
+        assert image is not None
+        assert provider.calls == 1
+        assert budget.used == 0
+
+    def test_failed_hedge_falls_back_to_primary(self):
+        """对冲请求失败时使用原请求的结果"""
+        provider = ScriptedImageProvider([0.2, 0.01], errors={1: RuntimeError('boom')})
+        hedged = _warmed_up(provider)
+
+        with use_hedge_budget(HedgeBudget(1)):
+            image = hedged.generate_image('prompt')
+
+        assert image.getpixel((0, 0))[0] == 0
+        assert provider.calls == 2
+
+    def test_async_hedge_cancels_loser(self):
+        """异步路径：对冲请求先完成时取消原请求"""
+        provider = ScriptedImageProvider([1.0, 0.01])
+        hedged = _warmed_up(provider)
+
+        async def run():
+            with use_hedge_budget(HedgeBudget(1)):
+                image = await hedged.agenerate_image('prompt')
+            await asyncio.sleep(0)
+            return image
+
+        image = asyncio.run(run())
+
+        assert image.getpixel((0, 0))[0] == 1
+        assert provider.cancelled == 1
+        # 被取消的原请求的已耗时（超过 p90）仍计入延迟样本
+        assert hedged.latencies.percentile(1.0) > 0.05
+
+    def test_budget_for_pages(self):
+        """任务预算为页数 × 比例（向上取整）"""
+        assert HedgeBudget.for_pages(10, 0.2).max_hedges == 2
+        assert HedgeBudget.for_pages(3, 0.2).max_hedges == 1
+        assert HedgeBudget.for_pages(10, 0).max_hedges == 0
+
+    def test_delegates_provider_attributes(self):
+        """未定义的属性转发给被包装的 provider"""
+        provider = ScriptedImageProvider([])
+        provider.model = 'image-model'
+
+        assert HedgedImageProvider(provider).model == 'image-model'
@@ -0,0 +1,110 @@
+"""
+图片派生版本测试
+
+验证原图保留、派生版本生成、索引与选择逻辑
+"""
+
+import os
+
+from PIL import Image
+
+from services.image_variant_service import ImageVariantService
+
+
+class TestImageVariantService:
+    """派生版本服务测试"""
+
+    def _make_master(self, tmp_path, size=(2560, 1440)):
+        pages_dir = tmp_path / 'proj' / 'pages'
+        pages_dir.mkdir(parents=True)
+        Image.new('RGB', size, (30, 60, 90)).save(pages_dir / 'page_v1.png')
+        return 'proj/pages/page_v1.png'
+
+    def test_generates_export_variant(self, tmp_path):
+        """只生成导出版本，原图不变"""
+        master_path = self._make_master(tmp_path)
+        master_size = os.path.getsize(tmp_path / master_path)
+        service = ImageVariantService(str(tmp_path), export_width=1920)
+
+        index = service.generate_variants(master_path)
+
+        assert index['master']['width'] == 2560
+        assert os.path.getsize(tmp_path / master_path) == master_size
+        assert [v['purpose'] for v in index['variants']] == ['export']
+        export = ImageVariantService.pick_variant(index, 'export')
+        assert export['width'] == 1920 and export['path'].endswith('page_v1__w1920.jpg')
+        assert os.path.exists(tmp_path / export['path'])
+
+    def test_small_master_is_not_upscaled(self, tmp_path):
+        """原图小于目标宽度时不放大"""
+        master_path = self._make_master(tmp_path, size=(800, 450))
+        service = ImageVariantService(str(tmp_path), export_width=1920)
+
+        index = service.generate_variants(master_path)
+
+        assert [v['width'] for v in index['variants']] == [800]
+
+    def test_transparent_master_is_flattened_onto_white(self, tmp_path):
+        """透明区域在 JPEG 导出版本中为白色"""
+        pages_dir = tmp_path / 'proj' / 'pages'
+        pages_dir.mkdir(parents=True)
+        Image.new('RGBA', (400, 300), (0, 0, 0, 0)).save(pages_dir / 'page_v1.png')
+        service = ImageVariantService(str(tmp_path))
+
+        export = service.generate_variants('proj/pages/page_v1.png')['variants'][0]
+
+        with Image.open(tmp_path / export['path']) as img:
+            assert img.mode == 'RGB'
+            assert all(channel > 250 for channel in img.getpixel((200, 150)))
+
+    def test_pick_variant_and_delete(self, tmp_path):
+        """按用途选择版本，删除时清理所有派生文件"""
+        master_path = self._make_master(tmp_path)
+        service = ImageVariantService(str(tmp_path))
+        index = service.generate_variants(master_path)
+
+        assert ImageVariantService.pick_variant(index, 'web') is None
+        assert ImageVariantService.pick_variant(index, 'export')['format'] == 'jpeg'
+
+        service.delete_variants(master_path)
+        assert os.listdir(tmp_path / 'proj' / 'pages') == ['page_v1.png']
+
+
+class TestVariantIndexStorage:
+    """派生版本索引存储测试"""
+
+    def test_generation_disabled_by_default(self, app):
+        """默认不在后台生成派生版本"""
+        from services.image_variant_service import schedule_image_variants
+
+        assert app.config['IMAGE_VARIANTS_ENABLED'] is False
+        assert schedule_image_variants('missing-version', app) is False
+
+    def test_index_stored_in_json_column(self, client, app):
+        """后台生成的索引直接存入 JSON 列，to_dict 返回派生版本 URL"""
+        from models import db, Project, Page, PageImageVersion
+        from services.image_variant_service import _generate_variants_for_version
+
+        project = Project(creation_type='idea', idea_prompt='派生版本')
+        db.session.add(project)
+        db.session.flush()
+        page = Page(project_id=project.id, order_index=0)
+        db.session.add(page)
+        db.session.flush()
+        pages_dir = os.path.join(app.config['UPLOAD_FOLDER'], project.id, 'pages')
+        os.makedirs(pages_dir, exist_ok=True)
+        Image.new('RGB', (1920, 1080), (30, 60, 90)).save(os.path.join(pages_dir, f'{page.id}_v1.png'))
+        version = PageImageVersion(page_id=page.id, image_path=f'{project.id}/pages/{page.id}_v1.png',
+                                   version_number=1, is_current=True)
+        db.session.add(version)
+        db.session.commit()
+        version_id = version.id
+
+        _generate_variants_for_version(version_id, app)
+
+        db.session.expire_all()
+        version = PageImageVersion.query.get(version_id)
+        assert isinstance(version.variants, dict)
+        assert version.variants['master']['width'] == 1920
+        urls = [v['url'] for v in version.to_dict()['variants']]
+        assert urls and all(url.startswith(f'/files/{project.id}/pages/') for url in urls)
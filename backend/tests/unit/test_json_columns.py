@@ -0,0 +1,100 @@
+"""
+JSON 列单元测试
+
+验证页面内容与任务进度以原生 JSON 列存储、读写一致并支持按字段查询
+"""
+
+from sqlalchemy import text
+
+
+def _create_page(**kwargs):
+    from models import db, Project, Page
+    project = Project(creation_type='outline')
+    db.session.add(project)
+    db.session.flush()
+    page = Page(project_id=project.id, order_index=0, **kwargs)
+    db.session.add(page)
+    db.session.commit()
+    return page
+
+
+class TestPageJsonColumns:
+    """页面 JSON 列测试"""
+
+    def test_round_trip_keeps_unicode(self, client):
+        """写入后重新加载内容一致，中文不被转义"""
+        from models import db, Page
+        page = _create_page()
+        page.set_outline_content({'title': '第一页', 'points': ['要点']})
+        db.session.commit()
+        page_id = page.id
+        db.session.expire_all()
+
+        assert Page.query.get(page_id).get_outline_content() == {'title': '第一页', 'points': ['要点']}
+        raw = db.session.execute(
+            text('SELECT outline_content FROM pages WHERE id = :id'), {'id': page_id}
+        ).scalar()
+        assert '第一页' in raw
+
+    def test_in_place_change_is_saved(self, client):
+        """修改取出的对象后再次设置也能保存"""
+        from models import db, Page
+        page = _create_page(outline_content={'title': '旧标题', 'points': []})
+        outline = page.get_outline_content()
+        outline['title'] = '新标题'
+        page.set_outline_content(outline)
+        db.session.commit()
+        page_id = page.id
+        db.session.expire_all()
+
+        assert Page.query.get(page_id).get_outline_content()['title'] == '新标题'
+
+    def test_getter_returns_copy(self, client):
+        """修改取出的对象不会改动会话中的页面内容"""
+        page = _create_page(outline_content={'title': '标题', 'points': ['a']})
+        outline = page.get_outline_content()
+        outline['part'] = '第一部分'
+        outline['points'].append('b')
+
+        assert page.outline_content == {'title': '标题', 'points': ['a']}
+        assert 'part' not in page.to_dict()['outline_content']
+
+    def test_to_dict_does_not_copy_content(self, client):
+        """to_dict 直接序列化已解码的内容，不复制"""
+        page = _create_page(outline_content={'title': '标题', 'points': ['a']})
+
+        assert page.to_dict()['outline_content'] is page.outline_content
+        assert page.to_dict()['description_content'] is None
+
+    def test_query_single_field(self, client):
+        """在数据库中直接提取标题字段"""
+        from models import db, Page
+        page = _create_page(outline_content={'title': '第一页', 'points': ['a', 'b']})
+
+        title = db.session.query(Page.outline_content['title'].as_string()).filter(
+            Page.id == page.id
+        ).scalar()
+
+        assert title == '第一页'
+
+
+class TestTaskProgress:
+    """任务进度 JSON 列测试"""
+
+    def test_progress_update(self, client):
+        """读取-修改-写回进度后持久化"""
+        from models import db, Task
+        task = Task(project_id=_create_page().project_id, task_type='GENERATE_IMAGES', status='PENDING')
+        assert task.get_progress() == {'total': 0, 'completed': 0, 'failed': 0}
+        task.set_progress({'total': 3, 'completed': 0, 'failed': 0})
+        db.session.add(task)
+        db.session.commit()
+
+        progress = task.get_progress()
+        progress['completed'] += 1
+        task.set_progress(progress)
+        db.session.commit()
+        task_id = task.id
+        db.session.expire_all()
+
+        assert Task.query.get(task_id).get_progress() == {'total': 3, 'completed': 1, 'failed': 0}
@@ -0,0 +1,62 @@
+"""
+路径工具单元测试
+
+验证 MinerU 文件前缀匹配与目录索引缓存
+"""
+
+import os
+
+from utils.path_utils import DirectoryNameIndex, find_file_with_prefix
+
+
+class TestFindFileWithPrefix:
+    """前缀匹配测试"""
+
+    def test_direct_and_prefix_match(self, tmp_path):
+        """直接命中返回原路径，否则按前缀（不区分大小写）和扩展名匹配"""
+        (tmp_path / 'abcdef123456.jpg').write_bytes(b'x')
+        (tmp_path / 'abcdef999999.png').write_bytes(b'x')
+
+        assert find_file_with_prefix(tmp_path / 'abcdef123456.jpg') == tmp_path / 'abcdef123456.jpg'
+        assert find_file_with_prefix(tmp_path / 'ABCDEF.jpg') == tmp_path / 'abcdef123456.jpg'
+        assert find_file_with_prefix(tmp_path / 'abcdef.png') == tmp_path / 'abcdef999999.png'
+        assert find_file_with_prefix(tmp_path / 'abcdef.gif') is None
+        assert find_file_with_prefix(tmp_path / 'abc.jpg') is None
+
+    def test_ignores_directories(self, tmp_path):
+        """同名前缀的目录不会被匹配"""
+        (tmp_path / 'images12345.jpg').mkdir()
+        (tmp_path / 'images12345_b.jpg').write_bytes(b'x')
+
+        assert find_file_with_prefix(tmp_path / 'images.jpg') == tmp_path / 'images12345_b.jpg'
+
+
+class TestDirectoryNameIndex:
+    """目录索引缓存测试"""
+
+    def test_index_is_reused_until_directory_changes(self, tmp_path):
+        """目录未变化时复用索引，新增文件后索引失效"""
+        index = DirectoryNameIndex()
+        (tmp_path / 'page_00001.png').write_bytes(b'x')
+
+        names = index.get_names(tmp_path)
+        assert index.get_names(tmp_path) is names
+        assert index.find_prefix(tmp_path, 'page_00002', '.png') is None
+
+        (tmp_path / 'page_00002_full.png').write_bytes(b'x')
+        stat = os.stat(tmp_path)
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert index.find_prefix(tmp_path, 'page_00002', '.png') == tmp_path / 'page_00002_full.png'
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """超过容量时淘汰最久未使用的目录"""
+        index = DirectoryNameIndex(max_dirs=1)
+        first, second = tmp_path / 'a', tmp_path / 'b'
+        first.mkdir()
+        second.mkdir()
+
+        names = index.get_names(first)
+        index.get_names(second)
+
+        assert index.get_names(first) is not names
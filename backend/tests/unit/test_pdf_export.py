@@ -0,0 +1,63 @@
+"""
+PDF导出测试
+
+验证流式PDF写入、降采样和进度回调
+"""
+
+import os
+
+from PIL import Image
+
+from services.export_service import ExportService
+
+
+def _make_images(tmp_path, count=3, size=(1600, 900)):
+    paths = []
+    for i in range(count):
+        path = str(tmp_path / f'page_{i}.png')
+        Image.new('RGB', size, (i * 40, 100, 200)).save(path)
+        paths.append(path)
+    return paths
+
+
+class TestStreamingPdfExport:
+    """流式PDF导出测试"""
+
+    def test_writes_all_pages_and_reports_progress(self, tmp_path):
+        """每写完一页都会回调进度，输出文件包含所有页面"""
+        image_paths = _make_images(tmp_path)
+        output_file = str(tmp_path / 'out.pdf')
+        progress = []
+
+        result = ExportService.create_pdf_from_images(
+            image_paths,
+            output_file=output_file,
+            progress_callback=lambda done, total: progress.append((done, total))
+        )
+
+        assert result is None
+        assert progress == [(1, 3), (2, 3), (3, 3)]
+        with open(output_file, 'rb') as f:
+            data = f.read()
+        assert data.startswith(b'%PDF-')
+        assert data.rstrip().endswith(b'%%EOF')
+        assert data.count(b'/Type /Page ') == 3
+        assert not os.path.exists(output_file + '.tmp')
+
+    def test_downsample_and_jpeg_reencode(self, tmp_path):
+        """设置DPI和JPEG质量后页面被降采样并以JPEG编码"""
+        image_paths = _make_images(tmp_path, count=1)
+
+        pdf_bytes = ExportService.create_pdf_from_images(image_paths, dpi=72, jpeg_quality=80)
+
+        # 10英寸宽的页面在72DPI下为720像素
+        assert b'/Width 720 /Height 405' in pdf_bytes
+        assert b'/DCTDecode' in pdf_bytes
+
+    def test_missing_images_are_skipped(self, tmp_path):
+        """缺失的图片被跳过"""
+        image_paths = _make_images(tmp_path, count=1) + [str(tmp_path / 'missing.png')]
+
+        pdf_bytes = ExportService.create_pdf_from_images(image_paths)
+
+        assert pdf_bytes.count(b'/Type /Page ') == 1
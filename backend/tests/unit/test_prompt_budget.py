@@ -0,0 +1,163 @@
+"""
+Prompt token 预算单元测试
+
+验证 token 估算、按优先级确定性地压缩低优先级部分、prompt 统计以及任务进度中的统计信息
+"""
+
+from config import get_config
+from conftest import make_ai_service
+from services.ai_providers import TextProvider
+from services.ai_service import ProjectContext
+from services.prompt_budget import (
+    PromptSection, PromptStats, assemble_prompt, estimate_tokens, track_prompt_stats, truncate_to_tokens
+)
+from services.prompts import get_outline_generation_prompt, get_page_description_prompt
+
+
+class EchoTextProvider(TextProvider):
+    """返回固定描述的文本 provider"""
+
+    def generate_text(self, prompt, thinking_budget=1000):
+        return '页面标题：测试'
+
+
+class TestTruncation:
+    """截断测试"""
+
+    def test_truncate_keeps_whole_lines_and_marks(self):
+        """按整行保留开头部分并追加截断标记"""
+        text = '\n'.join(f'第{i}行内容' for i in range(50))
+
+        truncated = truncate_to_tokens(text, 40)
+
+        assert estimate_tokens(truncated) <= 40
+        assert truncated.startswith('第0行内容\n第1行内容')
+        assert truncated.endswith('...(truncated)\n')
+
+    def test_truncate_single_long_line(self):
+        """没有换行的超长文本按字符截断"""
+        truncated = truncate_to_tokens('字' * 100, 30)
+
+        assert estimate_tokens(truncated) <= 30
+        assert truncated.startswith('字')
+
+    def test_short_text_unchanged(self):
+        """不超过上限时原样返回"""
+        assert truncate_to_tokens('短文本', 10) == '短文本'
+
+
+class TestAssemblePrompt:
+    """按预算组装 prompt 测试"""
+
+    def _sections(self):
+        return [
+            PromptSection('reference', '参' * 100, priority=2),
+            PromptSection('outline', '纲' * 100, priority=1, summary='标题'),
+            PromptSection('page', '页' * 50),
+        ]
+
+    def test_within_budget_unchanged(self):
+        """预算足够时直接拼接"""
+        assert assemble_prompt('test', self._sections(), budget=1000) == '参' * 100 + '纲' * 100 + '页' * 50
+
+    def test_lowest_priority_shrunk_first(self):
+        """先截断最低优先级部分，够用后不再压缩其他部分"""
+        prompt = assemble_prompt('test', self._sections(), budget=200)
+
+        assert estimate_tokens(prompt) <= 200
+        assert '纲' * 100 in prompt
+        assert prompt.endswith('页' * 50)
+
+    def test_summary_before_truncation_and_required_kept(self):
+        """低优先级部分清空后使用摘要替换下一部分，必需部分始终保留"""
+        prompt = assemble_prompt('test', self._sections(), budget=60)
+
+        assert '参' not in prompt
+        assert '纲' not in prompt and '标题' in prompt
+        assert '页' * 50 in prompt
+
+        # 必需部分本身超出预算时也不截断
+        assert assemble_prompt('test', self._sections(), budget=10).endswith('页' * 50)
+
+    def test_deterministic(self):
+        """相同输入得到相同结果"""
+        assert assemble_prompt('test', self._sections(), budget=150) == \
+            assemble_prompt('test', self._sections(), budget=150)
+
+
+class TestPromptBuilders:
+    """prompt 构建函数的预算测试"""
+
+    def test_page_description_shrinks_outline_to_titles(self, monkeypatch):
+        """单页 prompt 超出预算时大纲退化为标题，本页要求保留"""
+        outline = [{'title': f'第{i}页', 'points': ['很长的要点内容' * 20]} for i in range(30)]
+        context = ProjectContext({'idea_prompt': '测试', 'creation_type': 'idea'})
+        full = get_page_description_prompt(context, outline, outline[3], 4)
+
+        monkeypatch.setattr(get_config(), 'PROMPT_TOKEN_BUDGET', estimate_tokens(full) // 2)
+        prompt = get_page_description_prompt(context, outline, outline[3], 4)
+
+        assert estimate_tokens(prompt) <= estimate_tokens(full) // 2
+        assert "{'title': '第29页'}" in prompt
+        assert f"现在请为第 4 页生成描述：\n{outline[3]}" in prompt
+
+    def test_reference_files_truncated_keep_xml(self, monkeypatch):
+        """参考文件被截断时 XML 结构保持完整"""
+        monkeypatch.setattr(get_config(), 'PROMPT_TOKEN_BUDGET', 1000)
+        files = [{'filename': 'a.md', 'content': '资料' * 2000}, {'filename': 'b.md', 'content': '附录' * 2000}]
+        context = ProjectContext({'idea_prompt': '测试', 'creation_type': 'idea'}, files)
+
+        prompt = get_outline_generation_prompt(context)
+
+        assert estimate_tokens(prompt) <= 1000
+        assert prompt.startswith('<uploaded_files>')
+        assert prompt.count('</file>') == prompt.count('<file name=')
+        assert '</uploaded_files>' in prompt
+        assert "The user's request: 测试" in prompt
+
+
+class TestPromptStats:
+    """prompt 统计测试"""
+
+    def test_stats_recorded_within_scope(self):
+        """只统计 track_prompt_stats 范围内构建的 prompt"""
+        stats = PromptStats()
+        assemble_prompt('outside', [PromptSection('a', '内容')], budget=0)
+        with track_prompt_stats(stats):
+            assemble_prompt('inside', [PromptSection('a', '内容' * 10)], budget=0)
+            assemble_prompt('inside', [PromptSection('a', '内容' * 10, priority=1), PromptSection('b', '必需')],
+                            budget=5)
+
+        summary = stats.summary()
+        assert summary['prompts'] == 2
+        assert summary['trimmed'] == 1
+        assert summary['by_prompt']['inside']['count'] == 2
+        assert 'outside' not in summary['by_prompt']
+
+    def test_descriptions_task_reports_prompt_tokens(self, client, app, monkeypatch):
+        """描述生成任务在进度中给出各页 prompt 的 token 统计"""
+        from models import db, Project, Page, Task
+        from services.task_manager import generate_descriptions_task
+        monkeypatch.setitem(app.config, 'AI_ASYNC_ENABLED', True)
+        project = Project(creation_type='idea', idea_prompt='统计项目')
+        db.session.add(project)
+        db.session.flush()
+        outline = [{'title': '第一页', 'points': []}, {'title': '第二页', 'points': []}]
+        Page.bulk_create(project.id, [
+            {'order_index': i, 'outline_content': page} for i, page in enumerate(outline)
+        ])
+        task = Task(project_id=project.id, task_type='GENERATE_DESCRIPTIONS', status='PENDING')
+        db.session.add(task)
+        db.session.flush()
+        project_id, task_id = project.id, task.id
+        db.session.commit()
+        ai_service = make_ai_service(EchoTextProvider())
+        context = ProjectContext({'idea_prompt': '统计项目', 'creation_type': 'idea'})
+
+        generate_descriptions_task(task_id, project_id, ai_service, context, outline,
+                                   max_workers=2, app=app, language='zh')
+
+        prompt_tokens = Task.query.get(task_id).get_progress()['prompt_tokens']
+        assert prompt_tokens['prompts'] == 2
+        assert prompt_tokens['by_prompt']['page_description']['count'] == 2
+        assert prompt_tokens['total_tokens'] > 0
@@ -0,0 +1,231 @@
+"""
+熔断与备用 provider 单元测试
+
+验证熔断器状态切换、按顺序回退到备用 provider、熔断后跳过故障 provider
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from services.ai_providers import TextProvider
+from services.ai_providers import fallback
+from services.ai_providers.fallback import (
+    CircuitBreaker, CircuitOpenError, FallbackTextProvider, get_provider_health
+)
+from services.ai_service import AIService
+
+
+class FlakyTextProvider(TextProvider):
+    """可切换为失败状态并记录调用次数的文本 provider"""
+
+    def __init__(self, name, failing=False):
+        self.name = name
+        self.failing = failing
+        self.calls = 0
+
+    def generate_text(self, prompt, thinking_budget=1000):
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError(f'{self.name} unavailable')
+        return f'{self.name}: {prompt}'
+
+    def stream_text(self, prompt, thinking_budget=1000):
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError(f'{self.name} unavailable')
+        yield self.name
+        yield '!'
+
+
+@pytest.fixture(autouse=True)
+def isolated_breakers(monkeypatch):
+    """每个测试使用独立的熔断器注册表"""
+    monkeypatch.setattr(fallback, '_breakers', {})
+
+
+class TestCircuitBreaker:
+    """熔断器状态测试"""
+
+    def test_opens_after_consecutive_failures(self):
+        """连续失败达到阈值后熔断，成功会重置计数"""
+        breaker = CircuitBreaker('text:test', failure_threshold=2, recovery_timeout=60)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+        assert breaker.snapshot()['retry_in_seconds'] > 0
+
+    def test_half_open_allows_single_trial(self):
+        """冷却后只放行一次试探请求，试探失败重新熔断，成功则恢复"""
+        breaker = CircuitBreaker('text:test', failure_threshold=1, recovery_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        time.sleep(0.06)
+        assert breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow_request()
+
+
+class TestFallbackTextProvider:
+    """备用链测试"""
+
+    def test_falls_back_to_next_provider(self):
+        """主 provider 失败时使用备用 provider"""
+        primary = FlakyTextProvider('primary', failing=True)
+        backup = FlakyTextProvider('backup')
+        chain = FallbackTextProvider([('text:primary', primary), ('text:backup', backup)])
+
+        assert chain.generate_text('hi') == 'backup: hi'
+        assert get_provider_health()['text:primary']['consecutive_failures'] == 1
+        assert get_provider_health()['text:backup']['state'] == 'closed'
+
+    def test_open_circuit_skips_provider(self, monkeypatch):
+        """熔断后不再调用故障 provider"""
+        primary = FlakyTextProvider('primary', failing=True)
+        backup = FlakyTextProvider('backup')
+        fallback.get_circuit_breaker('text:primary').failure_threshold = 2
+        chain = FallbackTextProvider([('text:primary', primary), ('text:backup', backup)])
+
+        for _ in range(5):
+            chain.generate_text('hi')
+
+        assert primary.calls == 2
+        assert backup.calls == 5
+        assert get_provider_health()['text:primary']['state'] == 'open'
+
+    def test_all_unavailable_raises(self):
+        """全部熔断时抛出 CircuitOpenError，全部失败时抛出最后的错误"""
+        provider = FlakyTextProvider('only', failing=True)
+        fallback.get_circuit_breaker('text:only').failure_threshold = 1
+        chain = FallbackTextProvider([('text:only', provider)])
+
+        with pytest.raises(ConnectionError):
+            chain.generate_text('hi')
+        with pytest.raises(CircuitOpenError):
+            chain.generate_text('hi')
+        assert provider.calls == 1
+
+    def test_stream_falls_back_before_first_chunk(self):
+        """流式生成在产出第一块之前失败时回退"""
+        chain = FallbackTextProvider([
+            ('text:primary', FlakyTextProvider('primary', failing=True)),
+            ('text:backup', FlakyTextProvider('backup')),
+        ])
+
+        assert ''.join(chain.stream_text('hi')) == 'backup!'
+
+    def test_async_falls_back(self):
+        """异步接口同样回退（基类默认实现在线程中调用同步接口）"""
+        chain = FallbackTextProvider([
+            ('text:primary', FlakyTextProvider('primary', failing=True)),
+            ('text:backup', FlakyTextProvider('backup')),
+        ])
+
+        assert asyncio.run(chain.agenerate_text('hi')) == 'backup: hi'
+
+
+    def test_abandoned_stream_releases_trial(self):
+        """试探请求的流被中途关闭（如 SSE 客户端断开）后，熔断器仍可再次放行试探请求"""
+        provider = FlakyTextProvider('only')
+        breaker = fallback.get_circuit_breaker('text:only')
+        breaker.failure_threshold, breaker.recovery_timeout = 1, 0.05
+        breaker.record_failure()
+        time.sleep(0.06)
+        chain = FallbackTextProvider([('text:only', provider)])
+
+        stream = chain.stream_text('hi')
+        assert next(stream) == 'only'
+        stream.close()
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+
+    def test_cancelled_async_trial_releases_trial(self):
+        """试探请求的协程被取消后释放试探名额"""
+        class SlowProvider(TextProvider):
+            def generate_text(self, prompt, thinking_budget=1000):
+                return prompt
+
+            async def agenerate_text(self, prompt, thinking_budget=1000):
+                await asyncio.sleep(1)
+                return prompt
+
+        breaker = fallback.get_circuit_breaker('text:slow')
+        breaker.failure_threshold, breaker.recovery_timeout = 1, 0.05
+        breaker.record_failure()
+        time.sleep(0.06)
+        chain = FallbackTextProvider([('text:slow', SlowProvider())])
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(chain.agenerate_text('hi'), timeout=0.05))
+
+        assert breaker.allow_request()
+
+class TestAIServiceProviderChain:
+    """AIService 构建备用链测试"""
+
+    def test_chain_uses_configured_fallbacks(self, monkeypatch):
+        """按主格式 + AI_FALLBACK_FORMATS 构建，缺少配置的备用格式被跳过"""
+        monkeypatch.setenv('AI_PROVIDER_FORMAT', 'vertex')
+        monkeypatch.setenv('AI_FALLBACK_FORMATS', 'gemini, vertex, openai')
+
+        def factory(model, provider_format):
+            if provider_format == 'openai':
+                raise ValueError('OPENAI_API_KEY is required')
+            return FlakyTextProvider(provider_format)
+
+        chain = AIService._provider_chain('text', factory, 'model')
+
+        assert [name for name, _ in chain] == ['text:vertex', 'text:gemini']
+
+    def test_get_ai_service_uses_fallback_chain(self, app, monkeypatch):
+        """get_ai_service() 返回的服务使用带熔断的备用链，并按 provider 格式缓存"""
+        from services import ai_service_manager
+        from services.ai_providers.fallback import FallbackImageProvider
+
+        monkeypatch.setitem(app.config, 'AI_PROVIDER_FORMAT', 'gemini')
+        monkeypatch.setitem(app.config, 'AI_FALLBACK_FORMATS', 'openai')
+        monkeypatch.setattr(ai_service_manager, 'get_text_provider',
+                            lambda model, provider_format: FlakyTextProvider(provider_format))
+        monkeypatch.setattr(ai_service_manager, 'get_image_provider',
+                            lambda model, provider_format: object())
+        ai_service_manager.clear_ai_service_cache()
+        try:
+            with app.app_context():
+                service = ai_service_manager.get_ai_service()
+                assert isinstance(service.text_provider, FallbackTextProvider)
+                assert isinstance(service.image_provider, FallbackImageProvider)
+                assert set(get_provider_health()) == {
+                    'text:gemini', 'text:openai', 'image:gemini', 'image:openai'
+                }
+
+                # 切换 provider 格式后重新构建备用链
+                app.config['AI_FALLBACK_FORMATS'] = ''
+                assert ai_service_manager._get_cached_text_provider(service.text_model) is not service.text_provider
+        finally:
+            ai_service_manager.clear_ai_service_cache()
+
+    def test_health_endpoint_reports_providers(self, client):
+        """健康检查返回各 provider 的熔断状态"""
+        FallbackTextProvider([('text:gemini', FlakyTextProvider('gemini'))])
+
+        data = client.get('/health').get_json()
+
+        assert data['providers']['text:gemini']['state'] == 'closed'
+
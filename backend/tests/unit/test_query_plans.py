@@ -0,0 +1,84 @@
+"""
+查询计划测试
+
+在按模型建表的 SQLite 库上对热点查询执行 EXPLAIN QUERY PLAN，
+确认命中复合索引且无需额外排序，防止索引回退
+"""
+
+import pytest
+from sqlalchemy import create_engine, desc, func, select, text
+
+from models import db, Page, PageImageVersion, ReferenceFile, Material, Project
+
+
+@pytest.fixture(scope='module')
+def plan_engine():
+    """按模型元数据创建的内存 SQLite 库"""
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _query_plan(engine, statement):
+    """返回 SQLite 查询计划文本"""
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+    with engine.connect() as conn:
+        rows = conn.execute(text(f'EXPLAIN QUERY PLAN {sql}')).fetchall()
+    return '\n'.join(row[-1] for row in rows)
+
+
+class TestHotQueryPlans:
+    """热点查询索引测试"""
+
+    def test_pages_by_project_ordered(self, plan_engine):
+        """按项目查询页面并按顺序排序"""
+        plan = _query_plan(plan_engine, select(Page).filter_by(project_id='p').order_by(Page.order_index))
+        assert 'ix_pages_project_id_order_index' in plan
+        assert 'TEMP B-TREE' not in plan
+
+    def test_max_image_version(self, plan_engine):
+        """查询页面最大图片版本号"""
+        plan = _query_plan(
+            plan_engine,
+            select(func.max(PageImageVersion.version_number)).filter_by(page_id='p')
+        )
+        assert 'ix_page_image_versions_page_id_version_number' in plan
+
+    def test_current_image_version(self, plan_engine):
+        """查询页面当前图片版本"""
+        plan = _query_plan(
+            plan_engine,
+            select(PageImageVersion).where(
+                PageImageVersion.page_id == 'p', PageImageVersion.is_current.is_(True)
+            )
+        )
+        assert 'ix_page_image_versions_page_id_is_current' in plan
+
+    def test_no_redundant_page_id_index(self):
+        """page_id 单列索引已由复合索引覆盖，不应重复创建"""
+        column_sets = [tuple(c.name for c in index.columns) for index in PageImageVersion.__table__.indexes]
+        assert ('page_id',) not in column_sets
+
+    def test_reference_files_by_status(self, plan_engine):
+        """按项目和解析状态查询参考文件"""
+        plan = _query_plan(
+            plan_engine,
+            select(ReferenceFile).filter_by(project_id='p', parse_status='completed')
+        )
+        assert 'ix_reference_files_project_id_parse_status' in plan
+
+    def test_materials_by_project_ordered(self, plan_engine):
+        """按项目查询素材并按创建时间排序"""
+        plan = _query_plan(
+            plan_engine,
+            select(Material).filter_by(project_id='p').order_by(Material.created_at.desc())
+        )
+        assert 'ix_materials_project_id_created_at' in plan
+        assert 'TEMP B-TREE' not in plan
+
+    def test_projects_by_updated_at(self, plan_engine):
+        """按更新时间倒序查询项目列表"""
+        plan = _query_plan(plan_engine, select(Project).order_by(desc(Project.updated_at)).limit(50))
+        assert 'ix_projects_updated_at' in plan
+        assert 'TEMP B-TREE' not in plan
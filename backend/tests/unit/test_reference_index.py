@@ -0,0 +1,157 @@
+"""
+参考文件检索索引单元测试
+
+验证分块、BM25 检索、token 预算，以及单页描述 prompt 只附带相关片段
+"""
+
+import pytest
+
+from config import get_config
+from services.ai_service import ProjectContext
+from services.prompts import get_page_description_prompt
+from services.reference_index import ReferenceIndex, build_chunks, estimate_tokens, tokenize
+
+
+def _long_document():
+    """包含多个主题章节的长文档"""
+    filler = '这一部分介绍了相关的背景资料和历史数据，' * 30
+    return '\n\n'.join([
+        '# 碳排放现状', filler, '全球碳排放在过去十年持续增长，能源行业占比最高。',
+        '# 新能源汽车', filler, '新能源汽车销量快速上升，电池成本持续下降。',
+        '# Supply Chain', 'Lithium supply chain risks and cobalt sourcing in detail. ' * 20,
+    ])
+
+
+class TestChunking:
+    """分块与分词测试"""
+
+    def test_tokenize_mixes_words_and_cjk_bigrams(self):
+        """拉丁词整体保留，中日韩文本切为二元组"""
+        assert tokenize('GPT模型训练 data-2024') == ['gpt', '模型', '型训', '训练', 'data', '2024']
+
+    def test_estimate_tokens(self):
+        """中日韩字符按 1 token 计，其余约 4 字符 1 token"""
+        assert estimate_tokens('') == 0
+        assert estimate_tokens('人工智能') == 4
+        assert estimate_tokens('abcdefgh') == 2
+
+    def test_chunks_respect_size_and_keep_heading(self):
+        """分块不超过上限（容许标题行），续接的片段重复所属章节标题"""
+        chunks = build_chunks(_long_document(), max_tokens=200)
+
+        assert len(chunks) > 3
+        assert all(estimate_tokens(chunk['text']) <= 220 for chunk in chunks)
+        assert all(chunk['text'].startswith('# ') for chunk in chunks)
+        assert chunks[0]['terms']['碳排'] >= 1
+
+    def test_empty_content(self):
+        """空内容没有分块"""
+        assert build_chunks(None) == []
+        assert ReferenceIndex([{'filename': 'a.md', 'content': ''}]).search('任何') == []
+
+
+class TestReferenceIndex:
+    """检索与预算测试"""
+
+    def test_search_ranks_relevant_chunk_first(self):
+        """与查询最相关的片段排在最前"""
+        index = ReferenceIndex([{'filename': 'report.md', 'content': _long_document()}], chunk_tokens=200)
+
+        _, best = index.search('新能源汽车 电池成本')[0]
+        assert '电池成本' in index.entries[best][2]
+
+        _, best = index.search('lithium cobalt')[0]
+        assert 'Lithium' in index.entries[best][2]
+
+    def test_select_stays_within_budget(self):
+        """选取的片段不超过 token 预算，按文件分组"""
+        files = [
+            {'filename': 'a.md', 'content': _long_document()},
+            {'filename': 'b.md', 'content': '# 电池\n\n电池成本与电池回收。'},
+        ]
+        index = ReferenceIndex(files, chunk_tokens=200)
+
+        selected = index.select('电池成本', top_k=8, token_budget=250)
+
+        assert sum(estimate_tokens(item['content']) for item in selected) <= 250 + 10
+        assert {item['filename'] for item in selected} <= {'a.md', 'b.md'}
+        assert any('电池' in item['content'] for item in selected)
+
+    def test_uses_precomputed_chunks(self):
+        """优先使用解析时保存的分块"""
+        chunks = [{'text': '预先切好的片段：量子计算', 'terms': {'量子': 1, '计算': 1}}]
+        index = ReferenceIndex([{'filename': 'a.md', 'content': '不会被重新切分', 'chunks': chunks}])
+
+        assert [entry[2] for entry in index.entries] == ['预先切好的片段：量子计算']
+
+
+class TestPagePromptRetrieval:
+    """单页描述 prompt 的参考片段测试"""
+
+    @pytest.fixture
+    def small_budget(self, monkeypatch):
+        config = get_config()
+        monkeypatch.setattr(config, 'REFERENCE_TOKEN_BUDGET', 300)
+        monkeypatch.setattr(config, 'REFERENCE_CHUNK_TOKENS', 200)
+        monkeypatch.setattr(config, 'REFERENCE_TOP_K', 2)
+
+    def test_page_prompt_includes_only_relevant_chunks(self, small_budget):
+        """参考文件超过预算时，单页 prompt 只包含与该页相关的片段"""
+        context = ProjectContext(
+            {'idea_prompt': '能源转型', 'creation_type': 'idea'},
+            [{'filename': 'report.md', 'content': _long_document()}]
+        )
+        outline = [{'title': '碳排放现状', 'points': ['能源行业']}, {'title': '供应链', 'points': ['lithium cobalt']}]
+
+        prompt = get_page_description_prompt(context, outline, outline[1], 2)
+
+        assert '<file name="report.md">' in prompt
+        assert 'Lithium supply chain' in prompt
+        assert '电池成本持续下降' not in prompt
+        assert estimate_tokens(prompt) < estimate_tokens(_long_document())
+
+    def test_small_references_are_inlined_whole(self, small_budget):
+        """参考文件总量不超过预算时原样附带"""
+        files = [{'filename': 'note.md', 'content': '# 备注\n\n只有一句话。'}]
+        context = ProjectContext({'idea_prompt': '测试', 'creation_type': 'idea'}, files)
+
+        assert context.get_relevant_reference_files('无关查询') == files
+
+
+class TestParseBuildsChunks:
+    """解析完成时构建分块测试"""
+
+    def test_parse_completion_stores_chunks(self, app, monkeypatch):
+        """后台解析完成后保存检索分块，供生成描述时使用"""
+        from controllers import reference_file_controller
+        from controllers.project_controller import _get_project_reference_files_content
+        from models import db, Project, ReferenceFile
+
+        class StubParser:
+            def __init__(self, **kwargs):
+                pass
+
+            def parse_file(self, file_path, filename):
+                return 'batch', _long_document(), None, None, 0
+
+        monkeypatch.setattr(reference_file_controller, 'FileParserService', StubParser)
+
+        with app.app_context():
+            project = Project(creation_type='idea', idea_prompt='测试')
+            db.session.add(project)
+            db.session.flush()
+            ref = ReferenceFile(project_id=project.id, filename='report.md', file_path='report.md',
+                                file_size=1, file_type='md')
+            db.session.add(ref)
+            db.session.commit()
+            project_id, file_id = project.id, ref.id
+
+        reference_file_controller._parse_file_async(file_id, 'report.md', 'report.md', app)
+
+        with app.app_context():
+            stored = db.session.get(ReferenceFile, file_id)
+            assert stored.parse_status == 'completed'
+            assert stored.content_chunks and 'terms' in stored.content_chunks[0]
+
+            files = _get_project_reference_files_content(project_id)
+            assert files[0]['chunks'] == stored.content_chunks
@@ -0,0 +1,161 @@
+"""
+流式生成单元测试
+
+验证增量 JSON 数组解析器以及大纲/描述接口的 SSE 流式响应
+"""
+
+import json
+
+import pytest
+
+from services.ai_providers import TextProvider, ImageProvider
+from services.ai_service import AIService
+from utils.json_stream import JSONArrayStreamParser
+
+
+OUTLINE = [
+    {"title": "开场", "points": ["介绍 \"主题\"", "目标 [草案]"]},
+    {"part": "第一部分", "pages": [
+        {"title": "背景", "points": ["现状"]},
+        {"title": "问题", "points": ["痛点 {A}"]},
+    ]},
+]
+
+
+def _chunks(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class FakeStreamingTextProvider(TextProvider):
+    """按小块流式返回固定文本的文本 provider"""
+
+    def __init__(self, text):
+        self.text = text
+
+    def generate_text(self, prompt, thinking_budget=1000):
+        return self.text
+
+    def stream_text(self, prompt, thinking_budget=1000):
+        yield from _chunks(self.text)
+
+
+class FakeImageProvider(ImageProvider):
+    def generate_image(self, prompt, ref_images=None, aspect_ratio="16:9", resolution="2K"):
+        raise AssertionError('流式文本测试不应生成图片')
+
+
+def _use_text(monkeypatch, text):
+    """让控制器使用返回固定文本的 AI 服务"""
+    service = AIService(text_provider=FakeStreamingTextProvider(text), image_provider=FakeImageProvider())
+    monkeypatch.setattr('controllers.project_controller.get_ai_service', lambda: service)
+    monkeypatch.setattr('controllers.page_controller.get_ai_service', lambda: service)
+
+
+def _read_events(response):
+    """解析 SSE 响应体为 (event, data) 列表"""
+    events = []
+    for block in response.get_data(as_text=True).split('\n\n'):
+        if not block.strip():
+            continue
+        lines = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+class TestJSONArrayStreamParser:
+    """增量 JSON 数组解析器测试"""
+
+    def test_elements_emitted_as_soon_as_complete(self):
+        """每个元素闭合后立即产出，与整体解析结果一致"""
+        parser = JSONArrayStreamParser()
+        text = json.dumps(OUTLINE, ensure_ascii=False)
+        first_item_end = text.index('}') + 1
+
+        assert parser.feed(text[:first_item_end - 1]) == []
+        assert parser.feed(text[first_item_end - 1:first_item_end]) == [OUTLINE[0]]
+
+        rest = []
+        for chunk in _chunks(text[first_item_end:], size=3):
+            rest.extend(parser.feed(chunk))
+        parser.close()
+
+        assert rest == OUTLINE[1:]
+        assert parser.items == OUTLINE
+        assert parser.finished
+
+    def test_ignores_code_fence_and_handles_scalars(self):
+        """忽略 ```json 代码块标记，支持字符串与数字元素"""
+        parser = JSONArrayStreamParser()
+        text = '```json\n["第一页 \\"引号\\" ]", "第二页, 逗号", 3]\n```'
+
+        items = []
+        for chunk in _chunks(text, size=2):
+            items.extend(parser.feed(chunk))
+        parser.close()
+
+        assert items == ['第一页 "引号" ]', '第二页, 逗号', 3]
+
+    def test_incomplete_array_raises_on_close(self):
+        """数组未闭合时 close 抛出 ValueError"""
+        parser = JSONArrayStreamParser()
+        assert parser.feed('[{"title": "A"}, {"title": ') == [{"title": "A"}]
+
+        with pytest.raises(ValueError):
+            parser.close()
+
+
+class TestStreamingEndpoints:
+    """SSE 流式接口测试"""
+
+    def test_generate_outline_stream(self, client, sample_project, monkeypatch):
+        """流式生成大纲：逐页推送 page 事件，最后推送 done 并保存页面"""
+        _use_text(monkeypatch, '```json\n' + json.dumps(OUTLINE, ensure_ascii=False) + '\n```')
+        project_id = sample_project['project_id']
+
+        response = client.post(f'/api/projects/{project_id}/generate/outline', json={'stream': True})
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        events = _read_events(response)
+        assert [name for name, _ in events] == ['page', 'page', 'page', 'done']
+        assert [data['outline_content']['title'] for _, data in events[:3]] == ['开场', '背景', '问题']
+        assert events[1][1]['part'] == '第一部分'
+
+        pages = events[-1][1]['pages']
+        assert [page['outline_content']['title'] for page in pages] == ['开场', '背景', '问题']
+        saved = client.get(f'/api/projects/{project_id}').get_json()['data']
+        assert saved['status'] == 'OUTLINE_GENERATED'
+        assert len(saved['pages']) == 3
+
+    def test_generate_outline_stream_error(self, client, sample_project, monkeypatch):
+        """响应不是完整 JSON 数组时推送 error 事件且不保存页面"""
+        _use_text(monkeypatch, '[{"title": "开场"}, {"title": "未完')
+        project_id = sample_project['project_id']
+
+        response = client.post(f'/api/projects/{project_id}/generate/outline', json={'stream': True})
+
+        events = _read_events(response)
+        assert [name for name, _ in events] == ['page', 'error']
+        assert events[-1][1]['code'] == 'AI_SERVICE_ERROR'
+        saved = client.get(f'/api/projects/{project_id}').get_json()['data']
+        assert saved['pages'] == []
+
+    def test_generate_page_description_stream(self, client, sample_project, monkeypatch):
+        """流式生成单页描述：推送 delta 文本块，done 时返回保存后的页面"""
+        _use_text(monkeypatch, json.dumps(OUTLINE[:1], ensure_ascii=False))
+        project_id = sample_project['project_id']
+        client.post(f'/api/projects/{project_id}/generate/outline', json={})
+        page_id = client.get(f'/api/projects/{project_id}').get_json()['data']['pages'][0]['page_id']
+
+        description = '页面标题：开场\n页面文字：\n- 介绍主题'
+        _use_text(monkeypatch, description)
+        response = client.post(
+            f'/api/projects/{project_id}/pages/{page_id}/generate/description',
+            json={'stream': True}
+        )
+
+        events = _read_events(response)
+        assert events[-1][0] == 'done'
+        assert ''.join(data['text'] for name, data in events if name == 'delta') == description
+        assert events[-1][1]['description_content']['text'] == description
+        assert events[-1][1]['status'] == 'DESCRIPTION_GENERATED'
@@ -0,0 +1,135 @@
+"""
+结构化输出与 JSON 修复单元测试
+
+验证 generate_json 使用 provider 的结构化输出、本地修复常见格式问题，
+只有修复失败时才重新生成
+"""
+
+import json
+
+import pytest
+
+from conftest import make_ai_service
+from services.ai_providers import TextProvider
+from services.ai_providers.text.genai_provider import GenAITextProvider
+from services.ai_providers.text.openai_provider import OpenAITextProvider
+from services.prompts import OUTLINE_SCHEMA, DESCRIPTIONS_SCHEMA
+from utils.json_repair import parse_json_response
+
+
+class ScriptedTextProvider(TextProvider):
+    """按顺序返回预设响应并记录调用方式的文本 provider"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def generate_text(self, prompt, thinking_budget=1000):
+        self.calls.append(('text', None))
+        return self.responses.pop(0)
+
+    def generate_structured(self, prompt, response_schema, thinking_budget=1000):
+        self.calls.append(('structured', response_schema))
+        return self.responses.pop(0)
+
+
+class TestParseJsonResponse:
+    """JSON 修复解析测试"""
+
+    @pytest.mark.parametrize('text, expected', [
+        ('[1, 2]', [1, 2]),
+        ('```json\n{"a": 1}\n```', {'a': 1}),
+        ('好的，以下是大纲：\n[{"title": "A", "points": []}]\n希望有帮助', [{'title': 'A', 'points': []}]),
+        ('[{"title": "A",}, {"title": "B"},]', [{'title': 'A'}, {'title': 'B'}]),
+        ('["第一行\n第二行"]', ['第一行\n第二行']),
+    ])
+    def test_repairs_common_defects(self, text, expected):
+        """修复代码块、前后说明文字、尾随逗号和字符串内换行"""
+        assert parse_json_response(text) == expected
+
+    @pytest.mark.parametrize('text', [
+        '[{"title": "A", "points": ["x", "未完',
+        '{"colored_segments": [{"text": "a", "color":',
+    ])
+    def test_truncated_output_rejected(self, text):
+        """被截断的输出解析失败，不会补全成不完整的结果"""
+        with pytest.raises(json.JSONDecodeError):
+            parse_json_response(text)
+
+    def test_unrecoverable_text_raises(self):
+        """无法恢复的文本抛出 JSONDecodeError"""
+        with pytest.raises(json.JSONDecodeError):
+            parse_json_response('抱歉，我无法生成大纲')
+
+
+class TestGenerateJson:
+    """AIService.generate_json 测试"""
+
+    def test_uses_structured_output_with_schema(self):
+        """提供 schema 时调用 provider 的结构化输出"""
+        provider = ScriptedTextProvider('[{"title": "A", "points": ["x"]}]')
+
+        result = make_ai_service(provider).generate_json('prompt', schema=OUTLINE_SCHEMA)
+
+        assert result == [{'title': 'A', 'points': ['x']}]
+        assert provider.calls == [('structured', OUTLINE_SCHEMA)]
+
+    def test_repairable_response_is_not_regenerated(self):
+        """可在本地修复的响应不触发重新生成"""
+        provider = ScriptedTextProvider('```json\n["a", "b",]\n```')
+
+        assert make_ai_service(provider).generate_json('prompt', schema=DESCRIPTIONS_SCHEMA) == ['a', 'b']
+        assert len(provider.calls) == 1
+
+    def test_wrapped_array_is_unwrapped(self):
+        """期望数组时，取出 {"items": [...]} 包装中的数组"""
+        provider = ScriptedTextProvider('{"items": ["a", "b"]}')
+
+        assert make_ai_service(provider).generate_json('prompt', schema=DESCRIPTIONS_SCHEMA) == ['a', 'b']
+
+    def test_regenerates_when_repair_fails(self):
+        """修复失败或结构不符时才重新生成"""
+        provider = ScriptedTextProvider('无法生成', '{"title": "A"}', '["a"]')
+
+        assert make_ai_service(provider).generate_json('prompt', schema=DESCRIPTIONS_SCHEMA) == ['a']
+        assert len(provider.calls) == 3
+
+    def test_truncated_outline_is_regenerated(self):
+        """被截断的大纲不保存为残缺结果，而是重新生成"""
+        provider = ScriptedTextProvider('[{"title": "A", "points": ["x"]}, {"title":',
+                                        '[{"title": "A", "points": ["x"]}, {"title": "B", "points": []}]')
+
+        result = make_ai_service(provider).generate_json('prompt', schema=OUTLINE_SCHEMA)
+
+        assert result == [{'title': 'A', 'points': ['x']}, {'title': 'B', 'points': []}]
+        assert len(provider.calls) == 2
+
+    def test_structured_output_can_be_disabled(self):
+        """关闭结构化输出时使用普通文本生成"""
+        provider = ScriptedTextProvider('["a"]')
+        service = make_ai_service(provider)
+        service.structured_output = False
+
+        assert service.generate_json('prompt', schema=DESCRIPTIONS_SCHEMA) == ['a']
+        assert provider.calls == [('text', None)]
+
+
+class TestProviderStructuredRequest:
+    """provider 结构化输出请求参数测试"""
+
+    def test_genai_config_sets_json_schema(self):
+        """GenAI 请求使用 application/json 与 response_json_schema"""
+        config = GenAITextProvider._generate_config(1000, OUTLINE_SCHEMA)
+
+        assert config.response_mime_type == 'application/json'
+        assert config.response_json_schema == OUTLINE_SCHEMA
+        assert GenAITextProvider._generate_config(1000).response_mime_type is None
+
+    def test_openai_response_format_wraps_array_root(self):
+        """OpenAI json_schema 要求根为对象，数组 schema 包装在 items 中"""
+        response_format = OpenAITextProvider._response_format(DESCRIPTIONS_SCHEMA)
+
+        assert response_format['type'] == 'json_schema'
+        schema = response_format['json_schema']['schema']
+        assert schema['type'] == 'object'
+        assert schema['properties']['items'] == DESCRIPTIONS_SCHEMA
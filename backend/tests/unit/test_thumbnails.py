@@ -0,0 +1,96 @@
+"""
+缩略图单元测试
+
+验证按需缩放、磁盘缓存和缓存响应头
+"""
+
+import io
+import os
+
+from PIL import Image
+
+from services.thumbnail_service import ThumbnailService
+
+
+def _write_page_image(app, project_id='thumb-project', filename='page_v1.png', size=(1920, 1080)):
+    """在上传目录写入一张页面图片"""
+    pages_dir = os.path.join(app.config['UPLOAD_FOLDER'], project_id, 'pages')
+    os.makedirs(pages_dir, exist_ok=True)
+    path = os.path.join(pages_dir, filename)
+    Image.new('RGB', size, (30, 90, 160)).save(path)
+    return project_id, filename, path
+
+
+class TestThumbnailService:
+    """缩略图服务测试"""
+
+    def test_snap_width(self):
+        """请求宽度向上取整到固定档位"""
+        assert ThumbnailService.snap_width(100) == 160
+        assert ThumbnailService.snap_width(320) == 320
+        assert ThumbnailService.snap_width(5000) == ThumbnailService.WIDTH_BUCKETS[-1]
+
+    def test_locks_are_bounded(self):
+        """生成锁来自固定的锁池，不随缩略图数量增长"""
+        locks = {id(ThumbnailService._lock_for(f'/thumbs/page_{i}.webp')) for i in range(1000)}
+        assert len(locks) <= ThumbnailService.LOCK_STRIPES
+        assert ThumbnailService._lock_for('a') is ThumbnailService._lock_for('a')
+
+    def test_thumbnail_is_cached_and_refreshed(self, app):
+        """同一源文件只生成一次，源文件变化后生成新缩略图并清理旧的"""
+        _, _, path = _write_page_image(app)
+        service = ThumbnailService(app.config['UPLOAD_FOLDER'])
+
+        first = service.get_thumbnail(path, 300)
+        first_mtime = os.stat(first).st_mtime_ns
+        assert service.get_thumbnail(path, 320) == first
+        assert os.stat(first).st_mtime_ns == first_mtime
+        with Image.open(first) as thumb:
+            assert thumb.size == (320, 180)
+
+        Image.new('RGB', (1280, 720), 'white').save(path)
+        second = service.get_thumbnail(path, 320)
+        assert second != first
+        assert not os.path.exists(first)
+
+    def test_same_stem_different_extension_kept_apart(self, app):
+        """同名不同扩展名的源文件各自缓存，互不清理"""
+        _, _, png_path = _write_page_image(app, filename='page.png')
+        _, _, jpg_path = _write_page_image(app, filename='page.jpg')
+        service = ThumbnailService(app.config['UPLOAD_FOLDER'])
+
+        png_thumb = service.get_thumbnail(png_path, 320)
+        jpg_thumb = service.get_thumbnail(jpg_path, 320)
+
+        assert png_thumb != jpg_thumb
+        assert os.path.exists(png_thumb) and os.path.exists(jpg_thumb)
+
+
+class TestThumbnailEndpoint:
+    """缩略图接口测试"""
+
+    def test_serves_resized_image_with_cache_headers(self, client, app):
+        """带 w 参数返回缩略图，带版本号的URL可永久缓存"""
+        project_id, filename, _ = _write_page_image(app)
+
+        response = client.get(f'/files/{project_id}/pages/{filename}?v=1&w=320')
+
+        assert response.status_code == 200
+        with Image.open(io.BytesIO(response.data)) as thumb:
+            assert thumb.width == 320
+        assert 'immutable' in response.headers['Cache-Control']
+        assert response.headers.get('ETag')
+
+        etag = response.headers['ETag']
+        response = client.get(f'/files/{project_id}/pages/{filename}?v=1&w=320',
+                              headers={'If-None-Match': etag})
+        assert response.status_code == 304
+
+    def test_without_width_serves_original(self, client, app):
+        """不带 w 参数时返回原图"""
+        project_id, filename, path = _write_page_image(app)
+
+        response = client.get(f'/files/{project_id}/pages/{filename}')
+
+        assert response.status_code == 200
+        assert len(response.data) == os.path.getsize(path)
@@ -2,6 +2,8 @@
 from .response import (
     success_response, 
     error_response, 
+    sse_event,
+    stream_response,
     bad_request, 
     not_found, 
     invalid_status,
@@ -12,10 +14,14 @@ from .validators import validate_project_status, validate_page_status, allowed_f
 from .path_utils import convert_mineru_path_to_local, find_mineru_file_with_prefix, find_file_with_prefix
 from .pptx_builder import PPTXBuilder
 from .page_utils import parse_page_ids_from_query, parse_page_ids_from_body, get_filtered_pages
+from .json_stream import JSONArrayStreamParser
+from .json_repair import parse_json_response, repair_json
 
 __all__ = [
     'success_response',
     'error_response',
+    'sse_event',
+    'stream_response',
     'bad_request',
     'not_found',
     'invalid_status',
@@ -30,6 +36,9 @@ __all__ = [
     'PPTXBuilder',
     'parse_page_ids_from_query',
     'parse_page_ids_from_body',
-    'get_filtered_pages'
+    'get_filtered_pages',
+    'JSONArrayStreamParser',
+    'parse_json_response',
+    'repair_json'
 ]
 
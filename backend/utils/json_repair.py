@@ -0,0 +1,96 @@
+"""
+Tolerant parsing of JSON returned by text models
+"""
+import json
+import re
+from typing import Any
+
+_FENCE_PATTERN = re.compile(r'```(?:json|JSON)?\s*(.*?)\s*(?:```|$)', re.DOTALL)
+_STRING_ESCAPES = {'\n': '\\n', '\r': '\\r', '\t': '\\t'}
+_CLOSERS = {'[': ']', '{': '}'}
+
+
+def parse_json_response(text: str) -> Any:
+    """
+    Parse JSON from a model response, repairing common defects locally
+
+    Handles markdown code fences, prose before/after the JSON value, trailing
+    commas and raw newlines inside strings. Regenerating the response is only
+    needed when this raises.
+
+    Output truncated mid-value (e.g. by the max-token limit) is rejected rather
+    than closed, because closing it would silently drop or null out the tail.
+
+    Raises:
+        json.JSONDecodeError: If no JSON value can be recovered
+    """
+    text = (text or '').strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    fenced = _FENCE_PATTERN.search(text)
+    if fenced:
+        text = fenced.group(1)
+
+    start = min((i for i in (text.find('['), text.find('{')) if i != -1), default=-1)
+    if start == -1:
+        # 可能是顶层字符串/数字等标量
+        return json.loads(text)
+
+    return json.JSONDecoder().raw_decode(repair_json(text[start:]))[0]
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix trailing commas and unescaped control characters
+
+    The input must start at the opening bracket of the value; anything after the
+    value is closed is returned unchanged (raw_decode ignores it). A value that
+    never closes is returned still open, so parsing it fails.
+    """
+    out = []
+    stack = []
+    in_string = False
+    escape = False
+
+    for index, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+            elif char in _STRING_ESCAPES:
+                out.append(_STRING_ESCAPES[char])
+                continue
+            out.append(char)
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif char in ']}':
+            _strip_trailing_comma(out)
+            if stack and stack[-1] == char:
+                stack.pop()
+            if not stack:
+                out.append(char)
+                out.append(text[index + 1:])
+                return ''.join(out)
+        out.append(char)
+
+    # 输出被截断：保持未闭合，解析失败后重新生成
+    return ''.join(out)
+
+
+def _strip_trailing_comma(out: list):
+    """Remove a trailing ',' (and whitespace after it) from the output buffer"""
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ',':
+        del out[index:]
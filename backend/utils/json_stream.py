@@ -0,0 +1,108 @@
+"""
+Incremental parser for JSON arrays streamed from a text model
+"""
+import json
+from typing import Any, List
+
+
+class JSONArrayStreamParser:
+    """
+    Parse a top-level JSON array while its text is still arriving
+    
+    feed() accepts text chunks and returns the array elements completed by that
+    chunk, so callers can act on each outline page (or description) as soon as
+    its object is closed instead of waiting for the whole response. Text before
+    the opening '[' (e.g. a ```json fence) and after the closing ']' is ignored.
+    """
+    
+    def __init__(self):
+        self.items: List[Any] = []
+        self._started = False
+        self._finished = False
+        self._element: List[str] = []
+        self._depth = 0  # bracket depth inside the current element
+        self._in_string = False
+        self._escape = False
+    
+    @property
+    def finished(self) -> bool:
+        """True once the closing ']' of the array has been seen"""
+        return self._finished
+    
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Consume a chunk of text
+        
+        Returns:
+            Elements completed by this chunk (in order)
+        
+        Raises:
+            json.JSONDecodeError: If a completed element is not valid JSON
+        """
+        completed = []
+        for char in chunk:
+            if self._finished:
+                break
+            if not self._started:
+                if char == '[':
+                    self._started = True
+                continue
+            
+            if self._in_string:
+                self._element.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 0:
+                        # Top-level string element is complete
+                        self._emit(completed)
+                continue
+            
+            if char == '"':
+                self._in_string = True
+                self._element.append(char)
+            elif char in '{[':
+                self._depth += 1
+                self._element.append(char)
+            elif char in '}]' and self._depth > 0:
+                self._depth -= 1
+                self._element.append(char)
+                if self._depth == 0:
+                    # Top-level object/array element is complete
+                    self._emit(completed)
+            elif char == ']':
+                # End of the top-level array
+                self._emit(completed)
+                self._finished = True
+            elif char == ',' and self._depth == 0:
+                # Separator after a scalar element (numbers, true/false/null)
+                self._emit(completed)
+            else:
+                self._element.append(char)
+        return completed
+    
+    def close(self) -> List[Any]:
+        """
+        Finish parsing
+        
+        Returns:
+            All parsed elements
+        
+        Raises:
+            ValueError: If the text did not contain a complete JSON array
+        """
+        if not self._finished:
+            raise ValueError("Incomplete JSON array in model response")
+        return self.items
+    
+    def _emit(self, completed: List[Any]):
+        text = ''.join(self._element).strip()
+        self._element = []
+        if not text:
+            return
+        item = json.loads(text)
+        self.items.append(item)
+        completed.append(item)
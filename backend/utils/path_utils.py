@@ -3,12 +3,78 @@ Path utilities for handling MinerU file paths and prefix matching
 """
 import os
 import logging
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 
+class DirectoryNameIndex:
+    """
+    目录文件名索引缓存，用于前缀查找
+
+    每个目录缓存一份按小写文件名排序的列表，以目录 mtime 判断是否失效，
+    前缀查找通过二分定位，避免每次未命中都 os.listdir + 线性扫描。
+    """
+
+    def __init__(self, max_dirs: int = 256):
+        self.max_dirs = max_dirs
+        self._lock = threading.Lock()
+        # dirpath -> (mtime_ns, sorted [(lower_name, name)])
+        self._entries: "OrderedDict[str, Tuple[int, List[Tuple[str, str]]]]" = OrderedDict()
+
+    def get_names(self, dirpath: Path) -> List[Tuple[str, str]]:
+        """返回目录中按小写名排序的 (小写名, 原始名) 列表"""
+        key = str(dirpath)
+        mtime_ns = os.stat(key).st_mtime_ns
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == mtime_ns:
+                self._entries.move_to_end(key)
+                return cached[1]
+
+        names = sorted((name.lower(), name) for name in os.listdir(key))
+        with self._lock:
+            self._entries[key] = (mtime_ns, names)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_dirs:
+                self._entries.popitem(last=False)
+        return names
+
+    def find_prefix(self, dirpath: Path, prefix: str, ext: str) -> Optional[Path]:
+        """
+        查找文件名（不含扩展名）以 prefix 开头且扩展名为 ext 的文件（均不区分大小写）
+
+        Returns:
+            匹配的文件路径，未找到返回 None
+        """
+        names = self.get_names(dirpath)
+        prefix_lower = prefix.lower()
+        ext_lower = ext.lower()
+        for i in range(bisect_left(names, (prefix_lower, '')), len(names)):
+            lower_name, name = names[i]
+            if not lower_name.startswith(prefix_lower):
+                break
+            stem, file_ext = os.path.splitext(lower_name)
+            if stem.startswith(prefix_lower) and file_ext == ext_lower:
+                matched_path = dirpath / name
+                if matched_path.is_file():
+                    return matched_path
+        return None
+
+    def clear(self):
+        """清空全部缓存"""
+        with self._lock:
+            self._entries.clear()
+
+
+# 全局目录索引（MinerU 解压目录按 extract_id 分目录，每个目录一份索引）
+directory_name_index = DirectoryNameIndex()
+
+
 def convert_mineru_path_to_local(mineru_path: str, project_root: Optional[Path] = None) -> Optional[Path]:
     """
     将 /files/mineru/{extract_id}/{rel_path} 格式的路径转换为本地文件系统路径
@@ -87,26 +153,22 @@ def find_file_with_prefix(file_path: Path) -> Optional[Path]:
         找到的文件路径（Path 对象），如果未找到则返回 None
     """
     # Direct file matching
-    if file_path.exists() and file_path.is_file():
+    if file_path.is_file():
         return file_path
     
     # Try prefix match if not found and filename looks like a prefix with extension
     filename = file_path.name
     dirpath = file_path.parent
     
-    if '.' in filename and dirpath.exists() and dirpath.is_dir():
+    if '.' in filename and dirpath.is_dir():
         prefix, ext = os.path.splitext(filename)
         if len(prefix) >= 5:
             try:
-                for fname in os.listdir(dirpath):
-                    fp, fe = os.path.splitext(fname)
-                    if fp.lower().startswith(prefix.lower()) and fe.lower() == ext.lower():
-                        matched_path = dirpath / fname
-                        if matched_path.is_file():
-                            logger.debug(f"Prefix match found: {file_path} -> {matched_path}")
-                            return matched_path
+                matched_path = directory_name_index.find_prefix(dirpath, prefix, ext)
+                if matched_path is not None:
+                    logger.debug(f"Prefix match found: {file_path} -> {matched_path}")
+                    return matched_path
             except OSError as e:
                 logger.warning(f"Failed to list directory {dirpath}: {str(e)}")
     
     return None
-
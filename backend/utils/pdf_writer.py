@@ -0,0 +1,261 @@
+"""
+Streaming PDF writer - writes image pages to a PDF file one at a time
+
+Each page is decoded, optionally down-sampled / re-encoded, written to the
+output stream and released before the next page is opened, so peak memory is
+bounded by a single page regardless of deck size.
+"""
+import io
+import logging
+import zlib
+from typing import BinaryIO, Callable, List, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# 16:9 page (10in x 5.625in) in PDF points, same layout as the PPTX export
+DEFAULT_PAGE_SIZE = (720.0, 405.0)
+
+# Rows encoded per chunk when compressing raw pixels (keeps buffers small for 4K pages)
+_ROWS_PER_CHUNK = 256
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class StreamingPDFWriter:
+    """
+    Minimal PDF writer that streams image pages to a binary file object.
+
+    Usage:
+        with open(path, 'wb') as f:
+            writer = StreamingPDFWriter(f, dpi=150, jpeg_quality=85)
+            for p in image_paths:
+                writer.add_image(p)
+            writer.close()
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        page_size: Tuple[float, float] = DEFAULT_PAGE_SIZE,
+        dpi: Optional[int] = None,
+        jpeg_quality: Optional[int] = None
+    ):
+        """
+        Args:
+            stream: Writable binary file object
+            page_size: Page size in points (width, height)
+            dpi: Down-sample pages whose resolution on the page exceeds this DPI (None keeps originals)
+            jpeg_quality: Re-encode pages as JPEG with this quality 1-95 (None keeps lossless/original data)
+        """
+        self._stream = stream
+        self._page_size = page_size
+        self._dpi = dpi
+        self._jpeg_quality = jpeg_quality
+        self._offsets: List[int] = []
+        self._page_refs: List[int] = []
+        self._pos = 0
+        self._closed = False
+
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        # Object 1 = catalog, object 2 = page tree; both written in close()
+        self._offsets.extend([0, 0])
+
+    # ------------------------------------------------------------------ #
+    # Low level helpers
+    # ------------------------------------------------------------------ #
+    def _write(self, data: bytes):
+        self._stream.write(data)
+        self._pos += len(data)
+
+    def _reserve_object(self) -> int:
+        self._offsets.append(0)
+        return len(self._offsets)
+
+    def _begin_object(self, obj_num: int):
+        self._offsets[obj_num - 1] = self._pos
+        self._write(f"{obj_num} 0 obj\n".encode())
+
+    def _write_object(self, obj_num: int, body: str):
+        self._begin_object(obj_num)
+        self._write(body.encode())
+        self._write(b"\nendobj\n")
+
+    def _write_stream_object(self, obj_num: int, dictionary: str, chunks):
+        """Write a stream object whose length is only known after streaming (indirect /Length)."""
+        length_num = self._reserve_object()
+        self._begin_object(obj_num)
+        self._write(f"<< {dictionary} /Length {length_num} 0 R >>\nstream\n".encode())
+        start = self._pos
+        for chunk in chunks:
+            if chunk:
+                self._write(chunk)
+        length = self._pos - start
+        self._write(b"\nendstream\nendobj\n")
+        self._write_object(length_num, str(length))
+
+    # ------------------------------------------------------------------ #
+    # Page encoding
+    # ------------------------------------------------------------------ #
+    def _target_pixels(self, width: int, height: int) -> Tuple[int, int]:
+        """Pixel size after fitting the image into the page at the configured DPI."""
+        if not self._dpi:
+            return width, height
+        page_w, page_h = self._page_size
+        scale = min(page_w / width, page_h / height)
+        max_w = int(round(width * scale / 72.0 * self._dpi))
+        max_h = int(round(height * scale / 72.0 * self._dpi))
+        if max_w >= width or max_h >= height:
+            return width, height
+        return max(1, max_w), max(1, max_h)
+
+    @staticmethod
+    def _normalize_mode(img: Image.Image) -> Image.Image:
+        """Convert to a mode PDF can hold directly (RGB or L), flattening alpha onto white."""
+        if img.mode in ('RGB', 'L'):
+            return img
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            rgba = img.convert('RGBA')
+            background = Image.new('RGB', rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.split()[-1])
+            return background
+        return img.convert('RGB')
+
+    @staticmethod
+    def _copy_file(path: str):
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(_COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    @staticmethod
+    def _deflate_rows(img: Image.Image):
+        compressor = zlib.compressobj(6)
+        width, height = img.size
+        for top in range(0, height, _ROWS_PER_CHUNK):
+            band = img.crop((0, top, width, min(height, top + _ROWS_PER_CHUNK)))
+            yield compressor.compress(band.tobytes())
+        yield compressor.flush()
+
+    @staticmethod
+    def _jpeg_bytes(img: Image.Image, quality: int):
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG', quality=quality, optimize=True)
+        yield buffer.getvalue()
+
+    def _write_image_xobject(self, image_path: str) -> Tuple[int, int, int]:
+        """Write the image XObject for one page, returns (obj_num, width, height)."""
+        obj_num = self._reserve_object()
+        with Image.open(image_path) as src:
+            width, height = src.size
+            target_w, target_h = self._target_pixels(width, height)
+            resample = (target_w, target_h) != (width, height)
+
+            # Original JPEG data can be embedded as-is when nothing needs to change
+            if (src.format == 'JPEG' and src.mode in ('RGB', 'L')
+                    and not resample and not self._jpeg_quality):
+                color_space = '/DeviceRGB' if src.mode == 'RGB' else '/DeviceGray'
+                dictionary = (f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                              f"/ColorSpace {color_space} /BitsPerComponent 8 /Filter /DCTDecode")
+                self._write_stream_object(obj_num, dictionary, self._copy_file(image_path))
+                return obj_num, width, height
+
+            if src.format == 'JPEG' and resample:
+                # Let the JPEG decoder down-scale by a power of two before resizing
+                src.draft(src.mode, (target_w, target_h))
+
+            img = self._normalize_mode(src)
+            if resample:
+                img = img.resize((target_w, target_h), Image.LANCZOS)
+            width, height = img.size
+            color_space = '/DeviceRGB' if img.mode == 'RGB' else '/DeviceGray'
+            base = (f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                    f"/ColorSpace {color_space} /BitsPerComponent 8")
+
+            if self._jpeg_quality:
+                self._write_stream_object(
+                    obj_num, f"{base} /Filter /DCTDecode", self._jpeg_bytes(img, self._jpeg_quality)
+                )
+            else:
+                self._write_stream_object(obj_num, f"{base} /Filter /FlateDecode", self._deflate_rows(img))
+            img.close()
+        return obj_num, width, height
+
+    def add_image(self, image_path: str):
+        """Append one image as a page (fitted and centred on the page)."""
+        if self._closed:
+            raise ValueError("PDF writer already closed")
+
+        image_num, width, height = self._write_image_xobject(image_path)
+
+        page_w, page_h = self._page_size
+        scale = min(page_w / width, page_h / height)
+        draw_w, draw_h = width * scale, height * scale
+        offset_x, offset_y = (page_w - draw_w) / 2, (page_h - draw_h) / 2
+        content = f"q {draw_w:.4f} 0 0 {draw_h:.4f} {offset_x:.4f} {offset_y:.4f} cm /Im0 Do Q".encode()
+
+        content_num = self._reserve_object()
+        self._write_stream_object(content_num, "", [content])
+
+        page_num = self._reserve_object()
+        self._write_object(
+            page_num,
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_w:.4f} {page_h:.4f}] "
+            f"/Resources << /XObject << /Im0 {image_num} 0 R >> >> /Contents {content_num} 0 R >>"
+        )
+        self._page_refs.append(page_num)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_refs)
+
+    def close(self):
+        """Write the page tree, catalog, xref table and trailer."""
+        if self._closed:
+            return
+        kids = ' '.join(f"{num} 0 R" for num in self._page_refs)
+        self._write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_refs)} >>")
+        self._write_object(1, "<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_pos = self._pos
+        lines = [f"xref\n0 {len(self._offsets) + 1}\n", "0000000000 65535 f \n"]
+        lines.extend(f"{offset:010d} 00000 n \n" for offset in self._offsets)
+        self._write(''.join(lines).encode())
+        self._write(
+            f"trailer\n<< /Size {len(self._offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref_pos}\n%%EOF\n".encode()
+        )
+        self._closed = True
+
+
+def write_pdf_from_images(
+    image_paths: List[str],
+    stream: BinaryIO,
+    dpi: Optional[int] = None,
+    jpeg_quality: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    page_size: Tuple[float, float] = DEFAULT_PAGE_SIZE
+) -> int:
+    """
+    Stream images into a PDF, one page at a time.
+
+    Args:
+        image_paths: Absolute image paths, in page order
+        stream: Writable binary file object
+        dpi: Optional target DPI for down-sampling
+        jpeg_quality: Optional JPEG quality for re-encoding
+        progress_callback: Called as progress_callback(completed, total) after each page
+        page_size: Page size in points
+
+    Returns:
+        Number of pages written
+    """
+    writer = StreamingPDFWriter(stream, page_size=page_size, dpi=dpi, jpeg_quality=jpeg_quality)
+    total = len(image_paths)
+    for idx, path in enumerate(image_paths, start=1):
+        writer.add_image(path)
+        if progress_callback:
+            progress_callback(idx, total)
+    writer.close()
+    return writer.page_count
@@ -1,8 +1,9 @@
 """
 Unified response format utilities
 """
-from flask import jsonify
-from typing import Any, Dict, Optional
+import json
+from flask import Response, jsonify, stream_with_context
+from typing import Any, Dict, Iterable, Optional
 
 
 def success_response(data: Any = None, message: str = "Success", status_code: int = 200):
@@ -49,6 +50,40 @@ def error_response(error_code: str, message: str, status_code: int = 400):
     }), status_code
 
 
+def sse_event(event: str, data: Any) -> str:
+    """
+    Format one Server-Sent Event
+    
+    Args:
+        event: Event name (e.g. "page", "done", "error")
+        data: JSON-serializable payload
+    
+    Returns:
+        Event text ready to be written to a text/event-stream response
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_response(events: Iterable[str]):
+    """
+    Generate a streaming text/event-stream response
+    
+    The request context stays available while events are produced. Proxy
+    buffering is disabled so each event reaches the client immediately.
+    
+    Args:
+        events: Iterable of strings produced by sse_event
+    
+    Returns:
+        Flask streaming response
+    """
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 # Common error responses
 def bad_request(message: str = "Invalid request"):
     return error_response("INVALID_REQUEST", message, 400)
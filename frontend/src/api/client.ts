@@ -55,7 +55,7 @@ apiClient.interceptors.response.use(
 
 // 图片URL处理工具
 // 使用相对路径，通过代理转发到后端
-export const getImageUrl = (path?: string, timestamp?: string | number): string => {
+export const getImageUrl = (path?: string, timestamp?: string | number, width?: number): string => {
   if (!path) return '';
   // 如果已经是完整URL，直接返回
   if (path.startsWith('http://') || path.startsWith('https://')) {
@@ -72,6 +72,11 @@ export const getImageUrl = (path?: string, timestamp?: string | number): string
     url += `?v=${ts}`;
   }
   
+  // 请求缩略图（后端按宽度缩放并缓存，列表/网格中使用以减少流量）
+  if (width) {
+    url += `${url.includes('?') ? '&' : '?'}w=${width}`;
+  }
+  
   return url;
 };
 
@@ -46,10 +46,16 @@ export const uploadTemplate = async (
 /**
  * 获取项目列表（历史项目）
  */
-export const listProjects = async (limit?: number, offset?: number): Promise<ApiResponse<{ projects: Project[]; total: number }>> => {
+export const listProjects = async (
+  limit?: number,
+  offset?: number,
+  view?: 'full' | 'summary'
+): Promise<ApiResponse<{ projects: Project[]; total: number }>> => {
   const params = new URLSearchParams();
   if (limit !== undefined) params.append('limit', limit.toString());
   if (offset !== undefined) params.append('offset', offset.toString());
+  // summary 视图只返回页面统计，不包含页面内容
+  if (view) params.append('view', view);
 
   const queryString = params.toString();
   const url = `/api/projects${queryString ? `?${queryString}` : ''}`;
@@ -85,15 +91,15 @@ export const updateProject = async (
 };
 
 /**
- * 更新页面顺序
+ * 更新页面顺序（需包含项目的全部页面）
  */
 export const updatePagesOrder = async (
   projectId: string,
   pageIds: string[]
-): Promise<ApiResponse<Project>> => {
-  const response = await apiClient.put<ApiResponse<Project>>(
-    `/api/projects/${projectId}`,
-    { pages_order: pageIds }
+): Promise<ApiResponse<{ page_ids: string[] }>> => {
+  const response = await apiClient.put<ApiResponse<{ page_ids: string[] }>>(
+    `/api/projects/${projectId}/pages/order`,
+    { page_ids: pageIds }
   );
   return response.data;
 };
@@ -114,6 +120,81 @@ export const generateOutline = async (projectId: string, language?: OutputLangua
   return response.data;
 };
 
+/**
+ * 以 SSE 方式 POST 请求，逐个回调服务端事件（event + JSON data）
+ * 返回 "done" 事件的数据；收到 "error" 事件时抛出异常
+ */
+const postEventStream = async <T = any>(
+  url: string,
+  body: Record<string, unknown>,
+  onEvent: (event: string, data: any) => void
+): Promise<T> => {
+  const response = await fetch(url, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify({ ...body, stream: true }),
+  });
+  if (!response.ok || !response.body) {
+    const error = await response.json().catch(() => null);
+    throw new Error(error?.error?.message || `请求失败 (${response.status})`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let result: T | undefined;
+
+  const handleBlock = (block: string) => {
+    let event = 'message';
+    const dataLines: string[] = [];
+    for (const line of block.split('\n')) {
+      if (line.startsWith('event:')) event = line.slice(6).trim();
+      else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+    }
+    if (dataLines.length === 0) return;
+    const data = JSON.parse(dataLines.join('\n'));
+    if (event === 'error') throw new Error(data.message || '生成失败');
+    if (event === 'done') result = data;
+    onEvent(event, data);
+  };
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let separator = buffer.indexOf('\n\n');
+    while (separator !== -1) {
+      handleBlock(buffer.slice(0, separator));
+      buffer = buffer.slice(separator + 2);
+      separator = buffer.indexOf('\n\n');
+    }
+  }
+  if (buffer.trim()) handleBlock(buffer);
+  if (result === undefined) throw new Error('生成中断');
+  return result;
+};
+
+/**
+ * 流式生成大纲：每生成完一页即回调 onPage
+ * @param projectId 项目ID
+ * @param onPage 每页大纲完成时的回调
+ * @param language 输出语言（可选，默认从 sessionStorage 获取）
+ */
+export const generateOutlineStream = async (
+  projectId: string,
+  onPage: (page: { index: number; part?: string | null; outline_content: Page['outline_content'] }) => void,
+  language?: OutputLanguage
+): Promise<{ pages: Page[] }> => {
+  const lang = language || await getStoredOutputLanguage();
+  return postEventStream<{ pages: Page[] }>(
+    `/api/projects/${projectId}/generate/outline`,
+    { language: lang },
+    (event, data) => {
+      if (event === 'page') onPage(data);
+    }
+  );
+};
+
 // ===== 描述生成 =====
 
 /**
@@ -417,35 +498,43 @@ const buildPageIdsQuery = (pageIds?: string[]): string => {
   return `?${params.toString()}`;
 };
 
+/**
+ * PPTX/PDF导出结果：命中缓存时包含下载链接，否则包含异步任务ID
+ */
+export interface ImageExportResult {
+  download_url?: string;
+  download_url_absolute?: string;
+  task_id?: string;
+  cached?: boolean;
+}
+
 /**
  * 导出为PPTX
+ * 已有相同内容的导出文件时直接返回下载链接，否则返回task_id，需要通过getTaskStatus轮询
  * @param projectId 项目ID
  * @param pageIds 可选的页面ID列表，如果不提供则导出所有页面
  */
 export const exportPPTX = async (
   projectId: string,
   pageIds?: string[]
-): Promise<ApiResponse<{ download_url: string; download_url_absolute?: string }>> => {
+): Promise<ApiResponse<ImageExportResult>> => {
   const url = `/api/projects/${projectId}/export/pptx${buildPageIdsQuery(pageIds)}`;
-  const response = await apiClient.get<
-    ApiResponse<{ download_url: string; download_url_absolute?: string }>
-  >(url);
+  const response = await apiClient.get<ApiResponse<ImageExportResult>>(url);
   return response.data;
 };
 
 /**
  * 导出为PDF
+ * 已有相同内容的导出文件时直接返回下载链接，否则返回task_id，需要通过getTaskStatus轮询
  * @param projectId 项目ID
  * @param pageIds 可选的页面ID列表，如果不提供则导出所有页面
  */
 export const exportPDF = async (
   projectId: string,
   pageIds?: string[]
-): Promise<ApiResponse<{ download_url: string; download_url_absolute?: string }>> => {
+): Promise<ApiResponse<ImageExportResult>> => {
   const url = `/api/projects/${projectId}/export/pdf${buildPageIdsQuery(pageIds)}`;
-  const response = await apiClient.get<
-    ApiResponse<{ download_url: string; download_url_absolute?: string }>
-  >(url);
+  const response = await apiClient.get<ApiResponse<ImageExportResult>>(url);
   return response.data;
 };
 
@@ -25,7 +25,7 @@ export const SlideCard: React.FC<SlideCardProps> = ({
 }) => {
   const { confirm, ConfirmDialog } = useConfirm();
   const imageUrl = page.generated_image_path
-    ? getImageUrl(page.generated_image_path, page.updated_at)
+    ? getImageUrl(page.generated_image_path, page.updated_at, 640)
     : '';
   
   const generating = isGenerating || page.status === 'GENERATING';
@@ -62,7 +62,7 @@ export const MaterialSelector: React.FC<MaterialSelectorProps> = ({
 
   const loadProjects = async () => {
     try {
-      const response = await listProjects(100, 0);
+      const response = await listProjects(100, 0, 'summary');
       if (response.data?.projects) {
         setProjects(response.data.projects);
         setProjectsLoaded(true);
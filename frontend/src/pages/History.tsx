@@ -33,7 +33,7 @@ export const History: React.FC = () => {
     setIsLoading(true);
     setError(null);
     try {
-      const response = await api.listProjects(50, 0);
+      const response = await api.listProjects(50, 0, 'summary');
       if (response.data?.projects) {
         const normalizedProjects = response.data.projects.map(normalizeProject);
         setProjects(normalizedProjects);
@@ -65,6 +65,7 @@ export const OutlineEditor: React.FC = () => {
     addNewPage,
     generateOutline,
     isGlobalLoading,
+    isOutlineStreaming,
   } = useProjectStore();
 
   const [selectedPageId, setSelectedPageId] = useState<string | null>(null);
@@ -217,6 +218,7 @@ export const OutlineEditor: React.FC = () => {
               size="sm"
               icon={<ArrowRight size={16} className="md:w-[18px] md:h-[18px]" />}
               onClick={() => navigate(`/project/${projectId}/detail`)}
+              disabled={isOutlineStreaming}
               className="text-xs md:text-sm"
             >
               <span className="hidden sm:inline">下一步</span>
@@ -272,6 +274,7 @@ export const OutlineEditor: React.FC = () => {
                 variant="primary"
                 icon={<Plus size={16} className="md:w-[18px] md:h-[18px]" />}
                 onClick={addNewPage}
+                disabled={isOutlineStreaming}
                 className="w-full sm:w-auto text-sm md:text-base"
               >
                 添加页面
@@ -288,6 +291,7 @@ export const OutlineEditor: React.FC = () => {
                 <Button
                   variant="secondary"
                   onClick={handleGenerateOutline}
+                  loading={isOutlineStreaming}
                   className="w-full sm:w-auto text-sm md:text-base"
                 >
                   {currentProject.creation_type === 'outline' ? '重新解析大纲' : '重新生成大纲'}
@@ -305,6 +309,13 @@ export const OutlineEditor: React.FC = () => {
               </Button>
             </div>
 
+            {/* 流式生成进度 */}
+            {isOutlineStreaming && (
+              <div className="mb-4 text-sm text-gray-500">
+                正在生成大纲，已生成 {currentProject.pages.length} 页...
+              </div>
+            )}
+
             {/* 项目资源列表（文件和图片） */}
             <ProjectResourcesList
               projectId={projectId || null}
@@ -346,7 +357,7 @@ export const OutlineEditor: React.FC = () => {
                         onDelete={() => page.id && deletePageById(page.id)}
                         onClick={() => setSelectedPageId(page.id || null)}
                         isSelected={selectedPageId === page.id}
-                        isAiRefining={isAiRefining}
+                        isAiRefining={isAiRefining || isOutlineStreaming}
                       />
                     ))}
                   </div>
@@ -614,11 +614,12 @@ export const SlidePreview: React.FC = () => {
     
     try {
       if (type === 'pptx' || type === 'pdf') {
-        // Synchronous export - direct download, create completed task directly
+        // Cached export returns the download link directly, otherwise a task to poll
         const response = type === 'pptx' 
           ? await apiExportPPTX(projectId, pageIds)
           : await apiExportPDF(projectId, pageIds);
         const downloadUrl = response.data?.download_url || response.data?.download_url_absolute;
+        const taskId = response.data?.task_id;
         if (downloadUrl) {
           addTask({
             id: exportTaskId,
@@ -630,6 +631,17 @@ export const SlidePreview: React.FC = () => {
             pageIds: pageIds,
           });
           window.open(downloadUrl, '_blank');
+        } else if (taskId) {
+          addTask({
+            id: exportTaskId,
+            taskId,
+            projectId,
+            type: type as ExportTaskType,
+            status: 'PROCESSING',
+            pageIds: pageIds,
+          });
+          show({ message: '导出任务已开始，可在导出任务面板查看进度', type: 'success' });
+          pollExportTask(exportTaskId, projectId, taskId);
         }
       } else if (type === 'editable-pptx') {
         // Async export - create processing task and start polling
@@ -1090,7 +1102,7 @@ export const SlidePreview: React.FC = () => {
                     >
                       {page.generated_image_path ? (
                         <img
-                          src={getImageUrl(page.generated_image_path, page.updated_at)}
+                          src={getImageUrl(page.generated_image_path, page.updated_at, 160)}
                           alt={`Slide ${index + 1}`}
                           className="w-full h-full object-cover rounded"
                         />
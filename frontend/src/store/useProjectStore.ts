@@ -1,12 +1,17 @@
 import { create } from 'zustand';
-import type { Project, Task } from '@/types';
+import type { Page, Project, Task } from '@/types';
 import * as api from '@/api/endpoints';
 import { debounce, normalizeProject, normalizeErrorMessage } from '@/utils';
 
+// 完成后需要自动打开下载链接的导出任务类型
+const EXPORT_TASK_TYPES = ['EXPORT_PPTX', 'EXPORT_PDF', 'EXPORT_EDITABLE_PPTX'];
+
 interface ProjectState {
   // 状态
   currentProject: Project | null;
   isGlobalLoading: boolean;
+  // 大纲正在流式生成（已收到的页面已显示，但尚未保存，不可编辑）
+  isOutlineStreaming: boolean;
   activeTaskId: string | null;
   taskProgress: { total: number; completed: number } | null;
   error: string | null;
@@ -90,6 +95,7 @@ const debouncedUpdatePage = debounce(
   // 初始状态
   currentProject: null,
   isGlobalLoading: false,
+  isOutlineStreaming: false,
   activeTaskId: null,
   taskProgress: null,
   error: null,
@@ -389,21 +395,21 @@ const debouncedUpdatePage = debounce(
         if (task.status === 'COMPLETED') {
           console.log(`[轮询] Task ${taskId} 已完成，刷新项目数据`);
           
-          // 如果是导出可编辑PPTX任务，检查是否有下载链接
-          if (task.task_type === 'EXPORT_EDITABLE_PPTX' && task.progress) {
+          // 如果是导出任务，检查是否有下载链接
+          if (task.task_type && EXPORT_TASK_TYPES.includes(task.task_type) && task.progress) {
             const progress = typeof task.progress === 'string' 
               ? JSON.parse(task.progress) 
               : task.progress;
             
             const downloadUrl = progress?.download_url;
             if (downloadUrl) {
-              console.log('[导出可编辑PPTX] 从任务响应中获取下载链接:', downloadUrl);
+              console.log('[导出] 从任务响应中获取下载链接:', downloadUrl);
               // 延迟一下，确保状态更新完成后再打开下载链接
               setTimeout(() => {
                 window.open(downloadUrl, '_blank');
               }, 500);
             } else {
-              console.warn('[导出可编辑PPTX] 任务完成但没有下载链接');
+              console.warn('[导出] 任务完成但没有下载链接');
             }
           }
           
@@ -450,14 +456,41 @@ const debouncedUpdatePage = debounce(
   },
 
   // 生成大纲（同步操作，不需要轮询）
+  // 优先流式生成：每收到一页即显示，不必等待整份大纲；流式请求失败时回退为普通请求
   generateOutline: async () => {
     const { currentProject } = get();
     if (!currentProject) return;
+    const projectId = currentProject.id!;
 
     set({ isGlobalLoading: true, error: null });
     try {
-      const response = await api.generateOutline(currentProject.id!);
-      console.log('[生成大纲] API响应:', response);
+      const streamedPages: Page[] = [];
+      try {
+        const result = await api.generateOutlineStream(projectId, (page) => {
+          const project = get().currentProject;
+          if (!project || project.id !== projectId) return;
+          // 流式页面尚未保存，没有 id，卡片的编辑/删除操作不会生效
+          streamedPages.push({
+            page_id: '',
+            order_index: page.index,
+            part: page.part || undefined,
+            outline_content: page.outline_content,
+            status: 'DRAFT',
+          });
+          set({
+            currentProject: { ...project, pages: [...streamedPages] },
+            isGlobalLoading: false,
+            isOutlineStreaming: true,
+          });
+        });
+        console.log('[生成大纲] 流式生成完成:', result.pages.length, '个页面');
+      } catch (streamError: any) {
+        // 服务端只在流结束后保存页面，中途失败时整体重新生成
+        console.warn('[生成大纲] 流式生成失败，改用普通请求:', streamError);
+        set({ isGlobalLoading: true, isOutlineStreaming: false });
+        const response = await api.generateOutline(projectId);
+        console.log('[生成大纲] API响应:', response);
+      }
       
       // 刷新项目数据，确保获取最新的大纲页面
       await get().syncProject();
@@ -467,10 +500,12 @@ const debouncedUpdatePage = debounce(
       console.log('[生成大纲] 刷新后的项目:', updatedProject?.pages.length, '个页面');
     } catch (error: any) {
       console.error('[生成大纲] 错误:', error);
+      // 丢弃未保存的流式页面，恢复服务端数据
+      await get().syncProject();
       set({ error: error.message || '生成大纲失败' });
       throw error;
     } finally {
-      set({ isGlobalLoading: false });
+      set({ isGlobalLoading: false, isOutlineStreaming: false });
     }
   },
 
@@ -845,16 +880,23 @@ const debouncedUpdatePage = debounce(
       const downloadUrl =
         response.data?.download_url || response.data?.download_url_absolute;
 
-      if (!downloadUrl) {
+      if (downloadUrl) {
+        // 命中导出缓存，使用浏览器直接下载链接，避免 axios 受带宽和超时影响
+        window.open(downloadUrl, '_blank');
+        set({ isGlobalLoading: false });
+        return;
+      }
+
+      const taskId = response.data?.task_id;
+      if (!taskId) {
         throw new Error('导出链接获取失败');
       }
 
-      // 使用浏览器直接下载链接，避免 axios 受带宽和超时影响
-      window.open(downloadUrl, '_blank');
+      // 异步导出任务，pollTask 会在任务完成时自动打开下载链接并结束加载状态
+      set({ activeTaskId: taskId });
+      await get().pollTask(taskId);
     } catch (error: any) {
-      set({ error: error.message || '导出失败' });
-    } finally {
-      set({ isGlobalLoading: false });
+      set({ error: error.message || '导出失败', isGlobalLoading: false });
     }
   },
 
@@ -870,16 +912,23 @@ const debouncedUpdatePage = debounce(
       const downloadUrl =
         response.data?.download_url || response.data?.download_url_absolute;
 
-      if (!downloadUrl) {
+      if (downloadUrl) {
+        // 命中导出缓存，使用浏览器直接下载链接，避免 axios 受带宽和超时影响
+        window.open(downloadUrl, '_blank');
+        set({ isGlobalLoading: false });
+        return;
+      }
+
+      const taskId = response.data?.task_id;
+      if (!taskId) {
         throw new Error('导出链接获取失败');
       }
 
-      // 使用浏览器直接下载链接，避免 axios 受带宽和超时影响
-      window.open(downloadUrl, '_blank');
+      // 异步导出任务，pollTask 会在任务完成时自动打开下载链接并结束加载状态
+      set({ activeTaskId: taskId });
+      await get().pollTask(taskId);
     } catch (error: any) {
-      set({ error: error.message || '导出失败' });
-    } finally {
-      set({ isGlobalLoading: false });
+      set({ error: error.message || '导出失败', isGlobalLoading: false });
     }
   },
 
@@ -7,6 +7,7 @@
 import { describe, it, expect, beforeEach, vi } from 'vitest'
 import { act, renderHook } from '@testing-library/react'
 import { useProjectStore } from '@/store/useProjectStore'
+import * as api from '@/api/endpoints'
 
 // Mock API模块
 vi.mock('@/api/endpoints', () => ({
@@ -16,6 +17,7 @@ vi.mock('@/api/endpoints', () => ({
   updatePageDescription: vi.fn(),
   updatePageOutline: vi.fn(),
   generateOutline: vi.fn(),
+  generateOutlineStream: vi.fn(),
   generateDescriptions: vi.fn(),
   generateImages: vi.fn(),
   getTaskStatus: vi.fn(),
@@ -145,5 +147,63 @@ describe('useProjectStore', () => {
       expect(result.current.currentProject).toBeNull()
     })
   })
-})
 
+  describe('流式生成大纲', () => {
+    const savedProject = {
+      project_id: 'proj-1',
+      status: 'OUTLINE_GENERATED',
+      pages: [
+        { page_id: 'p1', order_index: 0, outline_content: { title: '第一页', points: [] }, status: 'DRAFT' },
+        { page_id: 'p2', order_index: 1, outline_content: { title: '第二页', points: [] }, status: 'DRAFT' },
+      ],
+    }
+
+    beforeEach(() => {
+      vi.mocked(api.generateOutline).mockReset()
+      vi.mocked(api.generateOutlineStream).mockReset()
+      vi.mocked(api.getProject).mockResolvedValue({ success: true, data: savedProject } as any)
+    })
+
+    it('should show pages as they stream in', async () => {
+      const { result } = renderHook(() => useProjectStore())
+      let pagesAfterFirstEvent: any[] = []
+      vi.mocked(api.generateOutlineStream).mockImplementation(async (_projectId, onPage) => {
+        onPage({ index: 0, outline_content: { title: '第一页', points: [] } })
+        pagesAfterFirstEvent = useProjectStore.getState().currentProject!.pages
+        expect(useProjectStore.getState().isOutlineStreaming).toBe(true)
+        expect(useProjectStore.getState().isGlobalLoading).toBe(false)
+        onPage({ index: 1, outline_content: { title: '第二页', points: [] } })
+        return { pages: savedProject.pages as any }
+      })
+
+      act(() => {
+        result.current.setCurrentProject({ id: 'proj-1', status: 'DRAFT', pages: [] } as any)
+      })
+      await act(async () => {
+        await result.current.generateOutline()
+      })
+
+      expect(pagesAfterFirstEvent.map(p => p.outline_content.title)).toEqual(['第一页'])
+      expect(api.generateOutline).not.toHaveBeenCalled()
+      expect(result.current.currentProject?.pages.map(p => p.id)).toEqual(['p1', 'p2'])
+      expect(result.current.isOutlineStreaming).toBe(false)
+    })
+
+    it('should fall back to the blocking request when streaming fails', async () => {
+      const { result } = renderHook(() => useProjectStore())
+      vi.mocked(api.generateOutlineStream).mockRejectedValue(new Error('stream unsupported'))
+      vi.mocked(api.generateOutline).mockResolvedValue({ success: true } as any)
+
+      act(() => {
+        result.current.setCurrentProject({ id: 'proj-1', status: 'DRAFT', pages: [] } as any)
+      })
+      await act(async () => {
+        await result.current.generateOutline()
+      })
+
+      expect(api.generateOutline).toHaveBeenCalledWith('proj-1')
+      expect(result.current.currentProject?.pages).toHaveLength(2)
+      expect(result.current.error).toBeNull()
+    })
+  })
+})
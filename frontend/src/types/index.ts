@@ -73,13 +73,34 @@ export interface Project {
   export_inpaint_method?: ExportInpaintMethod; // 背景图获取方法
   status: ProjectStatus;
   pages: Page[];
+  summary?: ProjectSummary; // 列表 summary 视图返回（此时 pages 为空）
   created_at: string;
   updated_at: string;
 }
 
+// 项目页面统计（历史列表使用，避免加载全部页面内容）
+export interface ProjectSummary {
+  page_count: number;
+  status_counts: Record<string, number>;
+  image_page_count: number;
+  description_page_count: number;
+  first_page_title?: string | null;
+  first_page_image_url?: string | null;
+  first_page_image_updated_at?: string | null;
+}
+
 // 任务状态
 export type TaskStatus = 'PENDING' | 'RUNNING' | 'COMPLETED' | 'FAILED';
 
+// 任务中各 prompt 的 token 估算统计
+export interface PromptTokenStats {
+  prompts: number;
+  total_tokens: number;
+  max_tokens: number;
+  trimmed: number; // 超出预算被压缩的 prompt 数
+  by_prompt: Record<string, { count: number; total_tokens: number }>;
+}
+
 // 任务信息
 export interface Task {
   task_id: string;
@@ -90,6 +111,7 @@ export interface Task {
     total: number;
     completed: number;
     failed?: number;
+    prompt_tokens?: PromptTokenStats;
     [key: string]: any; // 允许额外的字段，如material_id, image_url等
   };
   error_message?: string;
@@ -10,6 +10,11 @@ export const getProjectTitle = (project: Project): string => {
     return project.idea_prompt;
   }
   
+  // 列表 summary 视图直接返回第一页标题
+  if (project.summary?.first_page_title) {
+    return project.summary.first_page_title;
+  }
+  
   // 如果没有 idea_prompt，尝试从第一个页面获取标题
   if (project.pages && project.pages.length > 0) {
     // 按 order_index 排序，找到第一个页面
@@ -28,10 +33,40 @@ export const getProjectTitle = (project: Project): string => {
   return '未命名项目';
 };
 
+/**
+ * 获取页面统计（优先使用列表 summary 视图的统计，否则从页面计算）
+ */
+export const getPageStats = (project: Project): {
+  pageCount: number;
+  hasImages: boolean;
+  hasDescriptions: boolean;
+} => {
+  if (project.summary) {
+    return {
+      pageCount: project.summary.page_count,
+      hasImages: project.summary.image_page_count > 0,
+      hasDescriptions: project.summary.description_page_count > 0,
+    };
+  }
+  const pages = project.pages || [];
+  return {
+    pageCount: pages.length,
+    hasImages: pages.some(p => p.generated_image_path),
+    hasDescriptions: pages.some(p => p.description_content),
+  };
+};
+
 /**
  * 获取第一页图片URL
  */
 export const getFirstPageImage = (project: Project): string | null => {
+  if (project.summary) {
+    const { first_page_image_url, first_page_image_updated_at } = project.summary;
+    return first_page_image_url
+      ? getImageUrl(first_page_image_url, first_page_image_updated_at || undefined, 320)
+      : null;
+  }
+  
   if (!project.pages || project.pages.length === 0) {
     return null;
   }
@@ -39,7 +74,7 @@ export const getFirstPageImage = (project: Project): string | null => {
   // 找到第一页有图片的页面
   const firstPageWithImage = project.pages.find(p => p.generated_image_path);
   if (firstPageWithImage?.generated_image_path) {
-    return getImageUrl(firstPageWithImage.generated_image_path, firstPageWithImage.updated_at);
+    return getImageUrl(firstPageWithImage.generated_image_path, firstPageWithImage.updated_at, 320);
   }
   
   return null;
@@ -63,14 +98,13 @@ export const formatDate = (dateString: string): string => {
  * 获取项目状态文本
  */
 export const getStatusText = (project: Project): string => {
-  if (!project.pages || project.pages.length === 0) {
+  const { pageCount, hasImages, hasDescriptions } = getPageStats(project);
+  if (pageCount === 0) {
     return '未开始';
   }
-  const hasImages = project.pages.some(p => p.generated_image_path);
   if (hasImages) {
     return '已完成';
   }
-  const hasDescriptions = project.pages.some(p => p.description_content);
   if (hasDescriptions) {
     return '待生成图片';
   }
@@ -95,12 +129,11 @@ export const getProjectRoute = (project: Project): string => {
   const projectId = project.id || project.project_id;
   if (!projectId) return '/';
   
-  if (project.pages && project.pages.length > 0) {
-    const hasImages = project.pages.some(p => p.generated_image_path);
+  const { pageCount, hasImages, hasDescriptions } = getPageStats(project);
+  if (pageCount > 0) {
     if (hasImages) {
       return `/project/${projectId}/preview`;
     }
-    const hasDescriptions = project.pages.some(p => p.description_content);
     if (hasDescriptions) {
       return `/project/${projectId}/detail`;
     }
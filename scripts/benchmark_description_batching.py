@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+页面描述批量生成对比基准
+
+使用本地模拟的文本 provider（不调用任何真实 API），比较逐页请求与多页批量请求
+（DESCRIPTION_BATCH_SIZE）生成同一份大纲全部页面描述时的请求数、发送的 prompt token 数和耗时。
+
+模拟 provider 的每次请求耗时 = 固定开销 + prompt 长度 × 每千 token 耗时，
+批量响应中按 --drop-rate 随机遗漏页面，以覆盖逐页回退的开销。
+
+使用方法:
+    python scripts/benchmark_description_batching.py
+    python scripts/benchmark_description_batching.py --pages 30 --batch-sizes 1,3,5,8
+    python scripts/benchmark_description_batching.py --overhead 0.8 --ms-per-1k-tokens 40 --drop-rate 0.1
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+BACKEND_DIR = PROJECT_ROOT / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from services.ai_providers import TextProvider, ImageProvider  # noqa: E402
+from services.ai_service import AIService, ProjectContext  # noqa: E402
+from services.prompt_budget import estimate_tokens  # noqa: E402
+
+logging.basicConfig(level=logging.ERROR)
+
+_PAGE_INDEX_RE = re.compile(r'<page index="(\d+)">')
+_SINGLE_PAGE_RE = re.compile(r'现在请为第 (\d+) 页生成描述')
+
+
+class StubTextProvider(TextProvider):
+    """模拟延迟的本地文本 provider，统计请求数与 prompt token 数"""
+
+    def __init__(self, overhead: float, ms_per_1k_tokens: float, drop_rate: float, seed: int):
+        self.overhead = overhead
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.prompt_tokens = 0
+        self._lock = threading.Lock()
+
+    def _request(self, prompt: str):
+        tokens = estimate_tokens(prompt)
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += tokens
+        time.sleep(self.overhead + tokens / 1000 * self.ms_per_1k_tokens / 1000)
+
+    @staticmethod
+    def _description(page_index: int) -> str:
+        return f"页面标题：第{page_index}页\n\n页面文字：\n- 要点一\n- 要点二\n"
+
+    def generate_text(self, prompt, thinking_budget=1000):
+        return self.generate_with_prefix('', prompt, thinking_budget)
+
+    def generate_with_prefix(self, prefix, suffix, thinking_budget=1000):
+        self._request(prefix + suffix)
+        indices = [int(i) for i in _PAGE_INDEX_RE.findall(suffix)]
+        if not indices:
+            return self._description(int(_SINGLE_PAGE_RE.search(suffix).group(1)))
+        with self._lock:
+            kept = [i for i in indices if self.random.random() >= self.drop_rate]
+        return json.dumps([{'page_index': i, 'description': self._description(i)} for i in kept],
+                          ensure_ascii=False)
+
+
+class UnusedImageProvider(ImageProvider):
+    """基准只生成文本，被调用即说明测量对象有误"""
+
+    def generate_image(self, prompt, ref_images=None, aspect_ratio="16:9", resolution="2K"):
+        raise RuntimeError('描述生成基准不应生成图片')
+
+
+def build_outline(page_count: int):
+    """构造每页带若干要点的大纲"""
+    return [
+        {'title': f'第{i}部分：主题{i}', 'points': [f'主题{i}的第{j}个要点，包含一些说明文字' for j in range(1, 5)]}
+        for i in range(1, page_count + 1)
+    ]
+
+
+def run(batch_size: int, args) -> dict:
+    """按 generate_descriptions_task 的线程池方式生成全部页面描述"""
+    provider = StubTextProvider(args.overhead, args.ms_per_1k_tokens, args.drop_rate, args.seed)
+    ai_service = AIService(text_provider=provider, image_provider=UnusedImageProvider())
+    outline = build_outline(args.pages)
+    context = ProjectContext({'idea_prompt': args.idea * args.idea_repeat, 'creation_type': 'idea'})
+    pages = [(page, i) for i, page in enumerate(outline, 1)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        if batch_size > 1:
+            futures = [
+                executor.submit(ai_service.generate_page_descriptions_batch, context, outline,
+                                pages[i:i + batch_size], 'zh')
+                for i in range(0, len(pages), batch_size)
+            ]
+            described = sum(len(future.result()) for future in futures)
+        else:
+            futures = [
+                executor.submit(ai_service.generate_page_description, context, outline, page, index,
+                                'zh', True)
+                for page, index in pages
+            ]
+            described = sum(1 for future in futures if future.result())
+    elapsed = time.perf_counter() - start
+
+    return {
+        'batch_size': batch_size,
+        'described': described,
+        'requests': provider.requests,
+        'prompt_tokens': provider.prompt_tokens,
+        'seconds': elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='比较逐页与批量生成页面描述的请求数、prompt token 数和耗时（使用本地模拟 provider）',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument('--pages', type=int, default=20, help='页数（默认 20）')
+    parser.add_argument('--batch-sizes', default='1,3,5', help='要比较的每批页数，逗号分隔（默认 1,3,5）')
+    parser.add_argument('--workers', type=int, default=5, help='并发数，对应 MAX_DESCRIPTION_WORKERS（默认 5）')
+    parser.add_argument('--overhead', type=float, default=0.5, help='每次请求的固定耗时，秒（默认 0.5）')
+    parser.add_argument('--ms-per-1k-tokens', type=float, default=40.0,
+                        help='每千 prompt token 增加的耗时，毫秒（默认 40）')
+    parser.add_argument('--drop-rate', type=float, default=0.05,
+                        help='批量响应中每页被遗漏的概率，遗漏的页面逐页重新生成（默认 0.05）')
+    parser.add_argument('--idea', default='介绍人工智能在医疗、教育和制造业中的应用与挑战。', help='项目原始需求')
+    parser.add_argument('--idea-repeat', type=int, default=20, help='原始需求重复次数，用于模拟较长的共享上下文（默认 20）')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    args = parser.parse_args()
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(',') if size.strip()]
+    results = [run(size, args) for size in batch_sizes]
+
+    baseline = results[0]
+    print(f"{'batch':>5} {'pages':>6} {'requests':>9} {'prompt tokens':>14} {'seconds':>8} {'vs first':>9}")
+    for result in results:
+        print(f"{result['batch_size']:>5} {result['described']:>6} {result['requests']:>9} "
+              f"{result['prompt_tokens']:>14} {result['seconds']:>8.2f} "
+              f"{baseline['seconds'] / result['seconds']:>8.2f}x")
+
+
+if __name__ == '__main__':
+    main()